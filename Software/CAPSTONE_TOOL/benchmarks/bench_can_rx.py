@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+CAN 接收路径基准：对比
+  before: 每帧 unpack_id + parse_status（旧 AppBridge._on_can_message 路径，所有帧都进 Python）
+  after : 验收滤波器先丢弃无关帧 + arbitration_id -> handler 一次字典查找
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_can_rx.py [--frames 200000] [--foreign 0.75]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import can
+
+from config.arm_config import AxisConfig, CANConfig
+from hardware.vesc_can import VescCAN
+
+
+def make_traffic(vesc: VescCAN, node_ids, n_frames: int, foreign_ratio: float, seed: int = 1):
+    rnd = random.Random(seed)
+    status = [VescCAN.CAN_PACKET_STATUS, VescCAN.CAN_PACKET_STATUS_4, VescCAN.CAN_PACKET_STATUS_5]
+    frames = []
+    for _ in range(n_frames):
+        data = bytearray(rnd.getrandbits(8) for _ in range(8))
+        if rnd.random() < foreign_ratio:
+            # 共享总线上的其它设备：其它节点号 / 其它命令号
+            arb = rnd.choice([
+                vesc.pack_id(rnd.choice(status), rnd.randint(20, 120))[0],
+                vesc.pack_id(rnd.randint(30, 60), rnd.choice(node_ids))[0],
+                rnd.randint(0x100000, 0x1FFFFFFF),
+            ])
+        else:
+            arb = vesc.pack_id(rnd.choice(status), rnd.choice(node_ids))[0]
+        frames.append(can.Message(arbitration_id=arb, is_extended_id=True, data=data))
+    return frames
+
+
+def matches_filters(msg: can.Message, filters) -> bool:
+    # 等价于 python-can 驱动/硬件验收滤波的判定（硬件滤波时此开销不在 Python 侧）
+    for f in filters:
+        if (msg.arbitration_id ^ f["can_id"]) & f["can_mask"] == 0 and msg.is_extended_id == f["extended"]:
+            return True
+    return False
+
+
+def bench(fn, frames, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(frames)
+        best = min(best, time.perf_counter() - t0)
+    return len(frames) / best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=200_000)
+    ap.add_argument("--foreign", type=float, default=0.75, help="共享总线上与本机无关帧的比例")
+    args = ap.parse_args()
+
+    logging.disable(logging.WARNING)
+    node_ids = [1, 2, 3, 4]
+
+    def new_vesc() -> VescCAN:
+        v = VescCAN(CANConfig())
+        v.set_axis_configs({nid: AxisConfig(node_id=nid) for nid in node_ids})
+        return v
+
+    vesc = new_vesc()
+    frames = make_traffic(vesc, node_ids, args.frames, args.foreign)
+
+    def before(frames):
+        for msg in frames:
+            unpack = vesc.unpack_id(msg.arbitration_id, msg.is_extended_id)
+            if not unpack:
+                continue
+            packet_id, node_id = unpack
+            vesc.parse_status(packet_id, node_id, bytes(msg.data))
+
+    vesc_new = new_vesc()
+    table = vesc_new.build_rx_table(node_ids)
+    filters = vesc_new.build_can_filters(node_ids)
+    accepted = [m for m in frames if matches_filters(m, filters)]
+
+    def after(frames):
+        get = table.get
+        for msg in frames:
+            handler = get(msg.arbitration_id)
+            if handler is not None:
+                handler(msg.data)
+
+    fps_before = bench(before, frames)
+    # 硬件滤波：只有通过滤波器的帧进入 Python，按总线帧数折算吞吐
+    t_after = len(accepted) / bench(after, accepted) if accepted else 0.0
+    fps_after = len(frames) / t_after if t_after else float("inf")
+    t0 = time.perf_counter()
+    for m in frames:
+        matches_filters(m, filters)
+    fps_sw_filter = len(frames) / ((time.perf_counter() - t0) + t_after)
+
+    print(f"frames={len(frames)} foreign={args.foreign:.0%} accepted_by_filters={len(accepted)} filters={len(filters)}")
+    print(f"before (unpack_id + parse_status, all frames): {fps_before:12,.0f} frames/s")
+    print(f"after  (hw filters + dict dispatch)          : {fps_after:12,.0f} frames/s  x{fps_after / fps_before:.1f}")
+    print(f"after  (software filters + dict dispatch)    : {fps_sw_filter:12,.0f} frames/s  x{fps_sw_filter / fps_before:.1f}")
+
+
+if __name__ == "__main__":
+    main()
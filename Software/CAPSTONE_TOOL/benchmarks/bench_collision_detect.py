@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+找零碰撞检测基准：合成电流曲线（起步加速尖峰 + 自由运行电流与噪声 + 接触后电流爬升），对比
+  threshold       : 原固定阈值 + 持续时间（阈值按自由运行电流 + 0.2 A 调好）
+  cusum           : EWMA 基线 + CUSUM
+  derivative      : 电流变化率
+  cusum+derivative: 两者任一
+统计检测延迟（接触时刻到判定时刻）、误触发（接触前判定）与漏检，以及每样本耗时。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_collision_detect.py [--trials 500] [--rate 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import HOMING_CONFIG
+from control.collision import make_detector
+
+
+def trace(rng: random.Random, rate: float):
+    """返回 ([(t, |I|)], 接触时刻)。各轴自由运行电流 0.05~0.5 A 随机，模拟不同轴/负载。"""
+    dt = 1.0 / rate
+    free = rng.uniform(0.05, 0.5)
+    noise = free * rng.uniform(0.03, 0.08) + 0.005
+    contact = rng.uniform(0.6, 2.5)
+    ramp = rng.uniform(5.0, 20.0)      # 接触后电流爬升速率 A/s
+    out = []
+    t = 0.0
+    while t < contact + 0.5:
+        i = free + rng.gauss(0.0, noise)
+        if t < 0.08:
+            i += 3.0 * free * (1.0 - t / 0.08)   # 起步加速尖峰
+        if t >= contact:
+            i += min(ramp * (t - contact), 3.0)
+        out.append((t, abs(i)))
+        t += dt
+    return out, contact, free
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--trials", type=int, default=500)
+    ap.add_argument("--rate", type=float, default=200.0)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    traces = [trace(rng, args.rate) for _ in range(args.trials)]
+    for kind in ("threshold", "cusum", "derivative", "cusum+derivative"):
+        lat, false_hits, missed, n_samples, cost = [], 0, 0, 0, 0.0
+        for samples, contact, free in traces:
+            cfg = dict(HOMING_CONFIG, detector=kind, current_threshold_a=free + 0.2)
+            det = make_detector(cfg)
+            hit_t = None
+            t0 = time.perf_counter()
+            for t, x in samples:
+                n_samples += 1
+                if det.update(x, t):
+                    hit_t = t
+                    break
+            cost += time.perf_counter() - t0
+            if hit_t is None:
+                missed += 1
+            elif hit_t < contact:
+                false_hits += 1
+            else:
+                lat.append(hit_t - contact)
+        lat.sort()
+        p50 = lat[len(lat) // 2] * 1e3 if lat else float("nan")
+        p95 = lat[int(len(lat) * 0.95)] * 1e3 if lat else float("nan")
+        print(f"{kind:17s}: latency p50 {p50:6.1f} ms  p95 {p95:6.1f} ms  false {false_hits:4d}  "
+              f"missed {missed:4d}  / {args.trials}   {cost / max(1, n_samples) * 1e9:5.0f} ns/sample")
+
+
+if __name__ == "__main__":
+    main()
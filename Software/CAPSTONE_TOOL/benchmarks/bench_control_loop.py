@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+控制节拍精度基准：对比
+  before: 旧 _loop（time.time 测耗时，sleep(period - dt)，相对休眠会累积漂移）
+  after : DeadlineScheduler（单调时钟绝对截止时间，可选 spin 忙等尾段）
+
+每种配置运行 --seconds 秒，step 模拟 --work-us 微秒计算量，输出实际频率、累计漂移与抖动分位。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_control_loop.py [--rates 200,1000] [--seconds 2] [--spin-us 0,500] [--work-us 100]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from control.scheduler import DeadlineScheduler, Histogram
+
+
+def busy(us: float):
+    end = time.perf_counter() + us * 1e-6
+    while time.perf_counter() < end:
+        pass
+
+
+def run_legacy(rate: float, seconds: float, work_us: float):
+    period = 1.0 / rate
+    hist = Histogram(0.0, 2.0 * period)
+    n = 0
+    t_begin = time.monotonic()
+    last = None
+    while time.monotonic() - t_begin < seconds:
+        t0 = time.time()
+        now = time.monotonic()
+        if last is not None:
+            hist.add(now - last)
+        last = now
+        busy(work_us)
+        n += 1
+        dt = time.time() - t0
+        time.sleep(max(0.0, period - dt))
+    elapsed = time.monotonic() - t_begin
+    return n, elapsed, hist
+
+
+def run_sched(rate: float, seconds: float, work_us: float, spin_s: float):
+    sched = DeadlineScheduler(1.0 / rate, spin_s=spin_s)
+    stop = threading.Event()
+    t_begin = time.monotonic()
+
+    def step():
+        busy(work_us)
+        if time.monotonic() - t_begin >= seconds:
+            stop.set()
+    sched.run(step, stop)
+    return sched.ticks, time.monotonic() - t_begin, sched
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rates", default="200,1000")
+    ap.add_argument("--seconds", type=float, default=2.0)
+    ap.add_argument("--spin-us", default="0,500")
+    ap.add_argument("--work-us", type=float, default=100.0)
+    args = ap.parse_args()
+
+    for rate in [float(r) for r in args.rates.split(",")]:
+        period_us = 1e6 / rate
+        print(f"--- {rate:.0f} Hz (period {period_us:.0f} us, work {args.work_us:.0f} us) ---")
+        n, el, h = run_legacy(rate, args.seconds, args.work_us)
+        drift_ms = (el - n / rate) * 1e3
+        print(f"before            : {n / el:8.1f} Hz  drift {drift_ms:+8.1f} ms  "
+              f"period p50 {h.percentile(50) * 1e6:7.0f} us  p99 {h.percentile(99) * 1e6:7.0f} us  "
+              f"max {h.max * 1e6:7.0f} us")
+        for spin_us in [float(s) for s in args.spin_us.split(",")]:
+            n, el, sched = run_sched(rate, args.seconds, args.work_us, spin_us * 1e-6)
+            st = sched.stats()
+            drift_ms = (el - n / rate) * 1e3
+            print(f"after (spin {spin_us:4.0f}us): {n / el:8.1f} Hz  drift {drift_ms:+8.1f} ms  "
+                  f"period p50 {st['tick_period']['p50']:7.0f} us  p99 {st['tick_period']['p99']:7.0f} us  "
+                  f"max {st['tick_period']['max']:7.0f} us  jitter p99 {st['jitter']['p99']:6.0f} us  "
+                  f"overruns {st['overruns']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+关节状态估计基准（VirtualClock + 仿真节点，无需硬件）：
+  accuracy : 控制线程执行一段同步运动，每 --query-ms 毫秒查询一次，以仿真真值为准对比
+             原始量（状态表中最新 pos_deg / deg_per_s，保持到下一帧）与 alpha_beta / kalman 估计的位置、速度误差
+  cost     : 全部轴一次批量 update()（无新帧 / 每轴新位置帧 / 每轴新位置与速度帧，取多次最小值）与 estimate() 的耗时
+  homing   : home_axis 在关闭/启用估计时的耗时（启用后回退到位即结束，不必等满估算时长）
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_estimator.py [--axes 6] [--query-ms 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig, CANConfig
+from config.settings import ESTIMATOR_CONFIG
+from control.arm_controller import ArmController
+from control.estimator import make_estimator
+from hardware.vesc_can import VescCAN
+from hardware.vesc_sim import VescSimFleet
+from models.state_table import C_DEG_PER_S, C_POS_DEG
+from utils.clock import VirtualClock
+
+KINDS = ("alpha_beta", "kalman")
+
+
+class _NullLogger:
+    def __getattr__(self, name):
+        return lambda *a, **k: None
+
+
+def _setup(n_axes: int, estimator=None, threshold=None):
+    clock = VirtualClock(1000.0)
+    axes = {nid: AxisConfig(node_id=nid, homing_current_threshold_a=threshold) for nid in range(1, n_axes + 1)}
+    vesc = VescCAN(CANConfig(), clock=clock)
+    vesc.set_axis_configs(axes)
+    fleet = VescSimFleet.from_axes(axes)
+    fleet.bind(clock, vesc)
+    arm = ArmController(axes, vesc, fleet.send, control_rate_hz=500.0, logger=_NullLogger(),
+                        stream_keepalive_s=0.1, estimator=estimator)
+    return clock, vesc, fleet, arm
+
+
+def _summary(err: np.ndarray) -> str:
+    return f"mean {np.nanmean(err):7.4f}  p99 {np.nanpercentile(err, 99):7.4f}  max {np.nanmax(err):7.4f}"
+
+
+def bench_accuracy(n_axes: int, query_ms: float):
+    clock, vesc, fleet, arm = _setup(n_axes)
+    ids = sorted(arm.axes)
+    ests = {k: make_estimator(vesc.table, ids, dict(ESTIMATOR_CONFIG, kind=k)) for k in KINDS}
+    for nid, ax in arm.axes.items():
+        ax.target_deg_ui = fleet.nodes[nid].pid_pos_deg
+        arm.set_axis_enabled(nid, True)
+    arm.start()
+    clock.sleep(0.2)
+    traj = arm.move_to({nid: 100.0 + 20.0 * nid for nid in ids})
+    pos_err = {k: [] for k in ("raw",) + KINDS}
+    vel_err = {k: [] for k in ("raw",) + KINDS}
+    t_end = clock.now() + traj.duration + 0.5
+    while clock.now() < t_end:
+        now = clock.now()
+        q = np.array([fleet.nodes[nid].pid_pos_deg for nid in ids])
+        v = np.array([fleet.nodes[nid].vel for nid in ids])
+        pos_err["raw"].append(np.abs(np.array([vesc.sample(nid, "pos_deg")[0] for nid in ids]) - q))
+        vel_err["raw"].append(np.abs(np.array([vesc.sample(nid, "deg_per_s")[0] for nid in ids]) - v))
+        for k, est in ests.items():
+            est.update()
+            p, dv, _ = est.estimate(now)
+            pos_err[k].append(np.abs(p - q))
+            vel_err[k].append(np.abs(dv - v))
+        clock.sleep(query_ms * 1e-3)
+    arm.stop()
+    print(f"accuracy: {n_axes} axes, move {traj.duration:.2f} s, query every {query_ms:.0f} ms, "
+          f"status 100 Hz, pos quantum 0.02 deg")
+    for k in ("raw",) + KINDS:
+        print(f"  {k:10s} pos err deg  {_summary(np.array(pos_err[k]))}   "
+              f"vel err deg/s {_summary(np.array(vel_err[k]))}")
+
+
+def bench_cost(n_axes: int, repeats: int = 7, n: int = 500):
+    _, vesc, _, arm = _setup(n_axes)
+    ids = sorted(arm.axes)
+    rows = {nid: vesc.table.row(nid) for nid in ids}
+    i = 0   # 时间戳单调递增（跨估计器），避免被当作旧帧丢弃
+    for k in KINDS:
+        est = make_estimator(vesc.table, ids, dict(ESTIMATOR_CONFIG, kind=k))
+        best = {"idle": 1e9, "pos": 1e9, "pos+vel": 1e9}
+        for _ in range(repeats):
+            for case in best:
+                t0 = time.perf_counter()
+                for _ in range(n):
+                    i += 1
+                    ts = 1000.0 + i * 0.01
+                    if case != "idle":
+                        for nid in ids:
+                            v, t = rows[nid]
+                            v[C_POS_DEG] = 180.0 + 0.02 * i
+                            t[C_POS_DEG] = ts
+                            if case == "pos+vel":
+                                v[C_DEG_PER_S] = 2.0
+                                t[C_DEG_PER_S] = ts - 0.001
+                    est.update()
+                best[case] = min(best[case], (time.perf_counter() - t0) / n)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            est.estimate(ts + 0.002)
+        q = (time.perf_counter() - t0) / n
+        print(f"cost    : {k:10s} update() for {n_axes} axes: no new frame {best['idle'] * 1e6:5.1f} us, "
+              f"new pos on every axis {best['pos'] * 1e6:5.1f} us, new pos+vel {best['pos+vel'] * 1e6:5.1f} us; "
+              f"estimate() {q * 1e6:5.1f} us")
+
+
+def bench_homing(n_axes: int):
+    for kind in (None, "kalman"):
+        clock, _, fleet, arm = _setup(n_axes, estimator=kind, threshold=0.5)
+        v0 = clock.now()
+        arm.home_axis(1)
+        node = fleet.nodes[1]
+        print(f"homing  : estimator {str(kind):7s} home_axis(1) {'ok' if arm.axes[1].homed else 'FAILED'} "
+              f"in {clock.now() - v0:.2f} s (virtual), backoff pos {node.pid_pos_deg:.2f} deg")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--axes", type=int, default=6)
+    ap.add_argument("--query-ms", type=float, default=2.0)
+    args = ap.parse_args()
+    bench_accuracy(args.axes, args.query_ms)
+    bench_cost(args.axes)
+    bench_homing(args.axes)
+
+
+if __name__ == "__main__":
+    main()
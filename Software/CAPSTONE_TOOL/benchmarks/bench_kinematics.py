@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+运动学基准（CAPSTONE_ARM 默认几何）：
+  - 正解：批量 (N, 6) 一次求值 vs 逐点调用
+  - 逆解：批量阻尼最小二乘 vs 逐点调用，收敛率与残差
+  - LRU 缓存：重复查询命中耗时
+  - 与 RoboDK 导出 TCP 的一致性（robodk/test/joint_path_with_speed.csv）
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_kinematics.py [--n 5000]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import KinematicsConfig
+from planner.kinematics import SerialArm
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                   "robodk", "test", "joint_path_with_speed.csv")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=5000)
+    ap.add_argument("--seed-noise-deg", type=float, default=5.0)
+    args = ap.parse_args()
+
+    arm = SerialArm(KinematicsConfig())
+    rng = np.random.default_rng(0)
+    q = rng.uniform(-150.0, 150.0, (args.n, arm.n))
+
+    t0 = time.perf_counter()
+    T = arm.fk(q)
+    batch = time.perf_counter() - t0
+    m = min(args.n, 1000)
+    t0 = time.perf_counter()
+    for i in range(m):
+        arm.fk(q[i])
+    single = (time.perf_counter() - t0) / m
+    print(f"FK  : batch {batch / args.n * 1e6:7.2f} us/pose   per-call {single * 1e6:7.2f} us/pose   "
+          f"x{single / (batch / args.n):.0f}")
+
+    seed = q + rng.normal(0.0, args.seed_noise_deg, q.shape)
+    t0 = time.perf_counter()
+    qs, ok = arm.ik(T, seed, use_cache=False)
+    batch = time.perf_counter() - t0
+    err = np.linalg.norm(arm.fk(qs)[:, :3, 3] - T[:, :3, 3], axis=1)
+    m = min(args.n, 300)
+    t0 = time.perf_counter()
+    for i in range(m):
+        arm.ik(T[i], seed[i], use_cache=False)
+    single = (time.perf_counter() - t0) / m
+    print(f"IK  : batch {batch / args.n * 1e6:7.1f} us/pose   per-call {single * 1e6:7.1f} us/pose   "
+          f"x{single / (batch / args.n):.0f}   converged {ok.mean() * 100:.1f}%  max err {err[ok].max():.4f} mm")
+
+    arm.cache_clear()
+    arm.ik(T[:m], seed[:m])
+    t0 = time.perf_counter()
+    for i in range(m):
+        arm.ik(T[i], seed[i])
+    hit = (time.perf_counter() - t0) / m
+    print(f"IK cache hit: {hit * 1e6:7.1f} us/query   (hits {arm.cache_hits}, misses {arm.cache_misses})")
+
+    if os.path.exists(CSV):
+        with open(CSV, newline="") as f:
+            rows = [[float(v) for v in r] for r in list(csv.reader(f))[1:]]
+        a = np.array(rows)
+        d = np.linalg.norm(arm.fk(a[:, :6])[:, :3, 3] - a[:, 11:14], axis=1)
+        print(f"RoboDK TCP check: {len(a)} samples, max {d.max():.3f} mm, mean {d.mean():.3f} mm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+离线判定开销基准：对比
+  before: 每帧解析后全表扫描 last_update_s（旧 check_offline_and_cleanup，每次 get_state 也扫描）
+  after : NodeSupervisor 截止时间堆，接收路径只刷新截止时间，监视节拍 poll 一次
+
+按节点数扩展，输出每帧（含每帧一次 get_state）的平均开销。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_offline_detect.py [--frames 100000] [--nodes 4,16,64,256]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig, CANConfig
+from hardware.vesc_can import VescCAN
+
+
+class LegacyOfflineScan(VescCAN):
+    """旧版：每帧与每次读取都遍历全部节点（仅用于对比）。"""
+
+    def _legacy_scan(self):
+        now = time.time()
+        for nid, st in list(self.states.items()):
+            if st and (now - st.last_update_s) > self._offline_timeout_s:
+                self.reset_state(nid)
+
+    def parse_status(self, packet_id: int, node_id: int, data: bytes):
+        try:
+            super().parse_status(packet_id, node_id, data)
+        finally:
+            self._legacy_scan()
+
+    def get_state(self, node_id: int):
+        self._legacy_scan()
+        return self.states.get(node_id)
+
+
+def run(cls, n_nodes: int, n_frames: int, poll_every: int) -> float:
+    v = cls(CANConfig())
+    node_ids = list(range(1, n_nodes + 1))
+    v.set_axis_configs({nid: AxisConfig(node_id=nid) for nid in node_ids})
+    data = bytes(range(8))
+    pid = VescCAN.CAN_PACKET_STATUS
+    parse = v.parse_status
+    get_state = v.get_state
+    poll = v.check_offline_and_cleanup if cls is VescCAN else (lambda: None)
+    t0 = time.perf_counter()
+    for i in range(n_frames):
+        nid = node_ids[i % n_nodes]
+        parse(pid, nid, data)
+        get_state(nid)
+        if i % poll_every == 0:
+            poll()
+    return (time.perf_counter() - t0) / n_frames
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=100_000)
+    ap.add_argument("--nodes", default="4,16,64,256")
+    ap.add_argument("--poll-every", type=int, default=100, help="每多少帧执行一次监视节拍（模拟 50 ms 节拍）")
+    args = ap.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(f"frames={args.frames} poll_every={args.poll_every}")
+    for n in [int(x) for x in args.nodes.split(",")]:
+        before = min(run(LegacyOfflineScan, n, args.frames, args.poll_every) for _ in range(3))
+        after = min(run(VescCAN, n, args.frames, args.poll_every) for _ in range(3))
+        print(f"nodes={n:4d}  before {before * 1e9:9.0f} ns/frame   after {after * 1e9:7.0f} ns/frame   x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+同步轨迹基准：
+  1) 协调性：6 轴随机点到点运动，对比各轴独立梯形（固件各自规划，各轴到达时间不同）与上位机同步轨迹
+     （全部轴同时到达）的到达时间差；
+  2) 采样开销：整条轨迹按控制频率 NumPy 批量采样 vs 逐点 Python 求值。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_planner.py [--moves 200] [--rate 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig
+from planner.profiles import trapezoid
+from planner.trajectory import PROFILE_SCURVE, PROFILE_TRAPEZOID, plan_synchronized
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--moves", type=int, default=200)
+    ap.add_argument("--rate", type=float, default=200.0)
+    args = ap.parse_args()
+    rng = random.Random(0)
+    axes = {nid: AxisConfig(nid, max_vel_dps=rng.uniform(30, 120), max_accel_dps2=rng.uniform(60, 400))
+            for nid in range(1, 7)}
+
+    spread, sync_T, slowest_T = [], [], []
+    for _ in range(args.moves):
+        start = {nid: rng.uniform(0, 359) for nid in axes}
+        goal = {nid: rng.uniform(0, 359) for nid in axes}
+        indep = [trapezoid(abs(goal[n] - start[n]), axes[n].max_vel_dps, axes[n].max_accel_dps2).duration
+                 for n in axes]
+        spread.append(max(indep) - min(indep))
+        slowest_T.append(max(indep))
+        sync_T.append(plan_synchronized(start, goal, axes, profile=PROFILE_TRAPEZOID).duration)
+    print(f"independent trapezoids: finish-time spread p50 {np.median(spread):.2f}s max {max(spread):.2f}s")
+    print(f"synchronized trapezoid: spread 0 s, duration / slowest independent axis "
+          f"= {np.mean(np.array(sync_T) / np.array(slowest_T)):.3f} (mean)")
+
+    start = {nid: 10.0 for nid in axes}
+    goal = {nid: 300.0 for nid in axes}
+    traj = plan_synchronized(start, goal, axes, profile=PROFILE_SCURVE)
+    n = int(traj.duration * args.rate) + 1
+    reps = 20
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        traj.sample_uniform(args.rate)
+    bulk = (time.perf_counter() - t0) / reps
+    ts = np.arange(n) / args.rate
+    t0 = time.perf_counter()
+    for t in ts:
+        traj.positions(float(t))
+    loop = time.perf_counter() - t0
+    print(f"s-curve {traj.duration:.2f}s x 6 axes, {n} samples: bulk {bulk * 1e3:.2f} ms, "
+          f"per-point {loop * 1e3:.1f} ms  (x{loop / bulk:.0f})")
+
+
+if __name__ == "__main__":
+    main()
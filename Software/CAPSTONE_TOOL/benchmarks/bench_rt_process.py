@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+控制核心独立进程基准：在 GUI 进程施加纯 Python 计算负载（模拟绘图/界面刷新占用 GIL），对比
+  in-process: ArmController 控制线程与负载同进程（共享 GIL）
+  process   : CoreProxy 子进程运行 ArmController，GUI 进程只读共享内存状态
+的控制节拍周期/抖动分位与超时次数；并测量命令环往返（call）与状态发布延迟。
+后端为 --axes 轴、CAN 发送为空操作，不需要硬件。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_rt_process.py [--rate 500] [--seconds 3] [--axes 6] [--load-ms 20]
+"""
+import argparse
+import functools
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig, CANConfig
+from control.arm_controller import ArmController
+from control.rt_process import AXIS_FIELDS, GLOBAL_FIELDS, CoreProxy
+from hardware.vesc_can import VescCAN
+
+
+class _BenchBackend:
+    """无硬件后端：接口与 AppBridge 中 GUI/核心进程用到的部分一致。"""
+    def __init__(self, logger, n_axes: int, rate_hz: float):
+        axes = {nid: AxisConfig(node_id=nid) for nid in range(1, n_axes + 1)}
+        self.vesc = VescCAN(CANConfig())
+        self.vesc.set_axis_configs(axes)
+        self.can_if = None
+        self.arm = ArmController(axes, self.vesc, lambda *a, **k: None, control_rate_hz=rate_hz, logger=logger)
+        for nid in axes:
+            self.arm.set_axis_enabled(nid, True)
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        self.arm.stop()
+
+
+def make_backend(logger, n_axes: int, rate_hz: float):
+    return _BenchBackend(logger, n_axes, rate_hz)
+
+
+class _NullLogger:
+    def __getattr__(self, name):
+        return lambda *a, **k: None
+
+
+def gui_load(seconds: float, load_ms: float, poll=None):
+    """模拟 GUI 帧：每帧 load_ms 毫秒纯 Python 计算后让出 2 ms；poll 为每帧的状态读取。"""
+    end = time.monotonic() + seconds
+    frames = 0
+    while time.monotonic() < end:
+        t_end = time.perf_counter() + load_ms * 1e-3
+        acc = 0
+        while time.perf_counter() < t_end:
+            acc += sum(i * i for i in range(200))
+        if poll is not None:
+            poll()
+        frames += 1
+        time.sleep(0.002)
+    return frames
+
+
+def report(name: str, st: dict):
+    print(f"{name:11s}: ticks {st['ticks']:6d}  period p50 {st['tick_period']['p50']:7.0f} us  "
+          f"p99 {st['tick_period']['p99']:7.0f} us  max {st['tick_period']['max']:7.0f} us  "
+          f"jitter p99 {st['jitter']['p99']:7.0f} us  overruns {st['overruns']}  skipped {st['skipped']}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=float, default=500.0)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--axes", type=int, default=6)
+    ap.add_argument("--load-ms", type=float, default=20.0)
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--publish-hz", type=float, default=100.0)
+    args = ap.parse_args()
+    print(f"--- {args.rate:.0f} Hz, {args.axes} axes, GUI load {args.load_ms:.0f} ms/frame, {args.seconds:.0f} s ---")
+
+    # 同进程：控制线程与 GUI 负载争用 GIL
+    backend = make_backend(_NullLogger(), args.axes, args.rate)
+    backend.arm.start()
+    time.sleep(0.2)
+    backend.arm.reset_loop_stats()
+    gui_load(args.seconds, args.load_ms, poll=lambda: [backend.vesc.get_state(n) for n in backend.arm.axes])
+    report("in-process", backend.arm.get_loop_stats())
+    backend.disconnect()
+
+    # 独立进程：GUI 只读状态环
+    core = CoreProxy(functools.partial(make_backend, n_axes=args.axes, rate_hz=args.rate), _NullLogger(),
+                     publish_hz=args.publish_hz)
+    try:
+        core.arm.start()
+        time.sleep(0.3)
+        core.arm.reset_loop_stats()
+        gui_load(args.seconds, args.load_ms, poll=lambda: [core.vesc.get_state(n) for n in core.arm.axes])
+        report("process", core.arm.get_loop_stats(timeout_s=5.0))
+
+        # 命令往返：call 经命令环送达、经事件环应答
+        lat = []
+        for _ in range(args.calls):
+            t0 = time.perf_counter()
+            core.call("arm", "reset_loop_stats")
+            lat.append(time.perf_counter() - t0)
+        lat.sort()
+        print(f"call round trip: p50 {lat[len(lat) // 2] * 1e6:7.0f} us  p99 {lat[int(len(lat) * 0.99)] * 1e6:7.0f} us")
+
+        # 命令生效到状态可见：设定目标后轮询状态环，直到发布的 target_deg 更新
+        col = len(GLOBAL_FIELDS) + 2 + len(AXIS_FIELDS)
+        lat = []
+        for i in range(args.calls // 4):
+            want = float(i % 90 + 1)
+            t0 = time.perf_counter()
+            core.arm.set_axis_target(1, want)
+            while core.latest()[col] != want and time.perf_counter() - t0 < 1.0:
+                time.sleep(0.0002)
+            lat.append(time.perf_counter() - t0)
+        lat.sort()
+        print(f"command -> state visible: p50 {lat[len(lat) // 2] * 1e3:6.2f} ms  "
+              f"max {lat[-1] * 1e3:6.2f} ms (publish {args.publish_hz:.0f} Hz)")
+    finally:
+        core.close()
+
+
+if __name__ == "__main__":
+    main()
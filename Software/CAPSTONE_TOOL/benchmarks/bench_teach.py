@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+示教录制/回放基准：
+  format : 合成 --minutes 分钟、--axes 轴、100 Hz 状态帧（平滑运动 + 1/50 度量化 + 时间戳抖动）写入 .cteach，
+           输出每样本字节数（对比 CAN 录制 24 B/帧、float64 明文）、写入速度、打开（扫描块头）耗时、
+           按控制频率顺序取行的单拍耗时与回放期间的内存峰值
+  closed : VirtualClock + 仿真节点闭环：控制线程执行一段同步运动时录制，再回放录制结果，
+           输出录制样本数与回放轨迹相对录制轨迹的最大偏差
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_teach.py [--minutes 30] [--axes 6] [--skip-closed]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig, CANConfig
+from control.arm_controller import ArmController
+from hardware.vesc_can import VescCAN
+from hardware.vesc_sim import VescSimFleet
+from planner.teachfile import CH_CURRENT, CH_POS, CH_VELOCITY, TeachFile, TeachWriter
+from utils.clock import VirtualClock
+
+
+class _NullLogger:
+    def __getattr__(self, name):
+        return lambda *a, **k: None
+
+
+def bench_format(minutes: float, n_axes: int, full: bool, tmpdir: str):
+    rate = 100.0
+    n = int(minutes * 60 * rate)
+    ids = list(range(1, n_axes + 1))
+    path = os.path.join(tmpdir, "bench.cteach")
+    channels = CH_POS | ((CH_CURRENT | CH_VELOCITY) if full else 0)
+    rng = np.random.default_rng(0)
+    first = []      # 轴 1 的写入值，用于核对解码结果
+    t0 = time.perf_counter()
+    with TeachWriter(path, ids, channels) as w:
+        block = 6000
+        for k0 in range(0, n, block):
+            k = np.arange(k0, min(n, k0 + block))
+            t = k / rate + rng.uniform(-2e-4, 2e-4, len(k))
+            for j, nid in enumerate(ids):
+                q = np.round((180.0 + 60.0 * np.sin(2 * np.pi * t / (20.0 + 3 * j))) * 50.0) / 50.0
+                vel = np.round(60.0 * 2 * np.pi / (20.0 + 3 * j) * np.cos(2 * np.pi * t / (20.0 + 3 * j)), 2)
+                cur = np.round(0.3 * np.sign(vel) + rng.normal(0, 0.02, len(k)), 3)
+                if nid == 1 and not first:
+                    first = q.tolist()
+                for ti, qi, ci, vi in zip(t.tolist(), q.tolist(), cur.tolist(), vel.tolist()):
+                    w.append(nid, ti, qi, ci, vi)
+        samples = w.samples
+    write_s = time.perf_counter() - t0
+    size = os.path.getsize(path)
+    raw = samples * 8 * (2 + (2 if full else 0))
+    print(f"format : {n_axes} axes x {minutes:.0f} min @ {rate:.0f} Hz = {samples} samples "
+          f"({'pos+current+velocity' if full else 'pos'}), file {size / 1e6:.2f} MB, "
+          f"{size / samples:.2f} B/sample (CAN log 24 B/frame, float64 {raw / samples:.0f} B/sample, "
+          f"{raw / size:.0f}x smaller), write {samples / write_s / 1e3:.0f} k samples/s")
+
+    t0 = time.perf_counter()
+    f = TeachFile(path)
+    open_ms = (time.perf_counter() - t0) * 1e3
+    rows = f.rows(500.0)
+    m = min(len(rows), 100000)
+    t0 = time.perf_counter()
+    for k in range(m):
+        rows[k]
+    per_tick = (time.perf_counter() - t0) / m
+    # 内存峰值：从头到尾顺序取完全部行
+    tracemalloc.start()
+    for k in range(0, len(rows), 5):
+        rows[k]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # 解码正确性：首块逐样本核对写入值
+    a = f.chunk(1, 0)
+    err = float(np.max(np.abs(a[:, 1] - first[:len(a)])))
+    print(f"format : open {open_ms:.1f} ms ({f.n_chunks(1)} chunks/axis), duration {f.duration:.1f} s, "
+          f"row @500 Hz {per_tick * 1e6:.1f} us/tick, replay peak memory {peak / 1e3:.0f} kB, "
+          f"decode check max err {err:.4f} deg")
+    f.close()
+
+
+def bench_closed(n_axes: int, tmpdir: str):
+    path = os.path.join(tmpdir, "closed.cteach")
+    clock = VirtualClock(1000.0)
+    axes = {nid: AxisConfig(node_id=nid) for nid in range(1, n_axes + 1)}
+    vesc = VescCAN(CANConfig(), clock=clock)
+    vesc.set_axis_configs(axes)
+    fleet = VescSimFleet.from_axes(axes)
+    fleet.bind(clock, vesc)
+    arm = ArmController(axes, vesc, fleet.send, control_rate_hz=200.0, logger=_NullLogger(), stream_keepalive_s=0.1)
+    for nid, ax in arm.axes.items():
+        ax.target_deg_ui = fleet.nodes[nid].pid_pos_deg
+        arm.set_axis_enabled(nid, True)
+    arm.start()
+    clock.sleep(0.2)
+
+    # 示教：录制一段同步运动
+    arm.start_teach(path, current=True, velocity=True)
+    traj = arm.move_to({nid: 120.0 + 10.0 * nid for nid in axes})
+    clock.sleep(traj.duration + 0.5)
+    st = arm.stop_teach()
+
+    # 回到起点后回放，回放期间采样仿真位置
+    arm.move_to({nid: fleet.nodes[nid].cfg.init_pos_deg for nid in axes})
+    clock.sleep(traj.duration + 1.0)
+    t0 = time.perf_counter()
+    v0 = clock.now()
+    info = arm.play_teach(path)
+    trace = []
+    while arm.trajectory_active:
+        trace.append((clock.now() - v0, [fleet.nodes[nid].pid_pos_deg for nid in info["axes"]]))
+        clock.sleep(0.01)
+    clock.sleep(0.5)
+    arm.stop()
+    cpu = time.perf_counter() - t0
+    # 回放轨迹相对录制轨迹的偏差：录制值即实际位置，回放时作为目标再经一次固件位置环，偏差主要为跟随滞后
+    worst = 0.0
+    f = TeachFile(path)
+    for t, q in trace:
+        for nid, qi in zip(info["axes"], q):
+            worst = max(worst, abs(qi - f.position_at(nid, f.start + t)))
+    final = max(abs(fleet.nodes[nid].pid_pos_deg - f.position_at(nid, f.end)) for nid in axes)
+    print(f"closed : recorded {st['samples']} samples ({st['chunks']} chunks) over {st['duration_s']:.2f} s, "
+          f"{os.path.getsize(path)} bytes; replay {clock.now() - v0:.2f} s virtual in {cpu * 1e3:.0f} ms cpu, "
+          f"max lag behind recording {worst:.2f} deg, final error {final:.3f} deg")
+    f.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, default=30.0)
+    ap.add_argument("--axes", type=int, default=6)
+    ap.add_argument("--pos-only", action="store_true")
+    ap.add_argument("--skip-closed", action="store_true")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        bench_format(args.minutes, args.axes, not args.pos_only, tmpdir)
+        if not args.skip_closed:
+            bench_closed(args.axes, tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+时间最优路径参数化（TOPP）基准：一条 6 轴平滑关节路径（稀疏航点，如 RoboDK 导出/示教），对比
+  逐点停靠  : 每两个航点间 plan_synchronized（S 曲线 / 梯形）并在航点处停下
+  TOPP      : planner.topp.topp 连续通过整条路径
+输出总时长、求解耗时，以及按控制频率重采样后各轴的最大速度/加速度相对上限的比值（检验可行性）。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_topp.py [--waypoints 40] [--grid 1000] [--rate 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig
+from planner.topp import topp
+from planner.trajectory import PROFILE_SCURVE, PROFILE_TRAPEZOID, plan_synchronized
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--waypoints", type=int, default=40)
+    ap.add_argument("--grid", type=int, default=1000)
+    ap.add_argument("--rate", type=float, default=200.0)
+    args = ap.parse_args()
+
+    ids = (1, 2, 3, 4, 5, 6)
+    axes = {nid: AxisConfig(node_id=nid, max_vel_dps=60.0 + 15.0 * k, max_accel_dps2=120.0 + 40.0 * k)
+            for k, nid in enumerate(ids)}
+    u = np.linspace(0.0, 1.0, args.waypoints)
+    path = np.column_stack([120.0 + 60.0 * np.sin(2 * np.pi * (k + 1) * 0.5 * u + k) for k in range(len(ids))])
+
+    for prof in (PROFILE_TRAPEZOID, PROFILE_SCURVE):
+        total = 0.0
+        for a, b in zip(path[:-1], path[1:]):
+            total += plan_synchronized(dict(zip(ids, a)), dict(zip(ids, b)), axes, prof, node_ids=ids).duration
+        print(f"stop at waypoints ({prof:9s}): {total:7.3f} s")
+
+    t0 = time.perf_counter()
+    traj = topp(path, ids, axes, n_grid=args.grid)
+    solve = time.perf_counter() - t0
+    t, q = traj.sample_uniform(args.rate)
+    v = np.gradient(q, t, axis=0)
+    a = np.gradient(v, t, axis=0)
+    v_lim = np.array([axes[nid].max_vel_dps for nid in ids])
+    a_lim = np.array([axes[nid].max_accel_dps2 for nid in ids])
+    print(f"TOPP                        : {traj.duration:7.3f} s   solve {solve * 1e3:6.1f} ms  "
+          f"({args.grid} grid points)")
+    print(f"  max |v|/v_lim per axis: {np.round(np.abs(v).max(axis=0) / v_lim, 3).tolist()}")
+    print(f"  max |a|/a_lim per axis: {np.round(np.abs(a).max(axis=0) / a_lim, 3).tolist()}")
+
+
+if __name__ == "__main__":
+    main()
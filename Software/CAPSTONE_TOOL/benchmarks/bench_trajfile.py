@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+轨迹文件基准：对比 RoboDK CSV 整体读入（csv 解析为行列表，原有思路）与 .ctraj 内存映射回放：
+  - 打开/载入耗时与常驻内存增量（RSS，读 /proc/self/statm，仅 Linux；.ctraj 的增量是映射文件的干净页，
+    内存紧张时可由系统直接回收，不占匿名内存）
+  - 以控制频率逐拍取样（MappedRows，文件 1 kHz -> 控制 200 Hz 插值）的每拍耗时
+样本为 6 轴平滑曲线；CSV 只生成 --csv-rows 行（解析太慢），按行数线性外推到同样本数。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_trajfile.py [--samples 2000000] [--csv-rows 200000] [--dir /tmp]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner.robodk_convert import convert_csv
+from planner.trajfile import TrajectoryFile, TrajectoryWriter
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def block(k0: int, k1: int, rate: float) -> np.ndarray:
+    t = np.arange(k0, k1) / rate
+    return np.column_stack([90.0 * np.sin(0.2 * (j + 1) * t + j) for j in range(6)])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--samples", type=int, default=2_000_000)
+    ap.add_argument("--csv-rows", type=int, default=200_000)
+    ap.add_argument("--rate", type=float, default=1000.0)
+    ap.add_argument("--control-rate", type=float, default=200.0)
+    ap.add_argument("--dir", default="/tmp")
+    args = ap.parse_args()
+    ctraj = os.path.join(args.dir, "bench_traj.ctraj")
+    csv_path = os.path.join(args.dir, "bench_traj.csv")
+    conv_path = os.path.join(args.dir, "bench_traj_conv.ctraj")
+
+    t0 = time.perf_counter()
+    with TrajectoryWriter(ctraj, range(1, 7), args.rate) as w:
+        for k in range(0, args.samples, 100_000):
+            w.append(block(k, min(args.samples, k + 100_000), args.rate))
+    print(f".ctraj write : {args.samples} samples, {os.path.getsize(ctraj) / 2 ** 20:7.1f} MB "
+          f"in {time.perf_counter() - t0:6.2f} s")
+
+    with open(csv_path, "w", newline="") as f:
+        wr = csv.writer(f)
+        wr.writerow([f"J{j + 1}" for j in range(6)] + ["ERROR", "STEP_MM", "STEP_DEG", "MOVE_ID", "TIME_S"])
+        for row in block(0, args.csv_rows, args.rate):
+            wr.writerow([f"{v:.7f}" for v in row] + ["0", "0", "0", "1", f"{1.0 / args.rate:.7f}"])
+    scale = args.samples / args.csv_rows
+
+    r0 = rss_mb()
+    t0 = time.perf_counter()
+    with open(csv_path, newline="") as f:
+        rd = csv.reader(f)
+        next(rd)
+        rows = [[float(v) for v in r[:6]] for r in rd]
+    load = time.perf_counter() - t0
+    print(f"CSV load     : {load * scale:8.2f} s   RSS +{(rss_mb() - r0) * scale:8.1f} MB  "
+          f"(extrapolated from {args.csv_rows} rows)")
+    del rows
+
+    t0 = time.perf_counter()
+    n = convert_csv(csv_path, conv_path, rate_hz=args.rate)
+    print(f"convert      : {(time.perf_counter() - t0) * scale:8.2f} s   (extrapolated, {n} samples written)")
+
+    r0 = rss_mb()
+    t0 = time.perf_counter()
+    f = TrajectoryFile(ctraj)
+    rows = f.rows(args.control_rate, [-180.0] * 6, [180.0] * 6)
+    open_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    stride = max(1, len(rows) // 200_000)       # 抽样覆盖整个文件
+    ticks = 0
+    for k in range(0, len(rows), stride):
+        rows[k]
+        ticks += 1
+    per_tick = (time.perf_counter() - t0) / ticks
+    print(f".ctraj open  : {open_s * 1e3:8.3f} ms  RSS +{rss_mb() - r0:8.1f} MB after {ticks} ticks "
+          f"spread over {f.duration:.0f} s;  {per_tick * 1e6:.2f} us/tick")
+    f.close()
+    for p in (ctraj, csv_path, conv_path):
+        os.remove(p)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+位置流发送量基准：对比
+  before: 每个控制节拍为每个已启用轴重新编码并发送 SET_POS_LIM（stream_keepalive_s=None）
+  after : 预编码帧 + 变化检测，目标不变时只按 keepalive 间隔重发
+
+模拟 --axes 个轴、--rate Hz 控制节拍、--seconds 秒：一半时间目标静止，一半时间目标按 --move-dps 匀速变化；
+输出发送帧数、等效总线占用（按扩展帧约 130 bit/帧 估算）与每拍 CPU 开销。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_tx_streaming.py [--axes 6] [--rate 200] [--seconds 5] [--keepalive 0.1]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig, CANConfig
+from control.arm_controller import AxisController
+from hardware.vesc_can import VescCAN
+
+FRAME_BITS = 130  # 29 位 ID + 8 字节数据 + 填充位的粗略估算
+
+
+def run(keepalive, args):
+    vesc = VescCAN(CANConfig())
+    axes = [AxisController(AxisConfig(node_id=i + 1), vesc, keepalive) for i in range(args.axes)]
+    for ax in axes:
+        ax.enabled = True
+        ax.target_deg_ui = 90.0
+    sent = [0]
+
+    def send(arb, data, ext):
+        sent[0] += 1
+
+    ticks = int(args.seconds * args.rate)
+    period = 1.0 / args.rate
+    cpu = 0.0
+    t_next = time.monotonic()
+    for k in range(ticks):
+        moving = k >= ticks // 2
+        for ax in axes:
+            if moving:
+                ax.target_deg_ui = 90.0 + args.move_dps * (k - ticks // 2) * period
+        t0 = time.perf_counter()
+        for ax in axes:
+            ax.update(send)
+        cpu += time.perf_counter() - t0
+        t_next += period
+        d = t_next - time.monotonic()
+        if d > 0:
+            time.sleep(d)
+    return sent[0], cpu / ticks
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--axes", type=int, default=6)
+    ap.add_argument("--rate", type=float, default=200.0)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--keepalive", type=float, default=0.1)
+    ap.add_argument("--move-dps", type=float, default=30.0)
+    ap.add_argument("--bitrate", type=int, default=500000)
+    args = ap.parse_args()
+
+    for name, ka in (("before", None), ("after ", args.keepalive)):
+        frames, cpu = run(ka, args)
+        load = frames * FRAME_BITS / args.seconds / args.bitrate * 100.0
+        print(f"{name}: frames {frames:7d}  ({frames / args.seconds:7.0f}/s, ~{load:5.1f}% of "
+              f"{args.bitrate // 1000} kbit/s)  cpu {cpu * 1e6:6.1f} us/tick")
+
+
+if __name__ == "__main__":
+    main()
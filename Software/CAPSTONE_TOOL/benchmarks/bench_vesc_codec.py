@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+VescCAN 编解码基准：对比
+  before: 切片 + be_i16/int.from_bytes 逐字段解码、if/elif 按包分支；int.to_bytes 拼接编码
+          （基线实现的独立副本，含其 MotorState 与 time.time() 时间戳，不随 VescCAN 后续修改而变化）
+  after : 当前 VescCAN：packet_id -> (预编译 struct.Struct, 解码函数) 查表 + unpack_from；Struct.pack 编码
+
+decode 行只测编解码与状态写入：before 关闭其逐帧离线扫描；decode+offline 行为 before 原样（每帧遍历全部节点判离线），
+after 两行相同（离线判定只在接收路径刷新截止时间，见 NodeSupervisor）。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_vesc_codec.py [--frames 200000]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig, CANConfig
+from hardware.vesc_can import VescCAN
+from utils.math_utils import be_i16
+
+
+@dataclass
+class _LegacyMotorState:
+    """基线 MotorState 中解码路径用到的字段。"""
+    node_id: int
+    temp_mos: Optional[float] = None
+    temp_motor: Optional[float] = None
+    voltage_in: Optional[float] = None
+    current_motor: Optional[float] = None
+    current_in: Optional[float] = None
+    rpm: Optional[float] = None
+    deg_per_s: Optional[float] = None
+    duty: Optional[float] = None
+    pos_deg: Optional[float] = None
+    pos_mod_turns: Optional[float] = None
+    last_update_s: float = field(default_factory=time.time)
+    offline: bool = False
+
+
+class LegacyVescCodec:
+    """基线 VescCAN 的状态解析 / 编码实现（独立副本，仅用于对比）。offline_scan=False 时跳过逐帧离线扫描。"""
+    CAN_PACKET_STATUS = VescCAN.CAN_PACKET_STATUS
+    CAN_PACKET_STATUS_4 = VescCAN.CAN_PACKET_STATUS_4
+    CAN_PACKET_STATUS_5 = VescCAN.CAN_PACKET_STATUS_5
+    CAN_PACKET_STATUS_6 = VescCAN.CAN_PACKET_STATUS_6
+
+    def __init__(self, offline_scan: bool = True, offline_timeout_s: float = 0.5):
+        self.states: Dict[int, _LegacyMotorState] = {}
+        self.aixs_cfg: Dict[int, AxisConfig] = {}
+        self.log = logging.getLogger("LegacyVescCodec")
+        self._offline_timeout_s = offline_timeout_s
+        self.offline_scan = offline_scan
+
+    def set_axis_configs(self, axes_cfg: Dict[int, AxisConfig]):
+        self.aixs_cfg = dict(axes_cfg or {})
+
+    def _get_state(self, node_id: int) -> _LegacyMotorState:
+        st = self.states.get(node_id)
+        if st is None:
+            st = _LegacyMotorState(node_id=node_id)
+            self.states[node_id] = st
+        return st
+
+    def _get_cfg(self, node_id: int) -> Optional[AxisConfig]:
+        return self.aixs_cfg.get(node_id)
+
+    def reset_state(self, node_id: int):
+        st = self.states.get(node_id)
+        if not st or st.offline:
+            return
+        st.temp_mos = st.temp_motor = st.voltage_in = st.current_motor = st.current_in = None
+        st.rpm = st.deg_per_s = st.duty = st.pos_deg = st.pos_mod_turns = None
+        st.offline = True
+        self.log.warning(f"Node {node_id} offline: reset state")
+
+    def _mark_update(self, node_id: int):
+        st = self._get_state(node_id)
+        st.last_update_s = time.time()
+        if st.offline:
+            st.offline = False
+            self.log.info(f"Node {node_id} online")
+        return st
+
+    def check_offline_and_cleanup(self):
+        if not self.offline_scan:
+            return
+        now = time.time()
+        for nid, st in list(self.states.items()):
+            if st and (now - st.last_update_s) > self._offline_timeout_s:
+                self.reset_state(nid)
+
+    def parse_status(self, packet_id: int, node_id: int, data: bytes):
+        st = self._get_state(node_id)
+        try:
+            if packet_id == self.CAN_PACKET_STATUS and len(data) >= 8:
+                erpm = int.from_bytes(data[0:4], byteorder="big", signed=True)
+                current_x1000 = be_i16(data[4:6])
+                duty_x1000 = be_i16(data[6:8])
+                st.current_motor = current_x1000 / 1000.0
+                st.duty = duty_x1000 / 1000.0
+                acf = self._get_cfg(node_id)
+                if acf is not None:
+                    pole_pairs = max(1.0, float(getattr(acf, 'motor_poles_pairs', 3.0)))
+                    ratio = max(1e-9, float(getattr(acf, 'reduction_ratio', 1.0)))
+                    mech_rpm_motor = float(erpm) / pole_pairs
+                    joint_rpm = mech_rpm_motor / ratio
+                    st.rpm = joint_rpm
+                    st.deg_per_s = joint_rpm * 6.0
+                else:
+                    self.log.debug(f"No AxisConfig for node {node_id}, skip rpm conversion")
+                self._mark_update(node_id)
+            elif packet_id == self.CAN_PACKET_STATUS_4 and len(data) >= 8:
+                temp_fet_x10 = be_i16(data[0:2])
+                temp_m_x10 = be_i16(data[2:4])
+                i_in_x1000 = be_i16(data[4:6])
+                pid_pos_deg_x50 = be_i16(data[6:8])
+                st.temp_mos = temp_fet_x10 / 10.0
+                st.temp_motor = temp_m_x10 / 10.0
+                st.current_in = i_in_x1000 / 1000.0
+                pid_pos_deg = pid_pos_deg_x50 / 50.0
+                st.pos_deg = pid_pos_deg
+                self._mark_update(node_id)
+            elif packet_id == self.CAN_PACKET_STATUS_5 and len(data) >= 6:
+                v_in_x10 = ((data[4] << 8) | data[5])
+                st.voltage_in = v_in_x10 / 10.0
+                self._mark_update(node_id)
+            elif packet_id == self.CAN_PACKET_STATUS_6:
+                self._mark_update(node_id)
+        except Exception as e:
+            self.log.debug(f"parse error node {node_id} pid {packet_id}: {e}")
+        finally:
+            self.check_offline_and_cleanup()
+
+    def _encode_float16(self, value: float, scale: float) -> bytes:
+        v = int(round(value * scale))
+        v = max(-32768, min(32767, v))
+        return v.to_bytes(2, byteorder="big", signed=True)
+
+    def encode_set_pos(self, degrees: float) -> bytes:
+        d = degrees % 360.0
+        if d < 0:
+            d += 360.0
+        if d >= 360.0:
+            d = 0.0
+        v = int(round(d * 1_000_000.0))
+        return v.to_bytes(4, byteorder="big", signed=True)
+
+    def encode_set_pos_with_limits(self, degrees: float, max_vel_dps: float, max_accel_dps2: float) -> bytes:
+        pos_bytes = self.encode_set_pos(degrees)
+        vel_bytes = self._encode_float16(max_vel_dps, 100.0)
+        acc_bytes = self._encode_float16(max_accel_dps2, 10.0)
+        return pos_bytes + vel_bytes + acc_bytes
+
+    def encode_set_erpm(self, erpm: float) -> bytes:
+        v = int(round(erpm))
+        return v.to_bytes(4, byteorder="big", signed=True)
+
+
+def make_frames(n: int, node_ids, seed: int = 1):
+    rnd = random.Random(seed)
+    pids = [VescCAN.CAN_PACKET_STATUS, VescCAN.CAN_PACKET_STATUS_4, VescCAN.CAN_PACKET_STATUS_5]
+    return [(rnd.choice(pids), rnd.choice(node_ids), bytes(rnd.getrandbits(8) for _ in range(8)))
+            for _ in range(n)]
+
+
+def bench(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=200_000)
+    args = ap.parse_args()
+
+    logging.disable(logging.WARNING)
+    node_ids = [1, 2, 3, 4]
+    frames = make_frames(args.frames, node_ids)
+    cmds = [(random.uniform(-720, 720), random.uniform(0, 200), random.uniform(0, 500)) for _ in range(args.frames)]
+
+    axes = {nid: AxisConfig(node_id=nid) for nid in node_ids}
+    codecs = (("before", LegacyVescCodec(offline_scan=False)), ("before+offline", LegacyVescCodec()),
+              ("after", VescCAN(CANConfig())))
+    results = {}
+    for name, v in codecs:
+        v.set_axis_configs(axes)
+        parse = v.parse_status
+        enc_pos = v.encode_set_pos_with_limits
+        enc_rpm = v.encode_set_erpm
+
+        def decode_all():
+            for pid, nid, data in frames:
+                parse(pid, nid, data)
+
+        def encode_all():
+            for deg, vel, acc in cmds:
+                enc_pos(deg, vel, acc)
+                enc_rpm(vel * 100.0)
+
+        results[name] = (bench(decode_all) / len(frames), bench(encode_all) / (2 * len(cmds)))
+
+    (d0, e0), (d0o, _), (d1, e1) = results["before"], results["before+offline"], results["after"]
+    print(f"frames={len(frames)}, nodes={len(node_ids)}")
+    print(f"decode        : before {d0 * 1e9:7.0f} ns/frame   after {d1 * 1e9:7.0f} ns/frame   x{d0 / d1:.2f}")
+    print(f"decode+offline: before {d0o * 1e9:7.0f} ns/frame   after {d1 * 1e9:7.0f} ns/frame   x{d0o / d1:.2f}")
+    print(f"encode        : before {e0 * 1e9:7.0f} ns/frame   after {e1 * 1e9:7.0f} ns/frame   x{e0 / e1:.2f}")
+
+
+if __name__ == "__main__":
+    main()
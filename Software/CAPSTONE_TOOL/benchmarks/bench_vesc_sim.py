@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+VESC 仿真节点基准：
+  lockstep : N 个仿真节点按 1 kHz 物理步长推进 --sim-s 秒，状态帧经 VescCAN 分发表解码，输出相对实时的倍数
+  closed   : ArmController + CANInterface 挂到 python-can virtual 总线，与实时运行的仿真节点闭环：
+             单轴找零（仿真限位处电流上升触发碰撞检测）后，位置流跟踪一条同步轨迹，输出找零耗时、零点误差与跟踪误差
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_vesc_sim.py [--nodes 6] [--sim-s 60] [--skip-closed]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig, CANConfig
+from control.arm_controller import ArmController
+from hardware.can_interface import CANInterface
+from hardware.vesc_can import VescCAN
+from hardware.vesc_sim import VescSimFleet
+
+
+class _NullLogger:
+    def __getattr__(self, name):
+        return lambda *a, **k: None
+
+
+def bench_lockstep(n_nodes: int, sim_s: float):
+    axes = {nid: AxisConfig(node_id=nid) for nid in range(1, n_nodes + 1)}
+    vesc = VescCAN(CANConfig())
+    vesc.set_axis_configs(axes)
+    rx = vesc.build_rx_table(axes)
+    fleet = VescSimFleet.from_axes(axes)
+    # 每轴一条位置命令（100 ms 重发作心跳），往返摆动
+    cmds = {nid: [vesc.build_frame(vesc.CAN_PACKET_SET_POS_LIM, nid, vesc.encode_set_pos_with_limits(d, 90.0, 180.0))
+                  for d in (60.0, 300.0)] for nid in axes}
+
+    def on_frame(arb_id, data, ext):
+        h = rx.get(arb_id)
+        if h is not None:
+            h(data)
+
+    t0 = time.perf_counter()
+    n_frames = 0
+    for k in range(int(sim_s * 10)):
+        for nid in axes:
+            fleet.receive(*cmds[nid][(k // 40) % 2])
+        n_frames += fleet.run_for(0.1, on_frame)
+    wall = time.perf_counter() - t0
+    st = vesc.get_state(1)
+    print(f"lockstep: {n_nodes} nodes, {sim_s:.0f} s simulated in {wall * 1e3:.0f} ms "
+          f"({sim_s / wall:.0f}x real time), {n_frames} status frames decoded; "
+          f"node 1 pos {st.pos_deg:.2f} deg (sim {fleet.nodes[1].pid_pos_deg:.2f})")
+
+
+def bench_closed_loop(n_nodes: int):
+    axes = {nid: AxisConfig(node_id=nid, homing_current_threshold_a=0.5) for nid in range(1, n_nodes + 1)}
+    can_cfg = CANConfig(interface="virtual", channel="bench-vesc-sim")
+    vesc = VescCAN(can_cfg)
+    vesc.set_axis_configs(axes)
+    fleet = VescSimFleet.from_axes(axes, can_cfg.id_format)
+    can_if = CANInterface(can_cfg.interface, can_cfg.channel, can_cfg.bitrate, tx_budget_fraction=None)
+    can_if.set_rx_dispatch(vesc.build_rx_table(axes), vesc.build_can_filters(axes))
+    arm = ArmController(axes, vesc, can_if.send, control_rate_hz=200.0, logger=_NullLogger(),
+                        stream_keepalive_s=0.1)
+    fleet.start(can_cfg.channel)
+    can_if.start()
+    try:
+        time.sleep(0.2)
+        node = fleet.nodes[1]
+        t0 = time.perf_counter()
+        arm.home_axis(1)
+        homing_s = time.perf_counter() - t0
+        zero_err = node.offset - node.cfg.stop_min_deg
+        print(f"closed  : home_axis(1) {'ok' if arm.axes[1].homed else 'FAILED'} in {homing_s:.2f} s, "
+              f"zero error {zero_err:+.3f} deg, backoff pos {node.pid_pos_deg:.2f} deg")
+
+        # 位置流：全部轴启用，从仿真当前位置出发做一次同步运动
+        for nid, ax in arm.axes.items():
+            ax.target_deg_ui = fleet.nodes[nid].pid_pos_deg
+            arm.set_axis_enabled(nid, True)
+        arm.start()
+        goal = {nid: 120.0 + 10.0 * nid for nid in axes}
+        traj = arm.move_to(goal)
+        worst = 0.0
+        t_end = time.monotonic() + traj.duration + 1.0
+        while time.monotonic() < t_end:
+            for nid, ax in arm.axes.items():
+                worst = max(worst, abs(fleet.nodes[nid].pid_pos_deg - ax.target_deg_ui))
+            time.sleep(0.005)
+        final = max(abs(fleet.nodes[nid].pid_pos_deg - goal[nid]) for nid in axes)
+        print(f"closed  : move_to {traj.duration:.2f} s, max tracking lag {worst:.2f} deg, "
+              f"final error {final:.3f} deg, {fleet.frames_sent} status frames")
+    finally:
+        arm.stop()
+        can_if.stop()
+        fleet.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", type=int, default=6)
+    ap.add_argument("--sim-s", type=float, default=60.0)
+    ap.add_argument("--skip-closed", action="store_true")
+    args = ap.parse_args()
+    bench_lockstep(args.nodes, args.sim_s)
+    if not args.skip_closed:
+        bench_closed_loop(args.nodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+虚拟时钟基准：VescCAN / ArmController 与仿真节点共用一个 VirtualClock（fleet.bind + fleet.send 作为 can_send），
+不经 CAN 总线、不做真实休眠，按离散事件推进时间：
+  home  : 单轴找零（仿真限位处电流上升触发碰撞检测）
+  group : 多轴并行找零
+  move  : 控制线程位置流跟踪一次同步运动
+输出每个场景的虚拟时长、CPU 耗时与相对实时的倍数；同一场景重复运行结果完全一致。
+另检查死锁判定：所有参与者都在不限时地等待未置位的 event 时，wait 应抛出 "virtual clock deadlock" RuntimeError。
+
+用法（在 CAPSTONE_TOOL 目录下）：
+  python benchmarks/bench_virtual_clock.py [--nodes 6] [--rate 200] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.arm_config import AxisConfig, CANConfig
+from control.arm_controller import ArmController
+from hardware.vesc_can import VescCAN
+from hardware.vesc_sim import VescSimFleet
+from utils.clock import VirtualClock
+
+
+class _NullLogger:
+    def __getattr__(self, name):
+        return lambda *a, **k: None
+
+
+def report(name: str, virt_s: float, cpu_s: float, detail: str):
+    print(f"{name:6s}: virtual {virt_s:6.2f} s  cpu {cpu_s * 1e3:7.0f} ms  "
+          f"({virt_s / max(cpu_s, 1e-9):5.0f}x real time)  {detail}")
+
+
+def run_scenario(n_nodes: int, rate_hz: float, verbose: bool):
+    clock = VirtualClock(1000.0)
+    axes = {nid: AxisConfig(node_id=nid, homing_current_threshold_a=0.5) for nid in range(1, n_nodes + 1)}
+    vesc = VescCAN(CANConfig(), clock=clock)
+    vesc.set_axis_configs(axes)
+    fleet = VescSimFleet.from_axes(axes)
+    fleet.bind(clock, vesc)
+    arm = ArmController(axes, vesc, fleet.send, control_rate_hz=rate_hz, logger=_NullLogger(),
+                        stream_keepalive_s=0.1)
+    out = []
+
+    t0, v0 = time.perf_counter(), clock.now()
+    arm.home_axis(1)
+    node = fleet.nodes[1]
+    out.append(("home", clock.now() - v0, time.perf_counter() - t0,
+                f"{'ok' if arm.axes[1].homed else 'FAILED'}, zero error {node.offset - node.cfg.stop_min_deg:+.3f} deg"))
+
+    group = [nid for nid in axes if nid != 1][:3]
+    t0, v0 = time.perf_counter(), clock.now()
+    res = arm.home_group(group)
+    out.append(("group", clock.now() - v0, time.perf_counter() - t0,
+                f"axes {group}: {'all ok' if all(res.values()) else res}"))
+
+    for nid, ax in arm.axes.items():
+        ax.target_deg_ui = fleet.nodes[nid].pid_pos_deg
+        arm.set_axis_enabled(nid, True)
+    arm.start()
+    goal = {nid: 120.0 + 10.0 * nid for nid in axes}
+    t0, v0 = time.perf_counter(), clock.now()
+    traj = arm.move_to(goal)
+    clock.sleep(traj.duration + 1.0)
+    arm.stop()
+    final = max(abs(fleet.nodes[nid].pid_pos_deg - goal[nid]) for nid in axes)
+    out.append(("move", clock.now() - v0, time.perf_counter() - t0,
+                f"traj {traj.duration:.2f} s, final error {final:.3f} deg, {arm.get_loop_stats()['ticks']} ticks"))
+
+    if verbose:
+        for row in out:
+            report(*row)
+    return [(name, round(virt, 9), detail) for name, virt, _, detail in out]
+
+
+def _expect_deadlock(fn) -> bool:
+    try:
+        fn()
+    except RuntimeError as e:
+        return "deadlock" in str(e)
+    return False
+
+
+def check_deadlock() -> bool:
+    # 单个参与者不限时等待永不置位的 event
+    alone = _expect_deadlock(lambda: VirtualClock().wait(threading.Event(), None))
+    # 两个参与者各自不限时等待永不置位的 event：两者都应得到死锁错误，而不是其一永远阻塞
+    clock = VirtualClock()
+    other = []
+    th = clock.spawn(lambda: other.append(_expect_deadlock(lambda: clock.wait(threading.Event(), None))), "waiter")
+    both = _expect_deadlock(lambda: clock.wait(threading.Event(), None))
+    th.join(1.0)
+    both = both and other == [True]
+    print(f"deadlock: single waiter {'ok' if alone else 'FAILED'}, two waiters {'ok' if both else 'FAILED'}")
+    return alone and both
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", type=int, default=6)
+    ap.add_argument("--rate", type=float, default=200.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    first = run_scenario(args.nodes, args.rate, verbose=True)
+    # 确定性：重复运行的虚拟时长与结果应逐位一致
+    same = all(run_scenario(args.nodes, args.rate, verbose=False) == first for _ in range(args.repeat - 1))
+    print(f"repeat x{args.repeat}: {'identical' if same else 'DIVERGED'}")
+    check_deadlock()
+
+
+if __name__ == "__main__":
+    main()
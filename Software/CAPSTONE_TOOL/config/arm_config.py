@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -9,6 +9,19 @@ class CANConfig:
     bitrate: int = 500000
     id_format: str = "extended_29bit"
     offline_timeout_s: float = 0.5   # 新增：状态帧超时判定离线阈值
+    offline_check_period_s: float = 0.05  # 离线监视线程的检查节拍
+    # 状态包 DBC（相对路径按 CAPSTONE_TOOL 目录解析，None 不加载）：只用于补充没有手写解码的状态包，
+    # 现有 STATUS..STATUS_6 均已手写解码，固件新增状态包时再指定（如 "VESC网友原版.dbc"；vesc.dbc 的信号声明为 @1 小端，与固件大端不符）
+    dbc_path: Optional[str] = None
+    # 传输后端："thread"（收/发各一线程）或 "asyncio"（单事件循环，含控制节拍与找零）
+    backend: str = "thread"
+    # 发送队列：独立线程发送，同一 (packet_id, node_id) 未发出的旧帧被新帧覆盖
+    tx_async: bool = True
+    tx_queue_size: int = 64
+    tx_timeout_s: float = 0.02
+    # 总线负载：统计窗口（s，0 关闭统计）；发送预算占比（低优先级帧超出则延后，None 不限制）
+    bus_load_window_s: float = 1.0
+    tx_budget_fraction: Optional[float] = 0.6
 
 
 @dataclass
@@ -19,9 +32,12 @@ class AxisConfig:
     # 位置控制默认限速（每轴可覆盖）
     max_vel_dps: float = 90.0          # 度/秒
     max_accel_dps2: float = 180.0      # 度/秒^2
+    max_jerk_dps3: Optional[float] = None  # 度/秒^3，上位机 S 曲线规划用；None 取 10 × max_accel_dps2
 
     reduction_ratio: float = 100.0
     motor_poles_pairs: float = 3.0
+    # 该轴所在的 CAN 总线名（对应 AppConfig.can_buses 的键）
+    can_bus: str = "default"
     
     # —— 每轴独立找零参数（None 表示使用全局默认 HOMING_CONFIG） ——
     homing_mode: Optional[str] = None                 # "rpm" 或 "current"
@@ -30,6 +46,7 @@ class AxisConfig:
     homing_current_a: Optional[float] = None
     homing_current_threshold_a: Optional[float] = None
     homing_collision_dwell_s: Optional[float] = None
+    homing_detector: Optional[str] = None             # "threshold" / "cusum" / "derivative" / "cusum+derivative"
     homing_timeout_s: Optional[float] = None
     homing_backoff_deg: Optional[float] = None
     homing_backoff_rpm: Optional[float] = None
@@ -38,10 +55,58 @@ class AxisConfig:
     homing_send_idle_keepalive: Optional[bool] = None
 
 
+def _capstone_dhm() -> List[List[float]]:
+    # CAPSTONE_STATION.rdk 中 CAPSTONE_ARM 的改进 DH 参数，每行 [alpha 度, a mm, theta 度, d mm]
+    return [
+        [0.0, 0.0, 180.0, 290.0],
+        [90.0, 0.0, 90.0, 0.0],
+        [0.0, 350.0, 0.0, 0.0],
+        [0.0, 300.0, -90.0, 5.65],
+        [-90.0, 0.0, 180.0, 154.0],
+        [90.0, 0.0, 0.0, 23.5],
+    ]
+
+
+@dataclass
+class KinematicsConfig:
+    # 改进 DH（Craig / RoboDK DHM）：T_i = RotX(alpha) · TransX(a) · RotZ(theta + q_i) · TransZ(d)
+    dhm: List[List[float]] = field(default_factory=_capstone_dhm)
+    # 关节 i 对应的轴 node_id；模型关节角 = joint_sign · (轴目标角 - joint_offset_deg)
+    node_ids: List[int] = field(default_factory=lambda: [1, 2, 3, 4, 5, 6])
+    joint_sign: List[float] = field(default_factory=lambda: [1.0] * 6)
+    joint_offset_deg: List[float] = field(default_factory=lambda: [0.0] * 6)
+    # 基座坐标系（世界 -> 关节 1 基准）与工具（法兰 -> TCP）：x, y, z (mm), rx, ry, rz (度，固定轴 XYZ)
+    base_xyzrpw: List[float] = field(default_factory=lambda: [0.0] * 6)
+    # 按 robodk/test/joint_path_with_speed.csv 的 X/Y/Z_TCP 拟合（沿法兰 z 负向 120 mm，残差约 1.4 mm）
+    tool_xyzrpw: List[float] = field(default_factory=lambda: [0.0, 0.0, -120.0, 0.0, 0.0, 0.0])
+
+
 @dataclass
 class AppConfig:
     can: CANConfig = field(default_factory=CANConfig)
+    # 多总线：名称 -> CANConfig；为空时只使用 can（名称 "default"）
+    can_buses: Dict[str, CANConfig] = field(default_factory=dict)
     control_rate_hz: float = 200.0
+    # 控制节拍落后时的策略："skip"（跳过错过的节拍）或 "compress"（连续补跑，最多 5 拍）
+    control_overrun: str = "skip"
+    # 截止时间前改为忙等的时长（s）；0 为纯休眠，1 kHz 等高节拍可设 0.0005~0.001（线程后端有效）
+    control_spin_s: float = 0.0
+    # 位置流：只在编码后的位置帧变化时发送，未变化时按此间隔重发作心跳（空闲轴 rpm=0 心跳同此间隔）；
+    # 需明显小于 VESC 的指令超时（固件 app 配置 timeout，默认 1 s）。None 为每个控制节拍都发送
+    stream_keepalive_s: Optional[float] = 0.1
+    # 并行找零分组（node_id 列表的列表）：同组轴机械上互不干涉，同时找零；组间依次进行，未分组的轴逐个找零
+    homing_groups: List[List[int]] = field(default_factory=list)
+    # 机械臂几何（上位机笛卡尔规划用），默认取 RoboDK 工作站 CAPSTONE_ARM
+    kinematics: KinematicsConfig = field(default_factory=KinematicsConfig)
+    # 仿真：各总线改用 python-can virtual 通道，由 hardware.vesc_sim 模拟全部已配置节点（无需硬件）
+    simulate_vesc: bool = False
+    # 控制核心独立进程：CAN 收发、解码与控制节拍运行在子进程（独立 GIL），GUI 经共享内存环读取状态、下达命令
+    control_process: bool = False
+    # 子进程向共享内存发布状态记录的频率（Hz）
+    control_publish_hz: float = 100.0
+    # 关节状态估计："kalman" / "alpha_beta"（参数见 settings.ESTIMATOR_CONFIG），None 关闭；控制节拍每拍批量更新
+    # 默认关闭：6 轴每拍约 0.1–0.2 ms，启用前先用 benchmarks/bench_estimator.py 确认精度与开销
+    estimator: Optional[str] = None
     # 全局默认限速（若轴未覆盖则使用）
     default_max_vel_dps: float = 90.0
     default_max_accel_dps2: float = 180.0
@@ -71,6 +71,19 @@ HOMING_CONFIG = {
     "current_threshold_a": 0.12,
     # 阈值持续时间（s），用于去抖
     "collision_dwell_s": 0.08,
+    # 碰撞检测器："threshold"（上面两项，固定阈值+持续时间）、"cusum"（EWMA 基线 + CUSUM）、
+    # "derivative"（电流变化率）或 "cusum+derivative"；后三者自适应各轴自由运行电流，无需按轴设阈值
+    "detector": "threshold",
+    "settle_s": 0.15,            # 起步加速瞬态忽略时长（s）
+    "baseline_warmup": 20,       # 建立基线的样本数
+    "baseline_alpha": 0.05,      # 基线 EWMA 系数
+    "min_sigma_a": 0.01,         # 基线噪声下限（A）
+    "min_delta_a": 0.05,         # 判定碰撞时电流至少高出基线（A）
+    "cusum_k": 1.0,              # CUSUM 允许偏移（σ）
+    "cusum_h": 8.0,              # CUSUM 判定门限（σ）
+    "derivative_a_per_s": 5.0,   # 变化率门限（A/s）
+    "derivative_confirm": 3,     # 变化率连续超限样本数
+    "derivative_tau_s": 0.02,    # 变化率低通时间常数（s）
     # 整体超时时间（s）
     "timeout_s": 8.0,
     # 碰撞后回退角度（deg），以新零点为基准的反向回退
@@ -82,4 +95,28 @@ HOMING_CONFIG = {
     "command_period_s": 0.05,    # 控制心跳发送周期（s）
     # 是否为未启用的其他轴发送 rpm=0 心跳
     "send_idle_keepalive": True,
+    # 回退到位判定（需启用状态估计）：估计位置距回退目标与估计速度均在容差内即结束回退，不必等满估算时长
+    "backoff_settle_deg": 0.2,
+    "backoff_settle_dps": 2.0,
+}
+
+# 关节状态估计（control.estimator）：融合 STATUS_4 位置、STATUS 的 ERPM 换算角速度与帧时间戳
+ESTIMATOR_CONFIG = {
+    # "kalman"（匀加速卡尔曼）或 "alpha_beta"
+    "kind": "kalman",
+    # 位置残差超过此值（deg）时重新初始化（找零更新固件零点等跳变）
+    "reset_deg": 5.0,
+    # 查询时刻相对最新状态的最大外推时长（s）
+    "max_extrapolate_s": 0.05,
+    # kalman：加加速度功率谱密度（deg²/s⁵）、位置量测噪声（deg，含 1/50° 量化）、速度量测噪声（deg/s）
+    # ERPM 速度远比量化位置的差分准确，速度量测噪声取小值使速度估计贴合量测（bench_estimator 下不劣于原始量）
+    "jerk_psd": 2e6,
+    "pos_noise_deg": 0.01,
+    "vel_noise_dps": 0.01,
+    # alpha_beta：位置残差增益 alpha / beta / gamma（gamma=0 为经典 alpha-beta），速度量测混合系数
+    # beta=0、velocity_gain=1 即速度直接取 ERPM 量测，位置残差只修正位置
+    "alpha": 0.5,
+    "beta": 0.0,
+    "gamma": 0.0,
+    "velocity_gain": 1.0,
 }
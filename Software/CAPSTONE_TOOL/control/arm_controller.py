@@ -1,25 +1,47 @@
+import dataclasses
+import inspect
 import threading
-import time
-from typing import Dict, Callable, Optional
+from typing import Collection, Dict, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 from utils.log_utils import globalLogger
 from utils.log_utils import LoggerTool
 
-from models.motor_state import MotorState
 from utils.math_utils import clamp
 from hardware.vesc_can import VescCAN
+from hardware.can_interface import TX_PRIORITY_HIGH, TX_PRIORITY_LOW
 from config.arm_config import AxisConfig
-from config.settings import HOMING_CONFIG
+from config.settings import ESTIMATOR_CONFIG, HOMING_CONFIG
+from control.estimator import StateEstimator, make_estimator
+from control.homing import HomingJob, DONE
+from control.scheduler import DeadlineScheduler, OVERRUN_SKIP
+from control.teach import TeachRecorder
+from utils.clock import MONOTONIC, Clock
+from planner.kinematics import SerialArm, as_poses, interpolate_poses
+from planner.topp import topp
+from planner.teachfile import TeachFile
+from planner.trajfile import TrajectoryFile
+from planner.trajectory import MultiAxisTrajectory, PROFILE_SCURVE, SampledTrajectory, plan_synchronized
 
 
 class AxisController:
-    def __init__(self, axis_cfg: AxisConfig, vesc: VescCAN):
+    def __init__(self, axis_cfg: AxisConfig, vesc: VescCAN, stream_keepalive_s: Optional[float] = None,
+                 clock: Clock = MONOTONIC):
         self.cfg = axis_cfg
         self.vesc = vesc
+        self.clock = clock
         self.target_deg_ui = 0.0
         self.enabled = False
         # 找零相关：记录“机械零点”对应的VESC绝对角度（0..360）
         self.zero_abs_deg: float = 0.0
         self.homed: bool = False
+        # 位置流：None 为每拍发送；否则仅在编码结果变化时发送，未变化时每 stream_keepalive_s 重发一次
+        self.stream_keepalive_s = stream_keepalive_s
+        # 预编码帧缓存：(目标角, 限速, 限加速度) -> (arb_id, payload, ext)，输入不变时直接复用
+        self._pos_key: Optional[Tuple[float, float, float]] = None
+        self._pos_frame: Optional[Tuple[int, bytes, bool]] = None
+        self._sent_payload: Optional[bytes] = None
+        self._sent_ts = 0.0
 
     def _apply_zero_offset(self, target_deg: float) -> float:
         # 绝对角 = 零点绝对角 + 目标机械角（取模360）
@@ -31,49 +53,124 @@ class AxisController:
         self.zero_abs_deg = float(current_pos_deg) % 360.0
         self.homed = True
 
+    def _pos_frame_for(self, target_deg: float) -> Tuple[int, bytes, bool]:
+        # 选择该轴限速，若未设置则使用全局默认
+        max_vel = self.cfg.max_vel_dps if self.cfg.max_vel_dps is not None else 90.0
+        max_acc = self.cfg.max_accel_dps2 if self.cfg.max_accel_dps2 is not None else 180.0
+        key = (target_deg, max_vel, max_acc)
+        if key != self._pos_key:
+            data = self.vesc.encode_set_pos_with_limits(target_deg, max_vel, max_acc)
+            self._pos_frame = self.vesc.build_frame(self.vesc.CAN_PACKET_SET_POS_LIM, self.cfg.node_id, data)
+            self._pos_key = key
+        return self._pos_frame
+
     def send_joint_deg(self, target_deg: float,
                        send_frame: Callable[[int, bytes, bool], None]):
         """
         发送位置控制：位置(度) + 最大速度(°/s) + 最大加速度(°/s^2)。
         固件侧将基于此做梯形速度规划。
         """
-        # 选择该轴限速，若未设置则使用全局默认
-        max_vel = self.cfg.max_vel_dps if self.cfg.max_vel_dps is not None else 90.0
-        max_acc = self.cfg.max_accel_dps2 if self.cfg.max_accel_dps2 is not None else 180.0
-        data = self.vesc.encode_set_pos_with_limits(target_deg, max_vel, max_acc)
-        arb_id, payload, ext = self.vesc.build_frame(self.vesc.CAN_PACKET_SET_POS_LIM, self.cfg.node_id, data)
+        arb_id, payload, ext = self._pos_frame_for(target_deg)
         send_frame(arb_id, payload, ext)
+        self._sent_payload = payload
+        self._sent_ts = self.clock()
+
+    def invalidate_stream(self):
+        """该轴收到了其它模式的指令（rpm/电流等）：下一拍无条件重发位置帧。"""
+        self._sent_payload = None
 
     def update(self, send_frame: Callable[[int, bytes, bool], None]):
         if not self.enabled:
+            self._sent_payload = None
             return
         # 目标角限制到软限位（默认 0..360）
         tgt_deg = clamp(self.target_deg_ui, self.cfg.soft_min_deg, self.cfg.soft_max_deg)
-        self.send_joint_deg(tgt_deg, lambda arb, data, ext: send_frame(arb, data, ext))
+        if self.stream_keepalive_s is not None:
+            payload = self._pos_frame_for(tgt_deg)[1]
+            if payload == self._sent_payload and self.clock() - self._sent_ts < self.stream_keepalive_s:
+                return
+        self.send_joint_deg(tgt_deg, send_frame)
+
+
+# can_send(arbitration_id, payload, extended, priority=TX_PRIORITY_HIGH)：与 CANInterface.send 一致，priority 可省略
+CanSend = Callable[..., None]
+
+
+def _accepts_priority(send: CanSend) -> bool:
+    """发送函数能否接收第四个位置参数 priority（只接受三个参数的旧式发送函数返回 False）。"""
+    try:
+        params = inspect.signature(send).parameters.values()
+    except (TypeError, ValueError):
+        return True
+    n = 0
+    for p in params:
+        if p.kind == p.VAR_POSITIONAL:
+            return True
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD):
+            n += 1
+    return n >= 4
 
 
 class ArmController:
-    def __init__(self, axes_cfg: Dict[int, AxisConfig], vesc: VescCAN, can_send: Callable[[int, bytes, bool], None], control_rate_hz: float = 50.0, logger: LoggerTool = None):
+    def __init__(self, axes_cfg: Dict[int, AxisConfig], vesc: VescCAN, can_send: CanSend, control_rate_hz: float = 50.0, logger: LoggerTool = None,
+                 overrun_policy: str = OVERRUN_SKIP, spin_s: float = 0.0,
+                 stream_keepalive_s: Optional[float] = None,
+                 homing_groups: Optional[Sequence[Iterable[int]]] = None,
+                 kinematics: Optional[SerialArm] = None,
+                 clock: Optional[Clock] = None,
+                 estimator: Optional[str] = None):
         self.axes_cfg = axes_cfg
         self.vesc = vesc
         self.can_send = can_send
-        self.axes: Dict[int, AxisController] = {nid: AxisController(cfg, vesc) for nid, cfg in axes_cfg.items()}
+        # 只接受 (arb_id, payload, extended) 的发送函数：低优先级帧（心跳）按普通帧发送
+        self._send_has_priority = _accepts_priority(can_send)
+        # 时钟：默认与 VescCAN 相同（状态时间戳与找零/心跳/节拍计时同一时基）
+        self.clock: Clock = clock or getattr(vesc, "clock", MONOTONIC)
+        # stream_keepalive_s：位置帧只在变化时发送 + 按此间隔重发（None 为每拍发送），空闲轴心跳同样按此间隔
+        self.stream_keepalive_s = stream_keepalive_s
+        self.axes: Dict[int, AxisController] = {nid: AxisController(cfg, vesc, stream_keepalive_s, self.clock)
+                                                for nid, cfg in axes_cfg.items()}
+        # 预编码的 rpm=0 心跳帧：node_id -> (arb_id, payload, ext)
+        self._idle_frames: Dict[int, Tuple[int, bytes, bool]] = {}
         self.log = logger
         self.terminal_log = globalLogger
         self._stop = threading.Event()
         self._thread = None
         self.control_rate_hz = control_rate_hz
+        # 控制节拍：单调时钟绝对截止时间，附带周期/抖动/耗时直方图（get_loop_stats）
+        self.scheduler = DeadlineScheduler(1.0 / max(1e-3, control_rate_hz),
+                                           overrun=overrun_policy, spin_s=spin_s, clock=self.clock)
+        # 正在执行的同步轨迹：(轴顺序, 按控制频率预采样的位置行, 起始时刻, 所属文件)，由控制节拍逐拍取用；
+        # 位置行可为 list 或惰性的 MappedRows（轨迹文件回放）/ TeachRows（示教回放）。
+        # 文件回放时控制器持有该文件，轨迹结束、被替换或终止时由 _set_trajectory / _finish_trajectory 关闭
+        self._traj_run: Optional[Tuple[Tuple[int, ...], Sequence[List[float]], float, Optional[object]]] = None
+        self._traj_lock = threading.Lock()
         # 找零互斥
         self._homing_lock = threading.Lock()
         # 心跳时间戳
         self._last_idle_keepalive_ts: float = 0.0
         # 终止找零事件
         self._homing_cancel = threading.Event()
+        # 并行找零分组：同组轴机械上互不干涉，可同时找零；组间依次进行，未列入任何组的轴逐个找零
+        self.homing_groups: List[List[int]] = [list(g) for g in (homing_groups or [])]
+        # 运动学模型（笛卡尔目标/路径用），None 时笛卡尔接口不可用
+        self.kinematics = kinematics
+        # 示教录制（start_teach / stop_teach）
+        self._teach: Optional[TeachRecorder] = None
+        # 关节状态估计（estimator 为 ESTIMATOR_CONFIG 中的 kind，None 关闭）：控制节拍每拍从状态表批量更新，
+        # joint_state() 给出任意时刻的位置/速度/加速度；找零回退据此判定到位
+        self.estimator: Optional[StateEstimator] = None
+        if estimator:
+            self.estimator = make_estimator(vesc.table, sorted(axes_cfg), dict(ESTIMATOR_CONFIG, kind=estimator))
 
     # ---------------- 运行与轴控制接口（恢复） ----------------
     def set_axis_target(self, node_id: int, deg: float):
         axis = self.axes.get(node_id)
         if axis is not None:
+            # 手动设定目标即接管该轴：终止包含该轴的同步轨迹
+            run = self._traj_run
+            if run is not None and node_id in run[0]:
+                self.stop_trajectory()
             axis.target_deg_ui = float(deg)
 
     def set_axis_enabled(self, node_id: int, enabled: bool):
@@ -85,12 +182,21 @@ class ArmController:
         # 方向锁由固件侧处理，这里保留占位以兼容 GUI
         return
 
+    def update_axis_config(self, node_id: int, cfg: AxisConfig):
+        """用 cfg 的字段覆盖该轴当前配置（GUI 修改限速/找零参数后调用；控制核心在独立进程时经命令环送达）。"""
+        axis = self.axes.get(node_id)
+        if axis is None:
+            return
+        if cfg is not axis.cfg:
+            for f in dataclasses.fields(AxisConfig):
+                setattr(axis.cfg, f.name, getattr(cfg, f.name))
+        axis.invalidate_stream()
+
     def start(self):
         if self._thread and self._thread.is_alive():
             return
         self._stop.clear()
-        self._thread = threading.Thread(target=self._loop, daemon=True)
-        self._thread.start()
+        self._thread = self.clock.spawn(self._loop, "arm-control")
         self.log.log_info("控制发送循环开始..")
         self.terminal_log.info("ArmController loop started")
 
@@ -98,7 +204,7 @@ class ArmController:
         self._stop.set()
         if self._thread:
             try:
-                self._thread.join(timeout=1.0)
+                self.clock.join(self._thread, timeout_s=1.0)
             except Exception:
                 pass
         self._thread = None
@@ -106,20 +212,270 @@ class ArmController:
         self.terminal_log.info("ArmController loop stopped")
 
     def _loop(self):
-        period = 1.0 / max(1e-3, self.control_rate_hz)
-        while not self._stop.is_set():
-            t0 = time.time()
-            # 周期下发已启用轴的位置命令
-            for axis in self.axes.values():
-                try:
-                    axis.update(self.can_send)
-                except Exception as e:
-                    self.log.log_error(f"轴控制更新错误: {e}")
-                    self.terminal_log.error(f"Axis update error: {e}")
-            # 控制循环节拍
-            dt = time.time() - t0
-            sleep_t = max(0.0, period - dt)
-            time.sleep(sleep_t)
+        self.scheduler.run(self._control_step, self._stop)
+
+    def _control_step(self):
+        if self.estimator is not None:
+            self.estimator.update()
+        # 同步轨迹：按经过时间取当拍的预采样位置作为各轴目标
+        run = self._traj_run
+        if run is not None:
+            ids, rows, t0, _ = run
+            k = int((self.scheduler.clock() - t0) * self.control_rate_hz + 0.5)
+            done = k >= len(rows) - 1
+            if done:
+                k = len(rows) - 1
+            try:
+                row = rows[k]
+            except Exception as e:
+                # 文件回放读取失败（损坏的块、I/O 错误等）：终止轨迹，各轴保持当前目标角
+                self.log.log_error(f"轨迹取样失败，已终止轨迹: {e}")
+                self.terminal_log.error(f"Trajectory sample failed, trajectory stopped: {e}")
+                self._finish_trajectory(run)
+            else:
+                if done:
+                    self._finish_trajectory(run)
+                for nid, q in zip(ids, row):
+                    self.axes[nid].target_deg_ui = q
+        # 周期下发已启用轴的位置命令
+        for axis in self.axes.values():
+            try:
+                axis.update(self.can_send)
+            except Exception as e:
+                self.log.log_error(f"轴控制更新错误: {e}")
+                self.terminal_log.error(f"Axis update error: {e}")
+
+    # ---------------- 同步轨迹 ----------------
+    def move_to(self, goal: Dict[int, float], profile: str = PROFILE_SCURVE,
+                start: Optional[Dict[int, float]] = None) -> Optional[MultiAxisTrajectory]:
+        """
+        多轴同步运动到 goal（node_id -> 度，已按软限位裁剪）：按各轴 AxisConfig 的速度/加速度（/加加速度）上限
+        规划共用一条归一化曲线的轨迹，全部轴同时到达；起点默认取各轴当前目标角。返回轨迹（无可动轴时 None）。
+        """
+        goal = {nid: clamp(float(q), self.axes[nid].cfg.soft_min_deg, self.axes[nid].cfg.soft_max_deg)
+                for nid, q in goal.items() if nid in self.axes}
+        if not goal:
+            return None
+        if start is None:
+            start = {nid: self.axes[nid].target_deg_ui for nid in goal}
+        traj = plan_synchronized(start, goal, self.axes_cfg, profile=profile)
+        self.run_trajectory(traj)
+        return traj
+
+    def follow_path(self, waypoints: Sequence[Sequence[float]], node_ids: Sequence[int],
+                    current_limits: Optional[Dict[int, Tuple[float, float]]] = None) -> Optional[SampledTrajectory]:
+        """
+        以时间最优时间律沿关节路径运动（如 RoboDK 导出或示教记录）：waypoints 每行为 node_ids 顺序的关节角（度），
+        先按软限位裁剪，再由 planner.topp 在各轴速度/加速度（及可选电流）上限下参数化后下发。静止起、静止停。
+        """
+        ids = tuple(nid for nid in node_ids if nid in self.axes)
+        if len(ids) != len(tuple(node_ids)) or not len(waypoints):
+            self.log and self.log.log_warning(f"路径跟随：未知轴或空路径 {list(node_ids)}")
+            return None
+        rows = [[clamp(float(q), self.axes[nid].cfg.soft_min_deg, self.axes[nid].cfg.soft_max_deg)
+                 for nid, q in zip(ids, row)] for row in waypoints]
+        traj = topp(rows, ids, self.axes_cfg, current_limits=current_limits)
+        self.run_trajectory(traj)
+        return traj
+
+    # ---------------- 笛卡尔运动 ----------------
+    def _joint_vector(self) -> Optional[np.ndarray]:
+        kin = self.kinematics
+        if kin is None or any(nid not in self.axes for nid in kin.node_ids):
+            self.log and self.log.log_error("未配置运动学模型或模型轴不在控制器中")
+            return None
+        return np.array([self.axes[nid].target_deg_ui for nid in kin.node_ids])
+
+    def current_pose(self) -> Optional[np.ndarray]:
+        """按各轴当前目标角正解得到的 TCP 位姿（4x4，mm）。"""
+        q = self._joint_vector()
+        return None if q is None else self.kinematics.fk(q)[0]
+
+    def move_to_pose(self, target, profile: str = PROFILE_SCURVE) -> Optional[MultiAxisTrajectory]:
+        """
+        关节空间运动到笛卡尔目标（4x4 位姿、[x, y, z, rx, ry, rz] 或仅位置 [x, y, z]）：
+        以当前目标角为初值逆解，再按 move_to 同步规划。逆解失败返回 None。
+        """
+        q0 = self._joint_vector()
+        if q0 is None:
+            return None
+        q, ok = self.kinematics.ik(target, q0)
+        if not ok[0]:
+            self.log and self.log.log_error(f"逆解失败：{np.asarray(target).tolist()}")
+            return None
+        return self.move_to(dict(zip(self.kinematics.node_ids, q[0].tolist())), profile=profile)
+
+    def move_linear(self, target, step_mm: float = 2.0, step_deg: float = 1.0) -> Optional[SampledTrajectory]:
+        """TCP 直线运动到目标位姿：按 step_mm / step_deg 插值笛卡尔路径，批量逆解后以 follow_path 时间最优执行。"""
+        q0 = self._joint_vector()
+        if q0 is None:
+            return None
+        kin = self.kinematics
+        T0 = kin.fk(q0)[0]
+        T1, has_rot = as_poses(target)
+        T1 = T1[0]
+        if not has_rot:
+            T1[:3, :3] = T0[:3, :3]
+        dist = float(np.linalg.norm(T1[:3, 3] - T0[:3, 3]))
+        ang = float(np.degrees(np.arccos(np.clip((np.trace(T0[:3, :3].T @ T1[:3, :3]) - 1.0) / 2.0, -1.0, 1.0))))
+        n = int(max(dist / max(step_mm, 1e-6), ang / max(step_deg, 1e-6))) + 2
+        return self.follow_cartesian_path(interpolate_poses(T0, T1, n))
+
+    def follow_cartesian_path(self, targets) -> Optional[SampledTrajectory]:
+        """沿笛卡尔路径运动（每点为 as_poses 支持的形式）：逐段保持构型连续地批量逆解，再以 follow_path 执行。"""
+        q0 = self._joint_vector()
+        if q0 is None:
+            return None
+        kin = self.kinematics
+        q, ok = kin.ik_path(targets, q0)
+        if not np.all(ok):
+            bad = int(np.argmin(ok))
+            self.log and self.log.log_error(f"笛卡尔路径第 {bad} 点逆解失败或关节跳变过大，未执行")
+            return None
+        return self.follow_path(np.vstack([q0, q]), kin.node_ids)
+
+    def play_file(self, path: str) -> Optional[Dict[str, object]]:
+        """
+        回放 .ctraj 轨迹文件（见 planner.trajfile / planner.robodk_convert）：文件以内存映射打开，
+        控制节拍每拍只读取当拍所需的两行并插值到控制频率、按软限位裁剪，长程序也无需整体载入。
+        文件由控制器持有并在回放结束/被替换/终止时关闭；返回文件信息（路径/轴/样本数/频率/时长），失败时 None。
+        """
+        try:
+            f = TrajectoryFile(path)
+        except (OSError, ValueError) as e:
+            self.log and self.log.log_error(f"轨迹文件打开失败: {e}")
+            self.terminal_log.error(f"Trajectory file open failed: {e}")
+            return None
+        missing = [nid for nid in f.node_ids if nid not in self.axes]
+        if missing or not len(f):
+            self.log and self.log.log_warning(f"轨迹文件轴 {missing} 不存在或文件为空：{path}")
+            f.close()
+            return None
+        cfgs = [self.axes[nid].cfg for nid in f.node_ids]
+        rows = f.rows(self.control_rate_hz, [c.soft_min_deg for c in cfgs], [c.soft_max_deg for c in cfgs])
+        info = {"path": path, "axes": list(f.node_ids), "samples": len(f), "rate_hz": f.rate_hz,
+                "duration_s": f.duration}
+        self._set_trajectory((f.node_ids, rows, self.scheduler.clock(), f))
+        self.terminal_log.info(f"Trajectory file started: {path}, axes {info['axes']}, {info['duration_s']:.3f}s")
+        return info
+
+    # ---------------- 示教 ----------------
+    def start_teach(self, path: str, node_ids: Optional[Iterable[int]] = None, current: bool = False,
+                    velocity: bool = False) -> bool:
+        """
+        开始示教录制到 path（.cteach，见 planner.teachfile）：按状态帧频率记录 node_ids（默认全部轴）的位置，
+        可选电流与角速度。只观察不下发，拖动示教或手动点动期间均可录制；已在录制时先结束上一段。
+        """
+        self.stop_teach()
+        ids = sorted(self.axes) if node_ids is None else [nid for nid in node_ids if nid in self.axes]
+        if not ids:
+            self.log and self.log.log_warning("示教录制：没有可录制的轴")
+            return False
+        try:
+            self._teach = TeachRecorder(self.vesc, path, ids, current=current, velocity=velocity)
+        except OSError as e:
+            self.log and self.log.log_error(f"示教文件创建失败: {e}")
+            self.terminal_log.error(f"Teach file create failed: {e}")
+            return False
+        self.log and self.log.log_info(f"开始示教录制：轴 {ids} -> {path}")
+        self.terminal_log.info(f"Teach recording started: {path}, axes {ids}")
+        return True
+
+    def stop_teach(self) -> Optional[Dict[str, object]]:
+        """结束示教录制，返回统计（路径/轴/样本数/块数/时长）；未在录制时返回 None。"""
+        rec, self._teach = self._teach, None
+        if rec is None:
+            return None
+        st = rec.close()
+        self.log and self.log.log_success(f"示教录制结束：{st['samples']} 个样本，{st['duration_s']:.1f}s")
+        return st
+
+    @property
+    def teach_active(self) -> bool:
+        return self._teach is not None
+
+    def play_teach(self, path: str, speed: float = 1.0) -> Optional[Dict[str, object]]:
+        """
+        回放示教记录：由控制节拍按经过时间（× speed）逐拍插值各轴位置并按软限位裁剪后下发，块在取用时才解压，
+        数小时的记录也无需整体载入。与 play_file 一样替换正在执行的轨迹，目标首点由固件限速限加速度趋近；
+        文件由控制器持有并在回放结束/被替换/终止时关闭。返回回放信息（路径/轴/样本数/倍速/时长），失败时 None。
+        """
+        try:
+            f = TeachFile(path)
+        except (OSError, ValueError) as e:
+            self.log and self.log.log_error(f"示教文件打开失败: {e}")
+            self.terminal_log.error(f"Teach file open failed: {e}")
+            return None
+        missing = [nid for nid in f.node_ids if nid not in self.axes]
+        if missing or not len(f):
+            self.log and self.log.log_warning(f"示教文件轴 {missing} 不存在或文件为空：{path}")
+            f.close()
+            return None
+        rows = f.rows(self.control_rate_hz, speed=speed)
+        cfgs = [self.axes[nid].cfg for nid in rows.node_ids]
+        rows.lo = [c.soft_min_deg for c in cfgs]
+        rows.hi = [c.soft_max_deg for c in cfgs]
+        info = {"path": path, "axes": list(rows.node_ids), "samples": len(f), "speed": speed,
+                "duration_s": f.duration / max(speed, 1e-6)}
+        self._set_trajectory((rows.node_ids, rows, self.scheduler.clock(), f))
+        self.terminal_log.info(f"Teach replay started: {path}, axes {info['axes']}, {info['duration_s']:.3f}s")
+        return info
+
+    def run_trajectory(self, traj: Union[MultiAxisTrajectory, SampledTrajectory]):
+        """按控制频率一次性采样整条轨迹，由控制节拍逐拍下发（替换正在执行的轨迹）。"""
+        rows = traj.sample_uniform(self.control_rate_hz)[1].tolist()
+        self._set_trajectory((traj.node_ids, rows, self.scheduler.clock(), None))
+        self.terminal_log.info(f"Trajectory started: axes {list(traj.node_ids)}, {traj.duration:.3f}s")
+
+    def stop_trajectory(self):
+        """终止同步轨迹：各轴保持在当前目标角。"""
+        self._set_trajectory(None)
+
+    def _set_trajectory(self, run):
+        """替换轨迹执行槽；被替换的轨迹若来自文件回放则关闭该文件（控制节拍仍在读取的行视图由文件延后到释放时关闭）。"""
+        with self._traj_lock:
+            old, self._traj_run = self._traj_run, run
+        if old is not None and old[3] is not None:
+            old[3].close()
+
+    def _finish_trajectory(self, run):
+        """控制节拍中 run 已结束：执行槽仍为 run 时清空并关闭其文件；已被其它线程替换时由替换方负责关闭。"""
+        with self._traj_lock:
+            if self._traj_run is not run:
+                return
+            self._traj_run = None
+        if run[3] is not None:
+            run[3].close()
+
+    @property
+    def trajectory_active(self) -> bool:
+        return self._traj_run is not None
+
+    def joint_state(self, node_id: int, t: Optional[float] = None) -> Optional[Tuple[float, float, float]]:
+        """
+        该轴在时刻 t（默认当前，self.clock 时基）的估计 (位置 度, 速度 度/秒, 加速度 度/秒²)：
+        由最新状态外推，分辨率不受 1/50 度量化与状态帧间隔限制。未启用估计或尚无样本时为 None。
+        """
+        if self.estimator is None:
+            return None
+        self.estimator.update()
+        return self.estimator.state(node_id, self.clock() if t is None else t)
+
+    def _backoff_settled(self, node_id: int, target_deg: float, cfg: dict) -> bool:
+        """找零回退是否已到位：估计位置距 target_deg 与估计速度均在 backoff_settle_* 容差内（未启用估计时恒为 False）。"""
+        if self.estimator is None:
+            return False
+        self.estimator.update()
+        st = self.estimator.state(node_id)
+        return (st is not None and abs(st[0] - target_deg) <= float(cfg.get("backoff_settle_deg", 0.2))
+                and abs(st[1]) <= float(cfg.get("backoff_settle_dps", 2.0)))
+
+    def get_loop_stats(self, with_counts: bool = False) -> Dict[str, object]:
+        """控制节拍统计（微秒）：tick_period / jitter / compute 直方图摘要及超时、跳拍计数。"""
+        return self.scheduler.stats(with_counts)
+
+    def reset_loop_stats(self):
+        self.scheduler.reset_stats()
 
     # ---------------- 实用方法 ----------------
     def _resolve_axis_cfg(self, node_id: int, cfg: Optional[dict]) -> dict:
@@ -140,6 +496,7 @@ class ArmController:
         set_if("current_a", ac.homing_current_a)
         set_if("current_threshold_a", ac.homing_current_threshold_a)
         set_if("collision_dwell_s", ac.homing_collision_dwell_s)
+        set_if("detector", ac.homing_detector)
         set_if("timeout_s", ac.homing_timeout_s)
         set_if("backoff_deg", ac.homing_backoff_deg)
         set_if("backoff_rpm", ac.homing_backoff_rpm)
@@ -148,37 +505,56 @@ class ArmController:
         set_if("send_idle_keepalive", ac.homing_send_idle_keepalive)
         return base
 
-    def _keepalive_idle_axes(self, exclude_id: int, cmd_period: float, force: bool = False):
+    def _keepalive_idle_axes(self, exclude_id: Optional[int], cmd_period: float, force: bool = False,
+                             exclude_ids: Collection[int] = ()):
         """为未启用的其它轴发送 rpm=0 作为心跳，避免VESC超时。不会干扰已启用轴的正常位置控制。"""
-        now = time.time()
-        if not force and (now - self._last_idle_keepalive_ts) < cmd_period:
+        now = self.clock()
+        period = cmd_period if self.stream_keepalive_s is None else max(cmd_period, self.stream_keepalive_s)
+        if not force and (now - self._last_idle_keepalive_ts) < period:
             return
         for nid, axis in self.axes.items():
-            if nid == exclude_id:
+            if nid == exclude_id or nid in exclude_ids:
                 continue
             if not axis.enabled:
                 try:
-                    self._send_rpm(nid, 0.0)
-                except Exception:
-                    pass
+                    frame = self._idle_frames.get(nid)
+                    if frame is None:
+                        frame = self._idle_frames[nid] = self._rpm_frame(nid, 0.0)
+                    # 心跳为低优先级：总线预算紧张时可被延后，不挤占控制帧
+                    self._send_frame(*frame, TX_PRIORITY_LOW)
+                except Exception as e:
+                    self.terminal_log.warning(f"Idle keepalive to node {nid} failed: {e}")
         self._last_idle_keepalive_ts = now
 
     # ---------------- 低层发送 ----------------
+    def _send_frame(self, arb_id: int, payload: bytes, ext: bool, priority: int = TX_PRIORITY_HIGH):
+        if priority == TX_PRIORITY_HIGH or not self._send_has_priority:
+            self.can_send(arb_id, payload, ext)
+        else:
+            self.can_send(arb_id, payload, ext, priority)
+
     def _send_current(self, node_id: int, current_a: float):
         data = self.vesc.encode_set_current(current_a)
         arb_id, payload, ext = self.vesc.build_frame(self.vesc.CAN_PACKET_SET_CURRENT, node_id, data)
         self.can_send(arb_id, payload, ext)
+        axis = self.axes.get(node_id)
+        if axis is not None:
+            axis.invalidate_stream()
+
+    def _rpm_frame(self, node_id: int, rpm: float) -> Tuple[int, bytes, bool]:
+        cfg = self.axes[node_id].cfg
+        erpm = rpm * cfg.reduction_ratio * cfg.motor_poles_pairs
+        data = self.vesc.encode_set_erpm(erpm)
+        return self.vesc.build_frame(self.vesc.CAN_PACKET_SET_RPM, node_id, data)
 
-    def _send_rpm(self, node_id: int, rpm: float):
+    def _send_rpm(self, node_id: int, rpm: float, priority: int = TX_PRIORITY_HIGH):
         """
         发送速度模式：rpm 为关节最终机械转速（RPM）。
         与 VESC 通信时自动换算为 ERPM：ERPM = joint_rpm * reduction_ratio * pole_pairs。
         """
-        cfg = self.axes[node_id].cfg
-        erpm = rpm * cfg.reduction_ratio * cfg.motor_poles_pairs
-        data = self.vesc.encode_set_erpm(erpm)
-        arb_id, payload, ext = self.vesc.build_frame(self.vesc.CAN_PACKET_SET_RPM, node_id, data)
-        self.can_send(arb_id, payload, ext)
+        arb_id, payload, ext = self._rpm_frame(node_id, rpm)
+        self._send_frame(arb_id, payload, ext, priority)
+        self.axes[node_id].invalidate_stream()
 
     def _stop_axis_motion(self, node_id: int):
         # 通过设置0转速（或0电流）停止
@@ -189,198 +565,122 @@ class ArmController:
             pass
 
     # ---------------- 找零（Homing） ----------------
-    def home_axis(self, node_id: int, cfg: Optional[dict] = None):
+    def home_axis(self, node_id: int, cfg: Optional[dict] = None) -> bool:
         """
-        基于电流/转速的机械限位碰撞检测找零。
+        基于电流/转速的机械限位碰撞检测找零（单轴组，流程见 HomingJob / home_group）。
         找零期间持续发送控制心跳；支持每轴独立配置（方向/模式等）。
-        启动找零时禁用所有轴，结束后恢复原使能状态；支持外部取消。
+        启动找零时禁用所有轴，结束后恢复原使能状态；支持外部取消。返回是否找零成功。
         """
-        cfg = self._resolve_axis_cfg(node_id, cfg or HOMING_CONFIG)
-        mode = cfg.get("mode", "rpm")  # "rpm" / "current"
-        move_dir = float(cfg.get("move_direction", -1))  # -1或+1
-        rpm_val = float(cfg.get("rpm", 300.0))
-        cur_cmd = float(cfg.get("current_a", 2.0))
-        cur_th = float(cfg.get("current_threshold_a", 6.0))
-        dwell_s = float(cfg.get("collision_dwell_s", 0.08))
-        timeout_s = float(cfg.get("timeout_s", 8.0))
-        backoff_deg = float(cfg.get("backoff_deg", 5.0))
-        backoff_rpm = float(cfg.get("backoff_rpm", 200.0))
-        sample_dt = float(cfg.get("sample_period_s", 0.01))
-        cmd_period = float(cfg.get("command_period_s", 0.05))  # 心跳周期
-        send_idle_keepalive = bool(cfg.get("send_idle_keepalive", True))
-
         if node_id not in self.axes:
             self.log.log_error("错误：未知轴ID")
             self.terminal_log.error(f"Unknown axis {node_id}")
-            return
-        axis = self.axes[node_id]
+            return False
+        return self.home_group([node_id], cfg).get(node_id, False)
+
+    def home_all(self, cfg: Optional[dict] = None, groups: Optional[Sequence[Iterable[int]]] = None):
+        """
+        全轴找零。groups（默认 self.homing_groups）中每组并行找零、组间依次进行；
+        未分组的轴（及未配置分组时的全部轴）按 node_id 顺序逐个找零。
+        """
+        if cfg is None:
+            cfg = HOMING_CONFIG
+        for batch in self._homing_batches(groups):
+            if self._homing_cancel.is_set():
+                self.log.log_warning("找零取消，停止批量找零")
+                self.terminal_log.warning("Homing canceled; stop batch")
+                break
+            try:
+                self.home_group(batch, cfg)
+            except Exception as e:
+                self.log.log_error(f"轴 {batch} 找零失败: {e}")
+                self.terminal_log.error(f"Homing failed on axes {batch}: {e}")
+                continue
+
+    def _homing_batches(self, groups: Optional[Sequence[Iterable[int]]]) -> List[List[int]]:
+        groups = self.homing_groups if groups is None else [list(g) for g in groups]
+        batches: List[List[int]] = []
+        seen = set()
+        for g in groups:
+            batch = [nid for nid in g if nid in self.axes and nid not in seen]
+            seen.update(batch)
+            if batch:
+                batches.append(batch)
+        batches.extend([nid] for nid in sorted(self.axes.keys()) if nid not in seen)
+        return batches
+
+    def home_group(self, node_ids: Iterable[int], cfg: Optional[dict] = None) -> Dict[int, bool]:
+        """
+        并行找零：组内每轴一个 HomingJob（各自的碰撞检测、心跳与回退状态），由本线程的同一循环驱动；
+        任一组内轴的电流帧到达即唤醒。期间禁用所有轴、支持取消、结束后恢复使能状态（单轴找零即一轴的组）。
+        返回 node_id -> 是否找零成功。
+        """
+        node_ids = [nid for nid in node_ids if nid in self.axes]
+        if not node_ids:
+            self.log.log_error("错误：未知轴ID")
+            self.terminal_log.error("Unknown axes for group homing")
+            return {}
+        base_cfg = cfg or HOMING_CONFIG
+        cfgs = {nid: self._resolve_axis_cfg(nid, base_cfg) for nid in node_ids}
+        send_idle_keepalive = any(bool(c.get("send_idle_keepalive", True)) for c in cfgs.values())
+        cmd_period = min(float(c.get("command_period_s", 0.05)) for c in cfgs.values())
+        results: Dict[int, bool] = {nid: False for nid in node_ids}
 
         with self._homing_lock:
-            # 清除取消标志
             self._homing_cancel.clear()
-            # 记录并禁用所有轴
             prev_enabled_map = {nid: ax.enabled for nid, ax in self.axes.items()}
             for nid, ax in self.axes.items():
                 ax.enabled = False
                 self._stop_axis_motion(nid)
-            time.sleep(0.02)
-
+            self.clock.sleep(0.02)
+            wake = threading.Event()
+            watches = [self.vesc.watch(nid, ["current_motor"], event=wake) for nid in node_ids]
+            jobs: List[HomingJob] = []
             try:
-                # 若收到取消，直接退出
                 if self._homing_cancel.is_set():
                     self.log.log_info("找零取消于启动前")
                     self.terminal_log.info("Homing canceled before start")
-                    return
-
-                # 起动 + 初次发送
-                if mode == "rpm":
-                    self._send_rpm(node_id, move_dir * rpm_val)
-                elif mode == "current":
-                    self._send_current(node_id, move_dir * cur_cmd)
-                else:
-                    self.log.log_error("找零模式必须为 'rpm' 或 'current'")
-                    self.terminal_log.error("Homing mode must be 'rpm' or 'current'")
-                    return
-                last_cmd_ts = 0.0
-
-                # 监测碰撞（期间保持心跳）
-                t0 = time.time()
-                over_ts: Optional[float] = None
-                collided = False
+                    return results
+                now = self.clock()
+                jobs = [HomingJob(self, nid, cfgs[nid], now) for nid in node_ids]
+                self.log.log_info(f"轴 {node_ids} 找零开始")
+                self.terminal_log.info(f"Homing started: axes {node_ids}")
                 while True:
-                    # 取消检查
                     if self._homing_cancel.is_set():
-                        self.log.log_warning(f"轴 {node_id} 找零取消，停止中")
-                        self.terminal_log.warning(f"Axis {node_id} homing canceled, stopping")
-                        return
-                    # 主轴心跳
-                    now = time.time()
-                    if now - last_cmd_ts >= cmd_period:
-                        if mode == "rpm":
-                            self._send_rpm(node_id, move_dir * rpm_val)
-                        else:
-                            self._send_current(node_id, move_dir * cur_cmd)
-                        last_cmd_ts = now
-                    # 空闲轴心跳（rpm=0，仅对未启用轴）
+                        for job in jobs:
+                            job.cancel()
+                        self.log.log_warning(f"轴 {node_ids} 找零取消，停止中")
+                        self.terminal_log.warning(f"Axes {node_ids} homing canceled, stopping")
+                        break
+                    now = self.clock()
+                    active = [job for job in jobs if not job.finished]
+                    if not active:
+                        break
+                    for job in active:
+                        job.step(now)
                     if send_idle_keepalive:
-                        self._keepalive_idle_axes(exclude_id=node_id, cmd_period=cmd_period)
-
-                    if now - t0 > timeout_s:
-                        # 超时：不抛异常，安全停止并返回
-                        self.log.log_error(f"轴 {node_id} 找零超时，停止轴并退出找零")
-                        self.terminal_log.error(f"Axis {node_id} homing timeout, stop axis and exit homing")
-                        return
-
-                    st = self._wait_state(
-                        node_id,
-                        timeout_s=0.1,
-                        require_fields=["current_motor"],
-                        keepalive=(
-                            (lambda: self._send_rpm(node_id, move_dir * rpm_val))
-                            if mode == "rpm"
-                            else (lambda: self._send_current(node_id, move_dir * cur_cmd))
-                        ),
-                        keepalive_period_s=cmd_period,
-                    )
-                    # 离线直接退出
-                    # if self.vesc.with_state(node_id) is None:
-                    #     self.log and self.log.log_warning(f"轴 {node_id} 离线，终止找零")
-                    #     self._stop_axis_motion(node_id)
-                    #     return
-                    if not st or st.current_motor is None:
-                        time.sleep(min(sample_dt, cmd_period))
-                        continue
-
-                    if abs(st.current_motor) >= cur_th:
-                        if over_ts is None:
-                            over_ts = time.time()
-                        elif time.time() - over_ts >= dwell_s:
-                            # 确认碰撞
-                            collided = True
-                            break
-                    else:
-                        over_ts = None
-                    time.sleep(min(sample_dt, cmd_period))
-
-                # 若未检测到碰撞（例如手动停或未达阈值），或取消，直接退出并停轴
-                if not collided or self._homing_cancel.is_set():
-                    self._stop_axis_motion(node_id)
-                    return
-
-                # 停止并记录零点（仅在已碰撞时执行）
-                # self._stop_axis_motion(node_id)
-                self._send_rpm(node_id, 0.0)
-                # 读取当前角度，通知VESC将其应用为零点（由固件更新PID位置偏置）
-                st = self.vesc.get_state(node_id)
-                if st and st.pos_deg is not None:
-                    pos_deg_now = st.pos_deg
-                else:
-                    pos_deg_now = 0.0
-                try:
-                    data = self.vesc.encode_update_pid_pos_offset(0.0)
-                    time.sleep(0.01)
-                    arb, payload, ext = self.vesc.build_frame(self.vesc.CAN_PACKET_UPDATE_PID_POS_OFFSET, node_id, data)
-                    self.can_send(arb, payload, ext)
-                    self.log and self.log.log_info(f"轴 {node_id} 已将当前角度 {pos_deg_now:.2f}° 应用为零点(固件侧)")
-                    self.terminal_log.info(f"Axis {node_id} apply current angle as zero via PID offset")
-                except Exception as e:
-                    self.log and self.log.log_error(f"轴 {node_id} 应用零点失败: {e}")
-                    self.terminal_log.error(f"Apply zero via PID offset failed: {e}")
-                self._stop_axis_motion(node_id)
-                # 应用层不再维护零点偏移，置标记即可
-                axis.homed = True
-
-                # 取消检查
-                if self._homing_cancel.is_set():
-                    return
-
-                # 回退阶段：持续发送位置命令（心跳）
-                target_deg = -move_dir * backoff_deg
-                # 估算到位时间：deg/s = RPM * 6
-                deg_per_s_est = max(1e-6, self.axes[node_id].cfg.max_vel_dps if self.axes[node_id].cfg.max_vel_dps is not None else 90.0)
-                end_ts = time.time() + max(0.2, (backoff_deg / deg_per_s_est)) + 1.0
-                last_pos_ts = 0.0
-                self.log.log_info(f"轴 {node_id} 开始回退")
-                while time.time() < end_ts:
-                    if self._homing_cancel.is_set():
-                        self.log.log_warning(f"轴 {node_id} 找零取消于回退阶段")
-                        self.terminal_log.warning(f"Axis {node_id} homing canceled during backoff")
-                        return
-                    now2 = time.time()
-                    if now2 - last_pos_ts >= cmd_period:
-                        axis.send_joint_deg(target_deg, self.can_send)
-                        last_pos_ts = now2
-                    if send_idle_keepalive:
-                        self._keepalive_idle_axes(exclude_id=node_id, cmd_period=cmd_period)
-                    time.sleep(0.005)
-
+                        self._keepalive_idle_axes(None, cmd_period, exclude_ids=node_ids)
+                    wake_at = min((job.next_wake(now) for job in active if not job.finished), default=now)
+                    self.clock.wait(wake, max(0.0, wake_at - self.clock()))
+                    wake.clear()
             finally:
-                # 停止一切力矩/速度输出
+                for w in watches:
+                    self.vesc.unwatch(w)
                 for nid in self.axes.keys():
                     self._stop_axis_motion(nid)
-                # 恢复之前各轴的使能状态
                 for nid, was_enabled in prev_enabled_map.items():
                     ax = self.axes.get(nid)
                     if ax is not None:
                         ax.enabled = was_enabled
 
-            self.log.log_success(f"轴 {node_id} 找零成功")
-            self.terminal_log.info(f"Axis {node_id} homed. offset={axis.zero_abs_deg:.2f}deg")
+        self._report_homing(jobs, results)
+        return results
 
-    def home_all(self, cfg: Optional[dict] = None):
-        if cfg is None:
-            cfg = HOMING_CONFIG
-        for nid in sorted(self.axes.keys()):
-            if self._homing_cancel.is_set():
-                self.log.log_warning("找零取消，停止批量找零")
-                self.terminal_log.warning("Homing canceled; stop batch")
-                break
-            try:
-                self.home_axis(nid, cfg)
-            except Exception as e:
-                self.log.log_error(f"轴 {nid} 找零失败: {e}")
-                self.terminal_log.error(f"Homing failed on axis {nid}: {e}")
-                continue
+    def _report_homing(self, jobs: List[HomingJob], results: Dict[int, bool]):
+        for job in jobs:
+            results[job.node_id] = job.state == DONE
+            if job.state == DONE:
+                self.log.log_success(f"轴 {job.node_id} 找零成功")
+                self.terminal_log.info(f"Axis {job.node_id} homed. offset={job.axis.zero_abs_deg:.2f}deg")
 
     def cancel_homing(self):
         """外部终止找零：置位取消标志并立刻发送停止指令。"""
@@ -391,42 +691,3 @@ class ArmController:
             except Exception:
                 pass
         self.terminal_log.info("Homing cancel requested")
-
-    # ---------------- 等待状态 ----------------
-    def _wait_state(
-        self,
-        node_id: int,
-        timeout_s: float,
-        require_fields: Optional[list[str]] = None,
-        keepalive: Optional[Callable[[], None]] = None,
-        keepalive_period_s: float = 0.05,
-    ) -> Optional[MotorState]:
-        """
-        轮询等待指定轴的状态更新。
-        - require_fields: 需要非 None 的字段名列表（如 ["current_motor", "pos_deg"]），满足任一即可返回；
-          若为 None 则只要拿到状态对象即可返回。
-        - keepalive: 等待期间周期调用的心跳回调，确保控制指令不断流（如 rpm/current 或 pos 指令）。
-        - keepalive_period_s: 心跳调用周期。
-        """
-        t0 = time.time()
-        last_k = 0.0
-        while time.time() - t0 < timeout_s:
-            st = self.vesc.get_state(node_id)
-            if st is not None:
-                if not require_fields:
-                    return st
-                for f in require_fields:
-                    if getattr(st, f, None) is not None:
-                        return st
-            
-            # 心跳维持
-            if keepalive is not None:
-                now = time.time()
-                if now - last_k >= keepalive_period_s:
-                    try:
-                        keepalive()
-                    except Exception:
-                        pass
-                    last_k = now
-            time.sleep(0.005)
-        return self.vesc.get_state(node_id)
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from config.arm_config import AxisConfig
+from config.settings import HOMING_CONFIG
+from control.arm_controller import ArmController, CanSend
+from control.homing import HomingJob, DONE
+from control.scheduler import OVERRUN_SKIP
+from hardware.vesc_can import StateWatch, VescCAN
+from planner.kinematics import SerialArm
+from utils.aio_utils import LoopThread
+from utils.log_utils import LoggerTool
+
+
+class AsyncStateWatch(StateWatch):
+    """
+    StateWatch 的 asyncio 版本，须在事件循环内创建。AsyncCANInterface 在循环线程中解码并直接 set()；
+    其它线程（如离线监视线程的 reset_state）经 call_soon_threadsafe 转投。
+    """
+    __slots__ = ("_loop", "_loop_tid")
+
+    def __init__(self, node_id: int, fields=None, event: Optional[asyncio.Event] = None):
+        super().__init__(node_id, fields)
+        self._event = event if event is not None else asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._loop_tid = threading.get_ident()
+
+    def set(self):
+        if threading.get_ident() == self._loop_tid:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout_s: float) -> bool:
+        fired = self._event.is_set()
+        if not fired and timeout_s > 0:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout_s)
+                fired = True
+            except asyncio.TimeoutError:
+                pass
+        self._event.clear()
+        return fired
+
+
+class AsyncArmController(ArmController):
+    """
+    ArmController 的 asyncio 版本：控制节拍与找零都是同一事件循环上的任务。
+    - 控制节拍按 loop.time() 的绝对截止时间调度，不随单次计算耗时漂移；
+    - 等待状态/碰撞检测由 VescCAN 按节点/字段直接唤醒（AsyncStateWatch），而非固定 5 ms 轮询；
+    - 对 GUI 保持同步接口：start/stop/home_axis/home_all 从其它线程调用时投递到循环并等待完成。
+    """
+    def __init__(self, axes_cfg: Dict[int, AxisConfig], vesc: VescCAN, can_send: CanSend,
+                 runtime: LoopThread, control_rate_hz: float = 50.0, logger: LoggerTool = None,
+                 overrun_policy: str = OVERRUN_SKIP, stream_keepalive_s: Optional[float] = None,
+                 homing_groups: Optional[Sequence[Iterable[int]]] = None,
+                 kinematics: Optional[SerialArm] = None, estimator: Optional[str] = None):
+        # 事件循环内不忙等，spin 固定为 0
+        super().__init__(axes_cfg, vesc, can_send, control_rate_hz=control_rate_hz, logger=logger,
+                         overrun_policy=overrun_policy, stream_keepalive_s=stream_keepalive_s,
+                         homing_groups=homing_groups, kinematics=kinematics, estimator=estimator)
+        self.runtime = runtime
+        self._loop_task: Optional[asyncio.Task] = None
+        self._homing_lock_async = asyncio.Lock()
+
+    # ---------------- 控制循环 ----------------
+    def start(self):
+        self.runtime.start()
+        self.runtime.run(self.start_async())
+
+    def stop(self):
+        if not self.runtime.is_running():
+            return
+        self.runtime.run(self.stop_async())
+
+    async def start_async(self):
+        if self._loop_task and not self._loop_task.done():
+            return
+        self._stop.clear()
+        self._loop_task = asyncio.get_running_loop().create_task(self._loop_async())
+        self.log.log_info("控制发送循环开始..")
+        self.terminal_log.info("AsyncArmController loop started")
+
+    async def stop_async(self):
+        self._stop.set()
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._loop_task = None
+        self.log.log_info("控制发送循环停止")
+        self.terminal_log.info("AsyncArmController loop stopped")
+
+    async def _loop_async(self):
+        loop = asyncio.get_running_loop()
+        sched = self.scheduler
+        sched.clock = loop.time
+        sched.reset()
+        while not self._stop.is_set():
+            sched.tick_started()
+            self._control_step()
+            sched.tick_finished()
+            await asyncio.sleep(sched.delay())
+
+    # ---------------- 找零（Homing） ----------------
+    def home_axis(self, node_id: int, cfg: Optional[dict] = None) -> bool:
+        self.runtime.start()
+        return self.runtime.run(self.home_axis_async(node_id, cfg))
+
+    def home_all(self, cfg: Optional[dict] = None, groups: Optional[Sequence[Iterable[int]]] = None):
+        self.runtime.start()
+        self.runtime.run(self.home_all_async(cfg, groups))
+
+    def home_group(self, node_ids: Iterable[int], cfg: Optional[dict] = None) -> Dict[int, bool]:
+        self.runtime.start()
+        return self.runtime.run(self.home_group_async(list(node_ids), cfg))
+
+    async def home_axis_async(self, node_id: int, cfg: Optional[dict] = None) -> bool:
+        """与 ArmController.home_axis 相同：单轴组的 home_group_async。"""
+        if node_id not in self.axes:
+            self.log.log_error("错误：未知轴ID")
+            self.terminal_log.error(f"Unknown axis {node_id}")
+            return False
+        return (await self.home_group_async([node_id], cfg)).get(node_id, False)
+
+    async def home_all_async(self, cfg: Optional[dict] = None, groups: Optional[Sequence[Iterable[int]]] = None):
+        if cfg is None:
+            cfg = HOMING_CONFIG
+        for batch in self._homing_batches(groups):
+            if self._homing_cancel.is_set():
+                self.log.log_warning("找零取消，停止批量找零")
+                self.terminal_log.warning("Homing canceled; stop batch")
+                break
+            try:
+                await self.home_group_async(batch, cfg)
+            except Exception as e:
+                self.log.log_error(f"轴 {batch} 找零失败: {e}")
+                self.terminal_log.error(f"Homing failed on axes {batch}: {e}")
+                continue
+
+    async def home_group_async(self, node_ids: Iterable[int], cfg: Optional[dict] = None) -> Dict[int, bool]:
+        """与 ArmController.home_group 相同：组内各轴的 HomingJob 由本任务交替驱动，以 loop.time() 计时。"""
+        node_ids = [nid for nid in node_ids if nid in self.axes]
+        if not node_ids:
+            self.log.log_error("错误：未知轴ID")
+            self.terminal_log.error("Unknown axes for group homing")
+            return {}
+        base_cfg = cfg or HOMING_CONFIG
+        cfgs = {nid: self._resolve_axis_cfg(nid, base_cfg) for nid in node_ids}
+        send_idle_keepalive = any(bool(c.get("send_idle_keepalive", True)) for c in cfgs.values())
+        cmd_period = min(float(c.get("command_period_s", 0.05)) for c in cfgs.values())
+        results: Dict[int, bool] = {nid: False for nid in node_ids}
+        loop = asyncio.get_running_loop()
+
+        async with self._homing_lock_async:
+            self._homing_cancel.clear()
+            prev_enabled_map = {nid: ax.enabled for nid, ax in self.axes.items()}
+            for nid, ax in self.axes.items():
+                ax.enabled = False
+                self._stop_axis_motion(nid)
+            await asyncio.sleep(0.02)
+            wake = asyncio.Event()
+            watches = [self.vesc.add_watch(AsyncStateWatch(nid, ["current_motor"], event=wake)) for nid in node_ids]
+            jobs: List[HomingJob] = []
+            try:
+                if self._homing_cancel.is_set():
+                    self.log.log_info("找零取消于启动前")
+                    self.terminal_log.info("Homing canceled before start")
+                    return results
+                now = loop.time()
+                jobs = [HomingJob(self, nid, cfgs[nid], now) for nid in node_ids]
+                self.log.log_info(f"轴 {node_ids} 找零开始")
+                self.terminal_log.info(f"Homing started: axes {node_ids}")
+                while True:
+                    if self._homing_cancel.is_set():
+                        for job in jobs:
+                            job.cancel()
+                        self.log.log_warning(f"轴 {node_ids} 找零取消，停止中")
+                        self.terminal_log.warning(f"Axes {node_ids} homing canceled, stopping")
+                        break
+                    now = loop.time()
+                    active = [job for job in jobs if not job.finished]
+                    if not active:
+                        break
+                    for job in active:
+                        job.step(now)
+                    if send_idle_keepalive:
+                        self._keepalive_idle_axes(None, cmd_period, exclude_ids=node_ids)
+                    wake_at = min((job.next_wake(now) for job in active if not job.finished), default=now)
+                    await watches[0].wait(max(0.0, wake_at - loop.time()))
+            finally:
+                for w in watches:
+                    self.vesc.unwatch(w)
+                for nid in self.axes.keys():
+                    self._stop_axis_motion(nid)
+                for nid, was_enabled in prev_enabled_map.items():
+                    ax = self.axes.get(nid)
+                    if ax is not None:
+                        ax.enabled = was_enabled
+
+        self._report_homing(jobs, results)
+        return results
@@ -0,0 +1,216 @@
+# 找零碰撞检测：逐帧电流样本上的流式检测器（无内存分配，每样本 O(1)）
+import math
+from typing import Optional
+
+
+class CollisionDetector:
+    """
+    接口：reset() 开始新一次找零；update(x, t) 输入一帧样本（x 为 |电机电流| A，t 为该帧时间戳 s），
+    返回 True 表示判定为碰撞。每个样本只应输入一次（以 StateTable 中 current_motor 的更新时间去重）。
+    """
+    __slots__ = ()
+
+    def reset(self):
+        pass
+
+    def update(self, x: float, t: float) -> bool:
+        raise NotImplementedError
+
+
+class ThresholdDwellDetector(CollisionDetector):
+    """原有判定：|I| >= threshold 且持续 dwell_s。需按轴调阈值，确认延迟至少 dwell_s。"""
+    __slots__ = ("threshold", "dwell_s", "_over_t")
+
+    def __init__(self, threshold: float, dwell_s: float):
+        self.threshold = float(threshold)
+        self.dwell_s = float(dwell_s)
+        self.reset()
+
+    def reset(self):
+        self._over_t: Optional[float] = None
+
+    def update(self, x: float, t: float) -> bool:
+        if x >= self.threshold:
+            if self._over_t is None:
+                self._over_t = t
+            return t - self._over_t >= self.dwell_s
+        self._over_t = None
+        return False
+
+
+class _EwmaBaseline(CollisionDetector):
+    """
+    公共部分：启动后 settle_s 内的样本（加速瞬态）丢弃；随后 warmup 个样本建立自由运行电流的
+    EWMA 均值/方差基线。基线只在未怀疑碰撞时更新，避免把接触电流吸收进基线。
+    """
+    __slots__ = ("alpha", "settle_s", "warmup", "min_sigma", "min_delta",
+                 "_t0", "_n", "_mean", "_var")
+
+    def __init__(self, alpha: float, settle_s: float, warmup: int, min_sigma: float, min_delta: float):
+        self.alpha = float(alpha)
+        self.settle_s = float(settle_s)
+        self.warmup = max(2, int(warmup))
+        self.min_sigma = float(min_sigma)
+        self.min_delta = float(min_delta)
+        self.reset()
+
+    def reset(self):
+        self._t0: Optional[float] = None
+        self._n = 0
+        self._mean = 0.0
+        self._var = 0.0
+
+    def _learn(self, x: float):
+        if self._n < self.warmup:
+            # 预热阶段用累计均值/方差（Welford），收敛比 EWMA 快
+            self._n += 1
+            d = x - self._mean
+            self._mean += d / self._n
+            self._var += (d * (x - self._mean) - self._var) / self._n
+        else:
+            a = self.alpha
+            d = x - self._mean
+            self._mean += a * d
+            self._var = (1.0 - a) * (self._var + a * d * d)
+
+    def _ready(self, t: float) -> bool:
+        if self._t0 is None:
+            self._t0 = t
+        return t - self._t0 >= self.settle_s
+
+    @property
+    def baseline(self) -> float:
+        return self._mean
+
+    @property
+    def sigma(self) -> float:
+        return max(self.min_sigma, math.sqrt(self._var))
+
+
+class EwmaCusumDetector(_EwmaBaseline):
+    """
+    EWMA 基线 + 单边 CUSUM：z = (x - 基线) / σ，S = max(0, S + z - k)，S > h 且 x 超出基线 min_delta 即判定碰撞。
+    阶跃为 m 个 σ 时约 h / (m - k) 个样本确认，无需按轴设定绝对阈值。
+    """
+    __slots__ = ("k", "h", "_s")
+
+    def __init__(self, k: float = 1.0, h: float = 8.0, alpha: float = 0.05, settle_s: float = 0.15,
+                 warmup: int = 20, min_sigma: float = 0.01, min_delta: float = 0.05):
+        self.k = float(k)
+        self.h = float(h)
+        super().__init__(alpha, settle_s, warmup, min_sigma, min_delta)
+
+    def reset(self):
+        super().reset()
+        self._s = 0.0
+
+    def update(self, x: float, t: float) -> bool:
+        if not self._ready(t):
+            return False
+        if self._n < self.warmup:
+            self._learn(x)
+            return False
+        s = max(0.0, self._s + (x - self._mean) / self.sigma - self.k)
+        self._s = s
+        if s > self.h:
+            return x - self._mean >= self.min_delta
+        if s < 0.5 * self.h:
+            # 未怀疑变化时才更新基线（只用低于均值的样本会让基线偏低、误报增多）
+            self._learn(x)
+        return False
+
+
+class DerivativeDetector(_EwmaBaseline):
+    """
+    电流变化率检测：一阶低通（时间常数 tau_s，与采样率无关）平滑的 dI/dt 连续 confirm 个样本超过 slope_a_per_s，
+    且电流高于基线 min_delta。对接触时电流的快速爬升最敏感；基线同 EwmaCusumDetector。
+    """
+    __slots__ = ("slope_a_per_s", "confirm", "tau_s", "_last_x", "_last_t", "_slope", "_hits")
+
+    def __init__(self, slope_a_per_s: float = 5.0, confirm: int = 3, tau_s: float = 0.02, alpha: float = 0.05,
+                 settle_s: float = 0.15, warmup: int = 20, min_sigma: float = 0.01, min_delta: float = 0.05):
+        self.slope_a_per_s = float(slope_a_per_s)
+        self.confirm = max(1, int(confirm))
+        self.tau_s = max(1e-6, float(tau_s))
+        super().__init__(alpha, settle_s, warmup, min_sigma, min_delta)
+
+    def reset(self):
+        super().reset()
+        self._last_x = math.nan
+        self._last_t = 0.0
+        self._slope = 0.0
+        self._hits = 0
+
+    def update(self, x: float, t: float) -> bool:
+        if not self._ready(t):
+            return False
+        last_x, last_t = self._last_x, self._last_t
+        self._last_x, self._last_t = x, t
+        if last_x != last_x or t <= last_t:   # 首个样本（NaN）或时间戳未前进
+            return False
+        dt = t - last_t
+        self._slope += (1.0 - math.exp(-dt / self.tau_s)) * ((x - last_x) / dt - self._slope)
+        if self._n < self.warmup:
+            self._learn(x)
+            return False
+        if self._slope >= self.slope_a_per_s and x - self._mean >= self.min_delta:
+            self._hits += 1
+            return self._hits >= self.confirm
+        self._hits = 0
+        if x - self._mean < self.min_delta:
+            self._learn(x)
+        return False
+
+
+class AnyDetector(CollisionDetector):
+    """任一子检测器判定即为碰撞（如 CUSUM 兜底慢变化 + 变化率抓快速接触）。"""
+    __slots__ = ("detectors",)
+
+    def __init__(self, *detectors: CollisionDetector):
+        self.detectors = detectors
+
+    def reset(self):
+        for d in self.detectors:
+            d.reset()
+
+    def update(self, x: float, t: float) -> bool:
+        hit = False
+        for d in self.detectors:
+            # 全部更新，保持各自基线连续
+            if d.update(x, t):
+                hit = True
+        return hit
+
+
+def make_detector(cfg: dict) -> CollisionDetector:
+    """
+    按找零配置构造检测器：cfg["detector"] 为 "threshold"（默认，沿用 current_threshold_a / collision_dwell_s）、
+    "cusum"、"derivative" 或 "cusum+derivative"；其余参数见 settings.HOMING_CONFIG 中的 cusum_* / derivative_* 项。
+    """
+    kind = str(cfg.get("detector", "threshold")).lower()
+    common = dict(
+        alpha=float(cfg.get("baseline_alpha", 0.05)),
+        settle_s=float(cfg.get("settle_s", 0.15)),
+        warmup=int(cfg.get("baseline_warmup", 20)),
+        min_sigma=float(cfg.get("min_sigma_a", 0.01)),
+        min_delta=float(cfg.get("min_delta_a", 0.05)),
+    )
+
+    def cusum():
+        return EwmaCusumDetector(k=float(cfg.get("cusum_k", 1.0)), h=float(cfg.get("cusum_h", 8.0)), **common)
+
+    def derivative():
+        return DerivativeDetector(slope_a_per_s=float(cfg.get("derivative_a_per_s", 5.0)),
+                                  confirm=int(cfg.get("derivative_confirm", 3)),
+                                  tau_s=float(cfg.get("derivative_tau_s", 0.02)), **common)
+
+    if kind == "threshold":
+        return ThresholdDwellDetector(float(cfg.get("current_threshold_a", 6.0)),
+                                      float(cfg.get("collision_dwell_s", 0.08)))
+    if kind == "cusum":
+        return cusum()
+    if kind == "derivative":
+        return derivative()
+    if kind == "cusum+derivative":
+        return AnyDetector(cusum(), derivative())
+    raise ValueError(f"unknown collision detector: {kind}")
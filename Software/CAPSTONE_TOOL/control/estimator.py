@@ -0,0 +1,275 @@
+# 关节状态估计：融合 STATUS_4 位置（int16，1/50 度量化）、STATUS 的 ERPM 换算角速度与帧解码时间戳，
+# 给出任意时刻的位置/速度/加速度估计。全部轴的状态放在同一组数组中，由 update() 从 StateTable 批量更新（向量化）。
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from models.state_table import C_DEG_PER_S, C_POS_DEG, StateTable
+
+# 量测种类：状态向量 [位置, 速度, 加速度] 中被观测的分量
+_POS = 0
+_VEL = 1
+# 状态表中对应的列（与 _POS / _VEL 同序）
+_COLS = np.array([C_POS_DEG, C_DEG_PER_S], dtype=np.intp)
+
+
+class StateEstimator:
+    """
+    公共部分：每轴状态 x = [位置 度, 速度 度/秒, 加速度 度/秒²] 及其时刻 t_state（VescCAN.clock 时基）。
+    update() 读取状态表中各轴 pos_deg / deg_per_s 的值与更新时间，只处理上次之后的新样本：
+    先把该轴状态外推到量测时刻再校正，同一轴两种量测都有新值时按时间先后处理。
+    首个位置样本、reset() 之后或位置残差超过 reset_deg（如找零更新了固件零点）时，该轴以量测值重新初始化。
+    子类实现 _predict / _correct / _init。控制线程与找零线程可同时调用（内部加锁）。
+    """
+    def __init__(self, table: StateTable, node_ids: Iterable[int], reset_deg: float = 5.0,
+                 max_extrapolate_s: float = 0.05):
+        self.table = table
+        self.node_ids: Tuple[int, ...] = tuple(node_ids)
+        self.reset_deg = float(reset_deg)
+        self.max_extrapolate_s = float(max_extrapolate_s)
+        self._index: Dict[int, int] = {nid: i for i, nid in enumerate(self.node_ids)}
+        n = len(self.node_ids)
+        self.x = np.zeros((n, 3))
+        self.t_state = np.zeros(n)
+        self.ready = np.zeros(n, dtype=bool)
+        # 已处理样本的更新时间（去重，列同 _COLS）与各类量测上一次的时刻
+        self._seen = np.zeros((n, 2))
+        self._last_meas = np.zeros((n, 2))
+        self._ar = np.arange(n)
+        self._slots: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self.measurements = 0
+
+    # ---------------- 子类接口 ----------------
+    def _predict(self, dt: np.ndarray):
+        """各轴状态外推 dt 秒（未选中的轴 dt 为 0，须保持不变）。"""
+        raise NotImplementedError
+
+    def _correct(self, m: np.ndarray, kind: np.ndarray, z: np.ndarray, dt_meas: np.ndarray):
+        """以量测 z 校正 m 选中的轴；kind 为各轴量测种类（_POS / _VEL），dt_meas 为距该轴上一次同类量测的秒数。"""
+        raise NotImplementedError
+
+    def _init(self, m: np.ndarray):
+        """m 选中的轴已按量测重新赋值 x：重置子类内部状态（协方差等）。"""
+
+    # ---------------- 更新 ----------------
+    def _slot_rows(self) -> Tuple[tuple, Optional[np.ndarray]]:
+        """(状态表行列索引, 有效轴掩码)；全部轴都已在状态表中时缓存，掩码为 None。"""
+        if self._slots is not None:
+            return self._slots, None
+        slots = [self.table.slot(nid) for nid in self.node_ids]
+        valid = np.array([s is not None for s in slots])
+        rows = np.array([0 if s is None else s for s in slots], dtype=np.intp)
+        ix = (rows[:, None], _COLS)
+        if valid.all():
+            self._slots = ix
+            return ix, None
+        return ix, valid
+
+    def update(self) -> int:
+        """融合状态表中各轴自上次以来的新位置/速度样本，返回本次处理的量测数。"""
+        ix, valid = self._slot_rows()
+        # 先读时间戳再读值：解码先写值后写时间戳，不会拿到旧值配新时间戳
+        ts = self.table.stamps[ix]
+        if valid is not None:
+            ts[~valid] = 0.0
+        new = ts > self._seen
+        if not new.any():
+            return 0
+        z = self.table.values[ix]
+        with self._lock:
+            new &= ts > self._seen
+            new &= ~np.isnan(z)
+            np.maximum(self._seen, ts, out=self._seen)
+            new_p, new_v = new[:, _POS], new[:, _VEL]
+            tp, tv = ts[:, _POS], ts[:, _VEL]
+            zp, zv = z[:, _POS], z[:, _VEL]
+            first = new_p & ~self.ready
+            n = 0
+            if first.any():
+                self._reinit(first, zp, tp, zv)
+                new_p &= ~first
+                n += int(first.sum())
+            new_v &= self.ready
+            # 两遍：各轴先融合较早的新量测，两种都有新值的轴再融合较晚的一个
+            pos_first = ~new_v | (new_p & (tp <= tv))
+            both = new_p & new_v
+            self._step(new_p | new_v, np.where(pos_first, _POS, _VEL), z, ts)
+            if both.any():
+                self._step(both, np.where(pos_first, _VEL, _POS), z, ts)
+            n += int(np.count_nonzero(new_p) + np.count_nonzero(new_v))
+            self.measurements += n
+            return n
+
+    def _reinit(self, m: np.ndarray, zp: np.ndarray, t: np.ndarray, zv: np.ndarray):
+        self.x[m, 0] = zp[m]
+        self.x[m, 1] = np.where(np.isnan(zv[m]), 0.0, zv[m])
+        self.x[m, 2] = 0.0
+        self.t_state[m] = t[m]
+        self._last_meas[m] = t[m, None]
+        self.ready |= m
+        self._init(m)
+
+    def _step(self, m: np.ndarray, kind: np.ndarray, z: np.ndarray, ts: np.ndarray):
+        if not m.any():
+            return
+        ar = self._ar
+        zk = z[ar, kind]
+        tk = ts[ar, kind]
+        dt = np.where(m, np.maximum(0.0, tk - self.t_state), 0.0)
+        self._predict(dt)
+        self.t_state = np.where(m, np.maximum(self.t_state, tk), self.t_state)
+        jump = m & (kind == _POS) & (np.abs(zk - self.x[:, 0]) > self.reset_deg)
+        if jump.any():
+            self._reinit(jump, zk, tk, np.full_like(zk, np.nan))
+            m = m & ~jump
+            if not m.any():
+                return
+        dt_meas = np.maximum(tk - self._last_meas[ar, kind], 1e-4)
+        self._last_meas[ar[m], kind[m]] = tk[m]
+        self._correct(m, kind, zk, dt_meas)
+
+    def reset(self, node_id: Optional[int] = None):
+        """丢弃该轴（None 为全部轴）的估计，下一个位置样本重新初始化。"""
+        with self._lock:
+            if node_id is None:
+                self.ready[:] = False
+            elif node_id in self._index:
+                self.ready[self._index[node_id]] = False
+
+    # ---------------- 查询 ----------------
+    def estimate(self, t: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (位置, 速度, 加速度) 数组，按 node_ids 顺序：各轴位置由其最新状态按匀加速外推到时刻 t
+        （外推时长限制在 [0, max_extrapolate_s]；t 为 None 时不外推）。尚无样本的轴为 NaN。
+        速度取最新估计值、不外推：加速度估计滞后至少一个状态帧，在加速度突变（轨迹段切换、到位整定）处
+        按它外推速度的误差会超过直接保持 ERPM 速度量测（见 benchmarks/bench_estimator.py）。
+        """
+        with self._lock:
+            x = self.x.copy()
+            ready = self.ready.copy()
+            dt = np.zeros(len(x)) if t is None else np.clip(t - self.t_state, 0.0, self.max_extrapolate_s)
+        pos = x[:, 0] + x[:, 1] * dt + 0.5 * x[:, 2] * dt * dt
+        vel = x[:, 1].copy()
+        acc = x[:, 2].copy()
+        for a in (pos, vel, acc):
+            a[~ready] = np.nan
+        return pos, vel, acc
+
+    def state(self, node_id: int, t: Optional[float] = None) -> Optional[Tuple[float, float, float]]:
+        """单轴 (位置, 速度, 加速度)，含义同 estimate（速度不外推）；未知轴或尚无样本时为 None。"""
+        i = self._index.get(node_id)
+        if i is None:
+            return None
+        with self._lock:
+            if not self.ready[i]:
+                return None
+            p, v, a = self.x[i].tolist()
+            dt = 0.0 if t is None else min(max(t - self.t_state[i], 0.0), self.max_extrapolate_s)
+        return p + v * dt + 0.5 * a * dt * dt, v, a
+
+
+class AlphaBetaEstimator(StateEstimator):
+    """
+    alpha-beta(-gamma) 滤波：位置残差 r 按 alpha / beta / gamma 分别修正位置、速度（r/Δt）与加速度（2r/Δt²），
+    Δt 为相邻位置量测间隔；速度量测以 velocity_gain 直接混合到速度。gamma=0 即经典 alpha-beta（加速度恒为 0）。
+    默认 beta=0、velocity_gain=1：速度直接取 ERPM 量测（比 1/50 度量化位置的差分准确得多），位置残差只修正位置。
+    """
+    def __init__(self, table: StateTable, node_ids: Iterable[int], alpha: float = 0.5, beta: float = 0.0,
+                 gamma: float = 0.0, velocity_gain: float = 1.0, **kw):
+        super().__init__(table, node_ids, **kw)
+        self.alpha = float(alpha)
+        self.beta = float(beta)
+        self.gamma = float(gamma)
+        self.velocity_gain = float(velocity_gain)
+
+    def _predict(self, dt: np.ndarray):
+        x = self.x
+        x[:, 0] += x[:, 1] * dt + 0.5 * x[:, 2] * dt * dt
+        x[:, 1] += x[:, 2] * dt
+
+    def _correct(self, m: np.ndarray, kind: np.ndarray, z: np.ndarray, dt_meas: np.ndarray):
+        x = self.x
+        v = m & (kind == _VEL)
+        if v.any():
+            x[v, 1] += self.velocity_gain * (z[v] - x[v, 1])
+        p = m & (kind == _POS)
+        if not p.any():
+            return
+        r = z[p] - x[p, 0]
+        dt = dt_meas[p]
+        x[p, 0] += self.alpha * r
+        x[p, 1] += self.beta * r / dt
+        if self.gamma:
+            x[p, 2] += 2.0 * self.gamma * r / (dt * dt)
+
+
+class KalmanCAEstimator(StateEstimator):
+    """
+    匀加速模型卡尔曼滤波：过程噪声为白加加速度（功率谱密度 jerk_psd，度²/秒⁵），
+    位置量测噪声 pos_noise_deg（含 1/50 度量化与时间戳抖动），速度量测噪声 vel_noise_dps。
+    协方差 P 为 (轴数, 3, 3) 数组，预测与标量量测校正均对全部轴一次完成。
+    """
+    def __init__(self, table: StateTable, node_ids: Iterable[int], jerk_psd: float = 2e6,
+                 pos_noise_deg: float = 0.01, vel_noise_dps: float = 0.01, **kw):
+        super().__init__(table, node_ids, **kw)
+        self.q = float(jerk_psd)
+        self.r = np.array([float(pos_noise_deg) ** 2, float(vel_noise_dps) ** 2])
+        self.P = np.zeros((len(self.node_ids), 3, 3))
+        # 初始化时的协方差：位置取量测噪声，速度/加速度未知
+        self._p0 = np.diag([self.r[0], 10.0 * self.r[1] + 1.0, 1e4])
+        # 预测用的状态转移矩阵与过程噪声缓冲（每次按各轴 dt 填写）
+        n = len(self.node_ids)
+        self._F = np.tile(np.eye(3), (n, 1, 1))
+        self._Q = np.zeros((n, 3, 3))
+
+    def _init(self, m: np.ndarray):
+        self.P[m] = self._p0
+
+    def _predict(self, dt: np.ndarray):
+        F, Q = self._F, self._Q
+        d2 = dt * dt
+        d3 = d2 * dt
+        F[:, 0, 1] = dt
+        F[:, 0, 2] = 0.5 * d2
+        F[:, 1, 2] = dt
+        self.x = np.einsum("nij,nj->ni", F, self.x)
+        Q[:, 0, 0] = d3 * d2 / 20.0
+        Q[:, 0, 1] = Q[:, 1, 0] = d2 * d2 / 8.0
+        Q[:, 0, 2] = Q[:, 2, 0] = d3 / 6.0
+        Q[:, 1, 1] = d3 / 3.0
+        Q[:, 1, 2] = Q[:, 2, 1] = d2 / 2.0
+        Q[:, 2, 2] = dt
+        self.P = F @ self.P @ F.transpose(0, 2, 1) + self.q * Q
+
+    def _correct(self, m: np.ndarray, kind: np.ndarray, z: np.ndarray, dt_meas: np.ndarray):
+        i = np.flatnonzero(m)
+        k = kind[i]
+        a = np.arange(len(i))
+        P = self.P[i]
+        s = P[a, k, k] + self.r[k]
+        K = P[a, :, k] / s[:, None]
+        y = z[i] - self.x[i, k]
+        self.x[i] += K * y[:, None]
+        P = P - K[:, :, None] * P[a, k, :][:, None, :]
+        self.P[i] = 0.5 * (P + P.transpose(0, 2, 1))
+
+
+def make_estimator(table: StateTable, node_ids: Iterable[int], cfg: dict) -> StateEstimator:
+    """
+    按 settings.ESTIMATOR_CONFIG 形式的配置构造估计器：cfg["kind"] 为 "kalman"（默认，匀加速卡尔曼）
+    或 "alpha_beta"；其余参数见该配置各项。
+    """
+    kind = str(cfg.get("kind", "kalman")).lower()
+    common = dict(reset_deg=float(cfg.get("reset_deg", 5.0)),
+                  max_extrapolate_s=float(cfg.get("max_extrapolate_s", 0.05)))
+    if kind == "kalman":
+        return KalmanCAEstimator(table, node_ids, jerk_psd=float(cfg.get("jerk_psd", 2e6)),
+                                 pos_noise_deg=float(cfg.get("pos_noise_deg", 0.01)),
+                                 vel_noise_dps=float(cfg.get("vel_noise_dps", 0.01)), **common)
+    if kind in ("alpha_beta", "alpha-beta"):
+        return AlphaBetaEstimator(table, node_ids, alpha=float(cfg.get("alpha", 0.5)),
+                                  beta=float(cfg.get("beta", 0.0)), gamma=float(cfg.get("gamma", 0.0)),
+                                  velocity_gain=float(cfg.get("velocity_gain", 1.0)), **common)
+    raise ValueError(f"unknown estimator kind: {kind!r}")
@@ -0,0 +1,133 @@
+# 单轴找零状态机：单轴与并行找零（一组轴由同一循环驱动）共用
+from control.collision import make_detector
+
+# 状态
+DRIVE = "drive"        # 朝限位推进并检测碰撞（持续心跳）
+ZERO = "zero"          # 已碰撞：停转，稍后下发 PID 位置偏置
+BACKOFF = "backoff"    # 以新零点为基准反向回退（持续发送位置命令）
+DONE = "done"
+FAILED = "failed"
+
+
+class HomingJob:
+    """
+    单轴找零流程（推进到限位 -> 碰撞后下发零点 -> 回退），拆成非阻塞的 step(now)：每次调用只做当前时刻该做的事并立即返回，
+    next_wake(now) 给出下一次需要被调用的时刻。ArmController.home_group（及单轴的 home_axis）等由同一循环交替驱动多个 job，互不等待。
+    ctrl 为 ArmController（使用其 vesc / axes / can_send / _send_rpm / _send_current / _stop_axis_motion / 日志）。
+    时间参数 now 使用 ctrl.clock 的时基（异步版本传 loop.time()，只要全程一致即可）。
+    """
+    def __init__(self, ctrl, node_id: int, cfg: dict, now: float):
+        self.ctrl = ctrl
+        self.node_id = node_id
+        self.axis = ctrl.axes[node_id]
+        self.mode = cfg.get("mode", "rpm")
+        self.move_dir = float(cfg.get("move_direction", -1))
+        self.rpm_val = float(cfg.get("rpm", 300.0))
+        self.cur_cmd = float(cfg.get("current_a", 2.0))
+        self.detector = make_detector(cfg)
+        self.timeout_s = float(cfg.get("timeout_s", 8.0))
+        self.backoff_deg = float(cfg.get("backoff_deg", 5.0))
+        self.sample_dt = float(cfg.get("sample_period_s", 0.01))
+        self.cmd_period = float(cfg.get("command_period_s", 0.05))
+        self.state = DRIVE
+        self.reason = ""
+        self.t0 = now
+        self.last_cmd_ts = -1e18
+        self.last_sample_ts = ctrl.vesc.sample(node_id, "current_motor")[1]
+        self.zero_at = 0.0
+        self.end_ts = 0.0
+        self.cfg = cfg
+        if self.mode not in ("rpm", "current"):
+            self._fail("Homing mode must be 'rpm' or 'current'", "找零模式必须为 'rpm' 或 'current'")
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    def _fail(self, reason: str, msg_cn: str):
+        self.state = FAILED
+        self.reason = reason
+        self.ctrl._stop_axis_motion(self.node_id)
+        self.ctrl.log.log_error(msg_cn)
+        self.ctrl.terminal_log.error(f"Axis {self.node_id}: {reason}")
+
+    def _send_drive(self):
+        if self.mode == "rpm":
+            self.ctrl._send_rpm(self.node_id, self.move_dir * self.rpm_val)
+        else:
+            self.ctrl._send_current(self.node_id, self.move_dir * self.cur_cmd)
+
+    def cancel(self):
+        if not self.finished:
+            self.state = FAILED
+            self.reason = "canceled"
+            self.ctrl._stop_axis_motion(self.node_id)
+
+    # ---------------- 驱动 ----------------
+    def step(self, now: float):
+        if self.state == DRIVE:
+            self._step_drive(now)
+        elif self.state == ZERO:
+            if now >= self.zero_at:
+                self._apply_zero(now)
+        elif self.state == BACKOFF:
+            if now >= self.end_ts or self.ctrl._backoff_settled(self.node_id, -self.move_dir * self.backoff_deg,
+                                                                self.cfg):
+                self.state = DONE
+                self.ctrl._stop_axis_motion(self.node_id)
+            elif now >= self.last_cmd_ts + self.cmd_period:
+                self.axis.send_joint_deg(-self.move_dir * self.backoff_deg, self.ctrl.can_send)
+                self.last_cmd_ts = now
+
+    def _step_drive(self, now: float):
+        nid = self.node_id
+        if now >= self.last_cmd_ts + self.cmd_period:
+            self._send_drive()
+            self.last_cmd_ts = now
+        if now - self.t0 > self.timeout_s:
+            self._fail("homing timeout", f"轴 {nid} 找零超时，停止轴")
+            return
+        # 每个新电流样本送入检测器一次（样本时间戳为解码时刻）
+        current, sample_ts = self.ctrl.vesc.sample(nid, "current_motor")
+        if sample_ts <= self.last_sample_ts:
+            return
+        self.last_sample_ts = sample_ts
+        if self.detector.update(abs(current), sample_ts):
+            # 确认碰撞：停转，10 ms 后下发零点
+            self.ctrl._send_rpm(nid, 0.0)
+            self.state = ZERO
+            self.zero_at = now + 0.01
+
+    def _apply_zero(self, now: float):
+        nid = self.node_id
+        ctrl = self.ctrl
+        st = ctrl.vesc.get_state(nid)
+        pos_deg_now = st.pos_deg if st and st.pos_deg is not None else 0.0
+        try:
+            data = ctrl.vesc.encode_update_pid_pos_offset(0.0)
+            arb, payload, ext = ctrl.vesc.build_frame(ctrl.vesc.CAN_PACKET_UPDATE_PID_POS_OFFSET, nid, data)
+            ctrl.can_send(arb, payload, ext)
+            ctrl.log and ctrl.log.log_info(f"轴 {nid} 已将当前角度 {pos_deg_now:.2f}° 应用为零点(固件侧)")
+            ctrl.terminal_log.info(f"Axis {nid} apply current angle as zero via PID offset")
+        except Exception as e:
+            ctrl.log and ctrl.log.log_error(f"轴 {nid} 应用零点失败: {e}")
+            ctrl.terminal_log.error(f"Apply zero via PID offset failed: {e}")
+        ctrl._stop_axis_motion(nid)
+        self.axis.homed = True
+        if ctrl.estimator is not None:
+            ctrl.estimator.reset(nid)
+        deg_per_s_est = max(1e-6, self.axis.cfg.max_vel_dps if self.axis.cfg.max_vel_dps is not None else 90.0)
+        self.end_ts = now + max(0.2, (self.backoff_deg / deg_per_s_est)) + 1.0
+        self.last_cmd_ts = -1e18
+        self.state = BACKOFF
+        ctrl.log.log_info(f"轴 {nid} 开始回退")
+
+    def next_wake(self, now: float) -> float:
+        """下一次需要调用 step 的时刻（DRIVE 阶段另由电流帧到达唤醒）。"""
+        if self.state == DRIVE:
+            return min(self.last_cmd_ts + self.cmd_period, now + self.sample_dt, self.t0 + self.timeout_s)
+        if self.state == ZERO:
+            return self.zero_at
+        if self.state == BACKOFF:
+            return min(self.last_cmd_ts + self.cmd_period, self.end_ts)
+        return now
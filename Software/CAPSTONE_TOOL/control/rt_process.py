@@ -0,0 +1,397 @@
+# 控制核心独立进程：CAN 收发、VescCAN 解码与控制节拍在子进程运行（独立 GIL），
+# 状态经共享内存 StateRing 发布，命令经 SlotRing 下达，日志/应答经另一条 SlotRing 回传；GUI 进程只做消费者。
+import dataclasses
+import json
+import math
+import multiprocessing as mp
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.arm_config import AxisConfig
+from models.motor_state import MotorSnapshot
+from utils.log_utils import globalLogger
+from utils.shm_ring import SlotRing, StateRing
+
+# 每轴发布的快照字段（signals 为字典，不跨进程发布）
+AXIS_FIELDS: Tuple[str, ...] = tuple(f for f in MotorSnapshot._fields if f not in ("node_id", "signals"))
+# 记录布局：全局字段 + 每轴 [node_id, has_state, AXIS_FIELDS..., target_deg, enabled]
+GLOBAL_FIELDS: Tuple[str, ...] = ("t", "connected", "load_pct", "tx_pct", "trajectory_active", "n_axes")
+_AXIS_LEN = 2 + len(AXIS_FIELDS) + 2
+MAX_AXES = 16
+RECORD_LEN = len(GLOBAL_FIELDS) + MAX_AXES * _AXIS_LEN
+
+# 子进程接受的命令：目标对象 -> 允许调用的方法（其余一律拒绝）
+_ALLOWED = {
+    "arm": {"start", "stop", "set_axis_target", "set_axis_enabled", "set_axis_direction_lock",
+            "home_axis", "home_all", "home_group", "cancel_homing", "move_to", "move_to_pose", "move_linear",
+            "follow_path", "play_file", "start_teach", "stop_teach", "play_teach", "stop_trajectory",
+            "update_axis_config", "get_loop_stats", "reset_loop_stats", "joint_state"},
+    "bridge": {"connect", "disconnect", "start_recording", "stop_recording"},
+}
+# 可能长时间阻塞的命令在子进程的工作线程中执行，不阻塞命令/状态循环（找零期间仍能处理 cancel_homing）
+_BLOCKING = {"home_axis", "home_all", "home_group"}
+
+
+def _num(v) -> float:
+    if v is None:
+        return math.nan
+    return float(v)
+
+
+class RemoteLogger:
+    """子进程内替代 LoggerTool：日志经事件环送回 GUI 进程显示；环满时丢弃并计数。"""
+    def __init__(self, ring: SlotRing):
+        self.ring = ring
+        self._lock = threading.Lock()    # 子进程内多线程写同一 SPSC 环
+
+    def _send(self, level: str, msg: str):
+        # 按字符截断（UTF-8 每字符至多 4 字节），保证 JSON 完整
+        text = str(msg)[:self.ring.slot_bytes // 4 - 16]
+        payload = json.dumps({"type": "log", "level": level, "msg": text}, ensure_ascii=False).encode()
+        with self._lock:
+            self.ring.push(payload)
+
+    def log(self, msg: str):
+        self._send("raw", msg)
+
+    def log_debug(self, msg: str):
+        self._send("debug", msg)
+
+    def log_info(self, msg: str):
+        self._send("info", msg)
+
+    def log_warning(self, msg: str):
+        self._send("warning", msg)
+
+    def log_error(self, msg: str):
+        self._send("error", msg)
+
+    def log_critical(self, msg: str):
+        self._send("critical", msg)
+
+    def log_success(self, msg: str):
+        self._send("success", msg)
+
+
+def _pack_state(bridge, t: float) -> List[float]:
+    rec = [math.nan] * RECORD_LEN
+    can_if = getattr(bridge, "can_if", None)
+    connected = can_if is not None and getattr(can_if, "bus", None) is not None
+    load = can_if.get_bus_load() if connected and hasattr(can_if, "get_bus_load") else {}
+    arm = bridge.arm
+    rec[:len(GLOBAL_FIELDS)] = [t, float(connected), _num(load.get("load_pct")), _num(load.get("tx_pct")),
+                                float(arm.trajectory_active), 0.0]
+    base = len(GLOBAL_FIELDS)
+    n = 0
+    for nid, axis in sorted(arm.axes.items())[:MAX_AXES]:
+        st = bridge.vesc.get_state(nid)
+        row = [float(nid), float(st is not None)]
+        row += [_num(getattr(st, f)) for f in AXIS_FIELDS] if st is not None else [math.nan] * len(AXIS_FIELDS)
+        row += [float(axis.target_deg_ui), float(axis.enabled)]
+        rec[base + n * _AXIS_LEN:base + (n + 1) * _AXIS_LEN] = row
+        n += 1
+    rec[GLOBAL_FIELDS.index("n_axes")] = float(n)
+    return rec
+
+
+def _json_safe(v):
+    try:
+        json.dumps(v)
+        return v
+    except (TypeError, ValueError):
+        return repr(v)
+
+
+def _int_keys(v):
+    """JSON 对象的键总是字符串：键全为整数字面量的对象（如 node_id -> 值 的映射，含嵌套）还原为 int 键。"""
+    if not isinstance(v, dict):
+        return v
+    out = {k: _int_keys(x) for k, x in v.items()}
+    if out and all(isinstance(k, str) and k.lstrip("-").isdigit() for k in out):
+        return {int(k): x for k, x in out.items()}
+    return out
+
+
+def run_core(factory: Callable[[Any], Any], state_name: str, cmd_name: str, event_name: str,
+             state_capacity: int, slot_bytes: int, slot_capacity: int, publish_hz: float):
+    """子进程入口：构造后端（factory(logger) 返回 AppBridge 类对象，需有 arm / vesc / can_if），循环处理命令并发布状态。"""
+    state = StateRing.attach(state_name, RECORD_LEN, state_capacity)
+    cmds = SlotRing.attach(cmd_name, slot_bytes, slot_capacity)
+    events = SlotRing.attach(event_name, slot_bytes, slot_capacity)
+    log = RemoteLogger(events)
+    ev_lock = log._lock
+
+    def emit(obj: dict):
+        payload = json.dumps(obj, ensure_ascii=False).encode()
+        if len(payload) > events.slot_bytes:
+            if obj.get("type") != "reply":
+                raise ValueError(f"event of {len(payload)} bytes exceeds slot size {events.slot_bytes}")
+            payload = json.dumps({"type": "reply", "id": obj["id"], "ok": False,
+                                  "value": "reply too large"}).encode()
+        with ev_lock:
+            while not events.push(payload):
+                time.sleep(0.001)      # 应答/握手不能丢：等待 GUI 取走
+
+    bridge = factory(log)
+    can_if = getattr(bridge, "can_if", None)
+    # 握手：先逐轴发送配置（单条消息受槽大小限制），最后发送 hello
+    for nid, ax in bridge.arm.axes.items():
+        emit({"type": "axis", "node_id": nid, "cfg": dataclasses.asdict(ax.cfg)})
+    emit({"type": "hello", "can": {k: getattr(can_if, k, None) for k in ("interface", "channel", "bitrate")}})
+
+    def call(msg: dict):
+        target, method = msg.get("target"), msg.get("method")
+        rid = msg.get("id")
+        try:
+            if method not in _ALLOWED.get(target, ()):
+                raise ValueError(f"command not allowed: {target}.{method}")
+            obj = bridge.arm if target == "arm" else bridge
+            args = [_int_keys(a) for a in msg.get("args", [])]
+            kwargs = {k: _int_keys(v) for k, v in msg.get("kwargs", {}).items()}
+            if method == "update_axis_config":
+                args = [args[0], AxisConfig(**args[1])]
+            result = getattr(obj, method)(*args, **kwargs)
+            if rid is not None:
+                emit({"type": "reply", "id": rid, "ok": True, "value": _json_safe(result)})
+        except Exception as e:
+            log.log_error(f"命令 {target}.{method} 失败: {e}")
+            if rid is not None:
+                emit({"type": "reply", "id": rid, "ok": False, "value": str(e)})
+
+    period = 1.0 / max(1.0, publish_hz)
+    next_pub = time.monotonic()
+    running = True
+    while running:
+        for raw in cmds.drain(64):
+            msg = json.loads(raw)
+            if msg.get("method") == "shutdown":
+                running = False
+                break
+            if msg.get("method") in _BLOCKING:
+                threading.Thread(target=call, args=(msg,), daemon=True).start()
+            else:
+                call(msg)
+        now = time.monotonic()
+        if now >= next_pub:
+            state.publish(_pack_state(bridge, now))
+            next_pub += period
+            if next_pub < now:
+                next_pub = now + period
+        time.sleep(min(0.002, max(0.0, next_pub - time.monotonic())))
+    try:
+        bridge.disconnect()
+    except Exception as e:
+        globalLogger.error(f"Core shutdown error: {e}")
+    state.close()
+    cmds.close()
+    events.close()
+
+
+# ---------------- GUI 进程侧代理：接口与 AppBridge / ArmController / VescCAN 对 GUI 暴露的部分一致 ----------------
+class _AxisView:
+    __slots__ = ("cfg",)
+
+    def __init__(self, cfg: AxisConfig):
+        self.cfg = cfg
+
+
+class _ArmProxy:
+    def __init__(self, core: "CoreProxy", axes_cfg: Dict[int, AxisConfig]):
+        self._core = core
+        self.axes: Dict[int, _AxisView] = {nid: _AxisView(cfg) for nid, cfg in axes_cfg.items()}
+
+    def __getattr__(self, method: str):
+        if method not in _ALLOWED["arm"]:
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self._core.send("arm", method, *args, **kwargs)
+
+    def update_axis_config(self, node_id: int, cfg: AxisConfig):
+        self._core.send("arm", "update_axis_config", node_id, dataclasses.asdict(cfg))
+
+    def get_loop_stats(self, with_counts: bool = False, timeout_s: float = 1.0):
+        return self._core.call("arm", "get_loop_stats", with_counts, timeout_s=timeout_s)
+
+    @property
+    def trajectory_active(self) -> bool:
+        rec = self._core.latest()
+        return bool(rec is not None and rec[GLOBAL_FIELDS.index("trajectory_active")] > 0.5)
+
+
+class _VescProxy:
+    def __init__(self, core: "CoreProxy"):
+        self._core = core
+
+    def get_state(self, node_id: int) -> Optional[MotorSnapshot]:
+        row = self._core.axis_row(node_id)
+        if row is None or row[1] < 0.5:
+            return None
+        vals = {f: (None if math.isnan(v) else v) for f, v in zip(AXIS_FIELDS, row[2:2 + len(AXIS_FIELDS)])}
+        vals["offline"] = bool(vals["offline"])
+        vals["pos_unwrapped_turns"] = vals["pos_unwrapped_turns"] or 0.0
+        vals["last_update_s"] = vals["last_update_s"] or 0.0
+        if vals["erpm"] is not None:
+            vals["erpm"] = int(vals["erpm"])
+        return MotorSnapshot(node_id=node_id, signals={}, **vals)
+
+
+class _CanProxy:
+    def __init__(self, core: "CoreProxy", info: dict):
+        self._core = core
+        self.interface = info.get("interface")
+        self.channel = info.get("channel")
+        self.bitrate = info.get("bitrate")
+
+    @property
+    def bus(self):
+        """仅用于“是否已连接”判断：已连接时返回非 None。"""
+        rec = self._core.latest()
+        return True if rec is not None and rec[GLOBAL_FIELDS.index("connected")] > 0.5 else None
+
+    def get_bus_load(self) -> Dict[str, float]:
+        rec = self._core.latest()
+        if rec is None or math.isnan(rec[GLOBAL_FIELDS.index("load_pct")]):
+            return {}
+        return {"load_pct": float(rec[GLOBAL_FIELDS.index("load_pct")]),
+                "tx_pct": float(rec[GLOBAL_FIELDS.index("tx_pct")])}
+
+
+class CoreProxy:
+    """
+    在子进程中启动控制核心并代理其接口：GUI 调用 arm.* / connect() 等只是把命令写入命令环（非阻塞），
+    vesc.get_state / can_if.get_bus_load 读取状态环中的最新记录；后台线程把子进程日志转给本进程 logger。
+    factory 必须是可被 spawn 子进程导入的模块级函数。
+    """
+    def __init__(self, factory: Callable[[Any], Any], logger=None, publish_hz: float = 100.0,
+                 state_capacity: int = 1024, slot_bytes: int = 2048, slot_capacity: int = 256,
+                 start_timeout_s: float = 15.0):
+        self.logger = logger
+        self.state = StateRing(RECORD_LEN, state_capacity)
+        self.cmds = SlotRing(slot_bytes, slot_capacity)
+        self.events = SlotRing(slot_bytes, slot_capacity)
+        self._cmd_lock = threading.Lock()     # GUI 多线程（事件回调 / 找零线程）共用一个生产者端
+        self._replies: Dict[int, Any] = {}
+        self._reply_cv = threading.Condition()
+        self._next_id = 0
+        self._hello: Optional[dict] = None
+        self._axes_cfg: Dict[int, AxisConfig] = {}
+        self._cache: Tuple[int, Optional[Any]] = (-1, None)
+        self._stop = threading.Event()
+        ctx = mp.get_context("spawn")
+        self.process = ctx.Process(
+            target=run_core, name="control-core", daemon=True,
+            args=(factory, self.state.name, self.cmds.name, self.events.name,
+                  state_capacity, slot_bytes, slot_capacity, publish_hz))
+        self.process.start()
+        self._pump = threading.Thread(target=self._pump_events, daemon=True)
+        self._pump.start()
+        with self._reply_cv:
+            if not self._reply_cv.wait_for(lambda: self._hello is not None or not self.process.is_alive(),
+                                           start_timeout_s) or self._hello is None:
+                self.close()
+                raise RuntimeError("control core process failed to start")
+        self.arm = _ArmProxy(self, self._axes_cfg)
+        self.vesc = _VescProxy(self)
+        self.can_if = _CanProxy(self, self._hello.get("can", {}))
+
+    # ---- 命令 ----
+    def send(self, target: str, method: str, *args, _id: Optional[int] = None, **kwargs) -> bool:
+        msg = {"target": target, "method": method, "args": list(args), "kwargs": kwargs}
+        if _id is not None:
+            msg["id"] = _id
+        payload = json.dumps(msg, ensure_ascii=False).encode()
+        with self._cmd_lock:
+            ok = self.cmds.push(payload)
+        if not ok:
+            globalLogger.warning(f"Command ring full, dropped {target}.{method}")
+        return ok
+
+    def call(self, target: str, method: str, *args, timeout_s: float = 1.0, **kwargs):
+        """发送命令并等待子进程应答（返回值需可 JSON 序列化）；超时返回 None。"""
+        with self._reply_cv:
+            self._next_id += 1
+            rid = self._next_id
+        if not self.send(target, method, *args, _id=rid, **kwargs):
+            return None
+        with self._reply_cv:
+            self._reply_cv.wait_for(lambda: rid in self._replies, timeout_s)
+            ok, value = self._replies.pop(rid, (False, None))
+        return value if ok else None
+
+    def connect(self):
+        self.send("bridge", "connect")
+
+    def disconnect(self):
+        self.send("bridge", "disconnect")
+
+    def start_recording(self, path: str):
+        self.send("bridge", "start_recording", path)
+
+    def stop_recording(self):
+        self.send("bridge", "stop_recording")
+
+    # ---- 状态 ----
+    def latest(self):
+        """状态环中的最新记录（按 head 缓存，同一记录多次读取不重复复制）。"""
+        h = self.state.head
+        if h != self._cache[0]:
+            self._cache = (h, self.state.latest()[1])
+        return self._cache[1]
+
+    def axis_row(self, node_id: int):
+        rec = self.latest()
+        if rec is None:
+            return None
+        base = len(GLOBAL_FIELDS)
+        for n in range(int(rec[GLOBAL_FIELDS.index("n_axes")])):
+            row = rec[base + n * _AXIS_LEN:base + (n + 1) * _AXIS_LEN]
+            if int(row[0]) == node_id:
+                return row
+        return None
+
+    # ---- 事件 ----
+    def _pump_events(self):
+        while not self._stop.is_set():
+            got = False
+            for raw in self.events.drain(256):
+                got = True
+                try:
+                    msg = json.loads(raw)
+                except ValueError:
+                    globalLogger.warning("Malformed event from control core dropped")
+                    continue
+                kind = msg.get("type")
+                if kind == "log":
+                    if self.logger is not None:
+                        fn = getattr(self.logger, "log" if msg["level"] == "raw" else f"log_{msg['level']}", None)
+                        if fn is not None:
+                            fn(msg["msg"])
+                elif kind == "reply":
+                    with self._reply_cv:
+                        self._replies[msg["id"]] = (msg["ok"], msg["value"])
+                        self._reply_cv.notify_all()
+                elif kind == "axis":
+                    self._axes_cfg[int(msg["node_id"])] = AxisConfig(**msg["cfg"])
+                elif kind == "hello":
+                    with self._reply_cv:
+                        self._hello = msg
+                        self._reply_cv.notify_all()
+            if not got:
+                if not self.process.is_alive():
+                    with self._reply_cv:
+                        self._reply_cv.notify_all()
+                self._stop.wait(0.001)
+
+    def close(self, timeout_s: float = 3.0):
+        """请求子进程断开并退出，回收共享内存。"""
+        if self.process.is_alive():
+            self.send("core", "shutdown")
+            self.process.join(timeout_s)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(1.0)
+        self._stop.set()
+        if self._pump.is_alive() and self._pump is not threading.current_thread():
+            self._pump.join(1.0)
+        for ring in (self.state, self.cmds, self.events):
+            ring.close()
@@ -0,0 +1,229 @@
+# 控制节拍调度：单调时钟上的绝对截止时间 + 节拍统计直方图
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+OVERRUN_SKIP = "skip"          # 落后时跳过错过的节拍，下一拍对齐到原有相位网格
+OVERRUN_COMPRESS = "compress"  # 落后时连续补跑错过的节拍（不休眠），最多补 max_catchup 拍，超出则按 skip 处理
+
+
+class Histogram:
+    """
+    线性分桶直方图：[lo, hi) 等分 bins 桶，另计下溢/上溢；同时累计精确的 count/min/max/mean/std。
+    单次 add 只有一次乘法和下标运算，适合每拍调用；percentile 在桶内线性插值。
+    """
+    __slots__ = ("lo", "hi", "bins", "_scale", "counts", "under", "over",
+                 "count", "min", "max", "_sum", "_sum_sq")
+
+    def __init__(self, lo: float, hi: float, bins: int = 200):
+        if hi <= lo or bins <= 0:
+            raise ValueError("Histogram needs hi > lo and bins > 0")
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.bins = int(bins)
+        self._scale = self.bins / (self.hi - self.lo)
+        self.reset()
+
+    def reset(self):
+        self.counts: List[int] = [0] * self.bins
+        self.under = 0
+        self.over = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def add(self, x: float):
+        self.count += 1
+        self._sum += x
+        self._sum_sq += x * x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        i = int((x - self.lo) * self._scale)
+        if x < self.lo:
+            self.under += 1
+        elif i >= self.bins:
+            self.over += 1
+        else:
+            self.counts[i] += 1
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        if self.count < 2:
+            return math.nan
+        m = self._sum / self.count
+        return math.sqrt(max(0.0, self._sum_sq / self.count - m * m))
+
+    def percentile(self, p: float) -> float:
+        """p ∈ [0, 100]；落在下溢/上溢区的分位返回 min/max。"""
+        if not self.count:
+            return math.nan
+        rank = p / 100.0 * self.count
+        if rank <= self.under:
+            return self.min
+        acc = self.under
+        width = 1.0 / self._scale
+        for i, c in enumerate(self.counts):
+            if c and acc + c >= rank:
+                return self.lo + (i + (rank - acc) / c) * width
+            acc += c
+        return self.max
+
+    def to_dict(self, unit_scale: float = 1.0) -> Dict[str, object]:
+        """统计摘要（数值乘以 unit_scale，如 1e6 换算为微秒）与原始桶计数。"""
+        def s(x: float) -> float:
+            return x * unit_scale
+        return {
+            "count": self.count,
+            "min": s(self.min) if self.count else math.nan,
+            "max": s(self.max) if self.count else math.nan,
+            "mean": s(self.mean),
+            "std": s(self.std),
+            "p50": s(self.percentile(50)),
+            "p90": s(self.percentile(90)),
+            "p99": s(self.percentile(99)),
+            "p999": s(self.percentile(99.9)),
+            "lo": s(self.lo),
+            "hi": s(self.hi),
+            "under": self.under,
+            "over": self.over,
+            "counts": list(self.counts),
+        }
+
+
+class DeadlineScheduler:
+    """
+    固定周期节拍：截止时间按 start + k*period 在单调时钟上推进（不受 NTP 校时影响，也不累积漂移）。
+    - 休眠：先睡到截止时间前 spin_s，再忙等到截止时间（spin_s=0 时纯休眠），用于亚毫秒级精度；
+    - 超时策略：见 OVERRUN_SKIP / OVERRUN_COMPRESS；
+    - 统计：节拍周期（相邻两拍开始时间差）、抖动（实际开始 - 截止时间）、计算耗时三个直方图，见 stats()。
+    同步用法 run(step, stop_event)；事件循环等外部调度方可按 delay() -> tick_started() -> tick_finished() 自行驱动。
+    """
+    def __init__(self, period_s: float, overrun: str = OVERRUN_SKIP, spin_s: float = 0.0,
+                 max_catchup: int = 5, clock: Callable[[], float] = time.monotonic,
+                 hist_bins: int = 200):
+        if period_s <= 0:
+            raise ValueError("period_s must be > 0")
+        if overrun not in (OVERRUN_SKIP, OVERRUN_COMPRESS):
+            raise ValueError(f"unknown overrun policy: {overrun}")
+        self.period_s = float(period_s)
+        self.overrun = overrun
+        self.spin_s = max(0.0, float(spin_s))
+        self.max_catchup = max(0, int(max_catchup))
+        self.clock = clock
+        self.period_hist = Histogram(0.0, 2.0 * self.period_s, hist_bins)
+        self.jitter_hist = Histogram(0.0, self.period_s, hist_bins)
+        self.compute_hist = Histogram(0.0, self.period_s, hist_bins)
+        self.ticks = 0
+        self.overruns = 0       # 计算结束时已错过下一拍截止时间的次数
+        self.skipped = 0        # 被跳过（未执行）的节拍数
+        self._deadline: Optional[float] = None
+        self._last_start: Optional[float] = None
+        self._tick_start = 0.0
+
+    # ---------------- 外部驱动接口 ----------------
+    def reset(self, now: Optional[float] = None):
+        """从 now（默认当前时刻）开始新的节拍网格，统计保留。"""
+        self._deadline = self.clock() if now is None else now
+        self._last_start = None
+
+    @property
+    def deadline(self) -> float:
+        if self._deadline is None:
+            self.reset()
+        return self._deadline
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """距下一拍截止时间的秒数（已到期为 0）。"""
+        return max(0.0, self.deadline - (self.clock() if now is None else now))
+
+    def tick_started(self, now: Optional[float] = None):
+        if now is None:
+            now = self.clock()
+        self.jitter_hist.add(now - self.deadline)
+        if self._last_start is not None:
+            self.period_hist.add(now - self._last_start)
+        self._last_start = now
+        self._tick_start = now
+
+    def tick_finished(self, now: Optional[float] = None):
+        """记录计算耗时并按超时策略推进到下一拍截止时间。"""
+        if now is None:
+            now = self.clock()
+        self.ticks += 1
+        self.compute_hist.add(now - self._tick_start)
+        nxt = self._deadline + self.period_s
+        if now > nxt:
+            self.overruns += 1
+            missed = int((now - nxt) / self.period_s)
+            if self.overrun == OVERRUN_SKIP or missed >= self.max_catchup:
+                # 跳过已错过的节拍，保持相位
+                self.skipped += missed + 1
+                nxt += (missed + 1) * self.period_s
+        self._deadline = nxt
+
+    # ---------------- 同步执行 ----------------
+    def sleep_until_deadline(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """休眠（+可选忙等）到截止时间；stop_event 置位时提前返回 False。"""
+        deadline = self.deadline
+        clock = self.clock
+        if getattr(clock, "virtual", False):
+            # 虚拟时钟：由时钟直接推进到截止时间（无忙等）
+            if stop_event is not None:
+                return not clock.wait(stop_event, deadline - clock())
+            clock.sleep_until(deadline)
+            return True
+        remaining = deadline - clock() - self.spin_s
+        if remaining > 0:
+            if stop_event is not None:
+                if stop_event.wait(remaining):
+                    return False
+            else:
+                time.sleep(remaining)
+        while clock() < deadline:
+            pass
+        return stop_event is None or not stop_event.is_set()
+
+    def run(self, step: Callable[[], None], stop_event: threading.Event):
+        """按节拍调用 step() 直到 stop_event 置位（step 的异常由调用方在 step 内处理）。"""
+        self.reset()
+        while not stop_event.is_set():
+            self.tick_started()
+            step()
+            self.tick_finished()
+            if not self.sleep_until_deadline(stop_event):
+                break
+
+    # ---------------- 统计 ----------------
+    def stats(self, with_counts: bool = False) -> Dict[str, object]:
+        """节拍统计（时间单位：微秒）。with_counts=True 时附带各直方图的原始桶计数。"""
+        out: Dict[str, object] = {
+            "rate_hz": 1.0 / self.period_s,
+            "period_us": self.period_s * 1e6,
+            "overrun_policy": self.overrun,
+            "spin_us": self.spin_s * 1e6,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+        }
+        for name, h in (("tick_period", self.period_hist), ("jitter", self.jitter_hist),
+                        ("compute", self.compute_hist)):
+            d = h.to_dict(1e6)
+            if not with_counts:
+                d.pop("counts")
+            out[name] = d
+        return out
+
+    def reset_stats(self):
+        for h in (self.period_hist, self.jitter_hist, self.compute_hist):
+            h.reset()
+        self.ticks = self.overruns = self.skipped = 0
+        self._last_start = None
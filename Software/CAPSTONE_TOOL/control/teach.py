@@ -0,0 +1,67 @@
+# 示教录制：挂到 VescCAN 的更新通知上，每个位置帧（STATUS_4）解码后立即取样写入 .cteach（见 planner.teachfile），
+# 录制频率即节点状态帧频率，不受控制节拍或 GUI 刷新影响
+import math
+from typing import Dict, Iterable
+
+from hardware.vesc_can import VescCAN
+from planner.teachfile import CH_CURRENT, CH_POS, CH_VELOCITY, TeachWriter
+from utils.log_utils import globalLogger
+
+
+class _TeachTap:
+    """VescCAN.add_watch 的等待者：接收线程解码完该轴位置帧后调用 set()。"""
+    __slots__ = ("node_id", "fields", "_rec")
+
+    def __init__(self, node_id: int, recorder: "TeachRecorder"):
+        self.node_id = node_id
+        self.fields = frozenset(("pos_deg",))
+        self._rec = recorder
+
+    def set(self):
+        self._rec._on_update(self.node_id)
+
+
+class TeachRecorder:
+    """
+    录制 node_ids 各轴的位置（可选电流、角速度）：样本时刻为帧解码时刻（VescCAN.clock），
+    同一帧只记录一次（按状态表的字段更新时间去重），离线期间不记录。
+    """
+    def __init__(self, vesc: VescCAN, path: str, node_ids: Iterable[int], current: bool = False,
+                 velocity: bool = False, chunk_samples: int = 1024):
+        self.vesc = vesc
+        self.path = path
+        self.node_ids = tuple(node_ids)
+        self.log = globalLogger
+        channels = CH_POS | (CH_CURRENT if current else 0) | (CH_VELOCITY if velocity else 0)
+        self.writer = TeachWriter(path, self.node_ids, channels, chunk_samples)
+        self.current = current
+        self.velocity = velocity
+        self._last_ts: Dict[int, float] = {nid: vesc.sample(nid, "pos_deg")[1] for nid in self.node_ids}
+        self._taps = [vesc.add_watch(_TeachTap(nid, self)) for nid in self.node_ids]
+
+    def _on_update(self, node_id: int):
+        sample = self.vesc.sample
+        pos, ts = sample(node_id, "pos_deg")
+        if ts <= self._last_ts[node_id] or math.isnan(pos):
+            return
+        self._last_ts[node_id] = ts
+        cur = sample(node_id, "current_motor")[0] if self.current else 0.0
+        vel = sample(node_id, "deg_per_s")[0] if self.velocity else 0.0
+        self.writer.append(node_id, ts, pos, cur, vel)
+
+    @property
+    def samples(self) -> int:
+        return self.writer.samples
+
+    def stats(self) -> Dict[str, object]:
+        return {"path": self.path, "axes": list(self.node_ids), "samples": self.writer.samples,
+                "chunks": self.writer.chunks, "duration_s": self.writer.duration}
+
+    def close(self) -> Dict[str, object]:
+        for tap in self._taps:
+            self.vesc.unwatch(tap)
+        self._taps = []
+        self.writer.close()
+        st = self.stats()
+        self.log.info(f"Teach recording closed: {self.path} ({st['samples']} samples, {st['duration_s']:.1f}s)")
+        return st
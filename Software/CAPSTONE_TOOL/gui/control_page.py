@@ -54,6 +54,13 @@ class ControlPage:
                                 dpg.add_button(label="停止控制循环", callback=self._on_stop_control)
                                 dpg.add_button(label="开始所有轴找零", callback=self._find_zero)
                                 dpg.add_button(label="终止找零", callback=self._on_cancel_homing)
+                            # 示教：录制状态帧中的关节位置，回放时按原节奏下发位置命令
+                            with dpg.group(horizontal=True):
+                                dpg.add_input_text(tag="teach_path_in", default_value="teach.cteach", width=160)
+                                dpg.add_checkbox(label="含电流/速度", tag="teach_full_chk", default_value=False)
+                                dpg.add_button(label="开始示教", callback=self._on_start_teach)
+                                dpg.add_button(label="停止示教", callback=self._on_stop_teach)
+                                dpg.add_button(label="回放示教", callback=self._on_play_teach)
 
                         # 日志区域
                         self.logger.create_context(90, 470)
@@ -277,7 +284,12 @@ class ControlPage:
                 connected = False
                 if self.bridge and hasattr(self.bridge, "can_if") and self.bridge.can_if:
                     connected = (self.bridge.can_if.bus is not None)
-                dpg.set_value("connection_status_txt", f"状态: {'已连接' if connected else '未连接'}")
+                status_txt = f"状态: {'已连接' if connected else '未连接'}"
+                if connected and hasattr(self.bridge.can_if, "get_bus_load"):
+                    load = self.bridge.can_if.get_bus_load()
+                    if load:
+                        status_txt += f"  总线负载: {load['load_pct']:.1f}% (TX {load['tx_pct']:.1f}%)"
+                dpg.set_value("connection_status_txt", status_txt)
 
                 # 更新各轴状态
                 if self.bridge and hasattr(self.bridge, "arm") and self.bridge.arm:
@@ -474,6 +486,35 @@ class ControlPage:
         except Exception as e:
             self.logger.log_error(f"终止找零失败: {e}")
 
+    def _on_start_teach(self):
+        try:
+            if not self.bridge or not hasattr(self.bridge, "arm") or self.bridge.arm is None:
+                self.logger.log_error("后端未就绪，无法示教")
+                return
+            full = bool(dpg.get_value("teach_full_chk"))
+            self.bridge.arm.start_teach(dpg.get_value("teach_path_in"), current=full, velocity=full)
+        except Exception as e:
+            self.logger.log_error(f"开始示教失败: {e}")
+
+    def _on_stop_teach(self):
+        try:
+            if not self.bridge or not hasattr(self.bridge, "arm") or self.bridge.arm is None:
+                self.logger.log_error("后端未就绪，无法停止示教")
+                return
+            self.bridge.arm.stop_teach()
+        except Exception as e:
+            self.logger.log_error(f"停止示教失败: {e}")
+
+    def _on_play_teach(self):
+        try:
+            if not self.bridge or not hasattr(self.bridge, "arm") or self.bridge.arm is None:
+                self.logger.log_error("后端未就绪，无法回放示教")
+                return
+            self.bridge.arm.play_teach(dpg.get_value("teach_path_in"))
+            self.logger.log_info("已开始回放示教（需已启动控制循环并使能轴）")
+        except Exception as e:
+            self.logger.log_error(f"回放示教失败: {e}")
+
     def _find_zero(self):
         """对所有轴执行找零（根据 settings.HOMING_CONFIG）。"""
         try:
@@ -558,7 +599,8 @@ class ControlPage:
             axis_cfg.homing_command_period_s = float(dpg.get_value(tags["command_period_s"]))
             axis_cfg.homing_send_idle_keepalive = bool(dpg.get_value(tags["send_idle_keepalive"]))
             
-            # 应用配置更改（当前无需通知控制线程，home时读取即时生效）
+            # 通知控制核心（同进程时为同一对象，仅使位置流重发；独立进程时经命令环同步）
+            self.bridge.arm.update_axis_config(nid, axis_cfg)
             self.logger.log_success(f"轴 {nid} 找零参数已应用")
         except Exception as e:
             self.logger.log_error(f"应用找零参数失败: {e}")
@@ -576,6 +618,7 @@ class ControlPage:
             axis_cfg = self.bridge.arm.axes[nid].cfg
             axis_cfg.max_vel_dps = vel
             axis_cfg.max_accel_dps2 = acc
+            self.bridge.arm.update_axis_config(nid, axis_cfg)
             self.logger.log_success(f"轴 {nid} 限速已应用: vel={vel:.1f}°/s, acc={acc:.1f}°/s^2")
         except Exception as e:
             self.logger.log_error(f"应用限速失败: {e}")
@@ -0,0 +1,117 @@
+# asyncio 版 CAN 接口：基于 can.Notifier + AsyncBufferedReader
+import asyncio
+from typing import Optional
+
+import can
+
+from hardware.can_interface import CANInterface, TX_PRIORITY_HIGH
+from utils.aio_utils import LoopThread
+
+
+class AsyncCANInterface(CANInterface):
+    """
+    与 CANInterface 接口一致（start/stop/send/set_rx_dispatch/get_tx_stats），
+    但接收与发送都作为任务运行在 LoopThread 的事件循环上：
+    - 接收：can.Notifier 把帧投递到 AsyncBufferedReader（支持 fileno 的总线直接挂在 selector 上，无轮询线程），
+      接收任务逐帧分发（等待者由 VescCAN 解码后按节点/字段唤醒）；
+    - 发送：沿用合并队列与发送预算，发送任务被事件唤醒后非阻塞地写入驱动（tx_timeout_s 默认 0，不阻塞事件循环）。
+    """
+    def __init__(self, interface: str, channel: str, bitrate: int, runtime: LoopThread,
+                 tx_queue_size: int = 64, tx_timeout_s: float = 0.0,
+                 bus_load_window_s: Optional[float] = 1.0, tx_budget_fraction: Optional[float] = None):
+        super().__init__(interface, channel, bitrate,
+                         tx_queue_size=tx_queue_size, tx_timeout_s=tx_timeout_s, tx_async=True,
+                         bus_load_window_s=bus_load_window_s, tx_budget_fraction=tx_budget_fraction)
+        self.runtime = runtime
+        self.notifier: Optional[can.Notifier] = None
+        self._reader: Optional[can.AsyncBufferedReader] = None
+        self._rx_task: Optional[asyncio.Task] = None
+        self._tx_task: Optional[asyncio.Task] = None
+        self._tx_wakeup: Optional[asyncio.Event] = None
+
+    # ---------------- 生命周期 ----------------
+    def start(self):
+        if self.bus:
+            return
+        self.runtime.start()
+        self.runtime.run(self.start_async())
+
+    def stop(self):
+        if not self.runtime.is_running():
+            return
+        self.runtime.run(self.stop_async())
+
+    async def start_async(self):
+        if self.bus:
+            return
+        loop = asyncio.get_running_loop()
+        self.bus = can.Bus(interface=self.interface, channel=self.channel, bitrate=self.bitrate,
+                           can_filters=self.rx_filters)
+        self._reader = can.AsyncBufferedReader()
+        self.notifier = can.Notifier(self.bus, [self._reader], timeout=0.1, loop=loop)
+        self.tx_queue.clear()
+        self._tx_wakeup = asyncio.Event()
+        self._rx_task = loop.create_task(self._rx_loop_async())
+        self._tx_task = loop.create_task(self._tx_loop_async())
+        self.log.info(f"CAN(asyncio) started: {self.interface} {self.channel} {self.bitrate}")
+
+    async def stop_async(self):
+        # 尽量把已入队的停止类指令发出去再关闭
+        if self.bus is not None and len(self.tx_queue):
+            self._flush_tx()
+        for task in (self._rx_task, self._tx_task):
+            if task is not None:
+                task.cancel()
+        for task in (self._rx_task, self._tx_task):
+            if task is not None:
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        if self.notifier is not None:
+            self.notifier.stop()
+        if self.bus:
+            self.bus.shutdown()
+        self.bus = None
+        self.notifier = None
+        self._reader = None
+        self._rx_task = None
+        self._tx_task = None
+        self.tx_queue.clear()
+        self.log.info("CAN(asyncio) stopped")
+
+    # ---------------- 发送 ----------------
+    def send(self, arbitration_id: int, data: bytes, extended_id: bool,
+             priority: int = TX_PRIORITY_HIGH):
+        """线程安全：入队后唤醒发送任务（循环线程内直接 set，其它线程经 call_soon_threadsafe）。"""
+        if not self.bus or self._tx_wakeup is None:
+            return
+        msg = can.Message(arbitration_id=arbitration_id, is_extended_id=extended_id, data=data)
+        self.tx_queue.put((arbitration_id, extended_id), msg, priority)
+        self.runtime.call_soon(self._tx_wakeup.set)
+
+    def _flush_tx(self):
+        while True:
+            item = self.tx_queue.get(timeout=0, admit_low=self._admit_low)
+            if item is None:
+                return
+            msg, enqueue_ts = item
+            self._send_now(msg, enqueue_ts)
+
+    async def _tx_loop_async(self):
+        while True:
+            if self.tx_queue.has_low():
+                # 有被预算延后的低优先级帧：短超时后重试
+                try:
+                    await asyncio.wait_for(self._tx_wakeup.wait(), 0.002)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await self._tx_wakeup.wait()
+            self._tx_wakeup.clear()
+            self._flush_tx()
+
+    # ---------------- 接收 ----------------
+    async def _rx_loop_async(self):
+        async for msg in self._reader:
+            self._dispatch_rx(msg)
@@ -0,0 +1,185 @@
+# CAN 总线负载核算与发送预算
+import threading
+import time
+from typing import Dict, List, Optional
+
+import can
+
+# 帧尾固定位：CRC 分隔符(1) + ACK 槽/分隔符(2) + EOF(7) + 帧间隔 IFS(3)，不参与位填充
+_TAIL_BITS = 13
+
+
+def _stuffable_bits(dlc: int, extended: bool) -> int:
+    """SOF 至 CRC 末位（参与位填充）的位数。"""
+    n_data = 8 * min(8, dlc)
+    # 标准帧：SOF1 ID11 RTR1 IDE1 r0 1 DLC4 CRC15 = 34
+    # 扩展帧：SOF1 ID11 SRR1 IDE1 ID18 RTR1 r1 1 r0 1 DLC4 CRC15 = 54
+    return (54 if extended else 34) + n_data
+
+
+def nominal_frame_bits(dlc: int, extended: bool) -> int:
+    """不计位填充的帧长（位）。"""
+    return _stuffable_bits(dlc, extended) + _TAIL_BITS
+
+
+def worst_case_frame_bits(dlc: int, extended: bool) -> int:
+    """最坏位填充下的帧长（位）：每 4 位可插入 1 个填充位。"""
+    n = _stuffable_bits(dlc, extended)
+    return n + (n - 1) // 4 + _TAIL_BITS
+
+
+def _crc15(bits: List[int]) -> int:
+    crc = 0
+    for b in bits:
+        nxt = b ^ ((crc >> 14) & 1)
+        crc = (crc << 1) & 0x7FFF
+        if nxt:
+            crc ^= 0x4599
+    return crc
+
+
+def _append(bits: List[int], value: int, width: int):
+    for i in range(width - 1, -1, -1):
+        bits.append((value >> i) & 1)
+
+
+def exact_frame_bits(arbitration_id: int, data: bytes, extended: bool) -> int:
+    """按实际 ID/数据/CRC 逐位计算位填充后的精确帧长（位）。开销较大，仅用于核算/校验。"""
+    dlc = min(8, len(data))
+    bits: List[int] = [0]  # SOF
+    if extended:
+        _append(bits, (arbitration_id >> 18) & 0x7FF, 11)
+        bits += [1, 1]  # SRR, IDE
+        _append(bits, arbitration_id & 0x3FFFF, 18)
+        bits += [0, 0, 0]  # RTR, r1, r0
+    else:
+        _append(bits, arbitration_id & 0x7FF, 11)
+        bits += [0, 0, 0]  # RTR, IDE, r0
+    _append(bits, dlc, 4)
+    for byte in bytes(data[:dlc]):
+        _append(bits, byte, 8)
+    _append(bits, _crc15(bits), 15)
+
+    stuff = 0
+    prev = -1
+    run = 0
+    for b in bits:
+        if b == prev:
+            run += 1
+        else:
+            prev = b
+            run = 1
+        if run == 5:
+            # 插入反相填充位，它也计入下一段连续位
+            stuff += 1
+            prev = 1 - b
+            run = 1
+    return len(bits) + stuff + _TAIL_BITS
+
+
+# 预计算：dlc -> 位数（worst / nominal），热路径只做查表
+_WORST = {(d, e): worst_case_frame_bits(d, e) for d in range(9) for e in (False, True)}
+_NOMINAL = {(d, e): nominal_frame_bits(d, e) for d in range(9) for e in (False, True)}
+
+
+def frame_bits(msg: can.Message, mode: str = "worst") -> int:
+    """mode: "worst"（最坏填充，默认，用于预算）/ "nominal"（无填充）/ "exact"（逐位精确）。"""
+    if mode == "exact":
+        return exact_frame_bits(msg.arbitration_id, msg.data, msg.is_extended_id)
+    table = _NOMINAL if mode == "nominal" else _WORST
+    return table[(min(8, msg.dlc), bool(msg.is_extended_id))]
+
+
+class BusLoadMonitor:
+    """
+    滑动窗口统计收/发帧占用的总线位数，换算为利用率（%）。
+    作为 CANInterface.taps 挂入（on_frame），只统计本机可见的帧：
+    启用验收滤波后，被滤掉的其它设备流量不计入 RX。
+    """
+    def __init__(self, bitrate: int, window_s: float = 1.0, mode: str = "worst", buckets: int = 10):
+        self.bitrate = max(1, int(bitrate))
+        self.window_s = max(1e-3, float(window_s))
+        self.mode = mode
+        self._n = max(1, int(buckets))
+        self._bucket_s = self.window_s / self._n
+        self._lock = threading.Lock()
+        # 每桶：[tx_bits, rx_bits, tx_frames, rx_frames]
+        self._buckets = [[0, 0, 0, 0] for _ in range(self._n)]
+        self._bucket_idx = int(time.monotonic() / self._bucket_s)
+        self.total_tx_bits = 0
+        self.total_rx_bits = 0
+
+    def _advance(self, now: float):
+        idx = int(now / self._bucket_s)
+        gap = idx - self._bucket_idx
+        if gap <= 0:
+            return
+        for k in range(1, min(gap, self._n) + 1):
+            b = self._buckets[(self._bucket_idx + k) % self._n]
+            b[0] = b[1] = b[2] = b[3] = 0
+        self._bucket_idx = idx
+
+    def on_frame(self, msg: can.Message, is_tx: bool):
+        bits = frame_bits(msg, self.mode)
+        with self._lock:
+            self._advance(time.monotonic())
+            b = self._buckets[self._bucket_idx % self._n]
+            if is_tx:
+                b[0] += bits
+                b[2] += 1
+                self.total_tx_bits += bits
+            else:
+                b[1] += bits
+                b[3] += 1
+                self.total_rx_bits += bits
+
+    def snapshot(self) -> Dict[str, float]:
+        """窗口内的利用率（%）与帧率（帧/秒）。"""
+        with self._lock:
+            self._advance(time.monotonic())
+            tx_bits = sum(b[0] for b in self._buckets)
+            rx_bits = sum(b[1] for b in self._buckets)
+            tx_frames = sum(b[2] for b in self._buckets)
+            rx_frames = sum(b[3] for b in self._buckets)
+        cap = self.bitrate * self.window_s
+        return {
+            "load_pct": 100.0 * (tx_bits + rx_bits) / cap,
+            "tx_pct": 100.0 * tx_bits / cap,
+            "rx_pct": 100.0 * rx_bits / cap,
+            "tx_fps": tx_frames / self.window_s,
+            "rx_fps": rx_frames / self.window_s,
+        }
+
+
+class TxBudget:
+    """
+    发送预算（令牌桶，单位：位）：速率 = bitrate × fraction。
+    所有实际发出的帧都扣减令牌（可为负）；低优先级帧只有在令牌足够时才放行，否则延后，
+    从而在高优先级流量接近预算时把余量留给 VESC 状态帧。
+    """
+    def __init__(self, bitrate: int, fraction: float = 0.6, burst_s: float = 0.01, mode: str = "worst"):
+        self.rate_bps = max(1.0, float(bitrate) * float(fraction))
+        self.capacity = self.rate_bps * max(1e-4, burst_s)
+        self.mode = mode
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate_bps)
+        self._last = now
+
+    def consume(self, msg: can.Message):
+        bits = frame_bits(msg, self.mode)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= bits
+
+    def wait_time(self, msg: can.Message) -> float:
+        """低优先级帧需等待的秒数；0 表示现在即可发送。"""
+        bits = frame_bits(msg, self.mode)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= bits:
+                return 0.0
+            return (bits - self._tokens) / self.rate_bps
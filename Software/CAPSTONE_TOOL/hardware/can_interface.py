@@ -1,12 +1,114 @@
 import threading
+import time
+from collections import OrderedDict
 from utils.log_utils import globalLogger
-from typing import Callable, Optional
+from hardware.bus_load import BusLoadMonitor, TxBudget
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
 
 import can
 
 
+# 发送优先级：高优先级（控制/停止指令）总是先发；低优先级（空闲心跳等）受发送预算约束，可被延后
+TX_PRIORITY_HIGH = 0
+TX_PRIORITY_LOW = 1
+
+
+class CoalescingTxQueue:
+    """
+    有界发送队列，按 key 做“最新覆盖”（latest-wins）合并：
+    同一 key（同一 arbitration_id，即同一 (packet_id, node_id)）尚未发出的旧帧直接被新帧替换，
+    并移动到队尾，保证每个节点最后收到的仍是最后下发的命令。
+    高/低两个优先级各一条队列，高优先级先出；队列满时丢弃最旧的待发帧（优先丢低优先级）。
+    """
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = max(1, int(maxsize))
+        self._lanes: Tuple["OrderedDict[Hashable, Tuple[can.Message, float]]", ...] = (OrderedDict(), OrderedDict())
+        self._cond = threading.Condition()
+        # 统计
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.deferred = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._lanes[0]) + len(self._lanes[1])
+
+    def has_low(self) -> bool:
+        return bool(self._lanes[TX_PRIORITY_LOW])
+
+    def put(self, key: Hashable, msg: can.Message, priority: int = TX_PRIORITY_HIGH):
+        now = time.perf_counter()
+        lane = self._lanes[TX_PRIORITY_LOW if priority else TX_PRIORITY_HIGH]
+        with self._cond:
+            self.enqueued += 1
+            for q in self._lanes:
+                if key in q:
+                    # 旧帧尚未发出：替换并移到队尾
+                    del q[key]
+                    self.coalesced += 1
+                    break
+            else:
+                if len(self) >= self.maxsize:
+                    low = self._lanes[TX_PRIORITY_LOW]
+                    (low if low else self._lanes[TX_PRIORITY_HIGH]).popitem(last=False)
+                    self.dropped += 1
+            lane[key] = (msg, now)
+            depth = len(self)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None,
+            admit_low: Optional[Callable[[can.Message], float]] = None) -> Optional[Tuple[can.Message, float]]:
+        """
+        取出最早的待发帧及其入队时间；超时返回 None。
+        admit_low(msg) 返回低优先级帧还需等待的秒数（0 表示放行），用于发送预算。
+        """
+        high, low = self._lanes
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                wait = None
+                if high:
+                    item = high.popitem(last=False)[1]
+                    break
+                if low:
+                    msg = next(iter(low.values()))[0]
+                    wait = admit_low(msg) if admit_low is not None else 0.0
+                    if wait <= 0.0:
+                        item = low.popitem(last=False)[1]
+                        break
+                    self.deferred += 1
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0.0:
+                    return None
+                if wait is not None:
+                    remaining = wait if remaining is None else min(wait, remaining)
+                self._cond.wait(remaining)
+            if not high and not low:
+                self._cond.notify_all()
+            return item
+
+    def wait_empty(self, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not len(self), timeout)
+
+    def clear(self):
+        with self._cond:
+            for q in self._lanes:
+                q.clear()
+            self._cond.notify_all()
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+
 class CANInterface:
-    def __init__(self, interface: str, channel: str, bitrate: int):
+    def __init__(self, interface: str, channel: str, bitrate: int,
+                 tx_queue_size: int = 64, tx_timeout_s: float = 0.02, tx_async: bool = True,
+                 bus_load_window_s: Optional[float] = 1.0, tx_budget_fraction: Optional[float] = None):
         self.interface = interface
         self.channel = channel
         self.bitrate = bitrate
@@ -14,35 +116,156 @@ class CANInterface:
         self.rx_thread: Optional[threading.Thread] = None
         self._stop = threading.Event()
         self.on_message: Optional[Callable[[can.Message], None]] = None
+        # 预索引分发：arbitration_id -> handler(data)，命中即一次字典查找；未命中回退 on_message
+        self.rx_handlers: Optional[Dict[int, Callable[[bytes], None]]] = None
+        self.rx_filters: Optional[List[dict]] = None
+        # 旁路监听（如 CANRecorder）：tap(msg, is_tx)，收发两侧都会调用
+        self.taps: List[Callable[[can.Message, bool], None]] = []
         self.log = globalLogger
+        # 发送：tx_async=True 时由独立线程发送，调用方只入队，不再被驱动阻塞
+        self.tx_async = tx_async
+        self.tx_timeout_s = tx_timeout_s
+        self.tx_queue = CoalescingTxQueue(tx_queue_size)
+        self.tx_thread: Optional[threading.Thread] = None
+        self._tx_lock = threading.Lock()
+        self._tx_sent = 0
+        self._tx_errors = 0
+        self._tx_latency_last_s = 0.0
+        self._tx_latency_max_s = 0.0
+        self._tx_latency_sum_s = 0.0
+        self._tx_driver_max_s = 0.0
+        # 总线负载统计（收发都计入）与发送预算（None 表示不限制低优先级帧）
+        self.bus_load: Optional[BusLoadMonitor] = None
+        if bus_load_window_s:
+            self.bus_load = BusLoadMonitor(bitrate, window_s=bus_load_window_s)
+            self.taps.append(self.bus_load.on_frame)
+        self.tx_budget: Optional[TxBudget] = (
+            TxBudget(bitrate, fraction=tx_budget_fraction) if tx_budget_fraction else None
+        )
 
     def start(self):
         if self.bus:
             return
-        self.bus = can.Bus(interface=self.interface, channel=self.channel, bitrate=self.bitrate)
+        self.bus = can.Bus(interface=self.interface, channel=self.channel, bitrate=self.bitrate,
+                           can_filters=self.rx_filters)
         self._stop.clear()
         self.rx_thread = threading.Thread(target=self._rx_loop, daemon=True)
         self.rx_thread.start()
+        if self.tx_async:
+            self.tx_queue.clear()
+            self.tx_thread = threading.Thread(target=self._tx_loop, daemon=True)
+            self.tx_thread.start()
         self.log.info(f"CAN started: {self.interface} {self.channel} {self.bitrate}")
 
     def stop(self):
+        # 尽量把已入队的停止类指令发出去再关闭
+        if self.tx_thread and self.bus:
+            self.tx_queue.wait_empty(timeout=0.1)
         self._stop.set()
+        self.tx_queue.wake()
         if self.rx_thread:
             self.rx_thread.join(timeout=1.0)
+        if self.tx_thread:
+            self.tx_thread.join(timeout=1.0)
         if self.bus:
             self.bus.shutdown()
         self.bus = None
         self.rx_thread = None
+        self.tx_thread = None
+        self.tx_queue.clear()
         self.log.info("CAN stopped")
 
-    def send(self, arbitration_id: int, data: bytes, extended_id: bool):
+    def set_rx_dispatch(self, handlers: Dict[int, Callable[[bytes], None]],
+                        filters: Optional[List[dict]] = None):
+        """
+        设置接收分发表与验收滤波器（python-can can_filters 格式）。
+        滤波器在硬件/驱动层先丢弃无关帧；分发表对剩余帧做精确匹配。
+        """
+        self.rx_handlers = dict(handlers)
+        self.rx_filters = list(filters) if filters else None
+        if self.bus is not None:
+            try:
+                self.bus.set_filters(self.rx_filters)
+            except Exception as e:
+                self.log.warning(f"CAN set_filters failed: {e}")
+
+    def send(self, arbitration_id: int, data: bytes, extended_id: bool,
+             priority: int = TX_PRIORITY_HIGH):
         if not self.bus:
             return
         msg = can.Message(arbitration_id=arbitration_id, is_extended_id=extended_id, data=data)
+        if self.tx_async and self.tx_thread is not None:
+            # arbitration_id 唯一对应 (packet_id, node_id)，以其为合并键
+            self.tx_queue.put((arbitration_id, extended_id), msg, priority)
+            return
+        self._send_now(msg, time.perf_counter())
+
+    def _send_now(self, msg: can.Message, enqueue_ts: float):
+        bus = self.bus
+        if bus is None:
+            return
+        t0 = time.perf_counter()
         try:
-            self.bus.send(msg, timeout=0.02)
+            bus.send(msg, timeout=self.tx_timeout_s)
         except can.CanError as e:
+            with self._tx_lock:
+                self._tx_errors += 1
             self.log.warning(f"CAN send error: {e}")
+            return
+        t1 = time.perf_counter()
+        if self.tx_budget is not None:
+            self.tx_budget.consume(msg)
+        if self.taps:
+            self._call_taps(msg, True)
+        latency = t1 - enqueue_ts
+        with self._tx_lock:
+            self._tx_sent += 1
+            self._tx_latency_last_s = latency
+            self._tx_latency_sum_s += latency
+            if latency > self._tx_latency_max_s:
+                self._tx_latency_max_s = latency
+            if t1 - t0 > self._tx_driver_max_s:
+                self._tx_driver_max_s = t1 - t0
+
+    def _tx_loop(self):
+        while not self._stop.is_set():
+            item = self.tx_queue.get(timeout=0.05, admit_low=self._admit_low)
+            if item is None:
+                continue
+            msg, enqueue_ts = item
+            self._send_now(msg, enqueue_ts)
+
+    def _admit_low(self, msg: can.Message) -> float:
+        if self.tx_budget is None:
+            return 0.0
+        return self.tx_budget.wait_time(msg)
+
+    def get_bus_load(self) -> Dict[str, float]:
+        """窗口内总线利用率（%，按最坏位填充计）及收/发帧率；未启用统计时返回空字典。"""
+        return self.bus_load.snapshot() if self.bus_load is not None else {}
+
+    def get_tx_stats(self) -> Dict[str, float]:
+        """
+        发送统计：队列深度、合并/丢弃帧数、入队→发出延迟（秒）。
+        latency_* 含排队时间；driver_max_s 仅为 bus.send 本身的最大耗时。
+        """
+        q = self.tx_queue
+        with self._tx_lock:
+            sent = self._tx_sent
+            return {
+                "queue_depth": len(q),
+                "queue_max_depth": q.max_depth,
+                "enqueued": q.enqueued,
+                "sent": sent,
+                "coalesced": q.coalesced,
+                "dropped": q.dropped,
+                "deferred": q.deferred,
+                "errors": self._tx_errors,
+                "latency_last_s": self._tx_latency_last_s,
+                "latency_avg_s": (self._tx_latency_sum_s / sent) if sent else 0.0,
+                "latency_max_s": self._tx_latency_max_s,
+                "driver_max_s": self._tx_driver_max_s,
+            }
 
     def _rx_loop(self):
         assert self.bus
@@ -53,8 +276,29 @@ class CANInterface:
                 msg = None
             if msg is None:
                 continue
-            if self.on_message:
+            self._dispatch_rx(msg)
+
+    def _call_taps(self, msg: can.Message, is_tx: bool):
+        for tap in self.taps:
+            try:
+                tap(msg, is_tx)
+            except Exception as e:
+                self.log.error(f"CAN tap error: {e}")
+
+    def _dispatch_rx(self, msg: can.Message):
+        if self.taps:
+            self._call_taps(msg, False)
+        handlers = self.rx_handlers
+        if handlers is not None:
+            handler = handlers.get(msg.arbitration_id)
+            if handler is not None:
                 try:
-                    self.on_message(msg)
+                    handler(msg.data)
                 except Exception as e:
-                    self.log.exception(f"on_message error: {e}")
+                    self.log.error(f"rx handler error: {e}")
+                return
+        if self.on_message:
+            try:
+                self.on_message(msg)
+            except Exception as e:
+                self.log.error(f"on_message error: {e}")
@@ -0,0 +1,219 @@
+# CAN 流量录制与回放（定长二进制记录 + mmap 回放）
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Iterator, NamedTuple, Optional
+
+import can
+
+from hardware.vesc_can import VescCAN
+from utils.clock import MONOTONIC, Clock
+from utils.log_utils import globalLogger
+
+# 文件头：magic(8) | version(u16) | record_size(u16) | reserved(u32)，共 16 字节
+# 版本 2：时间戳统一取录制时钟（与 VescCAN.clock 同一时基）；版本 1 为驱动时间戳/墙钟混用，只读
+FILE_MAGIC = b"CAPCANRC"
+FILE_VERSION = 2
+_HEADER = struct.Struct("<8sHHI")
+# 记录：timestamp(f64) | arbitration_id(u32) | flags(u8) | dlc(u8) | pad(2) | data(8)，共 24 字节
+_RECORD = struct.Struct("<dIBB2x8s")
+
+FLAG_EXTENDED = 0x01
+FLAG_TX = 0x02
+FLAG_REMOTE = 0x04
+FLAG_ERROR = 0x08
+
+
+class RecordedFrame(NamedTuple):
+    timestamp: float
+    arbitration_id: int
+    is_extended_id: bool
+    is_tx: bool
+    dlc: int
+    data: bytes
+
+    def to_message(self) -> can.Message:
+        return can.Message(timestamp=self.timestamp, arbitration_id=self.arbitration_id,
+                           is_extended_id=self.is_extended_id, data=self.data)
+
+
+class CANRecorder:
+    """
+    挂到 CANInterface.taps 上，把每一帧（收/发）追加为 24 字节定长记录。
+    写入先进内存缓冲，满 buffer_records 条或 flush()/close() 时落盘。
+    时间戳取 clock（默认与 VescCAN 相同的单调时钟），收发帧同一时基，回放时可直接作为状态时间戳；
+    驱动时间戳（多为墙钟，发送帧没有）不使用。
+    """
+    def __init__(self, path: str, buffer_records: int = 512, clock: Clock = MONOTONIC):
+        self.path = path
+        self.clock = clock
+        self.log = globalLogger
+        exists = os.path.exists(path) and os.path.getsize(path) >= _HEADER.size
+        self._f = open(path, "r+b" if exists else "wb")
+        if exists:
+            magic, version, rec_size, _ = _HEADER.unpack(self._f.read(_HEADER.size))
+            if magic != FILE_MAGIC or rec_size != _RECORD.size or version != FILE_VERSION:
+                self._f.close()
+                raise ValueError(f"{path}: not a CAN recording (or incompatible version {version})")
+            self._f.seek(0, os.SEEK_END)
+        else:
+            self._f.write(_HEADER.pack(FILE_MAGIC, FILE_VERSION, _RECORD.size, 0))
+        self._buf = bytearray(_RECORD.size * max(1, buffer_records))
+        self._n_buf = 0
+        self._lock = threading.Lock()
+        self.records = 0
+        self._can_if = None
+
+    def attach(self, can_if):
+        self._can_if = can_if
+        can_if.taps.append(self.on_frame)
+
+    def detach(self):
+        if self._can_if is not None:
+            try:
+                self._can_if.taps.remove(self.on_frame)
+            except ValueError:
+                pass
+            self._can_if = None
+
+    def on_frame(self, msg: can.Message, is_tx: bool):
+        flags = (FLAG_EXTENDED if msg.is_extended_id else 0) | (FLAG_TX if is_tx else 0)
+        if msg.is_remote_frame:
+            flags |= FLAG_REMOTE
+        if msg.is_error_frame:
+            flags |= FLAG_ERROR
+        ts = self.clock()
+        with self._lock:
+            if self._f is None:
+                return
+            _RECORD.pack_into(self._buf, self._n_buf * _RECORD.size, ts, msg.arbitration_id,
+                              flags, msg.dlc, bytes(msg.data[:8]))
+            self._n_buf += 1
+            self.records += 1
+            if self._n_buf * _RECORD.size >= len(self._buf):
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._n_buf:
+            self._f.write(memoryview(self._buf)[:self._n_buf * _RECORD.size])
+            self._n_buf = 0
+        self._f.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._f is not None:
+                self._flush_locked()
+
+    def close(self):
+        self.detach()
+        with self._lock:
+            if self._f is None:
+                return
+            self._flush_locked()
+            self._f.close()
+            self._f = None
+        self.log.info(f"CAN recording closed: {self.path} ({self.records} frames)")
+
+
+class CANReplayer:
+    """
+    以 mmap 只读映射录制文件，按需逐条解码，内存占用与文件长度无关。
+    replay(speed=1.0) 按原始时间间隔回放；speed=N 为 N 倍速；speed=None 为不限速。
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._f.close()
+            raise ValueError(f"{path}: empty file")
+        magic, version, rec_size, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != FILE_MAGIC or rec_size != _RECORD.size or not 1 <= version <= FILE_VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a CAN recording (or incompatible version {version})")
+        self.version = version
+        # 末尾不完整的记录（录制中断）直接忽略
+        self._count = (len(self._mm) - _HEADER.size) // _RECORD.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> RecordedFrame:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._decode(index)
+
+    def _decode(self, index: int) -> RecordedFrame:
+        ts, arb, flags, dlc, data = _RECORD.unpack_from(self._mm, _HEADER.size + index * _RECORD.size)
+        return RecordedFrame(ts, arb, bool(flags & FLAG_EXTENDED), bool(flags & FLAG_TX), dlc, data[:dlc])
+
+    def frames(self, start: int = 0, stop: Optional[int] = None,
+               direction: Optional[str] = None) -> Iterator[RecordedFrame]:
+        """按序惰性迭代；direction 为 "rx"/"tx"/None(全部)。"""
+        stop = self._count if stop is None else min(stop, self._count)
+        want_tx = None if direction is None else (direction == "tx")
+        for i in range(max(0, start), stop):
+            fr = self._decode(i)
+            if want_tx is not None and fr.is_tx != want_tx:
+                continue
+            yield fr
+
+    def replay(self, sink: Callable[[RecordedFrame], None], speed: Optional[float] = 1.0,
+               start: int = 0, stop: Optional[int] = None, direction: Optional[str] = "rx",
+               stop_event: Optional[threading.Event] = None) -> int:
+        """把帧依次交给 sink，返回回放帧数。speed 为 None 或 <=0 时不做等待。"""
+        realtime = speed is not None and speed > 0
+        t_wall0 = time.monotonic()
+        ts0: Optional[float] = None
+        n = 0
+        for fr in self.frames(start, stop, direction):
+            if stop_event is not None and stop_event.is_set():
+                break
+            if realtime:
+                if ts0 is None:
+                    ts0 = fr.timestamp
+                delay = t_wall0 + (fr.timestamp - ts0) / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            sink(fr)
+            n += 1
+        return n
+
+    def close(self):
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    # ---------------- 常用 sink ----------------
+    @staticmethod
+    def vesc_sink(vesc: VescCAN) -> Callable[[RecordedFrame], None]:
+        """
+        直接喂给 VescCAN.parse_status（离线复现状态解析/碰撞判定/离线判定）：
+        状态时间戳取帧的录制时间戳，每帧之前按该时刻检查离线，与回放速度无关（speed=None 也能复现超时）。
+        vesc 不应启动监视线程（start_supervisor），否则会按实时时钟另行判定离线。
+        回放 direction=None 时发送帧只用于推进离线检查（主机周期命令使检查时刻更密），不解码。
+        """
+        def sink(fr: RecordedFrame):
+            vesc.check_offline_and_cleanup(fr.timestamp)
+            if fr.is_tx:
+                return
+            unpack = vesc.unpack_id(fr.arbitration_id, fr.is_extended_id)
+            if unpack:
+                vesc.parse_status(unpack[0], unpack[1], fr.data, fr.timestamp)
+        return sink
+
+    @staticmethod
+    def bus_sink(bus: can.BusABC) -> Callable[[RecordedFrame], None]:
+        """发送到（虚拟）总线，供接在同一通道上的 CANInterface 接收。"""
+        def sink(fr: RecordedFrame):
+            bus.send(fr.to_message())
+        return sink
@@ -0,0 +1,121 @@
+# 多通道 CAN：按节点把收发路由到不同总线
+from typing import Callable, Dict, List, Optional
+
+import can
+
+from hardware.can_interface import CANInterface, TX_PRIORITY_HIGH
+from utils.log_utils import globalLogger
+
+
+class _FanoutList(list):
+    """append/remove 同步到所有子接口的同名列表（taps）。"""
+    def __init__(self, targets: List[list]):
+        super().__init__()
+        self._targets = targets
+
+    def append(self, item):
+        super().append(item)
+        for t in self._targets:
+            t.append(item)
+
+    def remove(self, item):
+        super().remove(item)
+        for t in self._targets:
+            if item in t:
+                t.remove(item)
+
+
+class CANRouter:
+    """
+    聚合多个 CANInterface（每条总线各自的收发线程/任务），对上层保持单接口外观：
+    - send 按 arbitration_id 中的节点号选择总线（结果按 arbitration_id 缓存，热路径一次字典查找）；
+    - set_rx_dispatch 把分发表按节点拆到各总线；
+    - 未配置的节点走默认总线。
+    ArmController / VescCAN 无需感知通道划分。
+    """
+    def __init__(self, buses: Dict[str, CANInterface], node_bus: Dict[int, str],
+                 node_of: Callable[[int], Optional[int]], default_bus: Optional[str] = None):
+        if not buses:
+            raise ValueError("CANRouter needs at least one bus")
+        self.buses = dict(buses)
+        self.default_bus = default_bus if default_bus in self.buses else next(iter(self.buses))
+        self.node_bus: Dict[int, str] = {}
+        self.log = globalLogger
+        for nid, name in node_bus.items():
+            if name not in self.buses:
+                self.log.error(f"Node {nid} mapped to unknown CAN bus '{name}', using '{self.default_bus}'")
+                name = self.default_bus
+            self.node_bus[nid] = name
+        self._node_of = node_of
+        self._route_cache: Dict[int, CANInterface] = {}
+        self.taps = _FanoutList([b.taps for b in self.buses.values()])
+        # GUI 展示用
+        self.interface = ",".join(sorted({b.interface for b in self.buses.values()}))
+        self.channel = ",".join(f"{n}={b.channel}" for n, b in self.buses.items())
+        self.bitrate = ",".join(str(b.bitrate) for b in self.buses.values())
+
+    # ---------------- 路由 ----------------
+    def bus_for_node(self, node_id: Optional[int]) -> CANInterface:
+        return self.buses[self.node_bus.get(node_id, self.default_bus)]
+
+    def _route(self, arbitration_id: int) -> CANInterface:
+        iface = self._route_cache.get(arbitration_id)
+        if iface is None:
+            iface = self.bus_for_node(self._node_of(arbitration_id))
+            self._route_cache[arbitration_id] = iface
+        return iface
+
+    # ---------------- 与 CANInterface 一致的接口 ----------------
+    @property
+    def bus(self) -> Optional[can.BusABC]:
+        for b in self.buses.values():
+            if b.bus is not None:
+                return b.bus
+        return None
+
+    @property
+    def on_message(self):
+        return self.buses[self.default_bus].on_message
+
+    @on_message.setter
+    def on_message(self, cb):
+        for b in self.buses.values():
+            b.on_message = cb
+
+    def start(self):
+        for b in self.buses.values():
+            b.start()
+
+    def stop(self):
+        for b in self.buses.values():
+            b.stop()
+
+    def send(self, arbitration_id: int, data: bytes, extended_id: bool,
+             priority: int = TX_PRIORITY_HIGH):
+        self._route(arbitration_id).send(arbitration_id, data, extended_id, priority)
+
+    def set_rx_dispatch(self, handlers: Dict[int, Callable[[bytes], None]],
+                        filters: Optional[List[dict]] = None,
+                        filters_per_bus: Optional[Dict[str, List[dict]]] = None):
+        """分发表按节点拆分到各总线；filters_per_bus 未给出时各总线使用同一组 filters。"""
+        split: Dict[str, Dict[int, Callable[[bytes], None]]] = {name: {} for name in self.buses}
+        for arb, h in handlers.items():
+            nid = self._node_of(arb)
+            split[self.node_bus.get(nid, self.default_bus)][arb] = h
+        for name, b in self.buses.items():
+            f = filters_per_bus.get(name) if filters_per_bus is not None else filters
+            b.set_rx_dispatch(split[name], f)
+
+    def get_tx_stats(self) -> Dict[str, Dict[str, float]]:
+        return {name: b.get_tx_stats() for name, b in self.buses.items()}
+
+    def get_bus_load(self) -> Dict[str, float]:
+        """返回最繁忙总线的利用率（load_pct/tx_pct），各总线明细见 "buses"。"""
+        per_bus = {name: b.get_bus_load() for name, b in self.buses.items()}
+        loads = [v for v in per_bus.values() if v]
+        if not loads:
+            return {}
+        busiest = max(loads, key=lambda v: v["load_pct"])
+        out = dict(busiest)
+        out["buses"] = per_bus
+        return out
@@ -0,0 +1,346 @@
+# DBC 编解码：解析 DBC，生成每条报文的解码/编码函数源码，编译结果按 DBC 哈希缓存到磁盘
+import hashlib
+import marshal
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.log_utils import globalLogger
+
+# 生成代码的格式版本；修改代码生成逻辑时递增，使旧缓存失效
+CODEGEN_VERSION = 2
+
+_RE_COMMENT = re.compile(r'CM_\s[^"]*"(?:[^"\\]|\\.)*"\s*;', re.S)
+_RE_BO = re.compile(r"^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)\s+(\w+)")
+_RE_SG = re.compile(
+    r"^SG_\s+(\w+)\s*(\w*)\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*"
+    r"\(([^,]+),([^)]+)\)\s*\[([^|]*)\|([^\]]*)\]\s*\"([^\"]*)\"\s*(.*)$")
+_RE_VALTYPE = re.compile(r"^SIG_VALTYPE_\s+(\d+)\s+(\w+)\s*:\s*([12])\s*;")
+_RE_FRAME_FORMAT = re.compile(r'^BA_\s+"VFrameFormat"\s+BO_\s+(\d+)\s+"?(\w+)"?\s*;')
+
+# 定长对齐信号可直接映射为 struct 格式字符：(位宽, 有符号, 浮点) -> 字符
+_STRUCT_CHARS = {
+    (8, False, False): "B", (8, True, False): "b",
+    (16, False, False): "H", (16, True, False): "h",
+    (32, False, False): "I", (32, True, False): "i",
+    (64, False, False): "Q", (64, True, False): "q",
+    (32, True, True): "f", (32, False, True): "f",
+    (64, True, True): "d", (64, False, True): "d",
+}
+
+
+@dataclass
+class DbcSignal:
+    name: str
+    start_bit: int
+    length: int
+    little_endian: bool      # @1 Intel / @0 Motorola
+    signed: bool
+    factor: float
+    offset: float
+    minimum: float
+    maximum: float
+    unit: str = ""
+    is_float: bool = False
+
+    def byte_offset(self) -> Optional[int]:
+        """字节对齐且位宽为 8/16/32/64 时返回起始字节，否则 None。"""
+        if self.length not in (8, 16, 32, 64):
+            return None
+        if self.little_endian:
+            return self.start_bit // 8 if self.start_bit % 8 == 0 else None
+        # Motorola：start_bit 为最高位，在字节内编号 7..0
+        return self.start_bit // 8 if self.start_bit % 8 == 7 else None
+
+    def msb_stream_pos(self) -> int:
+        """Motorola 信号最高位在大端位流（字节 0 的 bit7 为 0）中的位置。"""
+        return (self.start_bit // 8) * 8 + (7 - self.start_bit % 8)
+
+
+@dataclass
+class DbcMessage:
+    frame_id: int            # 不含扩展帧标志位
+    name: str
+    dlc: int
+    transmitter: str
+    extended: bool
+    signals: List[DbcSignal] = field(default_factory=list)
+
+
+def _to_float(text: str, default: float = 0.0) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return default
+
+
+def read_dbc_text(path: str) -> Tuple[str, bytes]:
+    """返回 (文本, 原始字节)；依次尝试 utf-8 / gbk / latin-1（随附的网友版 DBC 不是 utf-8）。"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    for enc in ("utf-8", "gbk"):
+        try:
+            return raw.decode(enc), raw
+        except UnicodeDecodeError:
+            pass
+    return raw.decode("latin-1"), raw
+
+
+def parse_dbc(text: str) -> List[DbcMessage]:
+    """解析 BO_/SG_/SIG_VALTYPE_/VFrameFormat；多路复用信号（m<n>）不支持，直接跳过。"""
+    text = _RE_COMMENT.sub("", text)
+    messages: Dict[int, DbcMessage] = {}
+    float_sigs: Dict[Tuple[int, str], bool] = {}
+    frame_format: Dict[int, bool] = {}
+    current: Optional[DbcMessage] = None
+    for line in text.splitlines():
+        line = line.strip()
+        m = _RE_BO.match(line)
+        if m:
+            raw_id = int(m.group(1))
+            frame_id = raw_id & 0x1FFFFFFF
+            # bit31 置位为扩展帧约定；否则按 ID 是否超出 11 位判断（可被 VFrameFormat 覆盖）
+            current = DbcMessage(frame_id=frame_id, name=m.group(2), dlc=int(m.group(3)),
+                                 transmitter=m.group(4),
+                                 extended=bool(raw_id & 0x80000000) or frame_id > 0x7FF)
+            messages[raw_id] = current
+            continue
+        m = _RE_SG.match(line)
+        if m and current is not None:
+            mux = m.group(2)
+            if mux and mux != "M":
+                globalLogger.warning(f"DBC: multiplexed signal {current.name}.{m.group(1)} skipped")
+                continue
+            sg = DbcSignal(
+                name=m.group(1), start_bit=int(m.group(3)), length=int(m.group(4)),
+                little_endian=m.group(5) == "1", signed=m.group(6) == "-",
+                factor=_to_float(m.group(7), 1.0), offset=_to_float(m.group(8)),
+                minimum=_to_float(m.group(9)), maximum=_to_float(m.group(10)), unit=m.group(11))
+            if sg.length <= 0 or not 0 <= _bit_shift(current, sg) <= current.dlc * 8 - sg.length:
+                globalLogger.warning(f"DBC: signal {current.name}.{sg.name} outside the {current.dlc}-byte payload, skipped")
+                continue
+            current.signals.append(sg)
+            continue
+        current = None
+        m = _RE_VALTYPE.match(line)
+        if m:
+            float_sigs[(int(m.group(1)), m.group(2))] = True
+            continue
+        m = _RE_FRAME_FORMAT.match(line)
+        if m:
+            frame_format[int(m.group(1))] = m.group(2).lower().startswith("ext")
+    for raw_id, msg in messages.items():
+        if raw_id in frame_format:
+            msg.extended = frame_format[raw_id]
+        for sg in msg.signals:
+            sg.is_float = float_sigs.get((raw_id, sg.name), False)
+    return list(messages.values())
+
+
+# ---------------- 代码生成 ----------------
+
+def _struct_layout(msg: DbcMessage) -> Optional[str]:
+    """所有信号字节对齐、字节序一致且互不重叠时，返回整条报文的 struct 格式串，否则 None。"""
+    if not msg.signals:
+        return None
+    orders = {sg.little_endian for sg in msg.signals}
+    if len(orders) != 1:
+        return None
+    placed = []
+    for sg in msg.signals:
+        off = sg.byte_offset()
+        ch = _STRUCT_CHARS.get((sg.length, sg.signed, sg.is_float))
+        if off is None or ch is None or off + sg.length // 8 > msg.dlc:
+            return None
+        placed.append((off, sg.length // 8, ch))
+    placed.sort()
+    fmt = "<" if msg.signals[0].little_endian else ">"
+    pos = 0
+    for off, size, ch in placed:
+        if off < pos:
+            return None  # 重叠
+        if off > pos:
+            fmt += f"{off - pos}x"
+        fmt += ch
+        pos = off + size
+    return fmt
+
+
+def _phys_expr(var: str, sg: DbcSignal) -> str:
+    expr = var
+    if sg.factor != 1.0:
+        expr = f"{expr} * {sg.factor!r}"
+    if sg.offset != 0.0:
+        expr = f"{expr} + {sg.offset!r}"
+    return expr
+
+
+def _raw_expr(sg: DbcSignal) -> str:
+    if sg.is_float:
+        return f"float(values.get({sg.name!r}, 0.0))"
+    if sg.signed:
+        lo, hi = -(1 << (sg.length - 1)), (1 << (sg.length - 1)) - 1
+    else:
+        lo, hi = 0, (1 << sg.length) - 1
+    return f"_raw(values.get({sg.name!r}, {sg.offset!r}), {sg.factor!r}, {sg.offset!r}, {lo}, {hi})"
+
+
+def _bit_shift(msg: DbcMessage, sg: DbcSignal) -> int:
+    """位域解码时，该信号最低位在整数（按信号字节序由 dlc 字节构成）中的移位量。"""
+    if sg.little_endian:
+        return sg.start_bit
+    return msg.dlc * 8 - (sg.msb_stream_pos() + sg.length)
+
+
+def _gen_message(idx: int, msg: DbcMessage, out: List[str]):
+    names = [sg.name for sg in msg.signals]
+    layout = _struct_layout(msg)
+    # 解码主体：把每个信号的原始值读入 v<i>（i 为 DBC 中的信号序号）
+    body: List[str] = []
+    if layout is not None:
+        order = sorted(range(len(msg.signals)), key=lambda i: msg.signals[i].byte_offset())
+        out.append(f"_s{idx} = _struct.Struct({layout!r})")
+        body.append(f"    {', '.join(f'v{i}' for i in order)}, = _s{idx}.unpack_from(data)")
+    else:
+        # 通用位域路径：按字节序把整帧读成整数，逐信号移位/掩码
+        for order_name, little in (("little", True), ("big", False)):
+            if any(sg.little_endian == little for sg in msg.signals):
+                body.append(f"    r_{order_name} = int.from_bytes(data[:{msg.dlc}], {order_name!r})")
+        for i, sg in enumerate(msg.signals):
+            src = "r_little" if sg.little_endian else "r_big"
+            body.append(f"    v{i} = ({src} >> {_bit_shift(msg, sg)}) & {(1 << sg.length) - 1:#x}")
+            if sg.signed:
+                body.append(f"    if v{i} & {1 << (sg.length - 1):#x}:")
+                body.append(f"        v{i} -= {1 << sg.length:#x}")
+    phys = [_phys_expr(f"v{i}", sg) for i, sg in enumerate(msg.signals)]
+
+    # unpack：物理值元组（按 DBC 信号顺序），热路径用；decode：{信号名: 物理值}
+    out.append(f"def _unp{idx}(data):")
+    out.extend(body)
+    out.append(f"    return ({', '.join(phys)},)")
+    out.append(f"def _dec{idx}(data):")
+    out.extend(body)
+    out.append(f"    return {{{', '.join(f'{n!r}: {e}' for n, e in zip(names, phys))}}}")
+
+    out.append(f"def _enc{idx}(values):")
+    if layout is not None:
+        out.append(f"    return _s{idx}.pack({', '.join(_raw_expr(msg.signals[i]) for i in order)})")
+    else:
+        orders = {sg.little_endian for sg in msg.signals}
+        for order_name, little in (("little", True), ("big", False)):
+            if little in orders:
+                out.append(f"    r_{order_name} = 0")
+        for sg in msg.signals:
+            dst = "r_little" if sg.little_endian else "r_big"
+            out.append(f"    {dst} |= ({_raw_expr(sg)} & {(1 << sg.length) - 1:#x}) << {_bit_shift(msg, sg)}")
+        if len(orders) == 2:
+            # 两种字节序混合：把大端部分换算成小端整数后合并
+            out.append(f"    r_little |= int.from_bytes(r_big.to_bytes({msg.dlc}, 'big'), 'little')")
+            out.append(f"    return r_little.to_bytes({msg.dlc}, 'little')")
+        else:
+            order_name = "little" if True in orders else "big"
+            out.append(f"    return r_{order_name}.to_bytes({msg.dlc}, {order_name!r})")
+    out.append(f"MESSAGES[{msg.frame_id}] = ({msg.name!r}, {msg.dlc}, {msg.extended}, "
+               f"{msg.transmitter!r}, {tuple(names)!r}, _unp{idx}, _dec{idx}, _enc{idx})")
+    out.append("")
+
+
+def generate_source(messages: List[DbcMessage], origin: str = "") -> str:
+    """生成编解码模块源码：MESSAGES[frame_id] = (name, dlc, extended, transmitter, signal_names, unpack, decode, encode)。"""
+    out = [
+        f"# 由 hardware/dbc_codec.py 自 {os.path.basename(origin)} 生成，请勿手改",
+        "import struct as _struct",
+        "",
+        "def _raw(value, factor, offset, lo, hi):",
+        "    v = int(round((value - offset) / factor))",
+        "    return lo if v < lo else (hi if v > hi else v)",
+        "",
+        "MESSAGES = {}",
+        "",
+    ]
+    for idx, msg in enumerate(messages):
+        if msg.signals:
+            _gen_message(idx, msg, out)
+    return "\n".join(out)
+
+
+# ---------------- 加载（含磁盘缓存） ----------------
+
+@dataclass
+class CompiledMessage:
+    frame_id: int
+    name: str
+    dlc: int
+    extended: bool
+    transmitter: str
+    signal_names: Tuple[str, ...]
+    unpack: Callable[[bytes], Tuple[float, ...]]
+    decode: Callable[[bytes], Dict[str, float]]
+    encode: Callable[[Dict[str, float]], bytes]
+
+
+class DbcCodec:
+    """
+    由 DBC 编译得到的编解码表。
+    DbcCodec.load(path) 以 sha256(DBC 内容 + 生成器版本) 为键，在 cache_dir（默认 DBC 同目录的 __pycache__）
+    中查找已编译的代码对象（marshal），命中则直接执行，无需再解析 DBC 或编译源码。
+    """
+    def __init__(self, messages: Dict[int, CompiledMessage], source_path: str = "", digest: str = ""):
+        self.messages = messages
+        self.by_name = {m.name: m for m in messages.values()}
+        self.source_path = source_path
+        self.digest = digest
+
+    @staticmethod
+    def _cache_key(raw: bytes) -> str:
+        h = hashlib.sha256(raw)
+        h.update(f"codegen={CODEGEN_VERSION}".encode())
+        return h.hexdigest()[:20]
+
+    @classmethod
+    def load(cls, path: str, cache_dir: Optional[str] = None, use_cache: bool = True) -> "DbcCodec":
+        text, raw = read_dbc_text(path)
+        digest = cls._cache_key(raw)
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), "__pycache__")
+        cache_file = os.path.join(cache_dir, f"dbc-{digest}.{sys.implementation.cache_tag}.bin")
+
+        code = None
+        if use_cache and os.path.exists(cache_file):
+            try:
+                with open(cache_file, "rb") as f:
+                    code = marshal.load(f)
+            except Exception as e:
+                globalLogger.warning(f"DBC cache unreadable, recompiling: {e}")
+                code = None
+        if code is None:
+            source = generate_source(parse_dbc(text), origin=path)
+            code = compile(source, f"<dbc:{os.path.basename(path)}>", "exec")
+            if use_cache:
+                try:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    tmp = cache_file + ".tmp"
+                    with open(tmp, "wb") as f:
+                        marshal.dump(code, f)
+                    os.replace(tmp, cache_file)
+                    with open(os.path.join(cache_dir, f"dbc-{digest}.py"), "w", encoding="utf-8") as f:
+                        f.write(source)
+                except OSError as e:
+                    globalLogger.warning(f"DBC cache not written: {e}")
+
+        namespace: Dict[str, object] = {}
+        exec(code, namespace)
+        messages = {fid: CompiledMessage(fid, *entry) for fid, entry in namespace["MESSAGES"].items()}
+        return cls(messages, source_path=path, digest=digest)
+
+    def decode(self, frame_id: int, data: bytes) -> Optional[Dict[str, float]]:
+        msg = self.messages.get(frame_id)
+        if msg is None or len(data) < msg.dlc:
+            return None
+        return msg.decode(data)
+
+    def encode(self, name_or_id, values: Dict[str, float]) -> bytes:
+        msg = self.by_name[name_or_id] if isinstance(name_or_id, str) else self.messages[name_or_id]
+        return msg.encode(values)
@@ -0,0 +1,113 @@
+# 节点在线/离线监视：按截止时间组织的最小堆，单线程定时检查
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from utils.log_utils import globalLogger
+
+
+class NodeSupervisor:
+    """
+    每个在线节点在最小堆里只有一个条目 (deadline, node_id)：
+    - touch(node_id)：收到帧时调用，只改写该节点的最新截止时间（O(1)），不动堆；
+      仅当节点由离线/未知转为在线时入堆并发出 online 事件；
+    - poll()：由监视线程按节拍调用（或上层自行调用），弹出已到期的堆顶，
+      若节点的最新截止时间已被 touch 推后则按新时间重新入堆（惰性更新），否则判为离线并发出 offline 事件。
+    每帧开销与节点数、帧率无关；每个节点每个超时周期最多一次堆操作。
+    订阅者签名 cb(node_id, online)：online 事件在接收线程中触发，offline 事件在调用 poll 的线程中触发。
+    """
+    def __init__(self, timeout_s: float, clock: Callable[[], float] = time.monotonic):
+        self.timeout_s = float(timeout_s)
+        self.clock = clock
+        self.log = globalLogger
+        self._deadline: Dict[int, float] = {}
+        self._online: Set[int] = set()
+        self._heap: List[Tuple[float, int]] = []
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[int, bool], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---------------- 订阅 ----------------
+    def subscribe(self, cb: Callable[[int, bool], None]):
+        self._subscribers.append(cb)
+
+    def unsubscribe(self, cb: Callable[[int, bool], None]):
+        if cb in self._subscribers:
+            self._subscribers.remove(cb)
+
+    def _emit(self, node_id: int, online: bool):
+        for cb in self._subscribers:
+            try:
+                cb(node_id, online)
+            except Exception as e:
+                self.log.error(f"node event subscriber error: {e}")
+
+    # ---------------- 热路径 ----------------
+    def touch(self, node_id: int, now: Optional[float] = None):
+        deadline = (self.clock() if now is None else now) + self.timeout_s
+        # 已在线：只改写截止时间（字典赋值为原子操作），不加锁；与 poll 同时发生时至多晚一帧判定上线
+        self._deadline[node_id] = deadline
+        if node_id in self._online:
+            return
+        with self._lock:
+            self._deadline[node_id] = deadline
+            if node_id in self._online:
+                return
+            self._online.add(node_id)
+            heapq.heappush(self._heap, (deadline, node_id))
+        self._emit(node_id, True)
+
+    # ---------------- 到期检查 ----------------
+    def poll(self, now: Optional[float] = None) -> List[int]:
+        """处理所有已到期节点，返回本次判为离线的节点号。"""
+        if now is None:
+            now = self.clock()
+        expired: List[int] = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                _, nid = heapq.heappop(heap)
+                if nid not in self._online:
+                    continue  # 已 forget
+                deadline = self._deadline[nid]
+                if deadline > now:
+                    heapq.heappush(heap, (deadline, nid))
+                    continue
+                self._online.discard(nid)
+                expired.append(nid)
+        for nid in expired:
+            self._emit(nid, False)
+        return expired
+
+    def is_online(self, node_id: int) -> bool:
+        return node_id in self._online
+
+    def forget(self, node_id: int):
+        """不再监视该节点（不发事件），其堆条目在到期时被丢弃。"""
+        with self._lock:
+            self._online.discard(node_id)
+            self._deadline.pop(node_id, None)
+
+    # ---------------- 监视线程 ----------------
+    def start(self, period_s: float = 0.05):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(max(1e-3, period_s),),
+                                         name="node-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self, period_s: float):
+        while not self._stop.wait(period_s):
+            try:
+                self.poll()
+            except Exception as e:
+                self.log.error(f"node supervisor error: {e}")
@@ -1,12 +1,63 @@
+import dataclasses
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import logging
+import math
+import os
+import re
+import struct
+import threading
 import time
 
 from config.arm_config import AxisConfig
-from models.motor_state import MotorState
-from utils.math_utils import be_i16, be_i32
+from models.motor_state import MotorSnapshot, MotorState
+from models.state_table import (StateTable, FIELD_INDEX, C_ERPM, C_CURRENT_MOTOR, C_DUTY, C_RPM, C_DEG_PER_S,
+                                C_AMP_HOURS, C_AMP_HOURS_CHARGED, C_WATT_HOURS, C_WATT_HOURS_CHARGED,
+                                C_TEMP_MOS, C_TEMP_MOTOR, C_CURRENT_IN, C_POS_DEG, C_TACHOMETER, C_VOLTAGE_IN,
+                                C_ADC1, C_ADC2, C_ADC3, C_PPM)
 from config.arm_config import CANConfig as AppCANConfig
+from hardware.dbc_codec import DbcCodec
+from hardware.node_supervisor import NodeSupervisor
+from utils.clock import MONOTONIC, Clock
+
+# 预编译的帧格式（VESC 全部为大端）
+_I32 = struct.Struct(">i")                  # SET_RPM / SET_CURRENT / SET_POS / PID_POS_OFFSET
+_POS_LIM = struct.Struct(">ihh")            # SET_POS_LIM: pos(deg*1e6) | max_vel(deg/s*100) | max_acc(deg/s^2*10)
+_STATUS = struct.Struct(">ihh")             # ERPM | current_motor(A*1000) | duty(*1000)
+_STATUS_2 = struct.Struct(">ii")            # amp_hours(Ah*1e4) | amp_hours_charged(Ah*1e4)
+_STATUS_3 = struct.Struct(">ii")            # watt_hours(Wh*1e4) | watt_hours_charged(Wh*1e4)
+_STATUS_4 = struct.Struct(">hhhh")          # temp_fet(*10) | temp_motor(*10) | current_in(A*1000) | pid_pos(deg*50)
+_STATUS_5 = struct.Struct(">iH")            # tachometer(EREV*6) | voltage_in(V*10)
+_STATUS_6 = struct.Struct(">hhhh")          # adc1/2/3(V*1000) | ppm(*1000)
+# DBC 信号名中的节点后缀（如 Status_AmpHours_V1），按节点无关的包使用时去掉
+_NODE_SUFFIX = re.compile(r"_V\d+$")
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StateWatch:
+    """
+    节点（可选限定字段）的更新通知：VescCAN 解码完该节点的匹配帧后调用 set()。
+    用法：先 watch 再读状态，不满足时 wait()；wait 返回即复位，之后到达的帧会再次置位，不会漏掉。
+    多个节点共用同一个 event 时，任一节点更新都会唤醒（如并行找零时一个循环等待整组轴）。
+    """
+    __slots__ = ("node_id", "fields", "_event", "_clock")
+
+    def __init__(self, node_id: int, fields: Optional[Iterable[str]] = None,
+                 event: Optional[threading.Event] = None, clock: Clock = MONOTONIC):
+        self.node_id = node_id
+        self.fields = frozenset(fields) if fields else None
+        self._event = event if event is not None else threading.Event()
+        self._clock = clock
+
+    def set(self):
+        self._event.set()
+
+    def wait(self, timeout_s: float) -> bool:
+        """等待下一次匹配的更新；返回是否被唤醒（False 表示超时）。"""
+        fired = self._clock.wait(self._event, timeout_s)
+        self._event.clear()
+        return fired
 
 
 @dataclass
@@ -30,18 +81,94 @@ class VescCAN:
     CAN_PACKET_STATUS_4 = 16    # Temp FET, Temp Motor, Current In, PID Pos (deg)
     CAN_PACKET_STATUS_5 = 27    # Tachometer, Voltage In
     CAN_PACKET_STATUS_6 = 28    # ADC1/2/3, PPM
+    STATUS_PACKET_IDS = (CAN_PACKET_STATUS, CAN_PACKET_STATUS_2, CAN_PACKET_STATUS_3,
+                         CAN_PACKET_STATUS_4, CAN_PACKET_STATUS_5, CAN_PACKET_STATUS_6)
 
-    def __init__(self, config: VescCANConfig):
+    def __init__(self, config: VescCANConfig, clock: Clock = MONOTONIC):
         self.cfg = config
+        # 时间基准：状态时间戳、离线判定与等待均使用此时钟（默认单调时钟；仿真/测试可注入 VirtualClock）
+        self.clock = clock
+        # 接收热路径取时函数：实时时钟直接绑定 time.monotonic，省去 Clock.__call__ -> now() 两层调用
+        self._now: Callable[[], float] = time.monotonic if clock is MONOTONIC else clock.now
+        # states 为写方的工作副本，每个节点只由接收该节点的线程写入（单写者，无需加锁）；读方通过 get_state 拿到只读快照
         self.states: Dict[int, MotorState] = {}
         self.aixs_cfg: Dict[int, AxisConfig] = {}
         self.log = logging.getLogger("VescCAN")
         self._offline_timeout_s = getattr(AppCANConfig, 'offline_timeout_s', 0.5)
+        # 离线判定：截止时间堆 + 监视线程（start_supervisor），接收路径只刷新截止时间
+        self.supervisor = NodeSupervisor(self._offline_timeout_s, clock=clock)
+        self.supervisor.subscribe(self._on_node_event)
+        # 每节点 ERPM -> 关节 RPM 的换算系数（1 / (极对数 × 减速比)），随 set_axis_configs 更新
+        self._erpm_to_joint_rpm: Dict[int, float] = {}
+        # 列式状态表：全部遥测字段 + 逐字段更新时间，供控制/GUI/导出按向量读取
+        self.table = StateTable()
+        # packet_id -> (帧格式, 解码函数)；解码函数签名 (state, node_id, 表行值, 表行时间戳, now, *fields)
+        self._decoders: Dict[int, Tuple[struct.Struct, Callable[..., None]]] = {
+            self.CAN_PACKET_STATUS: (_STATUS, self._decode_status),
+            self.CAN_PACKET_STATUS_2: (_STATUS_2, self._decode_status_2),
+            self.CAN_PACKET_STATUS_3: (_STATUS_3, self._decode_status_3),
+            self.CAN_PACKET_STATUS_4: (_STATUS_4, self._decode_status_4),
+            self.CAN_PACKET_STATUS_5: (_STATUS_5, self._decode_status_5),
+            self.CAN_PACKET_STATUS_6: (_STATUS_6, self._decode_status_6),
+        }
+        # packet_id -> 该包更新的 MotorState 字段，用于按字段唤醒等待者
+        self._packet_fields: Dict[int, frozenset] = {
+            self.CAN_PACKET_STATUS: frozenset(("erpm", "current_motor", "duty", "rpm", "deg_per_s")),
+            self.CAN_PACKET_STATUS_2: frozenset(("amp_hours", "amp_hours_charged")),
+            self.CAN_PACKET_STATUS_3: frozenset(("watt_hours", "watt_hours_charged")),
+            self.CAN_PACKET_STATUS_4: frozenset(("temp_mos", "temp_motor", "current_in", "pos_deg")),
+            self.CAN_PACKET_STATUS_5: frozenset(("tachometer", "voltage_in")),
+            self.CAN_PACKET_STATUS_6: frozenset(("adc1", "adc2", "adc3", "ppm")),
+        }
+        # node_id -> 等待者元组（写时复制，接收路径无需加锁遍历）
+        self._watches: Dict[int, Tuple[StateWatch, ...]] = {}
+        self._watch_lock = threading.Lock()
+        # DBC 编译得到的解码器：只补充没有手写解码的包（DBC 中新增的状态包），packet_id -> (dlc, unpack, 信号名)
+        self.dbc: Optional[DbcCodec] = None
+        self._dbc_packets: Dict[int, Tuple[int, Callable[[bytes], Tuple[float, ...]], Tuple[str, ...]]] = {}
+        self.rx_packet_ids: Tuple[int, ...] = self.STATUS_PACKET_IDS
+        dbc_path = getattr(config, 'dbc_path', None)
+        if dbc_path:
+            self.load_dbc(dbc_path)
+
+    def load_dbc(self, path: str, cache_dir: Optional[str] = None) -> bool:
+        """
+        加载（编译或命中缓存）DBC，把 VESC 发出的、且没有手写解码的状态包接入 parse_status。
+        手写解码按本项目固件的缩放实现（如电机电流 A*1000），与 DBC 中的缩放不同时以手写为准。
+        """
+        if not os.path.isabs(path) and not os.path.exists(path):
+            path = os.path.join(_PROJECT_DIR, path)
+        try:
+            self.dbc = DbcCodec.load(path, cache_dir=cache_dir)
+        except Exception as e:
+            self.log.warning(f"DBC load failed ({path}): {e}")
+            return False
+        packets: Dict[int, Tuple[int, Callable[[bytes], Tuple[float, ...]], Tuple[str, ...]]] = {}
+        for msg in self.dbc.messages.values():
+            if not msg.extended or not msg.transmitter.upper().startswith("VESC"):
+                continue
+            pid = (msg.frame_id >> 8) & 0xFF
+            if pid in self._decoders or pid in packets:
+                continue
+            names = tuple(_NODE_SUFFIX.sub("", n) for n in msg.signal_names)
+            packets[pid] = (msg.dlc, msg.unpack, names)
+            self._packet_fields[pid] = frozenset(names) | {"signals"}
+        self._dbc_packets = packets
+        self.rx_packet_ids = tuple(sorted(set(self.STATUS_PACKET_IDS) | set(packets)))
+        self.log.info(f"DBC loaded: {os.path.basename(path)} ({len(self.dbc.messages)} messages, "
+                      f"packets decoded from DBC: {sorted(packets)})")
+        return True
 
     def set_axis_configs(self, axes_cfg: Dict[int, AxisConfig]):
         """由上层（ArmController/AppBridge）注入每轴配置，用于状态换算。"""
         try:
             self.aixs_cfg = dict(axes_cfg or {})
+            self._erpm_to_joint_rpm = {}
+            for nid, acf in self.aixs_cfg.items():
+                pole_pairs = max(1.0, float(getattr(acf, 'motor_poles_pairs', 3.0)))
+                ratio = max(1e-9, float(getattr(acf, 'reduction_ratio', 1.0)))
+                self._erpm_to_joint_rpm[nid] = 1.0 / (pole_pairs * ratio)
+            self.table.reserve(sorted(self.aixs_cfg))
             self.log.info(f"Axis configs loaded: {list(self.aixs_cfg.keys())}")
         except Exception:
             self.log.warning("Failed to load axis configs")
@@ -69,72 +196,95 @@ class VescCAN:
             return packet_id, node_id
         return None
 
+    def node_of(self, arbitration_id: int) -> Optional[int]:
+        """按当前 id_format 从 arbitration_id 取节点号（用于多总线路由）。"""
+        unpack = self.unpack_id(arbitration_id, self.cfg.id_format == "extended_29bit")
+        return unpack[1] if unpack else None
+
+    # ---------------- 接收滤波/分发表 ----------------
+
+    def build_rx_table(self, node_ids: Iterable[int],
+                       packet_ids: Optional[Iterable[int]] = None) -> Dict[int, Callable[[bytes], None]]:
+        """预计算 arbitration_id -> 解析函数，接收路径只需一次字典查找，无需再 unpack_id。"""
+        if packet_ids is None:
+            packet_ids = self.rx_packet_ids
+        table: Dict[int, Callable[[bytes], None]] = {}
+        for nid in node_ids:
+            for pid in packet_ids:
+                arb_id, _ = self.pack_id(pid, nid)
+                table[arb_id] = partial(self.parse_status, pid, nid)
+        return table
+
+    def build_can_filters(self, node_ids: Iterable[int],
+                          packet_ids: Optional[Iterable[int]] = None) -> List[dict]:
+        """
+        生成 python-can 验收滤波器（can_filters）。
+        取“按节点”与“按状态包”两种掩码方案中条目更少者，精确匹配交给分发表完成。
+        """
+        node_ids = sorted(set(node_ids))
+        packet_ids = sorted(set(self.rx_packet_ids if packet_ids is None else packet_ids))
+        extended = self.cfg.id_format == "extended_29bit"
+        # 29bit: [28..16 未用 | 15..8 命令号 | 7..0 节点]；11bit: [10 未用 | 9..5 命令号 | 4..0 节点]
+        by_node_mask = 0x1FFF00FF if extended else 0x41F
+        by_packet_mask = 0x1FFFFF00 if extended else 0x7E0
+        if len(node_ids) <= len(packet_ids):
+            ids = [self.pack_id(0, nid)[0] for nid in node_ids]
+            mask = by_node_mask
+        else:
+            ids = [self.pack_id(pid, 0)[0] for pid in packet_ids]
+            mask = by_packet_mask
+        return [{"can_id": i, "can_mask": mask, "extended": extended} for i in ids]
+
     # ---------------- 发送控制 ----------------
 
-    def _encode_float16(self, value: float, scale: float) -> bytes:
+    def _encode_i16(self, value: float, scale: float) -> int:
         v = int(round(value * scale))
         # int16 范围保护
-        v = max(-32768, min(32767, v))
-        return v.to_bytes(2, byteorder="big", signed=True)
+        return -32768 if v < -32768 else (32767 if v > 32767 else v)
+
+    @staticmethod
+    def _wrap_deg(degrees: float) -> float:
+        # 规范化到 [0, 360)；VESC 文档写 0..360，此处避免编码 360（等价 0，浮点取模可能得到 360.0）
+        d = degrees % 360.0
+        return 0.0 if d >= 360.0 else d
 
     def encode_set_pos(self, degrees: float) -> bytes:
         """
         VESC 单帧位置命令：参数为“度”，范围 0..360，缩放 1e6，BE int32。
         这里对度数进行 wrap 并 clamp 到 [0, 360)。
         """
-        # 规范化到 [0, 360)
-        d = degrees % 360.0
-        if d < 0:
-            d += 360.0
-        # VESC 文档写 0..360，此处避免编码 360（等价 0）
-        if d >= 360.0:
-            d = 0.0
-        v = int(round(d * 1_000_000.0))
-        return v.to_bytes(4, byteorder="big", signed=True)
-    
+        return _I32.pack(int(round(self._wrap_deg(degrees) * 1_000_000.0)))
+
     def encode_set_pos_offset(self, degrees: float) -> bytes:
         """
-        VESC 单帧位置命令：参数为“度”，范围 0..360，缩放 1e6，BE int32。
+        VESC 单帧位置命令：参数为“度”，范围 0..360，缩放 1e4，BE int32。
         这里对度数进行 wrap 并 clamp 到 [0, 360)。
         """
-        # 规范化到 [0, 360)
-        d = degrees % 360.0
-        if d < 0:
-            d += 360.0
-        # VESC 文档写 0..360，此处避免编码 360（等价 0）
-        if d >= 360.0:
-            d = 0.0
-        v = int(round(d * 1e4))
-        return v.to_bytes(4, byteorder="big", signed=True)
-    
+        return _I32.pack(int(round(self._wrap_deg(degrees) * 1e4)))
+
     def encode_set_pos_with_limits(self, degrees: float, max_vel_dps: float, max_accel_dps2: float) -> bytes:
         """
         新固件格式：
-        [ pos (float32, deg * 1e6) | max_vel (int16, deg/s * 100) | max_accel (int16, deg/s^2 * 10) ]
+        [ pos (int32, deg * 1e6) | max_vel (int16, deg/s * 100) | max_accel (int16, deg/s^2 * 10) ]
         共 8 字节。
         """
-        # 位置编码（与旧一致）
-        pos_bytes = self.encode_set_pos(degrees)
-        # 最大速度 / 加速度编码
-        vel_bytes = self._encode_float16(max_vel_dps, 100.0)
-        acc_bytes = self._encode_float16(max_accel_dps2, 10.0)
-        return pos_bytes + vel_bytes + acc_bytes
+        return _POS_LIM.pack(int(round(self._wrap_deg(degrees) * 1_000_000.0)),
+                             self._encode_i16(max_vel_dps, 100.0),
+                             self._encode_i16(max_accel_dps2, 10.0))
 
     def encode_update_pid_pos_offset(self, degrees: float) -> bytes:
         """
         更新PID位置偏置所用的角度编码，缩放（度 × 1e4）。
         传入“当前机械角度（度）”，由固件将angle_now作为当前角度。
         """
-        return self.encode_set_pos_offset(degrees) + bytes(0x00) # angle_now + store(bool)
+        return self.encode_set_pos_offset(degrees)  # angle_now（4 字节，不附带 store 标志）
 
     def encode_set_erpm(self, erpm: float) -> bytes:
-        v = int(round(erpm))
-        return v.to_bytes(4, byteorder="big", signed=True)
+        return _I32.pack(int(round(erpm)))
 
     def encode_set_current(self, current_a: float) -> bytes:
         # 文档：电流（A）缩放 1000（某些固件为 10/100，视固件而定）。
-        v = int(round(current_a * 1000.0))
-        return v.to_bytes(4, byteorder="big", signed=True)
+        return _I32.pack(int(round(current_a * 1000.0)))
 
     def build_frame(self, packet_id: int, node_id: int, data: bytes) -> Tuple[int, bytes, bool]:
         arb_id, extended = self.pack_id(packet_id, node_id)
@@ -147,39 +297,49 @@ class VescCAN:
             return
         if st.offline:
             return  # 已经离线，无需重复重置
-        st.temp_mos = None
-        st.temp_motor = None
-        st.voltage_in = None
-        st.current_motor = None
-        st.current_in = None
-        st.rpm = None
-        st.deg_per_s = None
-        st.duty = None
-        st.pos_deg = None
-        st.pos_mod_turns = None
-        st.offline = True
+        # 在离线监视线程执行：不原地改写接收线程正在写的对象，而是换上一个新的离线状态对象（字典赋值为原子操作），
+        # 接收线程此后的帧写入新对象
+        st = dataclasses.replace(
+            st, temp_mos=None, temp_motor=None, voltage_in=None, current_motor=None, current_in=None, rpm=None,
+            deg_per_s=None, duty=None, pos_deg=None, pos_mod_turns=None, erpm=None, tachometer=None,
+            amp_hours=None, amp_hours_charged=None, watt_hours=None, watt_hours_charged=None,
+            adc1=None, adc2=None, adc3=None, ppm=None, signals={}, offline=True, seq=0)
+        # 先发布新对象的快照：接收线程随后写它的期间，读方拿到的是这份离线快照
+        st.published = (0, st.snapshot())
+        self.states[node_id] = st
+        self.table.clear_node(node_id)
+        watches = self._watches.get(node_id)
+        if watches:
+            self._notify(watches, None)
         self.log.warning(f"Node {node_id} offline: reset state")
 
-    def _mark_update(self, node_id: int):
-        st = self._get_state(node_id)
-        st.last_update_s = time.time()
-        if st.offline:
-            st.offline = False
-            self.log.info(f"Node {node_id} online")
-        return st
+    def _on_node_event(self, node_id: int, online: bool):
+        if not online:
+            self.reset_state(node_id)
+            return
+        self.log.info(f"Node {node_id} online")
+
+    def subscribe_node_events(self, cb: Callable[[int, bool], None]):
+        """注册节点上线/离线回调 cb(node_id, online)，在状态已更新/重置之后调用。"""
+        self.supervisor.subscribe(cb)
 
-    def check_offline_and_cleanup(self):
-        now = time.time()
-        for nid, st in list(self.states.items()):
-            if st and (now - st.last_update_s) > self._offline_timeout_s:
-                self.reset_state(nid)
+    def start_supervisor(self, period_s: float = 0.05):
+        self.supervisor.start(period_s)
+
+    def stop_supervisor(self):
+        self.supervisor.stop()
+
+    def check_offline_and_cleanup(self, now: Optional[float] = None):
+        """立即处理截至 now（默认 self.clock()）已超时的节点（未启动监视线程时，如离线回放，可由上层按节拍调用）。"""
+        self.supervisor.poll(now)
 
     # ---------------- 状态解析（按 comm_can.md） ----------------
 
     def _get_state(self, node_id: int) -> MotorState:
         st = self.states.get(node_id)
         if st is None:
-            st = MotorState(node_id=node_id)
+            st = MotorState(node_id=node_id, last_update_s=self._now())
+            st.published = (0, st.snapshot())
             self.states[node_id] = st
         return st
     
@@ -187,70 +347,170 @@ class VescCAN:
         """返回该轴已注入的配置；若不存在则返回 None，不做默认构造。"""
         return self.aixs_cfg.get(node_id)
 
-    def parse_status(self, packet_id: int, node_id: int, data: bytes):
-        # 在解析前后更新 last_update 并检查离线
-        st = self._get_state(node_id)
+    def parse_status(self, packet_id: int, node_id: int, data: bytes, now: Optional[float] = None):
+        # 查表解码：packet_id -> (预编译 Struct, 解码函数)；长度不足或未知包直接忽略
+        # 写入期间 seq 为奇数（seqlock，每个节点只有接收线程一个写方，不加锁），读方据此判断快照是否一致；
+        # 离线判定只刷新截止时间（见 NodeSupervisor）
+        # now 为帧时刻（默认 self.clock()）；离线回放传入录制时间戳，状态时间戳与离线判定即与原始运行一致
         try:
-            if packet_id == self.CAN_PACKET_STATUS and len(data) >= 8:
-                # ERPM (int32), Current_motor (A*1000 int16), Duty (%/1000)
-                erpm = int.from_bytes(data[0:4], byteorder="big", signed=True)
-                current_x1000 = be_i16(data[4:6])
-                duty_x1000 = be_i16(data[6:8])
-
-                st.current_motor = current_x1000 / 1000.0
-                st.duty = duty_x1000 / 1000.0
-
-                # 依据已注入的轴配置换算到关节输出RPM与角速度（度/秒）
-                acf = self._get_cfg(node_id)
-                if acf is not None:
-                    pole_pairs = max(1.0, float(getattr(acf, 'motor_poles_pairs', 3.0)))
-                    ratio = max(1e-9, float(getattr(acf, 'reduction_ratio', 1.0)))
-                    mech_rpm_motor = float(erpm) / pole_pairs          # 电机机械RPM
-                    joint_rpm = mech_rpm_motor / ratio                  # 关节输出RPM
-                    st.rpm = joint_rpm
-                    st.deg_per_s = joint_rpm * 6.0                      # RPM*360/60
-                else:
-                    # 无配置则跳过换算，保留为 None
-                    self.log.debug(f"No AxisConfig for node {node_id}, skip rpm conversion")
-
-                self._mark_update(node_id)
-
-            elif packet_id == self.CAN_PACKET_STATUS_4 and len(data) >= 8:
-                # Temp FET (0.1C i16), Temp Motor (0.1C i16), Current In (A*1000 i16), PID Pos (deg, scale 50, i16)
-                temp_fet_x10 = be_i16(data[0:2])
-                temp_m_x10 = be_i16(data[2:4])
-                i_in_x1000 = be_i16(data[4:6])
-                pid_pos_deg_x50 = be_i16(data[6:8])
-                st.temp_mos = temp_fet_x10 / 10.0
-                st.temp_motor = temp_m_x10 / 10.0
-                st.current_in = i_in_x1000 / 1000.0
-                # 位置（度）直接保存为机械单圈角度
-                pid_pos_deg = pid_pos_deg_x50 / 50.0
-                st.pos_deg = pid_pos_deg
-                self._mark_update(node_id)
-
-            elif packet_id == self.CAN_PACKET_STATUS_5 and len(data) >= 6:
-                # Tachometer (erev, scale 6, int32) + Voltage In (0.1V u16)
-                # 这里只解析电压
-                v_in_x10 = ((data[4] << 8) | data[5])
-                st.voltage_in = v_in_x10 / 10.0
-                self._mark_update(node_id)
-
-            elif packet_id == self.CAN_PACKET_STATUS_6:
-                # ADC1/2/3, PPM （此处不解析）
-                self._mark_update(node_id)
+            entry = self._decoders.get(packet_id)
+            if entry is not None:
+                codec, decode = entry
+                if len(data) < codec.size:
+                    return
+                st = self.states.get(node_id) or self._get_state(node_id)
+                v, t = self.table.rows.get(node_id) or self.table.row(node_id)
+                if now is None:
+                    now = self._now()
+                st.seq += 1
+                try:
+                    decode(st, node_id, v, t, now, *codec.unpack_from(data))
+                    st.last_update_s = now
+                    st.offline = False
+                finally:
+                    st.seq += 1
+            else:
+                dbc_entry = self._dbc_packets.get(packet_id)
+                if dbc_entry is None or len(data) < dbc_entry[0]:
+                    return
+                _, unpack, names = dbc_entry
+                st = self.states.get(node_id) or self._get_state(node_id)
+                signals = dict(st.signals)
+                signals.update(zip(names, unpack(data)))
+                if now is None:
+                    now = self._now()
+                st.seq += 1
+                # 写时复制：已发布快照引用的旧字典保持不变
+                st.signals = signals
+                st.last_update_s = now
+                st.offline = False
+                st.seq += 1
+            self.supervisor.touch(node_id, now)
+            watches = self._watches.get(node_id)
+            if watches:
+                self._notify(watches, self._packet_fields.get(packet_id))
         except Exception as e:
             self.log.debug(f"parse error node {node_id} pid {packet_id}: {e}")
-        finally:
-            # 解析完成后检查离线
-            self.check_offline_and_cleanup()
 
-    def get_state(self, node_id: int) -> Optional[MotorState]:
-        # 调用时也进行一次离线检查
-        self.check_offline_and_cleanup()
-        return self.states.get(node_id)
+    # ---------------- 更新通知 ----------------
+    def watch(self, node_id: int, fields: Optional[Iterable[str]] = None,
+              event: Optional[threading.Event] = None) -> StateWatch:
+        """登记一个等待者：该节点任一 fields 字段（None 表示任意字段）更新或节点离线时被唤醒。用完需 unwatch。"""
+        return self.add_watch(StateWatch(node_id, fields, event, self.clock))
+
+    def add_watch(self, w: StateWatch) -> StateWatch:
+        """登记自定义等待者（只需 node_id / fields 属性与 set()，如 asyncio 版本）。"""
+        with self._watch_lock:
+            self._watches[w.node_id] = self._watches.get(w.node_id, ()) + (w,)
+        return w
+
+    def unwatch(self, w: StateWatch):
+        with self._watch_lock:
+            rest = tuple(x for x in self._watches.get(w.node_id, ()) if x is not w)
+            if rest:
+                self._watches[w.node_id] = rest
+            else:
+                self._watches.pop(w.node_id, None)
+
+    @staticmethod
+    def _notify(watches: Tuple[StateWatch, ...], fields: Optional[frozenset]):
+        for w in watches:
+            if w.fields is None or fields is None or not w.fields.isdisjoint(fields):
+                w.set()
+
+    def _decode_status(self, st: MotorState, node_id: int, v, t, now: float,
+                       erpm: int, current_x1000: int, duty_x1000: int):
+        # ERPM (int32), Current_motor (A*1000 int16), Duty (%/1000)
+        st.erpm = erpm
+        st.current_motor = v[C_CURRENT_MOTOR] = current_x1000 / 1000.0
+        st.duty = v[C_DUTY] = duty_x1000 / 1000.0
+        v[C_ERPM] = erpm
+        t[C_ERPM] = t[C_CURRENT_MOTOR] = t[C_DUTY] = now
+        # 依据已注入的轴配置换算到关节输出RPM与角速度（度/秒）
+        k = self._erpm_to_joint_rpm.get(node_id)
+        if k is not None:
+            joint_rpm = erpm * k
+            st.rpm = v[C_RPM] = joint_rpm
+            st.deg_per_s = v[C_DEG_PER_S] = joint_rpm * 6.0     # RPM*360/60
+            t[C_RPM] = t[C_DEG_PER_S] = now
+        else:
+            # 无配置则跳过换算，保留为 None
+            self.log.debug(f"No AxisConfig for node {node_id}, skip rpm conversion")
+
+    def _decode_status_2(self, st: MotorState, node_id: int, v, t, now: float, ah_x1e4: int, ah_chg_x1e4: int):
+        # Amp Hours / Amp Hours Charged (Ah*1e4 i32)
+        st.amp_hours = v[C_AMP_HOURS] = ah_x1e4 / 1e4
+        st.amp_hours_charged = v[C_AMP_HOURS_CHARGED] = ah_chg_x1e4 / 1e4
+        t[C_AMP_HOURS] = t[C_AMP_HOURS_CHARGED] = now
+
+    def _decode_status_3(self, st: MotorState, node_id: int, v, t, now: float, wh_x1e4: int, wh_chg_x1e4: int):
+        # Watt Hours / Watt Hours Charged (Wh*1e4 i32)
+        st.watt_hours = v[C_WATT_HOURS] = wh_x1e4 / 1e4
+        st.watt_hours_charged = v[C_WATT_HOURS_CHARGED] = wh_chg_x1e4 / 1e4
+        t[C_WATT_HOURS] = t[C_WATT_HOURS_CHARGED] = now
+
+    def _decode_status_4(self, st: MotorState, node_id: int, v, t, now: float,
+                         temp_fet_x10: int, temp_m_x10: int, i_in_x1000: int, pid_pos_deg_x50: int):
+        # Temp FET (0.1C i16), Temp Motor (0.1C i16), Current In (A*1000 i16), PID Pos (deg, scale 50, i16)
+        st.temp_mos = v[C_TEMP_MOS] = temp_fet_x10 / 10.0
+        st.temp_motor = v[C_TEMP_MOTOR] = temp_m_x10 / 10.0
+        st.current_in = v[C_CURRENT_IN] = i_in_x1000 / 1000.0
+        # 位置（度）直接保存为机械单圈角度
+        st.pos_deg = v[C_POS_DEG] = pid_pos_deg_x50 / 50.0
+        t[C_TEMP_MOS] = t[C_TEMP_MOTOR] = t[C_CURRENT_IN] = t[C_POS_DEG] = now
+
+    def _decode_status_5(self, st: MotorState, node_id: int, v, t, now: float, tach_x6: int, v_in_x10: int):
+        # Tachometer (EREV, scale 6, int32) + Voltage In (0.1V u16)
+        st.tachometer = v[C_TACHOMETER] = tach_x6 / 6.0
+        st.voltage_in = v[C_VOLTAGE_IN] = v_in_x10 / 10.0
+        t[C_TACHOMETER] = t[C_VOLTAGE_IN] = now
+
+    def _decode_status_6(self, st: MotorState, node_id: int, v, t, now: float,
+                         adc1_x1000: int, adc2_x1000: int, adc3_x1000: int, ppm_x1000: int):
+        # ADC1/2/3 (V*1000 i16), PPM (%/100 *1000 i16)
+        st.adc1 = v[C_ADC1] = adc1_x1000 / 1000.0
+        st.adc2 = v[C_ADC2] = adc2_x1000 / 1000.0
+        st.adc3 = v[C_ADC3] = adc3_x1000 / 1000.0
+        st.ppm = v[C_PPM] = ppm_x1000 / 1000.0
+        t[C_ADC1] = t[C_ADC2] = t[C_ADC3] = t[C_PPM] = now
+
+    def get_state(self, node_id: int) -> Optional[MotorSnapshot]:
+        """
+        该节点最新的只读快照（同一帧内的字段一致，不会读到写到一半的状态）。
+        快照按需生成并缓存在状态对象上：seq 未变化时直接返回缓存；按 seqlock 规则复制，复制期间有写入时不等待，返回上一份一致快照。
+        逐字段高频读取请用 sample()。
+        """
+        st = self.states.get(node_id)
+        if st is None:
+            return None
+        seq = st.seq
+        published = st.published
+        if published[0] == seq:
+            return published[1]
+        if not seq & 1:
+            snap = st.snapshot()
+            if st.seq == seq:
+                st.published = (seq, snap)
+                return snap
+        return published[1]
+
+    def sample(self, node_id: int, field: str) -> Tuple[float, float]:
+        """
+        单字段最新样本 (值, 更新时间)，直接读状态表（无快照开销）；从未收到为 (nan, 0.0)。
+        逐帧消费样本（如碰撞检测）时以更新时间去重。先读时间戳再读值：解码先写值后写时间戳，不会拿到旧值配新时间戳。
+        """
+        row = self.table.rows.get(node_id)
+        if row is None:
+            return math.nan, 0.0
+        col = FIELD_INDEX[field]
+        t = row[1][col]
+        return row[0][col], t
+
+    def snapshot(self, fields: Optional[List[str]] = None, with_stamps: bool = False):
+        """全部节点的遥测快照（NumPy 结构化数组，按 node_id 升序），见 StateTable.snapshot。"""
+        return self.table.snapshot(fields, with_stamps)
 
-    def with_state(self, node_id: int) -> Optional[MotorState]:
+    def with_state(self, node_id: int) -> Optional[MotorSnapshot]:
         """获取状态并在离线时返回 None（便于上层直接判空终止动作）。"""
         st = self.get_state(node_id)
         if st is None or st.offline:
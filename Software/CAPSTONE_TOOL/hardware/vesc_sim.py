@@ -0,0 +1,390 @@
+# VESC 节点仿真：在 python-can 的 virtual 总线（进程内）上模拟 N 个 VESC 节点，供无硬件的闭环测试/基准使用
+#
+#   - 命令：SET_POS_LIM / SET_POS（固件梯形位置控制）、SET_RPM、SET_CURRENT / SET_CURRENT_BRAKE、SET_DUTY、
+#           UPDATE_PID_POS_OFFSET；超过 timeout_s 未收到命令时按固件行为释放（电流归零、制动到停）
+#   - 机械限位：关节角越过 [stop_min_deg, stop_max_deg] 时被挡住，速度环积分饱和使电流升至 stall_current_a
+#   - 状态帧：STATUS / STATUS_2..6 按每节点各自频率发送，编码与 VescCAN 的解码完全对应（同一组 Struct）
+#
+# 仿真时间只由 step(dt) 推进：lockstep 调用可远快于实时（bind() 挂到 VirtualClock 与主机侧闭环）；
+# start() 则以实时线程驱动并挂到 virtual 总线。
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import can
+
+from config.arm_config import AxisConfig
+from hardware.vesc_can import (VescCAN, VescCANConfig, _I32, _POS_LIM, _STATUS, _STATUS_2, _STATUS_3, _STATUS_4,
+                               _STATUS_5, _STATUS_6)
+from utils.clock import VirtualClock
+from utils.log_utils import globalLogger
+
+# 控制模式
+MODE_IDLE = "idle"
+MODE_POS = "pos"
+MODE_RPM = "rpm"
+MODE_CURRENT = "current"
+MODE_BRAKE = "brake"
+MODE_DUTY = "duty"
+
+
+def _default_status_rates() -> Dict[int, float]:
+    # 状态帧频率（Hz），0 为不发送；与固件 app 配置中的 CAN status rate 对应
+    return {VescCAN.CAN_PACKET_STATUS: 100.0, VescCAN.CAN_PACKET_STATUS_2: 0.0,
+            VescCAN.CAN_PACKET_STATUS_3: 0.0, VescCAN.CAN_PACKET_STATUS_4: 100.0,
+            VescCAN.CAN_PACKET_STATUS_5: 10.0, VescCAN.CAN_PACKET_STATUS_6: 0.0}
+
+
+@dataclass
+class VescSimConfig:
+    node_id: int
+    reduction_ratio: float = 100.0
+    motor_poles_pairs: float = 3.0
+    # 初始关节角（度，连续角）与 PID 位置偏置（固件位置 = 关节角 - 偏置，取模 360）
+    init_pos_deg: float = 180.0
+    pos_offset_deg: float = 0.0
+    # 机械限位（关节角，度）；None 为该侧无限位
+    stop_min_deg: Optional[float] = 20.0
+    stop_max_deg: Optional[float] = 340.0
+    # SET_POS（无限速字段）与速度模式使用的加速度（°/s, °/s^2）
+    default_vel_dps: float = 90.0
+    default_accel_dps2: float = 180.0
+    rpm_accel_dps2: float = 720.0
+    brake_decel_dps2: float = 720.0
+    # 电流模型：自由运行电流 + 加速所需电流；顶住限位时以 stall_rise_a_per_s 升至 stall_current_a
+    free_current_a: float = 0.05
+    accel_current_a_per_dps2: float = 0.0005
+    stall_current_a: float = 2.0
+    stall_rise_a_per_s: float = 20.0
+    # 电流模式：稳态角速度 = 电流 × current_speed_dps_per_a（一阶时间常数 current_tau_s）
+    current_speed_dps_per_a: float = 200.0
+    current_tau_s: float = 0.05
+    # 满占空比对应的关节角速度（°/s），用于占空比/输入电流估算及 SET_DUTY
+    max_speed_dps: float = 600.0
+    current_noise_a: float = 0.005
+    voltage_in: float = 24.0
+    temp_mos: float = 35.0
+    temp_motor: float = 30.0
+    # 命令超时（s）：固件 app 配置 timeout，超时后释放电机
+    timeout_s: float = 1.0
+    status_rates_hz: Dict[int, float] = field(default_factory=_default_status_rates)
+
+
+class SimVescNode:
+    """单个 VESC 节点：关节角/角速度/电流的离散时间模型与固件位置环。时间单位 s，角度单位 度（关节输出侧）。"""
+    def __init__(self, cfg: VescSimConfig, seed: Optional[int] = None):
+        self.cfg = cfg
+        self.pos = float(cfg.init_pos_deg)
+        self.vel = 0.0
+        self.current = 0.0
+        self.offset = float(cfg.pos_offset_deg)
+        self.mode = MODE_IDLE
+        self.setpoint = 0.0            # MODE_POS：目标关节角（连续角）；MODE_RPM/DUTY：目标角速度；MODE_CURRENT：电流
+        self.max_vel = cfg.default_vel_dps
+        self.max_acc = cfg.default_accel_dps2
+        self.blocked = 0               # 顶住限位的方向（-1/+1），0 为未顶住
+        self._stall = 0.0              # 顶住限位时速度环积分带来的额外电流
+        self.last_cmd_t = -math.inf
+        self.amp_hours = self.amp_hours_charged = 0.0
+        self.watt_hours = self.watt_hours_charged = 0.0
+        self.rx_count = 0
+        self._rng = random.Random(seed if seed is not None else cfg.node_id)
+        self._next_status: Dict[int, float] = {pid: 0.0 for pid, hz in cfg.status_rates_hz.items() if hz > 0}
+
+    # ---------------- 派生量 ----------------
+    @property
+    def pid_pos_deg(self) -> float:
+        """固件 PID 位置（0..360）：关节角减去偏置后取模。"""
+        return (self.pos - self.offset) % 360.0
+
+    @property
+    def erpm(self) -> float:
+        return self.vel / 6.0 * self.cfg.reduction_ratio * self.cfg.motor_poles_pairs
+
+    @property
+    def duty(self) -> float:
+        return max(-1.0, min(1.0, self.vel / self.cfg.max_speed_dps))
+
+    # ---------------- 命令 ----------------
+    def command(self, packet_id: int, data: bytes, now: float):
+        cfg = self.cfg
+        self.rx_count += 1
+        if packet_id == VescCAN.CAN_PACKET_UPDATE_PID_POS_OFFSET:
+            if len(data) >= 4:
+                # 固件把当前角度记为 angle_now：偏置 = 关节角 - angle_now
+                self.offset = self.pos - _I32.unpack_from(data)[0] / 1e4
+            return
+        if packet_id == VescCAN.CAN_PACKET_SET_POS_LIM and len(data) >= _POS_LIM.size:
+            pos_x1e6, vel_x100, acc_x10 = _POS_LIM.unpack_from(data)
+            self._set_pos(pos_x1e6 / 1e6, vel_x100 / 100.0, acc_x10 / 10.0)
+        elif packet_id == VescCAN.CAN_PACKET_SET_POS and len(data) >= 4:
+            self._set_pos(_I32.unpack_from(data)[0] / 1e6, cfg.default_vel_dps, cfg.default_accel_dps2)
+        elif packet_id == VescCAN.CAN_PACKET_SET_RPM and len(data) >= 4:
+            self.mode = MODE_RPM
+            self.setpoint = _I32.unpack_from(data)[0] / (cfg.reduction_ratio * cfg.motor_poles_pairs) * 6.0
+        elif packet_id == VescCAN.CAN_PACKET_SET_CURRENT and len(data) >= 4:
+            self.mode = MODE_CURRENT
+            self.setpoint = _I32.unpack_from(data)[0] / 1000.0
+        elif packet_id == VescCAN.CAN_PACKET_SET_CURRENT_BRAKE and len(data) >= 4:
+            self.mode = MODE_BRAKE
+            self.setpoint = abs(_I32.unpack_from(data)[0] / 1000.0)
+        elif packet_id == VescCAN.CAN_PACKET_SET_DUTY and len(data) >= 4:
+            self.mode = MODE_DUTY
+            self.setpoint = _I32.unpack_from(data)[0] / 1e5 * cfg.max_speed_dps
+        else:
+            return
+        self.last_cmd_t = now
+
+    def _set_pos(self, pid_deg: float, max_vel: float, max_acc: float):
+        # 目标为固件位置（0..360），换算到与当前关节角同一圈的连续角（固件位置环不跨 0/360 回绕）
+        turn = math.floor((self.pos - self.offset) / 360.0)
+        self.setpoint = self.offset + 360.0 * turn + pid_deg
+        self.max_vel = max(1e-3, abs(max_vel))
+        self.max_acc = max(1e-3, abs(max_acc))
+        self.mode = MODE_POS
+
+    # ---------------- 物理步进 ----------------
+    def _pos_velocity(self, dt: float) -> Optional[float]:
+        # 梯形位置环：按剩余距离的可制动速度与限速取目标速度，再按加速度限幅逼近
+        err = self.setpoint - self.pos
+        v_stop = math.copysign(math.sqrt(2.0 * self.max_acc * abs(err)), err)
+        v_des = max(-self.max_vel, min(self.max_vel, v_stop))
+        dv = self.max_acc * dt
+        v = max(self.vel - dv, min(self.vel + dv, v_des))
+        if abs(err) < max(1e-4, abs(v) * dt) and abs(v) <= dv:
+            return None                # 到位：由调用方直接落在目标上
+        return v
+
+    def step(self, dt: float, now: float):
+        cfg = self.cfg
+        if self.mode != MODE_IDLE and now - self.last_cmd_t > cfg.timeout_s:
+            self.mode = MODE_IDLE
+        v0 = self.vel
+        push = 0.0                     # 电机试图运动的方向（用于判定是否顶住限位）
+        if self.mode == MODE_POS:
+            v = self._pos_velocity(dt)
+            push = self.setpoint - self.pos
+            if v is None:
+                self.pos, self.vel, v0, v = self.setpoint, 0.0, 0.0, 0.0
+        elif self.mode in (MODE_RPM, MODE_DUTY):
+            dv = cfg.rpm_accel_dps2 * dt
+            v = max(v0 - dv, min(v0 + dv, self.setpoint))
+            push = self.setpoint
+        elif self.mode == MODE_CURRENT:
+            v_ss = self.setpoint * cfg.current_speed_dps_per_a
+            v = v0 + (v_ss - v0) * min(1.0, dt / max(1e-6, cfg.current_tau_s))
+            push = self.setpoint
+        else:
+            dv = cfg.brake_decel_dps2 * dt
+            v = max(0.0, abs(v0) - dv) * (1.0 if v0 >= 0.0 else -1.0)
+
+        # 机械限位：越界即挡住，速度清零
+        pos = self.pos + 0.5 * (v0 + v) * dt
+        self.blocked = 0
+        if cfg.stop_min_deg is not None and pos <= cfg.stop_min_deg and (v < 0.0 or push < 0.0):
+            pos, v, self.blocked = cfg.stop_min_deg, 0.0, -1
+        elif cfg.stop_max_deg is not None and pos >= cfg.stop_max_deg and (v > 0.0 or push > 0.0):
+            pos, v, self.blocked = cfg.stop_max_deg, 0.0, 1
+        self.pos = pos
+        self.vel = v
+
+        # 电流：电流模式直接为指令值；速度/位置环为摩擦 + 加速电流，顶住限位时积分饱和逐步升到堵转电流
+        if self.mode == MODE_CURRENT:
+            i = self.setpoint
+            self._stall = 0.0
+        elif self.mode in (MODE_POS, MODE_RPM, MODE_DUTY):
+            direction = v if v != 0.0 else push
+            i = (math.copysign(cfg.free_current_a, direction) if direction else 0.0)
+            i += cfg.accel_current_a_per_dps2 * (v - v0) / dt
+            if self.blocked and push * self.blocked > 0.0:
+                self._stall = min(cfg.stall_current_a, self._stall + cfg.stall_rise_a_per_s * dt)
+                i = math.copysign(max(abs(i), self._stall), self.blocked)
+            else:
+                self._stall = 0.0
+        elif self.mode == MODE_BRAKE:
+            i = -math.copysign(min(self.setpoint, cfg.free_current_a * 4.0), v) if v else 0.0
+            self._stall = 0.0
+        else:
+            i = 0.0
+            self._stall = 0.0
+        if cfg.current_noise_a and i:
+            i += self._rng.gauss(0.0, cfg.current_noise_a)
+        self.current = i
+
+        # 能量计数（电机电流 × 占空比近似输入电流）
+        i_in = i * abs(self.duty)
+        if i_in >= 0.0:
+            self.amp_hours += i_in * dt / 3600.0
+            self.watt_hours += i_in * cfg.voltage_in * dt / 3600.0
+        else:
+            self.amp_hours_charged -= i_in * dt / 3600.0
+            self.watt_hours_charged -= i_in * cfg.voltage_in * dt / 3600.0
+
+    # ---------------- 状态帧 ----------------
+    def encode_status(self, packet_id: int) -> bytes:
+        cfg = self.cfg
+        if packet_id == VescCAN.CAN_PACKET_STATUS:
+            return _STATUS.pack(int(round(self.erpm)), _i16(self.current * 1000.0), _i16(self.duty * 1000.0))
+        if packet_id == VescCAN.CAN_PACKET_STATUS_2:
+            return _STATUS_2.pack(int(round(self.amp_hours * 1e4)), int(round(self.amp_hours_charged * 1e4)))
+        if packet_id == VescCAN.CAN_PACKET_STATUS_3:
+            return _STATUS_3.pack(int(round(self.watt_hours * 1e4)), int(round(self.watt_hours_charged * 1e4)))
+        if packet_id == VescCAN.CAN_PACKET_STATUS_4:
+            return _STATUS_4.pack(_i16(cfg.temp_mos * 10.0), _i16(cfg.temp_motor * 10.0),
+                                  _i16(self.current * abs(self.duty) * 1000.0), _i16(self.pid_pos_deg * 50.0))
+        if packet_id == VescCAN.CAN_PACKET_STATUS_5:
+            tach = self.pos / 360.0 * cfg.reduction_ratio * cfg.motor_poles_pairs
+            return _STATUS_5.pack(int(round(tach * 6.0)), max(0, min(65535, int(round(cfg.voltage_in * 10.0)))))
+        if packet_id == VescCAN.CAN_PACKET_STATUS_6:
+            return _STATUS_6.pack(0, 0, 0, 0)
+        raise ValueError(f"unknown status packet {packet_id}")
+
+    def due_status(self, now: float) -> List[int]:
+        """now 时刻到期的状态包（按各自频率排定下一次发送）。"""
+        due = []
+        for pid, t_next in self._next_status.items():
+            if now >= t_next:
+                period = 1.0 / self.cfg.status_rates_hz[pid]
+                # 落后超过一个周期时不补发，从当前时刻重新排定
+                self._next_status[pid] = t_next + period if now - t_next < period else now + period
+                due.append(pid)
+        return due
+
+
+def _i16(x: float) -> int:
+    v = int(round(x))
+    return -32768 if v < -32768 else (32767 if v > 32767 else v)
+
+
+class VescSimFleet:
+    """
+    一组仿真节点，共享 VescCAN 的 ID 编码（id_format）。
+    lockstep：receive() 投递命令帧，step(dt) 推进仿真时间并返回到期的状态帧 (arb_id, data, extended)；
+    实时：start(channel) 在 virtual 总线上收命令、按 physics_hz 步进并发出状态帧。
+    """
+    def __init__(self, nodes: Iterable[VescSimConfig], id_format: str = "extended_29bit",
+                 physics_hz: float = 1000.0):
+        self.codec = VescCAN(VescCANConfig(id_format=id_format))
+        self.nodes: Dict[int, SimVescNode] = {c.node_id: SimVescNode(c) for c in nodes}
+        self.physics_hz = float(physics_hz)
+        self.now = 0.0
+        self.bus: Optional[can.BusABC] = None
+        self.channel: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.frames_sent = 0
+        self.log = globalLogger
+
+    @classmethod
+    def from_axes(cls, axes_cfg: Dict[int, AxisConfig], id_format: str = "extended_29bit",
+                  physics_hz: float = 1000.0, **overrides) -> "VescSimFleet":
+        """按 ArmController 的轴配置生成节点（减速比/极对数一致），overrides 为所有节点共用的 VescSimConfig 字段。"""
+        nodes = [VescSimConfig(node_id=nid, reduction_ratio=ac.reduction_ratio,
+                               motor_poles_pairs=ac.motor_poles_pairs, **overrides)
+                 for nid, ac in sorted(axes_cfg.items())]
+        return cls(nodes, id_format, physics_hz)
+
+    # ---------------- lockstep ----------------
+    def receive(self, arbitration_id: int, data: bytes, is_extended: bool):
+        """投递一帧主机发出的 CAN 帧；非本组节点或非命令帧忽略。"""
+        unpack = self.codec.unpack_id(arbitration_id, is_extended)
+        if not unpack:
+            return
+        packet_id, node_id = unpack
+        node = self.nodes.get(node_id)
+        if node is not None:
+            with self._lock:
+                node.command(packet_id, bytes(data), self.now)
+
+    def step(self, dt: Optional[float] = None) -> List[Tuple[int, bytes, bool]]:
+        """推进 dt 秒（默认一个物理步长），返回期间到期的状态帧。"""
+        dt = 1.0 / self.physics_hz if dt is None else float(dt)
+        frames = []
+        with self._lock:
+            self.now += dt
+            for nid, node in self.nodes.items():
+                node.step(dt, self.now)
+                for pid in node.due_status(self.now):
+                    frames.append(self.codec.build_frame(pid, nid, node.encode_status(pid)))
+        self.frames_sent += len(frames)
+        return frames
+
+    def run_for(self, seconds: float, on_frame: Optional[Callable[[int, bytes, bool], None]] = None,
+                dt: Optional[float] = None) -> int:
+        """lockstep 连续推进 seconds 秒（不等待墙钟），状态帧交给 on_frame；返回帧数。"""
+        dt = 1.0 / self.physics_hz if dt is None else float(dt)
+        n = 0
+        for _ in range(int(round(seconds / dt))):
+            for frame in self.step(dt):
+                n += 1
+                if on_frame is not None:
+                    on_frame(*frame)
+        return n
+
+    def send(self, arbitration_id: int, data: bytes, is_extended: bool, priority: Optional[int] = None):
+        """与 CANInterface.send 签名一致，可直接作为 ArmController 的 can_send（lockstep，无总线）。"""
+        self.receive(arbitration_id, data, is_extended)
+
+    def bind(self, clock: VirtualClock, vesc: VescCAN):
+        """
+        lockstep 挂到虚拟时钟：每个物理步长由时钟回调推进一次，状态帧同步交给 vesc 的分发表解码。
+        主机侧用 send 作为 can_send，即可在虚拟时间下闭环运行找零/轨迹。
+        """
+        rx = vesc.build_rx_table(self.nodes)
+        self.now = clock.now()
+
+        def tick():
+            for arb_id, data, _ in self.step():
+                handler = rx.get(arb_id)
+                if handler is not None:
+                    handler(data)
+        clock.call_every(1.0 / self.physics_hz, tick)
+
+    # ---------------- 实时（virtual 总线） ----------------
+    def start(self, channel: str = "vesc-sim", bus: Optional[can.BusABC] = None):
+        """挂到 python-can virtual 总线的 channel（主机侧 CANInterface 用同一 channel），以实时线程运行。"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.channel = channel
+        self.bus = bus or can.Bus(interface="virtual", channel=channel)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="vesc-sim", daemon=True)
+        self._thread.start()
+        self.log.info(f"VESC simulator started on virtual:{channel}, nodes {sorted(self.nodes)}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        if self.bus is not None:
+            self.bus.shutdown()
+        self.bus = None
+
+    def _loop(self):
+        period = 1.0 / self.physics_hz
+        bus = self.bus
+        t_last = time.monotonic()
+        deadline = t_last + period
+        while not self._stop.is_set():
+            msg = bus.recv(timeout=max(0.0, deadline - time.monotonic()))
+            while msg is not None:
+                self.receive(msg.arbitration_id, msg.data, msg.is_extended_id)
+                msg = bus.recv(timeout=0.0)
+            now = time.monotonic()
+            if now < deadline:
+                continue
+            # 实时模式按实际经过时间步进（最多补 50 ms，避免暂停后跳变）
+            for arb_id, data, ext in self.step(min(now - t_last, 0.05)):
+                try:
+                    bus.send(can.Message(arbitration_id=arb_id, data=data, is_extended_id=ext))
+                except can.CanError as e:
+                    self.log.warning(f"VESC simulator send error: {e}")
+            t_last = now
+            deadline += period
+            if deadline < now:
+                deadline = now + period
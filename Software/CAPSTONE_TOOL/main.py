@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
+import dataclasses
 import logging
 import threading
 import time
 from typing import Optional, Dict
 
-from hardware.can_interface import CANInterface
+from hardware.can_interface import CANInterface, TX_PRIORITY_HIGH
+from hardware.async_can_interface import AsyncCANInterface
 from hardware.vesc_can import VescCAN, VescCANConfig
+from hardware.can_recorder import CANRecorder
+from hardware.can_router import CANRouter
+from hardware.vesc_sim import VescSimFleet
 from control.arm_controller import ArmController
+from control.async_arm_controller import AsyncArmController
+from control.rt_process import CoreProxy
 from config.arm_config import AxisConfig, AppConfig, CANConfig
+from planner.kinematics import SerialArm
 from gui.main_window import MultiPageGUI
 from utils.log_utils import LoggerTool
+from utils.aio_utils import LoopThread
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
@@ -22,9 +31,6 @@ class AppBridge:
     """
     def __init__(self, logger: LoggerTool):
 
-        self.can_if = CANInterface(CANConfig.interface, CANConfig.channel, CANConfig.bitrate)
-        self.vesc = VescCAN(CANConfig)
-
         # 构造四轴配置，后续可从APP_CONFIG/其他配置源读取
         axes_cfg: Dict[int, AxisConfig] = {
             1: AxisConfig(node_id=1, homing_current_threshold_a=0.55),
@@ -32,23 +38,90 @@ class AppBridge:
             3: AxisConfig(node_id=3, reduction_ratio=80.0, homing_current_threshold_a=0.25),
             4: AxisConfig(node_id=4, reduction_ratio=80.0, homing_current_threshold_a=0.25),
         }
+        self.app_cfg = AppConfig()
+        self.vesc = VescCAN(self.app_cfg.can)
         # 将每轴配置注入到 VESC 层，便于状态换算（极对数、减速比）
         try:
             self.vesc.set_axis_configs(axes_cfg)
         except Exception:
             pass
-        self.arm = ArmController(axes_cfg, self.vesc, self._send_can,
-                                 control_rate_hz=AppConfig.control_rate_hz,
-                                 logger=logger)
 
-        # CAN 接收回调
+        # CAN 总线：单总线直接使用 CANInterface；多总线时按 AxisConfig.can_bus 由 CANRouter 分发
+        can_buses = self.app_cfg.can_buses or {"default": self.app_cfg.can}
+        # 仿真节点：每条总线一个 virtual 通道 + 一组仿真 VESC，随 connect/disconnect 启停
+        self.sims: Dict[str, VescSimFleet] = {}
+        if self.app_cfg.simulate_vesc:
+            can_buses = {name: dataclasses.replace(cfg, interface="virtual", channel=f"vesc-sim-{name}")
+                         for name, cfg in can_buses.items()}
+            for name, cfg in can_buses.items():
+                bus_axes = {nid: ac for nid, ac in axes_cfg.items() if len(can_buses) == 1 or ac.can_bus == name}
+                self.sims[name] = VescSimFleet.from_axes(bus_axes, cfg.id_format)
+        self.runtime: Optional[LoopThread] = None
+        if self.app_cfg.can.backend == "asyncio":
+            # 单事件循环：CAN 收发、控制节拍、找零都作为任务运行（多总线共用同一循环）
+            self.runtime = LoopThread("can-aio")
+        ifaces = {name: self._make_can_if(cfg) for name, cfg in can_buses.items()}
+        if len(ifaces) == 1:
+            self.can_if = next(iter(ifaces.values()))
+        else:
+            self.can_if = CANRouter(ifaces, {nid: ac.can_bus for nid, ac in axes_cfg.items()},
+                                    node_of=self.vesc.node_of)
+        # 运动学模型：仅当其全部关节轴都已配置时启用（当前四轴配置下笛卡尔接口不可用）
+        kin_cfg = self.app_cfg.kinematics
+        kinematics = (SerialArm(kin_cfg, axes_cfg)
+                      if all(nid in axes_cfg for nid in kin_cfg.node_ids[:len(kin_cfg.dhm)]) else None)
+        if self.runtime is not None:
+            self.arm = AsyncArmController(axes_cfg, self.vesc, self._send_can, runtime=self.runtime,
+                                          control_rate_hz=self.app_cfg.control_rate_hz,
+                                          logger=logger, overrun_policy=self.app_cfg.control_overrun,
+                                          stream_keepalive_s=self.app_cfg.stream_keepalive_s,
+                                          homing_groups=self.app_cfg.homing_groups,
+                                          kinematics=kinematics, estimator=self.app_cfg.estimator)
+        else:
+            self.arm = ArmController(axes_cfg, self.vesc, self._send_can,
+                                     control_rate_hz=self.app_cfg.control_rate_hz,
+                                     logger=logger, overrun_policy=self.app_cfg.control_overrun,
+                                     spin_s=self.app_cfg.control_spin_s,
+                                     stream_keepalive_s=self.app_cfg.stream_keepalive_s,
+                                     homing_groups=self.app_cfg.homing_groups,
+                                     kinematics=kinematics, estimator=self.app_cfg.estimator)
+
+        # CAN 接收：验收滤波 + 预索引分发（arbitration_id -> 解析函数），其余帧回退到 on_message
+        rx_table = self.vesc.build_rx_table(axes_cfg.keys())
+        if isinstance(self.can_if, CANRouter):
+            filters_per_bus = {
+                name: self.vesc.build_can_filters(
+                    [nid for nid, ac in axes_cfg.items() if self.can_if.node_bus.get(nid) == name])
+                for name in ifaces
+            }
+            self.can_if.set_rx_dispatch(rx_table, filters_per_bus=filters_per_bus)
+        else:
+            self.can_if.set_rx_dispatch(rx_table, self.vesc.build_can_filters(axes_cfg.keys()))
         self.can_if.on_message = self._on_can_message
 
+        # 总线录制（CANRecorder），用于离线复现
+        self.recorder: Optional[CANRecorder] = None
+
         # 后台状态刷新线程（如需要对GUI更新状态）
         # self._ui_thread = threading.Thread(target=self._ui_refresh_loop, daemon=True)
 
-    def _send_can(self, arbitration_id: int, payload: bytes, extended: bool):
-        self.can_if.send(arbitration_id, payload, extended)
+    def _make_can_if(self, cfg: CANConfig) -> CANInterface:
+        if self.runtime is not None:
+            return AsyncCANInterface(cfg.interface, cfg.channel, cfg.bitrate,
+                                     runtime=self.runtime,
+                                     tx_queue_size=cfg.tx_queue_size,
+                                     bus_load_window_s=cfg.bus_load_window_s,
+                                     tx_budget_fraction=cfg.tx_budget_fraction)
+        return CANInterface(cfg.interface, cfg.channel, cfg.bitrate,
+                            tx_queue_size=cfg.tx_queue_size,
+                            tx_timeout_s=cfg.tx_timeout_s,
+                            tx_async=cfg.tx_async,
+                            bus_load_window_s=cfg.bus_load_window_s,
+                            tx_budget_fraction=cfg.tx_budget_fraction)
+
+    def _send_can(self, arbitration_id: int, payload: bytes, extended: bool,
+                  priority: int = TX_PRIORITY_HIGH):
+        self.can_if.send(arbitration_id, payload, extended, priority)
 
     def _on_can_message(self, msg):
         unpack = self.vesc.unpack_id(msg.arbitration_id, msg.is_extended_id)
@@ -58,6 +131,9 @@ class AppBridge:
         self.vesc.parse_status(packet_id, node_id, bytes(msg.data))
 
     def connect(self):
+        for name, sim in self.sims.items():
+            sim.start(f"vesc-sim-{name}")
+        self.vesc.start_supervisor(self.app_cfg.can.offline_check_period_s)
         self.can_if.start()
         # self.arm.start()
         # if not self._ui_thread.is_alive():
@@ -65,8 +141,26 @@ class AppBridge:
         #     self._ui_thread.start()
 
     def disconnect(self):
+        self.arm.stop_teach()
         self.arm.stop()
         self.can_if.stop()
+        self.vesc.stop_supervisor()
+        for sim in self.sims.values():
+            sim.stop()
+        if self.runtime is not None:
+            self.runtime.stop()
+        self.stop_recording()
+
+    def start_recording(self, path: str):
+        """把此后收发的每一帧录制到 path（追加）。"""
+        self.stop_recording()
+        self.recorder = CANRecorder(path, clock=self.vesc.clock)
+        self.recorder.attach(self.can_if)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     # def _ui_refresh_loop(self):
     #     while True:
@@ -75,9 +169,19 @@ class AppBridge:
     #         pass
 
 
+def build_backend(logger) -> AppBridge:
+    """控制核心进程的后端工厂（须为模块级函数，供 spawn 子进程导入）。"""
+    return AppBridge(logger)
+
+
 def main():
     logger = LoggerTool("control_panel")
-    bridge = AppBridge(logger)
+    app_cfg = AppConfig()
+    if app_cfg.control_process:
+        # 控制核心在独立进程运行，GUI 只消费共享内存中的状态
+        bridge = CoreProxy(build_backend, logger, publish_hz=app_cfg.control_publish_hz)
+    else:
+        bridge = AppBridge(logger)
     gui = MultiPageGUI(bridge=bridge, logger=logger)
 
     # 暴露给 GUI 页面使用的回调（后续在SerialPage或其他页面中绑定）
@@ -88,6 +192,8 @@ def main():
 
     # 运行 GUI
     gui.run()
+    if isinstance(bridge, CoreProxy):
+        bridge.close()
 
 
 if __name__ == "__main__":
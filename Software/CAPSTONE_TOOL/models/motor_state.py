@@ -1,8 +1,45 @@
 from dataclasses import dataclass, field
-from typing import Optional
+from operator import attrgetter
+from typing import Dict, NamedTuple, Optional, Tuple
 import time
 
 
+class MotorSnapshot(NamedTuple):
+    """
+    某节点在某一时刻的只读状态（tuple，无 __dict__）。由 VescCAN.get_state 在两帧之间按需整体复制，
+    读者拿到的是一致视图；signals 字典发布后不再被修改（写方采用写时复制）。
+    """
+    node_id: int
+    temp_mos: Optional[float]
+    temp_motor: Optional[float]
+    voltage_in: Optional[float]
+    current_motor: Optional[float]
+    current_in: Optional[float]
+    rpm: Optional[float]
+    deg_per_s: Optional[float]
+    duty: Optional[float]
+    erpm: Optional[int]
+    tachometer: Optional[float]
+    amp_hours: Optional[float]
+    amp_hours_charged: Optional[float]
+    watt_hours: Optional[float]
+    watt_hours_charged: Optional[float]
+    adc1: Optional[float]
+    adc2: Optional[float]
+    adc3: Optional[float]
+    ppm: Optional[float]
+    pos_deg: Optional[float]
+    pos_mod_turns: Optional[float]
+    pos_unwrapped_turns: float
+    signals: Dict[str, float]
+    last_update_s: float
+    offline: bool
+
+
+_SNAPSHOT_FIELDS = attrgetter(*MotorSnapshot._fields)
+_tuple_new = tuple.__new__
+
+
 @dataclass
 class MotorState:
     node_id: int
@@ -14,19 +51,39 @@ class MotorState:
     rpm: Optional[float] = None              # 关节输出RPM（已按极对数与减速比换算）
     deg_per_s: Optional[float] = None        # 关节输出角速度（度/秒）
     duty: Optional[float] = None
+    erpm: Optional[int] = None
+    tachometer: Optional[float] = None       # 转速计（电气圈 EREV）
+    amp_hours: Optional[float] = None
+    amp_hours_charged: Optional[float] = None
+    watt_hours: Optional[float] = None
+    watt_hours_charged: Optional[float] = None
+    adc1: Optional[float] = None
+    adc2: Optional[float] = None
+    adc3: Optional[float] = None
+    ppm: Optional[float] = None
     # 直接使用固件返回的机械单圈角度（度）
     pos_deg: Optional[float] = None
     # 旧：单圈位置（0..1），保留以兼容
     pos_mod_turns: Optional[float] = None
     pos_unwrapped_turns: float = 0.0
-    last_update_s: float = field(default_factory=time.time)
+    # 由 DBC 解码的其它信号（DBC 中新增、无手写解码的包），键为去掉节点后缀的 DBC 信号名；整体替换，不原地修改
+    signals: Dict[str, float] = field(default_factory=dict)
+    last_update_s: float = field(default_factory=time.monotonic)
     offline: bool = False
+    # 写序号（seqlock）：写入期间为奇数，每次写完 +2，见 VescCAN.get_state
+    seq: int = 0
+    # 最近一次发布的一致快照 (seq, MotorSnapshot)，由 VescCAN.get_state 维护
+    published: Optional[Tuple[int, MotorSnapshot]] = field(default=None, repr=False, compare=False)
     _last_pos_mod: Optional[float] = None
-    _last_time_s: float = field(default_factory=time.time)
+    _last_time_s: float = field(default_factory=time.monotonic)
     _last_pos_deg: Optional[float] = None
 
-    def update_pos_unwrapped_from_mod(self, pos_mod_turns: float):
-        now = time.time()
+    def snapshot(self) -> MotorSnapshot:
+        """按当前字段生成只读快照（attrgetter 一次取齐，C 层完成）。"""
+        return _tuple_new(MotorSnapshot, _SNAPSHOT_FIELDS(self))
+
+    def update_pos_unwrapped_from_mod(self, pos_mod_turns: float, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
         if self._last_pos_mod is None:
             self.pos_unwrapped_turns = pos_mod_turns
         else:
@@ -40,16 +97,16 @@ class MotorState:
         self.last_update_s = now
         self._last_time_s = now
 
-    def update_pos_unwrapped_from_rpm(self, rpm: float):
-        now = time.time()
+    def update_pos_unwrapped_from_rpm(self, rpm: float, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
         dt = now - self._last_time_s
         self._last_time_s = now
         self.pos_unwrapped_turns += (rpm / 60.0) * dt
         self.last_update_s = now
 
-    def update_pos_unwrapped_from_deg(self, pos_deg: float):
+    def update_pos_unwrapped_from_deg(self, pos_deg: float, now: Optional[float] = None):
         """基于度数(通常0..360包络)更新展开圈数，避免再做mod/归一化。"""
-        now = time.time()
+        now = time.monotonic() if now is None else now
         if self._last_pos_deg is None:
             self.pos_unwrapped_turns = (pos_deg / 360.0)
         else:
@@ -0,0 +1,128 @@
+# 列式节点状态表：每节点一行、每个遥测字段一列，附带逐字段的更新时间
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 列按状态包分组排列（同一包的字段相邻）
+FIELDS: Tuple[str, ...] = (
+    # STATUS
+    "erpm", "current_motor", "duty", "rpm", "deg_per_s",
+    # STATUS_2 / STATUS_3
+    "amp_hours", "amp_hours_charged", "watt_hours", "watt_hours_charged",
+    # STATUS_4
+    "temp_mos", "temp_motor", "current_in", "pos_deg",
+    # STATUS_5
+    "tachometer", "voltage_in",
+    # STATUS_6
+    "adc1", "adc2", "adc3", "ppm",
+)
+FIELD_INDEX: Dict[str, int] = {name: i for i, name in enumerate(FIELDS)}
+
+(C_ERPM, C_CURRENT_MOTOR, C_DUTY, C_RPM, C_DEG_PER_S,
+ C_AMP_HOURS, C_AMP_HOURS_CHARGED, C_WATT_HOURS, C_WATT_HOURS_CHARGED,
+ C_TEMP_MOS, C_TEMP_MOTOR, C_CURRENT_IN, C_POS_DEG,
+ C_TACHOMETER, C_VOLTAGE_IN,
+ C_ADC1, C_ADC2, C_ADC3, C_PPM) = range(len(FIELDS))
+
+
+class StateTable:
+    """
+    values[slot, col]：最新物理值（未收到/离线为 NaN）；stamps[slot, col]：该字段最近一次更新的时间（VescCAN.clock，默认单调时钟；0 表示从未）。
+    节点按首次出现（或 reserve 的顺序）分配行；接收路径通过 row(node_id) 取得该行的 memoryview 逐元素写入，
+    避免每帧构造 NumPy 临时对象。读取方用 snapshot()/column() 一次拿到全部节点的向量。
+    """
+    def __init__(self, capacity: int = 8):
+        capacity = max(1, int(capacity))
+        self._lock = threading.Lock()
+        self.values = np.full((capacity, len(FIELDS)), np.nan)
+        self.stamps = np.zeros((capacity, len(FIELDS)))
+        self.node_ids = np.full(capacity, -1, dtype=np.int32)
+        self._slots: Dict[int, int] = {}
+        # node_id -> (values 行, stamps 行)；接收热路径可直接 rows.get()，未命中再调用 row()
+        self.rows: Dict[int, Tuple[memoryview, memoryview]] = {}
+
+    # ---------------- 行管理 ----------------
+    def reserve(self, node_ids: Iterable[int]):
+        for nid in node_ids:
+            self.row(nid)
+
+    def row(self, node_id: int) -> Tuple[memoryview, memoryview]:
+        """(values 行, stamps 行) 的可写 memoryview；未知节点自动分配一行。"""
+        r = self.rows.get(node_id)
+        if r is None:
+            with self._lock:
+                r = self.rows.get(node_id)
+                if r is None:
+                    r = self._add_locked(node_id)
+        return r
+
+    def _add_locked(self, node_id: int) -> Tuple[memoryview, memoryview]:
+        slot = len(self._slots)
+        if slot >= len(self.node_ids):
+            self._grow_locked(2 * len(self.node_ids))
+        self._slots[node_id] = slot
+        self.node_ids[slot] = node_id
+        r = (memoryview(self.values[slot]), memoryview(self.stamps[slot]))
+        self.rows[node_id] = r
+        return r
+
+    def _grow_locked(self, capacity: int):
+        values = np.full((capacity, len(FIELDS)), np.nan)
+        stamps = np.zeros((capacity, len(FIELDS)))
+        node_ids = np.full(capacity, -1, dtype=np.int32)
+        n = len(self._slots)
+        values[:n] = self.values[:n]
+        stamps[:n] = self.stamps[:n]
+        node_ids[:n] = self.node_ids[:n]
+        self.values, self.stamps, self.node_ids = values, stamps, node_ids
+        self.rows = {nid: (memoryview(values[s]), memoryview(stamps[s])) for nid, s in self._slots.items()}
+
+    def slot(self, node_id: int) -> Optional[int]:
+        return self._slots.get(node_id)
+
+    def clear_node(self, node_id: int):
+        """节点离线：值置为 NaN，保留时间戳（可据此判断最后一次收到各字段的时间）。"""
+        s = self._slots.get(node_id)
+        if s is not None:
+            self.values[s, :] = np.nan
+
+    # ---------------- 读取 ----------------
+    def _cols(self, fields: Optional[Sequence[str]]) -> List[int]:
+        return list(range(len(FIELDS))) if fields is None else [FIELD_INDEX[f] for f in fields]
+
+    def snapshot(self, fields: Optional[Sequence[str]] = None, with_stamps: bool = False) -> np.ndarray:
+        """
+        全部节点一次性拷贝为结构化数组（按 node_id 升序）：字段 node_id 及各遥测字段；
+        with_stamps=True 时每个字段另附 "<字段>_t" 更新时间列。
+        """
+        names = list(FIELDS) if fields is None else list(fields)
+        cols = self._cols(fields)
+        dtype = [("node_id", np.int32)] + [(n, np.float64) for n in names]
+        if with_stamps:
+            dtype += [(n + "_t", np.float64) for n in names]
+        n = len(self._slots)
+        order = np.argsort(self.node_ids[:n], kind="stable")
+        values = self.values[:n][order][:, cols]
+        out = np.empty(n, dtype=dtype)
+        out["node_id"] = self.node_ids[:n][order]
+        for j, name in enumerate(names):
+            out[name] = values[:, j]
+        if with_stamps:
+            stamps = self.stamps[:n][order][:, cols]
+            for j, name in enumerate(names):
+                out[name + "_t"] = stamps[:, j]
+        return out
+
+    def column(self, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(node_ids, 该字段的值)，均按 node_id 升序。"""
+        n = len(self._slots)
+        order = np.argsort(self.node_ids[:n], kind="stable")
+        return self.node_ids[:n][order], self.values[:n, FIELD_INDEX[field]][order]
+
+    def age(self, field: str, now: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(node_ids, 距该字段最近一次更新的秒数)；从未更新为 inf。"""
+        n = len(self._slots)
+        order = np.argsort(self.node_ids[:n], kind="stable")
+        t = self.stamps[:n, FIELD_INDEX[field]][order]
+        return self.node_ids[:n][order], np.where(t > 0.0, now - t, np.inf)
@@ -0,0 +1,289 @@
+# 串联机械臂运动学：改进 DH 的批量正解 / 雅可比 / 阻尼最小二乘逆解（NumPy 向量化，输入 (N, 轴数)），逆解带 LRU 缓存
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.arm_config import AxisConfig, KinematicsConfig
+
+
+# ---------------- 位姿工具（均支持批量） ----------------
+def pose_from_xyzrpw(xyzrpw) -> np.ndarray:
+    """[x, y, z (mm), rx, ry, rz (度)] -> 4x4 位姿，R = Rz(rz)·Ry(ry)·Rx(rx)（与 RoboDK xyzrpw 一致）。形状 (..., 6) -> (..., 4, 4)。"""
+    v = np.asarray(xyzrpw, dtype=np.float64)
+    r, p, w = np.radians(v[..., 3]), np.radians(v[..., 4]), np.radians(v[..., 5])
+    cr, sr, cp, sp, cw, sw = np.cos(r), np.sin(r), np.cos(p), np.sin(p), np.cos(w), np.sin(w)
+    T = np.zeros(v.shape[:-1] + (4, 4))
+    T[..., 0, 0] = cw * cp
+    T[..., 0, 1] = cw * sp * sr - sw * cr
+    T[..., 0, 2] = cw * sp * cr + sw * sr
+    T[..., 1, 0] = sw * cp
+    T[..., 1, 1] = sw * sp * sr + cw * cr
+    T[..., 1, 2] = sw * sp * cr - cw * sr
+    T[..., 2, 0] = -sp
+    T[..., 2, 1] = cp * sr
+    T[..., 2, 2] = cp * cr
+    T[..., :3, 3] = v[..., :3]
+    T[..., 3, 3] = 1.0
+    return T
+
+
+def xyzrpw_from_pose(T) -> np.ndarray:
+    """pose_from_xyzrpw 的逆（ry = ±90° 时 rx 取 0）。"""
+    T = np.asarray(T, dtype=np.float64)
+    p = np.arcsin(np.clip(-T[..., 2, 0], -1.0, 1.0))
+    gimbal = np.abs(T[..., 2, 0]) > 1.0 - 1e-9
+    r = np.where(gimbal, 0.0, np.arctan2(T[..., 2, 1], T[..., 2, 2]))
+    w = np.where(gimbal, np.arctan2(-T[..., 0, 1], T[..., 1, 1]), np.arctan2(T[..., 1, 0], T[..., 0, 0]))
+    return np.concatenate([T[..., :3, 3], np.degrees(np.stack([r, p, w], axis=-1))], axis=-1)
+
+
+def rotvec_from_matrix(R) -> np.ndarray:
+    """旋转矩阵 -> 旋转向量（轴 × 角，弧度），形状 (..., 3, 3) -> (..., 3)；接近 180° 时由对角元素取轴。"""
+    R = np.asarray(R, dtype=np.float64)
+    cos = np.clip((np.trace(R, axis1=-2, axis2=-1) - 1.0) / 2.0, -1.0, 1.0)
+    ang = np.arccos(cos)
+    v = np.stack([R[..., 2, 1] - R[..., 1, 2], R[..., 0, 2] - R[..., 2, 0], R[..., 1, 0] - R[..., 0, 1]], axis=-1)
+    sin = np.sin(ang)
+    small = sin < 1e-6
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(small[..., None], 0.5 * v, v * (ang / (2.0 * np.where(small, 1.0, sin)))[..., None])
+    near_pi = small & (cos < 0.0)
+    if np.any(near_pi):
+        Rn = R[near_pi]
+        diag = np.clip((np.diagonal(Rn, axis1=-2, axis2=-1) + 1.0) / 2.0, 0.0, None)
+        axis = np.sqrt(diag)
+        k = np.argmax(diag, axis=-1)
+        # 以最大分量为正，由非对角元素定其余分量符号
+        sign = np.sign(np.take_along_axis(Rn + np.swapaxes(Rn, -1, -2), k[:, None, None], axis=-2)[:, 0, :])
+        sign[sign == 0] = 1.0
+        out[near_pi] = axis * sign * np.pi
+    return out
+
+
+def matrix_from_rotvec(v) -> np.ndarray:
+    """旋转向量 -> 旋转矩阵（Rodrigues），形状 (..., 3) -> (..., 3, 3)。"""
+    v = np.asarray(v, dtype=np.float64)
+    ang = np.linalg.norm(v, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.where(ang[..., None] > 1e-12, v / np.where(ang > 1e-12, ang, 1.0)[..., None], 0.0)
+    K = np.zeros(v.shape[:-1] + (3, 3))
+    K[..., 0, 1], K[..., 0, 2] = -k[..., 2], k[..., 1]
+    K[..., 1, 0], K[..., 1, 2] = k[..., 2], -k[..., 0]
+    K[..., 2, 0], K[..., 2, 1] = -k[..., 1], k[..., 0]
+    s, c = np.sin(ang)[..., None, None], np.cos(ang)[..., None, None]
+    return np.eye(3) + s * K + (1.0 - c) * (K @ K)
+
+
+def interpolate_poses(T0, T1, n: int) -> np.ndarray:
+    """两位姿间 n 个点（含端点）的直线插值：位置线性，姿态沿相对旋转的测地线（slerp）。"""
+    T0, T1 = np.asarray(T0, dtype=np.float64), np.asarray(T1, dtype=np.float64)
+    u = np.linspace(0.0, 1.0, max(2, int(n)))
+    rel = rotvec_from_matrix(T0[:3, :3].T @ T1[:3, :3])
+    out = np.zeros((len(u), 4, 4))
+    out[:, :3, :3] = T0[:3, :3] @ matrix_from_rotvec(np.multiply.outer(u, rel))
+    out[:, :3, 3] = T0[:3, 3] + np.multiply.outer(u, T1[:3, 3] - T0[:3, 3])
+    out[:, 3, 3] = 1.0
+    return out
+
+
+def as_poses(targets) -> Tuple[np.ndarray, bool]:
+    """目标统一为 (N, 4, 4)：接受 4x4 位姿、[x, y, z, rx, ry, rz] 或仅位置 [x, y, z]（及其批量）。返回 (位姿, 是否含姿态)。"""
+    t = np.asarray(targets, dtype=np.float64)
+    if t.shape[-2:] == (4, 4):
+        return t.reshape(-1, 4, 4), True
+    if t.shape[-1] == 6:
+        return pose_from_xyzrpw(t.reshape(-1, 6)), True
+    if t.shape[-1] == 3:
+        T = np.tile(np.eye(4), (t.reshape(-1, 3).shape[0], 1, 1))
+        T[:, :3, 3] = t.reshape(-1, 3)
+        return T, False
+    raise ValueError(f"unsupported target shape: {t.shape}")
+
+
+# ---------------- 运动学模型 ----------------
+class SerialArm:
+    """
+    改进 DH 串联臂。所有接口的关节角均为“轴目标角”（度，即 ArmController 中 target_deg_ui 的量），
+    内部按 KinematicsConfig 的 joint_sign / joint_offset_deg 换算为模型关节角；位置单位 mm。
+    fk / jacobian / ik 均对 (N, 轴数) 批量求值；ik 对重复查询走 LRU 缓存（键为量化后的目标与初值）。
+    """
+    def __init__(self, cfg: KinematicsConfig, axes_cfg: Optional[Dict[int, AxisConfig]] = None,
+                 cache_size: int = 4096, cache_seed_deg: float = 1.0):
+        dhm = np.asarray(cfg.dhm, dtype=np.float64).reshape(-1, 4)
+        self.n = len(dhm)
+        self.node_ids = tuple(cfg.node_ids[:self.n])
+        if len(self.node_ids) != self.n:
+            raise ValueError("kinematics node_ids must match the DH table length")
+        self.sign = np.asarray(cfg.joint_sign[:self.n], dtype=np.float64)
+        self.offset = np.asarray(cfg.joint_offset_deg[:self.n], dtype=np.float64)
+        self.theta0 = np.radians(dhm[:, 2])
+        self.d = dhm[:, 3]
+        # 每个关节的固定前段 RotX(alpha)·TransX(a)
+        self._pre = np.zeros((self.n, 4, 4))
+        for i, (alpha, a) in enumerate(zip(np.radians(dhm[:, 0]), dhm[:, 1])):
+            c, s = np.cos(alpha), np.sin(alpha)
+            self._pre[i] = [[1, 0, 0, a], [0, c, -s, 0], [0, s, c, 0], [0, 0, 0, 1]]
+        self.base = pose_from_xyzrpw(cfg.base_xyzrpw)
+        self.tool = pose_from_xyzrpw(cfg.tool_xyzrpw)
+        # 关节限位（轴目标角），来自 AxisConfig 软限位；未给出的轴不限
+        lo = np.full(self.n, -np.inf)
+        hi = np.full(self.n, np.inf)
+        for i, nid in enumerate(self.node_ids):
+            ac = (axes_cfg or {}).get(nid)
+            if ac is not None:
+                lo[i], hi[i] = ac.soft_min_deg, ac.soft_max_deg
+        self.lo, self.hi = lo, hi
+        self.cache_size = int(cache_size)
+        self.cache_seed_deg = float(cache_seed_deg)
+        self._cache: "OrderedDict[bytes, Tuple[np.ndarray, bool]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # ---- 关节角换算 ----
+    def _model_rad(self, q_deg: np.ndarray) -> np.ndarray:
+        return np.radians(self.sign * (q_deg - self.offset))
+
+    # ---- 正解 ----
+    def _frames(self, q_deg) -> Tuple[np.ndarray, np.ndarray]:
+        """返回 (各关节坐标系 (N, n, 4, 4)（关节轴为其 z 轴），TCP 位姿 (N, 4, 4))。"""
+        q = np.asarray(q_deg, dtype=np.float64).reshape(-1, self.n)
+        th = self._model_rad(q) + self.theta0
+        N = len(q)
+        T = np.broadcast_to(self.base, (N, 4, 4)).copy()
+        frames = np.empty((N, self.n, 4, 4))
+        c, s = np.cos(th), np.sin(th)
+        for i in range(self.n):
+            T = T @ self._pre[i]
+            frames[:, i] = T
+            # RotZ(theta)·TransZ(d)，直接写出乘积避免逐点构造矩阵
+            Rz = np.zeros((N, 4, 4))
+            Rz[:, 0, 0], Rz[:, 0, 1] = c[:, i], -s[:, i]
+            Rz[:, 1, 0], Rz[:, 1, 1] = s[:, i], c[:, i]
+            Rz[:, 2, 2] = 1.0
+            Rz[:, 2, 3] = self.d[i]
+            Rz[:, 3, 3] = 1.0
+            T = T @ Rz
+        return frames, T @ self.tool
+
+    def fk(self, q_deg) -> np.ndarray:
+        """关节角 (N, n) 或 (n,) -> TCP 位姿 (N, 4, 4)。"""
+        return self._frames(q_deg)[1]
+
+    def fk_xyzrpw(self, q_deg) -> np.ndarray:
+        return xyzrpw_from_pose(self.fk(q_deg))
+
+    def jacobian(self, q_deg) -> Tuple[np.ndarray, np.ndarray]:
+        """几何雅可比 (N, 6, n)（前三行 mm/rad，后三行 rad/rad，基于轴目标角的弧度）与 TCP 位姿。"""
+        frames, tcp = self._frames(q_deg)
+        z = frames[:, :, :3, 2]                              # (N, n, 3)
+        r = tcp[:, None, :3, 3] - frames[:, :, :3, 3]
+        J = np.empty((len(tcp), 6, self.n))
+        J[:, :3, :] = np.swapaxes(np.cross(z, r), 1, 2) * self.sign
+        J[:, 3:, :] = np.swapaxes(z, 1, 2) * self.sign
+        return J, tcp
+
+    # ---- 逆解 ----
+    def ik(self, targets, seed, orientation: Optional[bool] = None, rot_weight_mm: float = 100.0,
+           tol_mm: float = 0.01, tol_rad: float = 1e-4, max_iter: int = 100, damping: float = 1.0,
+           use_cache: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量逆解（阻尼最小二乘 / Levenberg-Marquardt，所有目标同时迭代，已收敛的行不再更新）：
+        targets 为 as_poses 支持的任意形式；seed 为初值关节角 (N, n) 或 (n,)（广播到全部目标）。
+        orientation=None 时按目标形式决定是否约束姿态（仅位置目标只解位置）。rot_weight_mm 为姿态误差
+        1 rad 折合的 mm。关节角按软限位裁剪。返回 (关节角 (N, n), 是否收敛 (N,))。
+        """
+        T, has_rot = as_poses(targets)
+        use_rot = has_rot if orientation is None else bool(orientation)
+        N = len(T)
+        q0 = np.broadcast_to(np.asarray(seed, dtype=np.float64).reshape(-1, self.n), (N, self.n)).copy()
+        q = np.empty_like(q0)
+        ok = np.zeros(N, dtype=bool)
+        todo = np.ones(N, dtype=bool)
+        keys = None
+        if use_cache and self.cache_size > 0:
+            keys = [self._cache_key(T[i], q0[i], use_rot) for i in range(N)]
+            for i, key in enumerate(keys):
+                hit = self._cache.get(key)
+                if hit is not None:
+                    self._cache.move_to_end(key)
+                    q[i], ok[i] = hit
+                    todo[i] = False
+            self.cache_hits += int(N - np.count_nonzero(todo))
+            self.cache_misses += int(np.count_nonzero(todo))
+        if np.any(todo):
+            qs, oks = self._solve(T[todo], q0[todo], use_rot, rot_weight_mm, tol_mm, tol_rad, max_iter, damping)
+            q[todo], ok[todo] = qs, oks
+            if keys is not None:
+                for i in np.nonzero(todo)[0]:
+                    self._cache[keys[i]] = (q[i].copy(), bool(ok[i]))
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return q, ok
+
+    def _cache_key(self, T: np.ndarray, seed: np.ndarray, use_rot: bool) -> bytes:
+        target = np.round(T[:3, :4] * np.array([1e6, 1e6, 1e6, 1e3]))  # 旋转 1e-6、位置 1 µm 量化
+        if not use_rot:
+            target = target[:, 3]
+        s = np.round(seed / self.cache_seed_deg) if self.cache_seed_deg > 0 else seed
+        return target.astype(np.int64).tobytes() + s.astype(np.int64).tobytes() + bytes([use_rot])
+
+    def cache_clear(self):
+        self._cache.clear()
+        self.cache_hits = self.cache_misses = 0
+
+    def _solve(self, T, q, use_rot, w, tol_mm, tol_rad, max_iter, damping):
+        q = np.clip(q, self.lo, self.hi)
+        N = len(T)
+        active = np.ones(N, dtype=bool)
+        ok = np.zeros(N, dtype=bool)
+        lam2 = float(damping) ** 2
+        rows = 6 if use_rot else 3
+        eye = np.eye(rows)
+        for _ in range(max_iter):
+            idx = np.nonzero(active)[0]
+            if not len(idx):
+                break
+            J, tcp = self.jacobian(q[idx])
+            e = np.empty((len(idx), rows))
+            e[:, :3] = T[idx, :3, 3] - tcp[:, :3, 3]
+            pos_err = np.linalg.norm(e[:, :3], axis=1)
+            done = pos_err <= tol_mm
+            if use_rot:
+                er = rotvec_from_matrix(T[idx, :3, :3] @ np.swapaxes(tcp[:, :3, :3], 1, 2))
+                e[:, 3:] = er * w
+                J = J.copy()
+                J[:, 3:, :] *= w
+                done &= np.linalg.norm(er, axis=1) <= tol_rad
+            else:
+                J = J[:, :3, :]
+            ok[idx[done]] = True
+            active[idx[done]] = False
+            step = ~done
+            if not np.any(step):
+                break
+            J, e, ids = J[step], e[step], idx[step]
+            Jt = np.swapaxes(J, 1, 2)
+            dq = (Jt @ np.linalg.solve(J @ Jt + lam2 * eye, e[..., None]))[..., 0]
+            # 单步限幅，避免远离初值时跨越奇异
+            dq_deg = np.degrees(dq)
+            big = np.max(np.abs(dq_deg), axis=1, keepdims=True)
+            dq_deg *= np.minimum(1.0, 10.0 / np.maximum(big, 1e-12))
+            q[ids] = np.clip(q[ids] + dq_deg, self.lo, self.hi)
+        return q, ok
+
+    def ik_path(self, targets, seed, max_jump_deg: float = 10.0, **kw) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        连续路径逆解：先以 seed 为全部点的初值批量求解，再对相邻点关节跳变超过 max_jump_deg 或未收敛的点
+        以前一点的解为初值逐点重解（保持同一构型分支）。返回 (关节角 (N, n), 是否收敛 (N,))。
+        """
+        T, _ = as_poses(targets)
+        q, ok = self.ik(T, seed, use_cache=False, **kw)
+        prev = np.asarray(seed, dtype=np.float64).reshape(self.n)
+        for i in range(len(T)):
+            # 首点相对 seed 不做跳变检查（路径起点可离当前位置较远）
+            if not ok[i] or (i and np.max(np.abs(q[i] - prev)) > max_jump_deg):
+                qi, oki = self.ik(T[i:i + 1], prev, use_cache=False, **kw)
+                q[i], ok[i] = qi[0], bool(oki[0]) and (not i or np.max(np.abs(qi[0] - prev)) <= max_jump_deg)
+            prev = q[i]
+        return q, ok
@@ -0,0 +1,113 @@
+# 一维运动曲线：梯形速度（加速度受限）与 S 曲线（加加速度受限），静止到静止
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+
+class Profile:
+    """
+    分段常加加速度曲线：第 i 段从 t[i] 开始，段首状态 (p[i], v[i], a[i])，段内加加速度 j[i]。
+    梯形曲线各段 j=0、a 为段内常数；S 曲线 a 在段间连续。sample() 对任意时间数组一次性求值（越界按端点保持）。
+    """
+    __slots__ = ("distance", "duration", "_t", "_p", "_v", "_a", "_j")
+
+    def __init__(self, distance: float, segments: List[Tuple[float, float, float]]):
+        """segments: [(时长, 段首加速度, 加加速度)]，从静止出发依次积分得到各段段首状态。"""
+        t, p, v, a = 0.0, 0.0, 0.0, 0.0
+        ts, ps, vs, as_, js = [], [], [], [], []
+        for dur, a0, j in segments:
+            if dur <= 0.0:
+                continue
+            a = a0
+            ts.append(t); ps.append(p); vs.append(v); as_.append(a); js.append(j)
+            p += v * dur + a * dur * dur / 2.0 + j * dur ** 3 / 6.0
+            v += a * dur + j * dur * dur / 2.0
+            a += j * dur
+            t += dur
+        if not ts:
+            ts, ps, vs, as_, js = [0.0], [0.0], [0.0], [0.0], [0.0]
+        self.distance = float(distance)
+        self.duration = t
+        self._t = np.array(ts)
+        self._p = np.array(ps)
+        self._v = np.array(vs)
+        self._a = np.array(as_)
+        self._j = np.array(js)
+
+    def sample(self, t) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """返回 (位置, 速度, 加速度)，形状同 t。"""
+        t = np.clip(np.asarray(t, dtype=np.float64), 0.0, self.duration)
+        i = np.searchsorted(self._t, t, side="right") - 1
+        np.clip(i, 0, len(self._t) - 1, out=i)
+        dt = t - self._t[i]
+        a0, j = self._a[i], self._j[i]
+        v0 = self._v[i]
+        pos = self._p[i] + dt * (v0 + dt * (a0 / 2.0 + dt * j / 6.0))
+        vel = v0 + dt * (a0 + dt * j / 2.0)
+        acc = a0 + dt * j
+        if self.duration > 0.0:
+            end = t >= self.duration
+            pos[end] = self.distance
+            vel[end] = 0.0
+            acc[end] = 0.0
+        return pos, vel, acc
+
+
+def trapezoid(distance: float, v_max: float, a_max: float) -> Profile:
+    """梯形速度曲线（distance >= 0）；距离不足以加速到 v_max 时退化为三角形。"""
+    d = float(distance)
+    if d <= 0.0:
+        return Profile(0.0, [])
+    if v_max <= 0.0 or a_max <= 0.0:
+        raise ValueError("v_max and a_max must be > 0")
+    ta = v_max / a_max
+    if a_max * ta * ta >= d:
+        ta = math.sqrt(d / a_max)
+        tv = 0.0
+    else:
+        tv = (d - a_max * ta * ta) / v_max
+    return Profile(d, [(ta, a_max, 0.0), (tv, 0.0, 0.0), (ta, -a_max, 0.0)])
+
+
+def scurve_times(distance: float, v_max: float, a_max: float, j_max: float) -> Tuple[float, float, float]:
+    """
+    静止到静止的双 S 曲线时间参数 (Tj, Ta, Tv)：加加速度段 Tj、加速段 Ta（含两个 Tj）、匀速段 Tv，减速段与加速段对称。
+    参见 Biagiotti & Melchiorri, Trajectory Planning for Automatic Machines and Robots, 3.4 节（v0 = v1 = 0）。
+    """
+    h, v, a, j = float(distance), float(v_max), float(a_max), float(j_max)
+    if v * j >= a * a:
+        tj = a / j
+        ta = tj + v / a
+    else:
+        tj = math.sqrt(v / j)
+        ta = 2.0 * tj
+    tv = h / v - ta
+    if tv >= 0.0:
+        return tj, ta, tv
+    # 达不到 v_max
+    tj = a / j
+    delta = a ** 4 / j ** 2 + 4.0 * a * h
+    ta = (a * a / j + math.sqrt(delta)) / (2.0 * a)
+    if ta < 2.0 * tj:
+        # 也达不到 a_max
+        tj = (h / (2.0 * j)) ** (1.0 / 3.0)
+        ta = 2.0 * tj
+    return tj, ta, 0.0
+
+
+def scurve(distance: float, v_max: float, a_max: float, j_max: float) -> Profile:
+    """加加速度受限的 7 段 S 曲线（distance >= 0）。"""
+    d = float(distance)
+    if d <= 0.0:
+        return Profile(0.0, [])
+    if v_max <= 0.0 or a_max <= 0.0 or j_max <= 0.0:
+        raise ValueError("v_max, a_max and j_max must be > 0")
+    tj, ta, tv = scurve_times(d, v_max, a_max, j_max)
+    a_lim = j_max * tj
+    tc = ta - 2.0 * tj
+    return Profile(d, [
+        (tj, 0.0, j_max), (tc, a_lim, 0.0), (tj, a_lim, -j_max),
+        (tv, 0.0, 0.0),
+        (tj, 0.0, -j_max), (tc, -a_lim, 0.0), (tj, -a_lim, j_max),
+    ])
@@ -0,0 +1,131 @@
+# RoboDK 关节轨迹导出（InstructionListJoints 的 CSV 或 robomath.Mat）-> 等间隔二进制轨迹文件（.ctraj）
+#
+# 用法（在 CAPSTONE_TOOL 目录下）：
+#   python -m planner.robodk_convert joint_path_with_speed.csv out.ctraj --nodes 1,2,3,4,5,6 [--rate 100]
+import argparse
+import csv
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from planner.trajfile import TrajectoryWriter, resample_uniform
+
+TIME_AUTO = "auto"
+TIME_DELTA = "delta"            # TIME_S 为相对上一点的时间步（flags=4 导出即如此）
+TIME_CUMULATIVE = "cumulative"  # TIME_S 为从程序开始的累计时间
+
+# InstructionListJoints 行（Mat 的列）中 TIME_S 的位置：J1..Jn, ERROR, STEP_MM, STEP_DEG, MOVE_ID, TIME_S
+_MAT_TIME_AFTER_JOINTS = 4
+
+
+def _timed(rows: Iterable[Tuple[float, List[float]]], time_mode: str) -> Iterator[Tuple[float, List[float]]]:
+    """(TIME_S, 关节角) -> (累计时刻, 关节角)。auto：前三个时间值严格递增视为累计时间，否则视为时间步。"""
+    it = iter(rows)
+    head = []
+    if time_mode == TIME_AUTO:
+        for r in it:
+            head.append(r)
+            if len(head) == 3:
+                break
+        ts = [r[0] for r in head]
+        time_mode = TIME_CUMULATIVE if len(ts) == 3 and ts[0] < ts[1] < ts[2] else TIME_DELTA
+    elif time_mode not in (TIME_DELTA, TIME_CUMULATIVE):
+        raise ValueError(f"unknown time mode: {time_mode}")
+    t = 0.0
+    for chunk in (head, it):
+        for ts, q in chunk:
+            if time_mode == TIME_DELTA:
+                t += ts
+                yield t, q
+            else:
+                yield ts, q
+
+
+def read_csv(path: str, time_step_s: Optional[float] = None) -> Tuple[int, Iterator[Tuple[float, List[float]]]]:
+    """
+    逐行读取 RoboDK CSV：按表头取 J1..Jn 列与 TIME_S 列，返回 (轴数, (TIME_S, 关节角) 迭代器)。
+    没有 TIME_S 列时需给出 time_step_s（每行固定时间步）。
+    """
+    f = open(path, newline="")
+    reader = csv.reader(f)
+    header = [h.strip().upper() for h in next(reader)]
+    joints = []
+    while f"J{len(joints) + 1}" in header:
+        joints.append(header.index(f"J{len(joints) + 1}"))
+    if not joints:
+        f.close()
+        raise ValueError(f"{path}: no J1..Jn columns in header")
+    t_col = header.index("TIME_S") if "TIME_S" in header else None
+    if t_col is None and not time_step_s:
+        f.close()
+        raise ValueError(f"{path}: no TIME_S column, time_step_s required")
+
+    def rows():
+        with f:
+            for rec in reader:
+                if not rec or not rec[0].strip():
+                    continue
+                q = [float(rec[c]) for c in joints]
+                yield (float(rec[t_col]) if t_col is not None else time_step_s), q
+
+    return len(joints), rows()
+
+
+def read_mat(mat, n_axes: int, time_step_s: Optional[float] = None) -> Iterator[Tuple[float, List[float]]]:
+    """
+    robomath.Mat（list(mat) 为各列，每列一个采样点）：前 n_axes 行为关节角；
+    列足够长时取 TIME_S 行（InstructionListJoints flags 含时间时），否则用固定 time_step_s。
+    """
+    for col in mat:
+        col = list(col)
+        if len(col) > n_axes + _MAT_TIME_AFTER_JOINTS:
+            ts = float(col[n_axes + _MAT_TIME_AFTER_JOINTS])
+        elif time_step_s:
+            ts = time_step_s
+        else:
+            raise ValueError("Mat has no TIME_S row, time_step_s required")
+        yield ts, [float(v) for v in col[:n_axes]]
+
+
+def write_ctraj(samples: Iterable[Tuple[float, List[float]]], out_path: str, node_ids: Sequence[int],
+                rate_hz: float = 100.0, time_mode: str = TIME_AUTO, dtype=np.float32) -> int:
+    """把 (TIME_S, 关节角) 流重采样为 rate_hz 等间隔样本写入 out_path；流式处理，返回写入的样本数。"""
+    with TrajectoryWriter(out_path, node_ids, rate_hz, dtype) as w:
+        for block in resample_uniform(_timed(samples, time_mode), rate_hz):
+            w.append(block)
+        return w.n_samples
+
+
+def convert_csv(csv_path: str, out_path: str, node_ids: Optional[Sequence[int]] = None, rate_hz: float = 100.0,
+                time_mode: str = TIME_AUTO, time_step_s: Optional[float] = None, dtype=np.float32) -> int:
+    n_axes, rows = read_csv(csv_path, time_step_s)
+    ids = tuple(node_ids) if node_ids else tuple(range(1, n_axes + 1))
+    if len(ids) != n_axes:
+        raise ValueError(f"{csv_path}: {n_axes} joint columns but {len(ids)} node ids")
+    return write_ctraj(rows, out_path, ids, rate_hz, time_mode, dtype)
+
+
+def convert_mat(mat, out_path: str, node_ids: Sequence[int], rate_hz: float = 100.0,
+                time_mode: str = TIME_AUTO, time_step_s: Optional[float] = None, dtype=np.float32) -> int:
+    """直接转换 RoboDK API 返回的 Mat（可在 RoboDK 脚本中调用，省去中间 CSV）。"""
+    return write_ctraj(read_mat(mat, len(node_ids), time_step_s), out_path, node_ids, rate_hz, time_mode, dtype)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert a RoboDK joint path CSV to a .ctraj trajectory file")
+    ap.add_argument("csv")
+    ap.add_argument("out")
+    ap.add_argument("--nodes", default=None, help="comma separated node ids for J1..Jn (default 1..n)")
+    ap.add_argument("--rate", type=float, default=100.0, help="output sample rate (Hz)")
+    ap.add_argument("--time-mode", choices=(TIME_AUTO, TIME_DELTA, TIME_CUMULATIVE), default=TIME_AUTO)
+    ap.add_argument("--time-step", type=float, default=None, help="seconds per row when there is no TIME_S column")
+    ap.add_argument("--float64", action="store_true")
+    args = ap.parse_args()
+    ids = [int(x) for x in args.nodes.split(",")] if args.nodes else None
+    n = convert_csv(args.csv, args.out, ids, args.rate, args.time_mode, args.time_step,
+                    np.float64 if args.float64 else np.float32)
+    print(f"{args.out}: {n} samples @ {args.rate:g} Hz ({(n - 1) / args.rate:.3f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+# 示教记录文件（.cteach）：按轴分块、差分编码 + 字节平面重排 + zlib 压缩的关节状态流，长时间示教也只占很小磁盘空间；
+# 读取时只扫描块头建立索引，回放按需解压当前所需的块，内存占用与示教时长无关。
+#
+# 布局（小端）：
+#   文件头    4s 魔数 b"CTCH" | H 版本（1）| B 通道掩码 | B 保留 | d 录制开始的墙钟时间（time.time）| I 轴数 | i * n_axes node_id
+#   块（重复）4s 魔数 b"TCHK" | i node_id | I 样本数 n | q 首样本时刻 us | q 末样本时刻 us | I 负载字节数 | I 负载 crc32
+#             负载 = zlib(各列 n 个 int32 差分值按字节平面重排后依次拼接)；首元素为绝对值，时刻列相对块头的首样本时刻
+#   列依次为：时刻（us，录制以首个样本为零点）、位置（1/50 度，即 STATUS_4 的原始分辨率）、[电流 mA]、[角速度 0.01 度/秒]
+# 块按写入顺序追加，不同轴的块交错；录制中断时末尾不完整的块在打开时忽略。
+import bisect
+import struct
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"CTCH"
+CHUNK_MAGIC = b"TCHK"
+VERSION = 1
+_HEADER = struct.Struct("<4sHBBdI")
+_CHUNK = struct.Struct("<4siIqqII")
+
+# 通道（位置恒有）及其定点比例：物理值 × 比例 取整后存储
+CH_POS = 0x01
+CH_CURRENT = 0x02
+CH_VELOCITY = 0x04
+_SCALES = ((CH_POS, 50.0), (CH_CURRENT, 1000.0), (CH_VELOCITY, 100.0))
+
+
+def _scales(channels: int) -> List[Tuple[int, float]]:
+    """通道掩码 -> [(样本值下标, 比例)]，样本值顺序为 (位置, 电流, 角速度)。"""
+    return [(i, scale) for i, (ch, scale) in enumerate(_SCALES) if channels & ch]
+
+
+def _encode_chunk(cols: np.ndarray, level: int) -> bytes:
+    """cols: (n_cols, n) 定点整数 -> 压缩负载。差分后多为小整数，按字节平面排列使高位零字节连成长串。"""
+    deltas = np.diff(cols, axis=1, prepend=0).astype("<i4")
+    planes = deltas.view(np.uint8).reshape(cols.shape[0], cols.shape[1], 4).transpose(0, 2, 1)
+    return zlib.compress(np.ascontiguousarray(planes).tobytes(), level)
+
+
+def _decode_chunk(payload: bytes, n_cols: int, n: int) -> np.ndarray:
+    planes = np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(n_cols, 4, n)
+    deltas = np.ascontiguousarray(planes.transpose(0, 2, 1)).view("<i4").reshape(n_cols, n)
+    return np.cumsum(deltas, axis=1, dtype=np.int64)
+
+
+class TeachWriter:
+    """
+    追加写入：append() 按轴缓冲，每轴攒满 chunk_samples 个样本即压缩为一块落盘，close() 写出剩余样本。
+    t 为任意单调时基的秒数（以首个样本为零点）；可由多个接收线程同时调用。可作为上下文管理器使用。
+    """
+    def __init__(self, path: str, node_ids: Sequence[int], channels: int = CH_POS,
+                 chunk_samples: int = 1024, level: int = 6):
+        self.path = path
+        self.node_ids = tuple(int(n) for n in node_ids)
+        if not self.node_ids:
+            raise ValueError("node_ids must be non-empty")
+        self.channels = CH_POS | int(channels)
+        self.chunk_samples = max(2, int(chunk_samples))
+        self.level = int(level)
+        self._scales = _scales(self.channels)
+        self._lock = threading.Lock()
+        # node_id -> 每列一个整数列表（时刻 us + 各通道定点值）
+        self._buf: Dict[int, List[List[int]]] = {nid: [[] for _ in range(1 + len(self._scales))]
+                                                  for nid in self.node_ids}
+        self._t0: Optional[float] = None
+        self._last_us = 0
+        self.samples = 0
+        self.chunks = 0
+        self._f = open(path, "wb")
+        n = len(self.node_ids)
+        self._f.write(_HEADER.pack(MAGIC, VERSION, self.channels, 0, time.time(), n)
+                      + struct.pack(f"<{n}i", *self.node_ids))
+
+    def append(self, node_id: int, t: float, pos_deg: float, current_a: float = 0.0, vel_dps: float = 0.0):
+        """追加一个样本；未录制通道的参数被忽略，NaN 按 0 存储。"""
+        cols = self._buf.get(node_id)
+        if cols is None:
+            return
+        vals = (pos_deg, current_a, vel_dps)
+        with self._lock:
+            if self._f is None:
+                return
+            if self._t0 is None:
+                self._t0 = t
+            t_us = int(round((t - self._t0) * 1e6))
+            cols[0].append(t_us)
+            self._last_us = max(self._last_us, t_us)
+            for c, (i, scale) in enumerate(self._scales, 1):
+                v = vals[i]
+                cols[c].append(int(round(v * scale)) if v == v else 0)
+            self.samples += 1
+            if len(cols[0]) >= self.chunk_samples:
+                self._flush_axis_locked(node_id)
+
+    def _flush_axis_locked(self, node_id: int):
+        cols = self._buf[node_id]
+        n = len(cols[0])
+        if not n:
+            return
+        arr = np.array(cols, dtype=np.int64)
+        arr[0] -= cols[0][0]        # 块内时刻相对首样本，长时间录制也不超出 int32
+        payload = _encode_chunk(arr, self.level)
+        self._f.write(_CHUNK.pack(CHUNK_MAGIC, node_id, n, cols[0][0], cols[0][-1], len(payload),
+                                  zlib.crc32(payload)))
+        self._f.write(payload)
+        self.chunks += 1
+        for c in cols:
+            c.clear()
+
+    def flush(self):
+        """把各轴未满一块的样本也写出（之后的样本另起新块）。"""
+        with self._lock:
+            if self._f is not None:
+                for nid in self.node_ids:
+                    self._flush_axis_locked(nid)
+                self._f.flush()
+
+    @property
+    def duration(self) -> float:
+        return self._last_us * 1e-6
+
+    def close(self):
+        with self._lock:
+            if self._f is None:
+                return
+            for nid in self.node_ids:
+                self._flush_axis_locked(nid)
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _AxisIndex:
+    __slots__ = ("t_first", "t_last", "t_first_us", "offsets", "lengths", "counts", "crcs")
+
+    def __init__(self):
+        self.t_first: List[float] = []
+        self.t_last: List[float] = []
+        self.t_first_us: List[int] = []
+        self.offsets: List[int] = []
+        self.lengths: List[int] = []
+        self.counts: List[int] = []
+        self.crcs: List[int] = []
+
+
+class TeachFile:
+    """
+    只读打开 .cteach：打开时只读取块头建立每轴的块索引（时刻范围与文件偏移），样本按块解压，
+    最近用过的 cache_chunks 个块保留在内存中（顺序回放时每轴只会用到当前块与下一块）。
+    close() 在仍有 rows() 视图存活时延后到最后一个视图释放后才关闭文件。
+    """
+    def __init__(self, path: str, cache_chunks: int = 16):
+        self.path = path
+        self._lock = threading.Lock()
+        self._views = 0
+        self._closing = False
+        self._f = open(path, "rb")
+        head = self._f.read(_HEADER.size)
+        if len(head) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: truncated teach header")
+        magic, version, channels, _, self.started_wall, n_axes = _HEADER.unpack(head)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: not a teach recording")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported teach version {version}")
+        self.channels = channels
+        self.node_ids: Tuple[int, ...] = struct.unpack(f"<{n_axes}i", self._f.read(4 * n_axes))
+        self._scales = _scales(channels)
+        self._index: Dict[int, _AxisIndex] = {nid: _AxisIndex() for nid in self.node_ids}
+        self._cache: "OrderedDict[Tuple[int, int], tuple]" = OrderedDict()
+        self._cache_size = max(2, int(cache_chunks))
+        self._scan()
+
+    def _scan(self):
+        f = self._f
+        f.seek(_HEADER.size + 4 * len(self.node_ids))
+        while True:
+            head = f.read(_CHUNK.size)
+            if len(head) < _CHUNK.size:
+                break
+            magic, nid, n, t_first, t_last, length, crc = _CHUNK.unpack(head)
+            pos = f.tell()
+            if magic != CHUNK_MAGIC or nid not in self._index or n == 0:
+                break
+            f.seek(pos + length)
+            idx = self._index[nid]
+            idx.t_first.append(t_first * 1e-6)
+            idx.t_last.append(t_last * 1e-6)
+            idx.t_first_us.append(t_first)
+            idx.offsets.append(pos)
+            idx.lengths.append(length)
+            idx.counts.append(n)
+            idx.crcs.append(crc)
+        # 末块负载不完整（录制中断）：丢弃
+        end = f.seek(0, 2)
+        for idx in self._index.values():
+            while idx.offsets and idx.offsets[-1] + idx.lengths[-1] > end:
+                for lst in (idx.t_first, idx.t_last, idx.t_first_us, idx.offsets, idx.lengths, idx.counts, idx.crcs):
+                    lst.pop()
+
+    # ---------------- 元数据 ----------------
+    def has(self, channel: int) -> bool:
+        return bool(self.channels & channel)
+
+    def n_samples(self, node_id: int) -> int:
+        return sum(self._index[node_id].counts)
+
+    def n_chunks(self, node_id: int) -> int:
+        return len(self._index[node_id].offsets)
+
+    def __len__(self) -> int:
+        return sum(self.n_samples(nid) for nid in self.node_ids)
+
+    @property
+    def start(self) -> float:
+        return min((idx.t_first[0] for idx in self._index.values() if idx.t_first), default=0.0)
+
+    @property
+    def end(self) -> float:
+        return max((idx.t_last[-1] for idx in self._index.values() if idx.t_last), default=0.0)
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.end - self.start)
+
+    # ---------------- 样本 ----------------
+    def _load(self, node_id: int, i: int) -> Tuple[np.ndarray, List[float], List[float]]:
+        """
+        (样本数组, 时刻列表, 位置列表)：列表供逐点插值用 bisect 查找，避免每拍构造 NumPy 临时对象。
+        位置列表在块内跨 0/360 处展开为连续角（样本数组保持记录值）。
+        """
+        key = (node_id, i)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                return entry
+            if self._f is None:
+                raise ValueError(f"{self.path}: teach file is closed")
+            idx = self._index[node_id]
+            self._f.seek(idx.offsets[i])
+            payload = self._f.read(idx.lengths[i])
+        if len(payload) != idx.lengths[i] or zlib.crc32(payload) != idx.crcs[i]:
+            raise ValueError(f"{self.path}: corrupt chunk {i} of node {node_id}")
+        cols = _decode_chunk(payload, 1 + len(self._scales), idx.counts[i])
+        cols[0] += idx.t_first_us[i]
+        cols = cols.astype(np.float64)
+        cols[0] *= 1e-6
+        for c, (_, scale) in enumerate(self._scales, 1):
+            cols[c] /= scale
+        steps = np.diff(cols[1])
+        steps -= 360.0 * np.round(steps / 360.0)
+        pos = np.concatenate((cols[1][:1], cols[1][0] + np.cumsum(steps)))
+        entry = (np.ascontiguousarray(cols.T), cols[0].tolist(), pos.tolist())
+        with self._lock:
+            self._cache[key] = entry
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    def chunk(self, node_id: int, i: int) -> np.ndarray:
+        """第 i 块解码后的样本：(n, n_cols) float64，列为 [t 秒, 位置 度, (电流 A), (角速度 度/秒)]。"""
+        return self._load(node_id, i)[0]
+
+    def chunks(self, node_id: int) -> Iterator[np.ndarray]:
+        """按时间顺序逐块产出该轴样本（见 chunk），适合流式导出/离线分析。"""
+        for i in range(self.n_chunks(node_id)):
+            yield self.chunk(node_id, i)
+
+    def position_at(self, node_id: int, t: float) -> float:
+        """
+        该轴在时刻 t（秒，与样本同一时基）的位置（度，0..360）：相邻样本沿较短方向线性插值（位置在 0/360 处回绕，
+        不能直接插值），跨块时取下一块首样本，范围外取端点值。
+        """
+        idx = self._index[node_id]
+        if not idx.offsets:
+            return float("nan")
+        j = max(0, bisect.bisect_right(idx.t_first, t) - 1)
+        _, ts, qs = self._load(node_id, j)
+        i = bisect.bisect_right(ts, t)
+        if i == 0:
+            return qs[0] % 360.0
+        if i < len(ts):
+            t0, q0, t1, q1 = ts[i - 1], qs[i - 1], ts[i], qs[i]
+        elif j + 1 < len(idx.offsets):
+            _, ts1, qs1 = self._load(node_id, j + 1)
+            t0, q0, t1, q1 = ts[-1], qs[-1], ts1[0], qs1[0]
+            q1 += 360.0 * round((q0 - q1) / 360.0)
+        else:
+            return qs[-1] % 360.0
+        if t1 <= t0:
+            return q1 % 360.0
+        return (q0 + (q1 - q0) * min(1.0, (t - t0) / (t1 - t0))) % 360.0
+
+    def rows(self, rate_hz: float, lo: Optional[Sequence[float]] = None, hi: Optional[Sequence[float]] = None,
+             speed: float = 1.0) -> "TeachRows":
+        """按 rate_hz 惰性取样的位置行视图（speed 为回放倍速）；文件已关闭（或正等待关闭）时抛出 ValueError。"""
+        with self._lock:
+            if self._closing:
+                raise ValueError(f"{self.path}: teach file is closed")
+            rows = TeachRows(self, rate_hz, lo, hi, speed)
+            self._views += 1
+        weakref.finalize(rows, self._release_view)
+        return rows
+
+    def _release_view(self):
+        with self._lock:
+            self._views -= 1
+            if self._views or not self._closing:
+                return
+        self._close_file()
+
+    @property
+    def closed(self) -> bool:
+        return self._closing
+
+    def close(self):
+        """关闭文件；仍有 rows() 视图存活时只做标记，最后一个视图释放时再关闭。"""
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            if self._views:
+                return
+        self._close_file()
+
+    def _close_file(self):
+        with self._lock:
+            f, self._f = self._f, None
+            self._cache = OrderedDict()
+        if f is not None:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TeachRows:
+    """
+    示教记录的位置行视图：rows[k] 为 start + k × speed / rate_hz 时刻各轴的位置（node_ids 顺序，只含有样本的轴），
+    可选按 lo/hi 逐轴裁剪。接口同 list，可直接放进 ArmController 的轨迹执行槽，块在取用时才解压。
+    """
+    __slots__ = ("file", "node_ids", "dt", "t0", "_len", "lo", "hi", "__weakref__")
+
+    def __init__(self, teach: TeachFile, rate_hz: float, lo: Optional[Sequence[float]] = None,
+                 hi: Optional[Sequence[float]] = None, speed: float = 1.0):
+        self.file = teach
+        self.node_ids = tuple(nid for nid in teach.node_ids if teach.n_chunks(nid))
+        self.dt = max(1e-6, float(speed)) / float(rate_hz)
+        self.t0 = teach.start
+        self._len = 0 if not len(teach) else int(np.ceil(teach.duration / self.dt - 1e-9)) + 1
+        self.lo = None if lo is None else [float(v) for v in lo]
+        self.hi = None if hi is None else [float(v) for v in hi]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, k: int) -> List[float]:
+        if k < 0:
+            k += self._len
+        if not 0 <= k < self._len:
+            raise IndexError(k)
+        t = self.t0 + k * self.dt
+        row = [self.file.position_at(nid, t) for nid in self.node_ids]
+        if self.lo is not None:
+            row = [min(max(q, lo), hi) for q, lo, hi in zip(row, self.lo, self.hi)]
+        return row
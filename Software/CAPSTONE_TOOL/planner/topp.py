@@ -0,0 +1,192 @@
+# 时间最优路径参数化（TOPP）：给定关节空间路径，在各轴速度/加速度上限下求最快的时间律
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.arm_config import AxisConfig
+from planner.trajectory import SampledTrajectory, axis_limits
+
+
+class _CubicSplinePath:
+    """以关节空间弦长为参数 s 的自然三次样条（C2 连续，航点处不再有折角）；可对任意 s 数组解析求 q、q'、q''。"""
+    def __init__(self, waypoints: np.ndarray):
+        seg = np.linalg.norm(np.diff(waypoints, axis=0), axis=1)
+        keep = np.concatenate(([True], seg > 1e-9))     # 去掉重复点
+        wp = waypoints[keep]
+        h = seg[seg > 1e-9]
+        n = len(wp)
+        # 二阶导 M（两端为 0）：三对角方程组
+        m = np.zeros_like(wp)
+        if n > 2:
+            A = np.zeros((n - 2, n - 2))
+            i = np.arange(n - 2)
+            A[i, i] = 2.0 * (h[:-1] + h[1:])
+            A[i[1:], i[1:] - 1] = h[1:-1]
+            A[i[:-1], i[:-1] + 1] = h[1:-1]
+            slope = np.diff(wp, axis=0) / h[:, None]
+            m[1:-1] = np.linalg.solve(A, 6.0 * np.diff(slope, axis=0))
+        self.knots = np.concatenate(([0.0], np.cumsum(h)))
+        self.length = float(self.knots[-1])
+        self._h = h
+        self._y = wp
+        self._m = m
+
+    def eval(self, s) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        s = np.clip(np.asarray(s, dtype=np.float64), 0.0, self.length)
+        k = np.clip(np.searchsorted(self.knots, s, side="right") - 1, 0, len(self._h) - 1)
+        hk = self._h[k][:, None]
+        a = (self.knots[k + 1][:, None] - s[:, None]) / hk
+        b = 1.0 - a
+        m0, m1 = self._m[k], self._m[k + 1]
+        y0, y1 = self._y[k], self._y[k + 1]
+        q = a * y0 + b * y1 + ((a ** 3 - a) * m0 + (b ** 3 - b) * m1) * hk * hk / 6.0
+        dq = (y1 - y0) / hk + (-(3.0 * a * a - 1.0) * m0 + (3.0 * b * b - 1.0) * m1) * hk / 6.0
+        ddq = a * m0 + b * m1
+        return q, dq, ddq
+
+
+def max_velocity_curve(dq: np.ndarray, ddq: np.ndarray, v_lim: np.ndarray, a_lim: np.ndarray) -> np.ndarray:
+    """
+    速度极限曲线（MVC，以 x = ṡ² 表示），对所有路径点向量化求值：
+    - 速度约束 |q'_i| ṡ ≤ v_i；
+    - 加速度约束 |q'_i s̈ + q''_i ṡ²| ≤ a_i 在某个 s̈ 下同时可满足（任意两轴的 s̈ 区间相交），
+      静止轴（q'_i = 0）则要求 |q''_i| ṡ² ≤ a_i。
+    """
+    n, m = dq.shape
+    x = np.full(n, np.inf)
+    adq = np.abs(dq)
+    moving = adq > 1e-12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xv = np.where(moving, (v_lim / adq) ** 2, np.inf)
+        x = np.minimum(x, xv.min(axis=1))
+        still = ~moving & (np.abs(ddq) > 1e-12)
+        x = np.minimum(x, np.where(still, a_lim / np.abs(ddq), np.inf).min(axis=1))
+        # 各轴 s̈ 区间：-A_i - B_i x ≤ s̈ ≤ A_i - B_i x，A = a/|q'|，B = q''/q'
+        A = np.where(moving, a_lim / adq, np.inf)
+        B = np.where(moving, ddq / np.where(moving, dq, 1.0), 0.0)
+        for i in range(m):
+            for j in range(m):
+                if i == j:
+                    continue
+                # 下界_i ≤ 上界_j  ⇔  (B_j - B_i) x ≤ A_i + A_j
+                d = B[:, j] - B[:, i]
+                ok = moving[:, i] & moving[:, j] & (d > 1e-12)
+                x = np.minimum(x, np.where(ok, (A[:, i] + A[:, j]) / np.where(ok, d, 1.0), np.inf))
+    return x
+
+
+def topp(waypoints, node_ids: Sequence[int], axes_cfg: Dict[int, AxisConfig],
+         n_grid: int = 1000, sample_rate_hz: float = 1000.0, current_limits: Optional[Dict[int, Tuple[float, float]]] = None,
+         default_vel: float = 90.0, default_accel: float = 180.0,
+         max_refine: int = 6, feas_tol: float = 1e-3) -> SampledTrajectory:
+    """
+    时间最优参数化（静止到静止）：
+    1. 航点按弦长做自然三次样条，取 n_grid 个等距 s 点及解析 q'(s)、q''(s)；
+    2. 向量化求速度极限曲线 MVC；
+    3. 前向以最大 s̈ 积分、反向以最小 s̈ 积分，取两者与 MVC 的下包络（bang-bang 结构）；
+    4. 各格内 s̈ 为常数，精确积分出 s(t)，按 sample_rate_hz 等时间间隔在样条上取点，返回 SampledTrajectory
+       （直接在格点上线性插值会在每个格点引入速度折点，格子稀疏时加速度明显超限）；
+    5. 约束只在格点上成立，格内仍可能略超限（格子越稀越明显）：按输出样本差分复查，按超限比收紧限值重解
+       （至多 max_refine 轮），最后必要时整体拉伸时间，保证输出各轴 |v|、|a| 不超过上限（容差 feas_tol）。
+    样条会在航点间产生少量过冲；航点已很密（示教录制）时可忽略，稀疏航点需确认不越软限位。
+    waypoints: 形状 (N, 轴数) 的关节角（度），列顺序同 node_ids；限值来自 AxisConfig 的 max_vel_dps / max_accel_dps2。
+    current_limits: 可选 node_id -> (电流上限 A, 每安培加速度 度/s²/A)，换算为附加的加速度上限
+    （无动力学模型时以恒定惯量近似：a ≤ I_max · k）。
+    """
+    ids = tuple(node_ids)
+    wp = np.asarray(waypoints, dtype=np.float64).reshape(-1, len(ids))
+    if len(wp) < 2:
+        return SampledTrajectory(ids, np.zeros(len(wp)), wp)
+    lim = np.array([axis_limits(axes_cfg[nid], default_vel, default_accel)[:2] for nid in ids])
+    v_lim, a_lim = lim[:, 0].copy(), lim[:, 1].copy()
+    if current_limits:
+        for k, nid in enumerate(ids):
+            if nid in current_limits:
+                i_max, acc_per_amp = current_limits[nid]
+                a_lim[k] = min(a_lim[k], float(i_max) * float(acc_per_amp))
+
+    if not np.any(np.linalg.norm(np.diff(wp, axis=0), axis=1) > 1e-9):
+        return SampledTrajectory(ids, np.zeros(1), wp[:1])
+    path = _CubicSplinePath(wp)
+    s = np.linspace(0.0, path.length, max(3, int(n_grid)))
+    _, dq, ddq = path.eval(s)
+    ds = s[1] - s[0]
+    n = len(s)
+    two_ds = 2.0 * ds
+    adq = np.abs(dq)
+    moving = adq > 1e-12
+
+    def integrate(v_eff: np.ndarray, a_eff: np.ndarray) -> np.ndarray:
+        """在限值 v_eff / a_eff 下求 MVC 并做前向/反向积分，返回各格点 ṡ²。"""
+        mvc = max_velocity_curve(dq, ddq, v_eff, a_eff)
+        mvc[0] = mvc[-1] = 0.0
+        # 每点 s̈ 上下界系数（纯 Python 列表，逐点积分时比小 NumPy 数组快）
+        with np.errstate(divide="ignore", invalid="ignore"):
+            A = np.where(moving, a_eff / adq, np.nan)
+            B = np.where(moving, ddq / np.where(moving, dq, 1.0), 0.0)
+        coef = [[(a, b) for a, b in zip(a_row, b_row) if a == a] for a_row, b_row in zip(A.tolist(), B.tolist())]
+
+        def u_max(k: int, x: float) -> float:
+            return min((a - b * x for a, b in coef[k]), default=np.inf)
+
+        def u_min(k: int, x: float) -> float:
+            return max((-a - b * x for a, b in coef[k]), default=-np.inf)
+
+        mvc_l = mvc.tolist()
+        x = [0.0] * n
+        # 前向：最大加速
+        for k in range(n - 1):
+            x[k + 1] = max(0.0, min(mvc_l[k + 1], x[k] + two_ds * u_max(k, x[k])))
+        # 反向：最大减速
+        x[-1] = 0.0
+        for k in range(n - 2, -1, -1):
+            xb = x[k + 1] - two_ds * u_min(k + 1, x[k + 1])
+            if xb < x[k]:
+                x[k] = max(0.0, xb)
+        return np.asarray(x)
+
+    def sample(xa: np.ndarray, stretch: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """各格内 s̈ 为常数精确积分 s(t)，时间按 stretch 拉伸后以 sample_rate_hz 取点。"""
+        sd = np.sqrt(xa)
+        denom = sd[:-1] + sd[1:]
+        dt = np.where(denom > 0.0, two_ds / np.where(denom > 0.0, denom, 1.0), 0.0)
+        t_grid = np.concatenate(([0.0], np.cumsum(dt)))
+        u = (xa[1:] - xa[:-1]) / two_ds            # 各格内常数 s̈
+        duration = float(t_grid[-1]) * stretch
+        n_out = int(np.ceil(duration * sample_rate_hz)) + 1
+        t = np.minimum(np.arange(n_out) / sample_rate_hz, duration)
+        tl = t / stretch
+        k = np.clip(np.searchsorted(t_grid, tl, side="right") - 1, 0, n - 2)
+        tau = tl - t_grid[k]
+        s_t = np.minimum(s[k] + sd[k] * tau + 0.5 * u[k] * tau * tau, s[k + 1])
+        return t, path.eval(s_t)[0]
+
+    def overshoot(t: np.ndarray, q: np.ndarray) -> Tuple[float, float]:
+        """输出按差分（与 SampledTrajectory.sample 相同）计的最大 |v|/v_lim 与 |a|/a_lim。"""
+        if len(t) < 3:
+            return 0.0, 0.0
+        v = np.gradient(q, t, axis=0)
+        a = np.gradient(v, t, axis=0)
+        return float((np.abs(v) / v_lim).max()), float((np.abs(a) / a_lim).max())
+
+    # 约束只在格点上成立，格内 q'、q'' 仍在变化，输出可能略超限（格子越稀越明显）：
+    # 按输出复查，把积分用的限值按超限比收紧后重解（只影响受该限值约束的段）；
+    # 仍超限时整体拉伸时间（速度按 1/f、加速度按 1/f² 缩小）兜底
+    v_eff, a_eff = v_lim.copy(), a_lim.copy()
+    xa = integrate(v_eff, a_eff)
+    t, q = sample(xa)
+    rv, ra = overshoot(t, q)
+    for _ in range(max_refine):
+        if rv <= 1.0 + feas_tol and ra <= 1.0 + feas_tol:
+            break
+        v_eff /= max(1.0, rv) * (1.0 + feas_tol)
+        a_eff /= max(1.0, ra) * (1.0 + feas_tol)
+        xa = integrate(v_eff, a_eff)
+        t, q = sample(xa)
+        rv, ra = overshoot(t, q)
+    stretch = 1.0
+    while rv > 1.0 + feas_tol or ra > 1.0 + feas_tol:
+        stretch *= max(rv, np.sqrt(ra)) * (1.0 + feas_tol)
+        t, q = sample(xa, stretch)
+        rv, ra = overshoot(t, q)
+    return SampledTrajectory(ids, t, q)
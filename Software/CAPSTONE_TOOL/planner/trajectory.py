@@ -0,0 +1,127 @@
+# 多轴同步轨迹：所有轴共用一条归一化曲线 s(t) ∈ [0, 1]，同时起止
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from config.arm_config import AxisConfig
+from planner.profiles import Profile, scurve, trapezoid
+
+PROFILE_TRAPEZOID = "trapezoid"
+PROFILE_SCURVE = "scurve"
+
+# AxisConfig 未给出加加速度上限时：加速度从 0 到 a_max 用 0.1 s
+DEFAULT_JERK_FACTOR = 10.0
+
+
+class MultiAxisTrajectory:
+    """
+    关节空间直线运动：q_i(t) = start_i + delta_i · s(t)。
+    s(t) 的速度/加速度/加加速度上限取各轴 limit_i / |delta_i| 的最小值，因此每轴都不超限，
+    且全部轴在同一最短时间 duration 内同时到达（由约束最紧的轴决定）。
+    """
+    def __init__(self, node_ids: Tuple[int, ...], start: np.ndarray, goal: np.ndarray, profile: Profile):
+        self.node_ids = tuple(node_ids)
+        self.start = np.asarray(start, dtype=np.float64)
+        self.goal = np.asarray(goal, dtype=np.float64)
+        self.delta = self.goal - self.start
+        self.profile = profile
+
+    @property
+    def duration(self) -> float:
+        return self.profile.duration
+
+    def sample(self, t) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """t 为时间数组（s）：返回 (位置, 速度, 加速度)，形状 (len(t), 轴数)，单位 度 / 度每秒 / 度每秒²。"""
+        s, ds, dds = self.profile.sample(t)
+        d = self.delta
+        return (self.start + np.multiply.outer(s, d),
+                np.multiply.outer(ds, d),
+                np.multiply.outer(dds, d))
+
+    def sample_uniform(self, rate_hz: float) -> Tuple[np.ndarray, np.ndarray]:
+        """按固定频率采样整条轨迹（含终点）：返回 (时间, 位置)，位置形状 (N, 轴数)。"""
+        n = int(np.ceil(self.duration * rate_hz)) + 1
+        t = np.arange(n) / rate_hz
+        t[-1] = min(t[-1], self.duration)
+        return t, self.sample(t)[0]
+
+    def positions(self, t) -> Dict[int, float]:
+        """单个时刻的各轴位置（node_id -> 度）。"""
+        row = self.sample(np.array([t]))[0][0]
+        return dict(zip(self.node_ids, row.tolist()))
+
+
+class SampledTrajectory:
+    """
+    按时间采样的多轴轨迹（如 TOPP 结果、示教/导入路径）：t 单调递增，q 形状 (len(t), 轴数)，采样间线性插值。
+    接口与 MultiAxisTrajectory 一致，可直接交给 ArmController.run_trajectory。
+    """
+    def __init__(self, node_ids: Tuple[int, ...], t: np.ndarray, q: np.ndarray):
+        self.node_ids = tuple(node_ids)
+        self.t = np.asarray(t, dtype=np.float64)
+        self.q = np.asarray(q, dtype=np.float64).reshape(len(self.t), len(self.node_ids))
+
+    @property
+    def duration(self) -> float:
+        return float(self.t[-1]) if len(self.t) else 0.0
+
+    def sample(self, t) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(位置, 速度, 加速度)，速度/加速度由采样点差分得到。"""
+        t = np.asarray(t, dtype=np.float64)
+        tt = self.t
+        pos = np.column_stack([np.interp(t, tt, self.q[:, k]) for k in range(self.q.shape[1])])
+        if len(tt) < 2:
+            zero = np.zeros_like(pos)
+            return pos, zero, zero
+        v = np.gradient(self.q, tt, axis=0)
+        a = np.gradient(v, tt, axis=0)
+        vel = np.column_stack([np.interp(t, tt, v[:, k]) for k in range(v.shape[1])])
+        acc = np.column_stack([np.interp(t, tt, a[:, k]) for k in range(a.shape[1])])
+        return pos, vel, acc
+
+    def sample_uniform(self, rate_hz: float) -> Tuple[np.ndarray, np.ndarray]:
+        """按固定频率重采样（含终点）：返回 (时间, 位置)。"""
+        n = int(np.ceil(self.duration * rate_hz)) + 1
+        t = np.arange(n) / rate_hz
+        t[-1] = min(t[-1], self.duration)
+        return t, np.column_stack([np.interp(t, self.t, self.q[:, k]) for k in range(self.q.shape[1])])
+
+    def positions(self, t) -> Dict[int, float]:
+        """单个时刻的各轴位置（node_id -> 度）。"""
+        return dict(zip(self.node_ids, [float(np.interp(t, self.t, self.q[:, k])) for k in range(self.q.shape[1])]))
+
+
+def axis_limits(cfg: AxisConfig, default_vel: float = 90.0, default_accel: float = 180.0) -> Tuple[float, float, float]:
+    """(max_vel_dps, max_accel_dps2, max_jerk_dps3)；未设置时使用全局默认。"""
+    v = cfg.max_vel_dps if cfg.max_vel_dps is not None else default_vel
+    a = cfg.max_accel_dps2 if cfg.max_accel_dps2 is not None else default_accel
+    j = getattr(cfg, "max_jerk_dps3", None)
+    if j is None:
+        j = a * DEFAULT_JERK_FACTOR
+    return float(v), float(a), float(j)
+
+
+def plan_synchronized(start: Dict[int, float], goal: Dict[int, float], axes_cfg: Dict[int, AxisConfig],
+                      profile: str = PROFILE_SCURVE, node_ids: Optional[Iterable[int]] = None,
+                      default_vel: float = 90.0, default_accel: float = 180.0) -> MultiAxisTrajectory:
+    """
+    规划 start -> goal 的同步运动（仅 goal 中出现的轴参与；node_ids 可指定轴顺序）。
+    profile: "trapezoid"（加速度受限）或 "scurve"（另受加加速度限制）。
+    """
+    ids = tuple(node_ids) if node_ids is not None else tuple(sorted(goal))
+    q0 = np.array([float(start[nid]) for nid in ids])
+    q1 = np.array([float(goal[nid]) for nid in ids])
+    dist = np.abs(q1 - q0)
+    moving = dist > 1e-9
+    if not np.any(moving):
+        return MultiAxisTrajectory(ids, q0, q1, trapezoid(0.0, 1.0, 1.0))
+    lim = np.array([axis_limits(axes_cfg[nid], default_vel, default_accel) for nid in ids])
+    # 归一化曲线的上限 = 各运动轴 limit / 行程 的最小值
+    v_s, a_s, j_s = (np.min(lim[moving, k] / dist[moving]) for k in range(3))
+    if profile == PROFILE_TRAPEZOID:
+        prof = trapezoid(1.0, v_s, a_s)
+    elif profile == PROFILE_SCURVE:
+        prof = scurve(1.0, v_s, a_s, j_s)
+    else:
+        raise ValueError(f"unknown profile: {profile}")
+    return MultiAxisTrajectory(ids, q0, q1, prof)
@@ -0,0 +1,232 @@
+# 二进制轨迹文件（.ctraj）：定长文件头 + 连续的等时间间隔关节角样本块，按内存映射读取，长程序也能瞬时打开、常量内存回放
+#
+# 布局（小端）：
+#   0   4s  魔数 b"CTRJ"
+#   4   H   版本（1）
+#   6   B   样本类型（1 = float32，2 = float64）
+#   7   B   保留
+#   8   I   轴数 n_axes
+#   12  Q   样本数 n_samples
+#   20  d   采样频率 rate_hz（样本 k 的时刻为 k / rate_hz）
+#   28  i * n_axes  各列对应的 node_id
+#   ... 补零到 64 字节对齐后为样本块：n_samples 行 × n_axes 列，行优先，单位 度
+import struct
+import threading
+import weakref
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"CTRJ"
+VERSION = 1
+_HEADER = struct.Struct("<4sHBBIQd")
+_DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f8")}
+_DTYPE_CODES = {v: k for k, v in _DTYPES.items()}
+_ALIGN = 64
+
+
+def _data_offset(n_axes: int) -> int:
+    n = _HEADER.size + 4 * n_axes
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class TrajectoryWriter:
+    """
+    顺序写入：先写样本数为 0 的文件头，append() 追加样本块，close() 回填样本数。
+    可作为上下文管理器使用；任意长度的数据都可分块写入，内存占用只与块大小有关。
+    """
+    def __init__(self, path: str, node_ids: Sequence[int], rate_hz: float, dtype=np.float32):
+        self.path = path
+        self.node_ids = tuple(int(n) for n in node_ids)
+        self.rate_hz = float(rate_hz)
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        if self.dtype not in _DTYPE_CODES:
+            raise ValueError(f"unsupported sample dtype: {dtype}")
+        if not self.node_ids or self.rate_hz <= 0.0:
+            raise ValueError("node_ids must be non-empty and rate_hz > 0")
+        self.n_samples = 0
+        self._f = open(path, "wb")
+        self._write_header()
+        self._f.seek(_data_offset(len(self.node_ids)))
+
+    def _write_header(self):
+        n = len(self.node_ids)
+        head = _HEADER.pack(MAGIC, VERSION, _DTYPE_CODES[self.dtype], 0, n, self.n_samples, self.rate_hz)
+        head += struct.pack(f"<{n}i", *self.node_ids)
+        self._f.seek(0)
+        self._f.write(head.ljust(_data_offset(n), b"\0"))
+
+    def append(self, rows):
+        """追加样本：形状 (k, n_axes) 或单行 (n_axes,)。"""
+        block = np.asarray(rows, dtype=self.dtype).reshape(-1, len(self.node_ids))
+        self._f.write(block.tobytes())
+        self.n_samples += len(block)
+
+    def close(self):
+        if self._f.closed:
+            return
+        end = self._f.tell()
+        self._write_header()
+        self._f.seek(end)
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MappedRows:
+    """
+    按另一频率（控制频率）惰性取样的行视图：rows[k] 为 k / rate_hz 时刻的各轴角度（文件样本间线性插值，
+    可选按 lo/hi 逐轴裁剪），每次只读取两行，页面按需由操作系统载入。接口同 list，可直接放进 ArmController 的轨迹执行槽。
+    """
+    __slots__ = ("data", "scale", "_len", "lo", "hi", "__weakref__")
+
+    def __init__(self, data: np.ndarray, src_rate_hz: float, rate_hz: float,
+                 lo: Optional[Sequence[float]] = None, hi: Optional[Sequence[float]] = None):
+        self.data = data
+        self.scale = float(src_rate_hz) / float(rate_hz)
+        n = len(data)
+        self._len = 0 if n == 0 else int(np.ceil((n - 1) / self.scale - 1e-9)) + 1
+        self.lo = None if lo is None else [float(v) for v in lo]
+        self.hi = None if hi is None else [float(v) for v in hi]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, k: int) -> List[float]:
+        if k < 0:
+            k += self._len
+        if not 0 <= k < self._len:
+            raise IndexError(k)
+        x = k * self.scale
+        i = int(x)
+        f = x - i
+        data = self.data
+        if f < 1e-9 or i + 1 >= len(data):
+            row = data[min(i, len(data) - 1)].tolist()
+        else:
+            a, b = data[i].tolist(), data[i + 1].tolist()
+            row = [p + (q - p) * f for p, q in zip(a, b)]
+        if self.lo is not None:
+            row = [min(max(q, lo), hi) for q, lo, hi in zip(row, self.lo, self.hi)]
+        return row
+
+
+class TrajectoryFile:
+    """
+    只读打开 .ctraj：样本块以 np.memmap 映射，打开耗时与文件大小无关。
+    rows() 返回的视图直接引用该映射，close() 在仍有视图存活时延后到最后一个视图释放后才解除映射。
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._views = 0
+        self._closing = False
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                raise ValueError(f"{path}: truncated trajectory header")
+            magic, version, code, _, n_axes, n_samples, rate_hz = _HEADER.unpack(head)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a trajectory file")
+            if version != VERSION or code not in _DTYPES:
+                raise ValueError(f"{path}: unsupported trajectory version {version} / dtype {code}")
+            self.node_ids: Tuple[int, ...] = struct.unpack(f"<{n_axes}i", f.read(4 * n_axes))
+        self.rate_hz = float(rate_hz)
+        self.dtype = _DTYPES[code]
+        if n_samples:
+            self.data = np.memmap(path, dtype=self.dtype, mode="r", offset=_data_offset(n_axes),
+                                  shape=(n_samples, n_axes))
+        else:
+            self.data = np.zeros((0, n_axes), dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def duration(self) -> float:
+        return max(0, len(self.data) - 1) / self.rate_hz
+
+    def rows(self, rate_hz: Optional[float] = None, lo: Optional[Sequence[float]] = None,
+             hi: Optional[Sequence[float]] = None) -> MappedRows:
+        """按 rate_hz（默认文件自身频率）惰性取样的行视图；文件已关闭（或正等待关闭）时抛出 ValueError。"""
+        with self._lock:
+            if self._closing:
+                raise ValueError(f"{self.path}: trajectory file is closed")
+            rows = MappedRows(self.data, self.rate_hz, rate_hz or self.rate_hz, lo, hi)
+            self._views += 1
+        weakref.finalize(rows, self._release_view)
+        return rows
+
+    def _release_view(self):
+        with self._lock:
+            self._views -= 1
+            if self._views or not self._closing:
+                return
+        self._unmap()
+
+    @property
+    def closed(self) -> bool:
+        return self._closing
+
+    def close(self):
+        """关闭文件；仍有 rows() 视图存活时只做标记，最后一个视图释放时再解除映射。"""
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            if self._views:
+                return
+        self._unmap()
+
+    def _unmap(self):
+        mm = getattr(self.data, "_mmap", None)
+        self.data = np.zeros((0, len(self.node_ids)), dtype=self.dtype)
+        if mm is not None:
+            mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def resample_uniform(samples: Iterable[Tuple[float, Sequence[float]]], rate_hz: float,
+                     block: int = 4096) -> Iterable[np.ndarray]:
+    """
+    把 (时刻, 关节角) 流按 rate_hz 线性插值为等间隔样本，分块产出 (k, n_axes) 数组；时刻须非减，
+    时刻相同的样本以后者为准。逐样本流式处理，内存只与 block 有关；末尾补上最后一个输入样本。
+    """
+    dt = 1.0 / float(rate_hz)
+    out: List[List[float]] = []
+    prev_t, prev_q = None, None
+    t0 = t_out = 0.0
+    k = 0
+    for t, q in samples:
+        t = float(t)
+        q = [float(v) for v in q]
+        if prev_t is None:
+            prev_t, prev_q = t, q
+            t0 = t_out = t
+            continue
+        if t <= prev_t:
+            prev_q = q
+            continue
+        span = t - prev_t
+        while t_out <= t:
+            f = (t_out - prev_t) / span
+            out.append([p + (c - p) * f for p, c in zip(prev_q, q)])
+            k += 1
+            t_out = t0 + k * dt     # 按序号计算，避免累加误差
+            if len(out) >= block:
+                yield np.asarray(out)
+                out = []
+        prev_t, prev_q = t, q
+    if prev_q is not None and (k == 0 or prev_t - (t0 + (k - 1) * dt) > 1e-6 * dt):
+        out.append(prev_q)
+    if out:
+        yield np.asarray(out)
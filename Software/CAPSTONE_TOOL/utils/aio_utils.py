@@ -0,0 +1,64 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Callable, Coroutine, Optional
+
+
+class LoopThread:
+    """
+    在单独线程中运行一个 asyncio 事件循环。
+    asyncio 后端下 CAN 收发、控制节拍与找零都作为任务跑在这一个循环上；
+    GUI 等其它线程通过 submit/run/call_soon 把工作投递进来。
+    """
+    def __init__(self, name: str = "aio-loop"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
+        self.loop.run_forever()
+
+    def stop(self, timeout: float = 1.0):
+        if not self._thread or self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+        self._thread = None
+        self.loop = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.get_ident() == self._thread.ident
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """投递协程，返回 concurrent.futures.Future（可在其它线程等待）。"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """在循环中执行协程并阻塞等待结果；不可在循环线程内调用。"""
+        if self.in_loop_thread():
+            raise RuntimeError("LoopThread.run() called from the loop thread; await the coroutine instead")
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, fn: Callable, *args):
+        """线程安全地在循环中调用 fn；已在循环线程内则直接调用。"""
+        if self.in_loop_thread():
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
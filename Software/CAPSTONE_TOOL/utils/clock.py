@@ -0,0 +1,264 @@
+# 可注入时钟：VescCAN / ArmController / DeadlineScheduler 等通过 Clock 取时间、休眠与带超时等待
+#   MonotonicClock：实时，单调时钟（不受系统校时/NTP 跳变影响），默认实现
+#   VirtualClock  ：离散事件虚拟时间，时间只在所有参与线程都在等待时跳到下一个事件，整段找零/轨迹场景可在毫秒级 CPU 时间内跑完
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class Clock:
+    """时钟接口。实例可直接调用（clock() 即 clock.now()），可传给只接受时间函数的旧参数（如 NodeSupervisor(clock=...)）。"""
+    virtual = False
+
+    def now(self) -> float:
+        raise NotImplementedError
+
+    def __call__(self) -> float:
+        return self.now()
+
+    def sleep(self, seconds: float):
+        self.sleep_until(self.now() + max(0.0, seconds))
+
+    def sleep_until(self, t: float):
+        raise NotImplementedError
+
+    def wait(self, event: threading.Event, timeout_s: Optional[float]) -> bool:
+        """等待 event 置位，最多 timeout_s 秒（None 为不限）；返回 event 是否已置位。"""
+        raise NotImplementedError
+
+    def spawn(self, target: Callable[[], None], name: Optional[str] = None) -> threading.Thread:
+        """启动一个在本时钟下运行的后台线程（daemon）。"""
+        raise NotImplementedError
+
+    def join(self, thread: threading.Thread, timeout_s: Optional[float] = None):
+        raise NotImplementedError
+
+
+class MonotonicClock(Clock):
+    def now(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def sleep_until(self, t: float):
+        self.sleep(t - time.monotonic())
+
+    def wait(self, event: threading.Event, timeout_s: Optional[float]) -> bool:
+        if timeout_s is not None and timeout_s <= 0:
+            return event.is_set()
+        return event.wait(timeout_s)
+
+    def spawn(self, target: Callable[[], None], name: Optional[str] = None) -> threading.Thread:
+        t = threading.Thread(target=target, name=name, daemon=True)
+        t.start()
+        return t
+
+    def join(self, thread: threading.Thread, timeout_s: Optional[float] = None):
+        thread.join(timeout_s)
+
+
+# 进程内默认实时时钟
+MONOTONIC = MonotonicClock()
+
+
+class _Waiter:
+    __slots__ = ("event", "go", "cancelled")
+
+    def __init__(self, event: Optional[threading.Event] = None):
+        self.event = event
+        self.go = False
+        self.cancelled = False
+
+
+class VirtualClock(Clock):
+    """
+    离散事件虚拟时钟。参与者为首个调用者（驱动线程）及经 spawn() 启动的线程，任一时刻只有一个参与者在运行（持有接力棒）：
+    运行者调用 sleep/wait 时登记自己的唤醒时刻并交出接力棒，时钟选出下一个要运行的参与者——
+    优先选等待的 event 已被置位者（当前时刻唤醒），否则把时间推进到最早的唤醒时刻/定时回调。
+    call_at / call_every 登记的回调（如仿真节点步进）在交接时由交出者线程执行。
+    因此同一场景的执行顺序完全确定；参与者之间不得用真实阻塞原语互等（join 需用 clock.join）。
+    非参与线程只能读取 now()。
+    """
+    virtual = True
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+        self._cv = threading.Condition()
+        self._seq = itertools.count()
+        # (时刻, 序号, _Waiter 或 回调元组 (fn, period))
+        self._heap: List[tuple] = []
+        self._event_waiters: List[_Waiter] = []
+        self._done: Dict[threading.Thread, threading.Event] = {}
+        self._deadlocked = False
+        self.callbacks_run = 0
+
+    def now(self) -> float:
+        return self._now
+
+    # ---------------- 定时回调 ----------------
+    def call_at(self, t: float, fn: Callable[[], None]):
+        with self._cv:
+            heapq.heappush(self._heap, (float(t), next(self._seq), (fn, None)))
+
+    def call_every(self, period_s: float, fn: Callable[[], None], start: Optional[float] = None):
+        """从 start（默认 now + period_s）起每 period_s 秒调用一次 fn。"""
+        with self._cv:
+            t0 = self._now + period_s if start is None else float(start)
+            heapq.heappush(self._heap, (t0, next(self._seq), (fn, float(period_s))))
+
+    # ---------------- 交接 ----------------
+    def _next_runnable(self) -> Optional[_Waiter]:
+        """（持锁）推进时间并执行到期回调，直到选出下一个要运行的参与者。"""
+        while True:
+            for w in self._event_waiters:
+                if w.event.is_set():
+                    return w
+            if not self._event_waiters and not any(isinstance(e[2], _Waiter) and not e[2].cancelled
+                                                   for e in self._heap):
+                return None             # 没有参与者在等待：不再空转周期回调
+            if not self._heap:
+                return None             # 只剩等待未置位 event 且不限时的参与者，也没有回调能置位它们
+            t, _, item = heapq.heappop(self._heap)
+            if isinstance(item, _Waiter):
+                if item.cancelled:
+                    continue
+                if t > self._now:
+                    self._now = t
+                return item
+            fn, period = item
+            if t > self._now:
+                self._now = t
+            if period is not None:
+                heapq.heappush(self._heap, (t + period, next(self._seq), item))
+            self._cv.release()
+            try:
+                fn()
+                self.callbacks_run += 1
+            finally:
+                self._cv.acquire()
+
+    def _hand_over(self, me: Optional[_Waiter]):
+        """（持锁）交出接力棒并等待 me 被选中；me 为 None 表示调用者退出参与。"""
+        nxt = self._next_runnable()
+        if nxt is None:
+            # 调用者退出且无人等待为正常结束；否则没有任何参与者还能被唤醒
+            if me is not None or self._event_waiters:
+                self._declare_deadlock()
+            if me is not None:
+                raise self._deadlock_error()
+            return
+        self._wake(nxt)
+        if me is None:
+            return
+        while not me.go:
+            if self._deadlocked:
+                raise self._deadlock_error()
+            self._cv.wait()
+        me.go = False
+
+    def _declare_deadlock(self):
+        """（持锁）唤醒所有仍在等待的参与者，令其同样抛出死锁错误（而不是永远阻塞）。"""
+        self._deadlocked = True
+        self._cv.notify_all()
+
+    @staticmethod
+    def _deadlock_error() -> RuntimeError:
+        return RuntimeError("virtual clock deadlock: no runnable participant or pending event")
+
+    def _wake(self, w: _Waiter):
+        if w.event is not None:
+            self._event_waiters.remove(w)
+        w.go = True
+        self._cv.notify_all()
+
+    def sleep_until(self, t: float):
+        with self._cv:
+            if t <= self._now and not self._heap_due(t):
+                return
+            me = _Waiter()
+            heapq.heappush(self._heap, (max(t, self._now), next(self._seq), me))
+            self._hand_over(me)
+
+    def _heap_due(self, t: float) -> bool:
+        return bool(self._heap) and self._heap[0][0] <= t
+
+    def wait(self, event: threading.Event, timeout_s: Optional[float]) -> bool:
+        with self._cv:
+            if event.is_set():
+                return True
+            if timeout_s is not None and timeout_s <= 0:
+                return False
+            me = _Waiter(event)
+            self._event_waiters.append(me)
+            # 超时另以一个堆条目表示，两者谁先被选中谁唤醒本线程
+            timeout_entry = None
+            if timeout_s is not None:
+                timeout_entry = _Waiter()
+                heapq.heappush(self._heap, (self._now + timeout_s, next(self._seq), timeout_entry))
+            self._hand_over_either(me, timeout_entry)
+            return event.is_set()
+
+    def _hand_over_either(self, me: _Waiter, timeout_entry: Optional[_Waiter]):
+        """（持锁）等待 event 唤醒（me）或超时（timeout_entry）之一，另一个作废。"""
+        nxt = self._next_runnable() if not self._deadlocked else None
+        if nxt is None:
+            self._event_waiters.remove(me)
+            if timeout_entry is not None:
+                timeout_entry.cancelled = True
+            self._declare_deadlock()
+            raise self._deadlock_error()
+        self._wake(nxt)
+        while not (me.go or (timeout_entry is not None and timeout_entry.go)):
+            if self._deadlocked:
+                if me in self._event_waiters:
+                    self._event_waiters.remove(me)
+                raise self._deadlock_error()
+            self._cv.wait()
+        if me.go:
+            me.go = False
+            if timeout_entry is not None:
+                timeout_entry.cancelled = True
+        else:
+            timeout_entry.go = False
+            self._event_waiters.remove(me)
+
+    # ---------------- 线程 ----------------
+    def spawn(self, target: Callable[[], None], name: Optional[str] = None) -> threading.Thread:
+        me = _Waiter()
+        done = threading.Event()
+
+        def run():
+            with self._cv:
+                while not me.go:
+                    self._cv.wait()
+                me.go = False
+            try:
+                target()
+            finally:
+                with self._cv:
+                    done.set()
+                    self._hand_over(None)
+
+        with self._cv:
+            heapq.heappush(self._heap, (self._now, next(self._seq), me))
+        t = threading.Thread(target=run, name=name, daemon=True)
+        self._done[t] = done
+        t.start()
+        return t
+
+    def join(self, thread: threading.Thread, timeout_s: Optional[float] = None):
+        done = self._done.get(thread)
+        if done is None:
+            thread.join(timeout_s)
+            return
+        if self.wait(done, timeout_s):
+            thread.join()
+            self._done.pop(thread, None)
+
+    def run_until(self, t: float):
+        """驱动线程推进到时刻 t（期间其它参与者与回调按时间顺序运行）。"""
+        self.sleep_until(t)
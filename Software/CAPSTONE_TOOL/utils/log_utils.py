@@ -396,12 +396,16 @@ class GlobalLogger:
         stack = inspect.stack()
         current_file = __file__
         
-        for frame_info in stack[1:]:  # 跳过当前函数
-            if frame_info.filename != current_file:
-                filename = os.path.basename(frame_info.filename)
-                function_name = frame_info.function
-                line_number = frame_info.lineno
-                return f"{filename}:{function_name}:{line_number}"
+        try:
+            for frame_info in stack[1:]:  # 跳过当前函数
+                if frame_info.filename != current_file:
+                    filename = os.path.basename(frame_info.filename)
+                    function_name = frame_info.function
+                    line_number = frame_info.lineno
+                    return f"{filename}:{function_name}:{line_number}"
+        finally:
+            # stack 含本帧，不解除会形成引用环，调用方各帧的局部变量要等到循环垃圾回收才释放
+            del stack
     
         return "unknown:unknown:0"
     
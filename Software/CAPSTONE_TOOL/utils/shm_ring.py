@@ -0,0 +1,175 @@
+# 跨进程共享内存环形缓冲（multiprocessing.shared_memory）：无锁，单写者
+#   StateRing：定长 float64 记录，单写多读，按槽位 seqlock 校验，读者总能取到最新一致记录或最近若干条历史
+#   SlotRing ：变长字节消息（不超过槽大小），单生产者单消费者（SPSC），用于命令与日志/事件
+# 指针与序号都是 8 字节对齐的单次写入；生产者先写数据、再写槽位序号、最后推进 head，消费者按相反顺序校验。
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+_LINE = 64    # head / tail 各占一个缓存行，避免生产者与消费者互相失效
+
+
+class _ShmBase:
+    def __init__(self, name: Optional[str], size: int, create: bool):
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.shm.buf[:_LINE * 2] = bytes(_LINE * 2)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = create
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        """释放本进程映射；创建者同时删除共享内存段。"""
+        self._release_views()
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _release_views(self):
+        pass
+
+
+class StateRing(_ShmBase):
+    """
+    单写多读的状态环：capacity 个槽，每槽 [seq: u64][record: float64 × record_len]。
+    写第 k 条记录时槽序号先置 2k+1（写入中），写完置 2k+2；读者复制后核对序号未变且等于 2k+2。
+    """
+    def __init__(self, record_len: int, capacity: int = 256, name: Optional[str] = None, create: bool = True):
+        self.record_len = int(record_len)
+        self.capacity = int(capacity)
+        self._slot = 8 + 8 * self.record_len
+        super().__init__(name, _LINE + self._slot * self.capacity, create)
+        buf = self.shm.buf
+        self._head = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=0)
+        self._seq = np.ndarray((self.capacity,), dtype=np.uint64, buffer=buf, offset=_LINE,
+                               strides=(self._slot,))
+        self._data = np.ndarray((self.capacity, self.record_len), dtype=np.float64, buffer=buf, offset=_LINE + 8,
+                                strides=(self._slot, 8))
+
+    @classmethod
+    def attach(cls, name: str, record_len: int, capacity: int) -> "StateRing":
+        return cls(record_len, capacity, name=name, create=False)
+
+    def _release_views(self):
+        self._head = self._seq = self._data = None
+
+    @property
+    def head(self) -> int:
+        """已发布的记录总数。"""
+        return int(self._head[0])
+
+    def publish(self, record) -> int:
+        k = int(self._head[0])
+        i = k % self.capacity
+        self._seq[i] = 2 * k + 1
+        self._data[i] = record
+        self._seq[i] = 2 * k + 2
+        self._head[0] = k + 1
+        return k
+
+    def _read(self, k: int) -> Optional[np.ndarray]:
+        i = k % self.capacity
+        want = 2 * k + 2
+        if int(self._seq[i]) != want:
+            return None
+        rec = self._data[i].copy()
+        if int(self._seq[i]) != want:     # 复制期间被覆盖
+            return None
+        return rec
+
+    def latest(self, retries: int = 8) -> Tuple[int, Optional[np.ndarray]]:
+        """(记录序号, 记录副本)；尚无记录时 (-1, None)。"""
+        for _ in range(retries):
+            h = int(self._head[0])
+            if h == 0:
+                return -1, None
+            rec = self._read(h - 1)
+            if rec is not None:
+                return h - 1, rec
+        return -1, None
+
+    def read_since(self, cursor: int) -> Tuple[int, List[np.ndarray]]:
+        """读取序号 >= cursor 的仍在环内的记录，返回 (新 cursor, 记录列表)；落后超过 capacity 的部分被跳过。"""
+        h = int(self._head[0])
+        out = []
+        for k in range(max(cursor, h - self.capacity + 1, 0), h):
+            rec = self._read(k)
+            if rec is not None:
+                out.append(rec)
+        return h, out
+
+
+class SlotRing(_ShmBase):
+    """
+    单生产者单消费者的字节消息环：capacity 个槽，每槽 [stamp: u64][len: u32][payload ≤ slot_bytes]。
+    head 只由生产者写、tail 只由消费者写；满时 push 返回 False（调用方决定丢弃或重试）。
+    """
+    _HDR = 12
+
+    def __init__(self, slot_bytes: int = 1024, capacity: int = 256, name: Optional[str] = None, create: bool = True):
+        self.slot_bytes = int(slot_bytes)
+        self.capacity = int(capacity)
+        self._slot = (self._HDR + self.slot_bytes + 7) // 8 * 8
+        super().__init__(name, 2 * _LINE + self._slot * self.capacity, create)
+        buf = self.shm.buf
+        self._head = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=0)
+        self._tail = np.ndarray((1,), dtype=np.uint64, buffer=buf, offset=_LINE)
+        self._stamp = np.ndarray((self.capacity,), dtype=np.uint64, buffer=buf, offset=2 * _LINE,
+                                 strides=(self._slot,))
+        self._len = np.ndarray((self.capacity,), dtype=np.uint32, buffer=buf, offset=2 * _LINE + 8,
+                               strides=(self._slot,))
+        self.dropped = 0
+
+    @classmethod
+    def attach(cls, name: str, slot_bytes: int, capacity: int) -> "SlotRing":
+        return cls(slot_bytes, capacity, name=name, create=False)
+
+    def _release_views(self):
+        self._head = self._tail = self._stamp = self._len = None
+
+    def __len__(self) -> int:
+        return int(self._head[0]) - int(self._tail[0])
+
+    def push(self, payload: bytes) -> bool:
+        n = len(payload)
+        if n > self.slot_bytes:
+            raise ValueError(f"message of {n} bytes exceeds slot size {self.slot_bytes}")
+        h = int(self._head[0])
+        if h - int(self._tail[0]) >= self.capacity:
+            self.dropped += 1
+            return False
+        i = h % self.capacity
+        off = 2 * _LINE + i * self._slot + self._HDR
+        self.shm.buf[off:off + n] = payload
+        self._len[i] = n
+        self._stamp[i] = h + 1
+        self._head[0] = h + 1
+        return True
+
+    def pop(self) -> Optional[bytes]:
+        t = int(self._tail[0])
+        if t == int(self._head[0]):
+            return None
+        i = t % self.capacity
+        if int(self._stamp[i]) != t + 1:      # 生产者尚未写完该槽
+            return None
+        n = int(self._len[i])
+        off = 2 * _LINE + i * self._slot + self._HDR
+        payload = bytes(self.shm.buf[off:off + n])
+        self._tail[0] = t + 1
+        return payload
+
+    def drain(self, limit: int = 1 << 30) -> Iterator[bytes]:
+        for _ in range(limit):
+            m = self.pop()
+            if m is None:
+                return
+            yield m